@@ -0,0 +1,100 @@
+# Ciclo fechado modelo -> terminal da IA -> modelo, com um modelo simulado (sem rede).
+#
+# Uso: python benchmarks/bench_agent_loop.py [--commands 6] [--model-delay 0.3] [--probe-seconds 0.3]
+#
+# A mesma tarefa (N sondagens só de leitura) é resolvida de duas formas pela MainWindow real,
+# com bash num PTY:
+#   "batched":    o modelo pede os N comandos numa só resposta; as saídas voltam num só pedido
+#                 (2 pedidos ao modelo, comandos em paralelo no conjunto de shells);
+#   "sequential": um comando por resposta, como no protocolo antigo (N + 1 pedidos).
+# "budget" mostra o limite de passos: um modelo que nunca para de pedir comandos.
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+from aura_ide.ai.agent_loop import COMMAND_PREFIX, compress_output
+from aura_ide.ui.main_window import MainWindow
+from mock_providers import ScriptedAgentProvider
+
+PROBES = ("ls /usr/bin | head -50", "cat /etc/os-release", "grep -c . /etc/passwd", "uname -a", "df -h /", "ls -la /etc")
+TIMEOUT_SECONDS = 120
+
+
+def _wait_until(condition):
+    loop = QEventLoop()
+    timer = QTimer()
+    timer.timeout.connect(lambda: loop.quit() if condition() else None)
+    timer.start(5)
+    QTimer.singleShot(TIMEOUT_SECONDS * 1000, loop.quit)
+    if not condition():
+        loop.exec()
+    timer.stop()
+
+
+def run_scenario(window, script: list, model_delay: float, max_steps: int = 8) -> dict:
+    provider = ScriptedAgentProvider(script, delay=model_delay)
+    window.ai_provider = provider
+    window.agent_loop.max_steps = max_steps
+    started = time.perf_counter()
+    window._send_chat_message_from_input_widget("Analise o sistema.")
+    _wait_until(lambda: not window.agent_loop.running)
+    elapsed = time.perf_counter() - started
+    loop = window.agent_loop
+    return {
+        "seconds": round(elapsed, 3),
+        "model_requests": provider.calls,
+        "prompt_chars": provider.prompt_chars,
+        "steps": len(loop.steps),
+        "stop_reason": loop.stop_reason,
+        "trace": loop.trace(),
+    }
+
+
+def run_compression() -> dict:
+    build_log = "\n".join(
+        [f"Downloading package {i}/400 ({i * 3} kB)" for i in range(400)]
+        + [f"[{i:04d}] compiling src/module_{i}.c" for i in range(600)]
+        + ["src/module_417.c:88: error: 'foo' undeclared", "make: *** [Makefile:12: all] Error 1"]
+    )
+    compressed = compress_output(build_log)
+    return {"raw_chars": len(build_log), "compressed_chars": len(compressed),
+            "keeps_errors": "error: 'foo' undeclared" in compressed and "Error 1" in compressed}
+
+
+def run(commands: int = 6, model_delay: float = 0.3, probe_seconds: float = 0.3) -> dict:
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    probes = [f"sleep {probe_seconds}; {PROBES[i % len(PROBES)]}" for i in range(commands)]
+    # A MainWindow regista cada passo com print; desviar para stderr para manter o JSON limpo
+    with contextlib.redirect_stdout(sys.stderr):
+        window = MainWindow()
+        _wait_until(lambda: window.ai_terminal.shell_running and window.ai_terminal._primary.ready)
+        results = {
+            "batched": run_scenario(window, ["\n".join(f"{COMMAND_PREFIX} {probe}" for probe in probes), "Resposta final."],
+                                    model_delay),
+            "sequential": run_scenario(window, [f"{COMMAND_PREFIX} {probe}" for probe in probes] + ["Resposta final."],
+                                       model_delay),
+            "budget": run_scenario(window, [f"{COMMAND_PREFIX} uname"], model_delay, max_steps=3),
+        }
+        window.close()
+        window.ai_terminal.close_session()
+    results["speedup"] = round(results["sequential"]["seconds"] / results["batched"]["seconds"], 2)
+    results["compression"] = run_compression()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ciclo de comandos da IA: respostas em lote vs. um comando por resposta")
+    parser.add_argument("--commands", type=int, default=6)
+    parser.add_argument("--model-delay", type=float, default=0.3, help="Latência simulada de cada pedido ao modelo")
+    parser.add_argument("--probe-seconds", type=float, default=0.3, help="Latência simulada de cada comando (sleep)")
+    args = parser.parse_args()
+    print(json.dumps(run(args.commands, args.model_delay, args.probe_seconds), indent=2))
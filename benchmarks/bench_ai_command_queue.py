@@ -0,0 +1,82 @@
+# Tempo total de uma rajada de sondagens só de leitura no terminal da IA.
+#
+# Uso: python benchmarks/bench_ai_command_queue.py [--probes 8] [--probe-seconds 0.5] [--pool-sizes 1,4]
+#
+# Para cada tamanho do conjunto de shells, um AITerminalWidget (bash real num PTY, sem ecrã)
+# recebe `--probes` comandos `sleep S; ls ...` de uma vez e mede-se o tempo até à última
+# saída. Com um só shell o total é a soma das sondagens; com N shells fica perto de
+# ceil(sondagens / N) vezes a mais lenta (mais o arranque dos shells auxiliares).
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+from aura_ide.ui.widgets.ai_terminal_widget import AITerminalWidget
+
+PROBE_COMMANDS = ("ls /usr/bin | wc -l", "cat /etc/hostname", "grep -c root /etc/passwd", "uname -a")
+TIMEOUT_SECONDS = 120
+
+
+def _wait(widget, signal, condition) -> bool:
+    """Corre o ciclo Qt até `condition()` ser verdadeira (reavaliada a cada emissão do sinal)."""
+    loop = QEventLoop()
+    signal.connect(lambda *args: loop.quit() if condition() else None)
+    QTimer.singleShot(TIMEOUT_SECONDS * 1000, loop.quit)
+    if not condition():
+        loop.exec()
+    return condition()
+
+
+def run_burst(pool_size: int, probes: int, probe_seconds: float) -> dict:
+    widget = AITerminalWidget(pool_size=pool_size)
+    widget.resize(800, 400)
+    ready = []
+    widget.ready_for_next_ai_command.connect(lambda: ready.append(True))
+    if not _wait(widget, widget.ready_for_next_ai_command, lambda: bool(ready)):
+        raise RuntimeError("O shell da IA não arrancou.")
+
+    results = {}
+    widget.command_output_ready.connect(lambda job_id, command, output: results.setdefault(job_id, output))
+    start = time.perf_counter()
+    job_ids = [widget.execute_ai_command(f"sleep {probe_seconds}; {PROBE_COMMANDS[i % len(PROBE_COMMANDS)]}")
+               for i in range(probes)]
+    _wait(widget, widget.command_output_ready, lambda: len(results) == probes)
+    elapsed = time.perf_counter() - start
+
+    jobs = [widget.get_job(job_id) for job_id in job_ids]
+    widget.close_session()
+    return {
+        "pool_size": pool_size,
+        "probes": probes,
+        "seconds": round(elapsed, 3),
+        "sum_of_probes_seconds": round(sum(job.run_seconds for job in jobs), 3),
+        "shells_used": len({job.shell_index for job in jobs}),
+        "failed": sum(1 for job in jobs if job.exit_code != 0),
+    }
+
+
+def run(probes: int = 8, probe_seconds: float = 0.5, pool_sizes=(1, 4)) -> dict:
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = {f"pool_{size}": run_burst(size, probes, probe_seconds) for size in pool_sizes}
+    serial = results.get("pool_1")
+    if serial:
+        for result in results.values():
+            result["speedup"] = round(serial["seconds"] / result["seconds"], 2)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Sondagens em paralelo no terminal da IA (fila + conjunto de shells)")
+    parser.add_argument("--probes", type=int, default=8)
+    parser.add_argument("--probe-seconds", type=float, default=0.5, help="Latência simulada de cada sondagem (sleep)")
+    parser.add_argument("--pool-sizes", default="1,4", help="Tamanhos do conjunto de shells a comparar")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.pool_sizes.split(",") if size]
+    print(json.dumps(run(args.probes, args.probe_seconds, sizes), indent=2))
@@ -0,0 +1,273 @@
+# Pesquisa no conteúdo dos arquivos (core/code_index.py, core/code_indexer.py) numa árvore grande.
+#
+# Uso: python benchmarks/bench_code_search.py [--mb 1024] [--workers 4] [--repeat 5] [--verify]
+#
+# A árvore é feita de cópias dos .py da biblioteca padrão do Python, até --mb megabytes; cada
+# cópia (menos a primeira) troca as letras entre si, para os trigramas não se repetirem de
+# cópia para cópia, e há "agulhas" únicas espalhadas por arquivos ao acaso. Mede: a indexação
+# completa (MB/s, arquivos/s, tamanho do índice em disco); abrir o índice gravado; a latência
+# das pesquisas com o índice já aberto (mediana e máximo de --repeat, até ao sinal de fim) para
+# vários tipos de consulta; e quanto tempo depois de um lote do FileWatcher o índice já dá os
+# arquivos alterados. --verify compara os resultados com uma pesquisa exaustiva.
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import statistics
+import sys
+import sysconfig
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from PySide6.QtCore import QCoreApplication
+
+from aura_ide.core.code_index import read_text
+from aura_ide.core.code_indexer import CodeIndexer, DEFAULT_SEARCH_WORKERS, path_filter
+from aura_ide.core.file_manager import walk_project
+from aura_ide.core.file_watcher import ProjectChanges
+from aura_ide.core.project_index import ProjectIndex
+
+NEEDLES = 100
+WAIT_SECONDS = 1800
+MB = 1024 * 1024
+
+# (nome, consulta, opções de CodeIndexer.search)
+QUERIES = [
+    ("literal_rare", "AURA_NEEDLE_0042", {}),
+    ("identifier", "HTTPConnection", {}),
+    ("identifier_case_sensitive", "SIGALRM", {"case_sensitive": True}),
+    ("regex", r"def\s+parse_\w+\(", {"regex": True}),
+    ("regex_alternation", r"(urlsplit|urlunsplit)\(", {"regex": True}),
+    ("path_filter", "import", {"paths": "copy000/email/"}),
+    ("unselective_capped", " = ", {}),
+    ("unselective_regex_capped", r"\):$", {"regex": True}),
+]
+# Sem trigramas: todos os arquivos são lidos (não há índice que ajude)
+FULL_SCAN_QUERY = ("full_scan_regex", r"[Qq][Zz]\d", {"regex": True})
+
+
+def _source_files() -> list:
+    stdlib = sysconfig.get_paths()["stdlib"]
+    files = []
+    for directory, dirnames, names in os.walk(stdlib):
+        dirnames[:] = sorted(d for d in dirnames if d not in ("site-packages", "__pycache__"))
+        for name in sorted(names):
+            if name.endswith(".py"):
+                path = os.path.join(directory, name)
+                with open(path, "rb") as f:
+                    files.append((os.path.relpath(path, stdlib), f.read()))
+    return files
+
+
+def _letter_swap(seed: int) -> bytes:
+    letters = list(b"abcdefghijklmnopqrstuvwxyz")
+    shuffled = letters[:]
+    random.Random(seed).shuffle(shuffled)
+    table = bytearray(range(256))
+    for original, replacement in zip(letters, shuffled):
+        table[original] = replacement
+        table[original - 32] = replacement - 32 # Maiúsculas
+    return bytes(table)
+
+
+def _create_corpus(root: str, megabytes: int, seed: int = 7) -> dict:
+    sources = _source_files()
+    copy_bytes = sum(len(data) for _, data in sources)
+    copies = max(1, -(-megabytes * MB // copy_bytes))
+    rng = random.Random(seed)
+    needles = {} # agulha -> caminho relativo
+    planted = {rng.randrange(copies * len(sources)): f"AURA_NEEDLE_{n:04d}" for n in range(NEEDLES)}
+    total = files = 0
+    for copy in range(copies):
+        table = _letter_swap(copy) if copy else None
+        for number, (relative, data) in enumerate(sources):
+            if table is not None:
+                data = data.translate(table)
+            needle = planted.get(copy * len(sources) + number)
+            path = os.path.join(f"copy{copy:03d}", relative)
+            if needle is not None:
+                data += f"\n# {needle}\n".encode()
+                needles[needle] = path.replace(os.sep, "/")
+            os.makedirs(os.path.join(root, os.path.dirname(path)), exist_ok=True)
+            with open(os.path.join(root, path), "wb") as f:
+                f.write(data)
+            total += len(data)
+            files += 1
+    return {"files": files, "bytes": total, "copies": copies, "needles": needles}
+
+
+def _wait(app, condition, timeout: float = WAIT_SECONDS) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        app.processEvents()
+        if condition():
+            return True
+        time.sleep(0.0002)
+    return False
+
+
+def _search(app, indexer, query: str, options: dict):
+    """(segundos até ao fim, [CodeMatch], estatísticas)."""
+    matches = []
+    outcome = {}
+    started = time.perf_counter()
+    search_id = indexer.search(query, **options)
+
+    def on_results(current_id, batch):
+        if current_id == search_id:
+            matches.extend(batch)
+
+    def on_finished(current_id, stats):
+        if current_id == search_id:
+            outcome["seconds"] = time.perf_counter() - started
+            outcome["stats"] = stats
+
+    def on_failed(current_id, error):
+        if current_id == search_id:
+            outcome["error"] = error
+
+    indexer.results_ready.connect(on_results)
+    indexer.search_finished.connect(on_finished)
+    indexer.search_failed.connect(on_failed)
+    try:
+        _wait(app, lambda: outcome)
+    finally:
+        indexer.results_ready.disconnect(on_results)
+        indexer.search_finished.disconnect(on_finished)
+        indexer.search_failed.disconnect(on_failed)
+    if "error" in outcome:
+        raise RuntimeError(f"{query!r}: {outcome['error']}")
+    return outcome["seconds"], matches, outcome["stats"]
+
+
+def _measure_query(app, indexer, query: str, options: dict, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        seconds, matches, stats = _search(app, indexer, query, options)
+        times.append(seconds)
+    return {
+        "p50_ms": round(statistics.median(times) * 1000, 1), "max_ms": round(max(times) * 1000, 1),
+        "matches": stats["matches"], "truncated": stats["truncated"], "trigrams": stats["trigrams"],
+        "candidates": stats["candidates"], "files_read": stats["searched_files"],
+        "plan_ms": round(stats["plan_seconds"] * 1000, 1),
+    }
+
+
+def _brute_force(root: str, listing: list, query: str, options: dict) -> set:
+    pattern = query if options.get("regex") else re.escape(query)
+    regex = re.compile(pattern, re.MULTILINE | (0 if options.get("case_sensitive") else re.IGNORECASE))
+    accept = path_filter(options.get("paths", ""))
+    found = set()
+    for directory, names in listing:
+        for name in names:
+            path = f"{directory}/{name}" if directory else name
+            if accept is not None and not accept(path):
+                continue
+            text = read_text(os.path.join(root, path))
+            if text is None:
+                continue
+            for number, line in enumerate(text.split("\n"), 1):
+                if regex.search(line):
+                    found.add((path, number))
+    return found
+
+
+def run(megabytes: int = 1024, workers: int = DEFAULT_SEARCH_WORKERS, repeat: int = 5, verify: bool = False) -> dict:
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    workspace = tempfile.mkdtemp(prefix="aura_search_bench_")
+    os.environ["XDG_CACHE_HOME"] = os.path.join(workspace, "cache") # O índice gravado não vai para a cache real
+    root = os.path.join(workspace, "projeto")
+    indexer = reopened = None
+    try:
+        started = time.perf_counter()
+        corpus = _create_corpus(root, megabytes)
+        result = {"corpus": {"files": corpus["files"], "mb": round(corpus["bytes"] / MB, 1), "copies": corpus["copies"],
+                             "create_seconds": round(time.perf_counter() - started, 1)},
+                  "workers": workers}
+
+        listing = walk_project(root, 8)
+        project_index = ProjectIndex.from_listing(root, listing)
+        indexer = CodeIndexer(workers=workers)
+        finished = []
+        indexer.finished.connect(finished.append)
+        indexer.start(root, project_index)
+        if not _wait(app, lambda: finished):
+            raise RuntimeError("indexação não terminou")
+        stats = finished[0]
+        result["indexing"] = {
+            "seconds": round(stats["seconds"], 2), "mb_per_second": round(stats["text_bytes"] / MB / stats["seconds"], 1),
+            "files_per_second": round(stats["indexed_files"] / stats["seconds"]),
+            "indexed_files": stats["indexed_files"], "segments": stats["segments"],
+            "index_mb": round(stats["index_bytes"] / MB, 1),
+            "index_to_text_ratio": round(stats["index_bytes"] / max(1, stats["text_bytes"]), 2),
+        }
+
+        # Abrir o índice gravado, como numa nova sessão (sem a listagem: só carregar)
+        reopened = CodeIndexer(workers=workers)
+        started = time.perf_counter()
+        reopened.start(root)
+        _wait(app, lambda: reopened.index is not None)
+        result["reopen_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        reopened.shutdown()
+
+        _search(app, indexer, "aquecimento", {}) # Pool de processos criado, páginas do índice em memória
+        queries = {}
+        for name, query, options in QUERIES:
+            queries[name] = _measure_query(app, indexer, query, options, repeat)
+        name, query, options = FULL_SCAN_QUERY
+        queries[name] = _measure_query(app, indexer, query, options, 1)
+        result["queries"] = queries
+        indexed = [q for n, q in queries.items() if n != FULL_SCAN_QUERY[0]]
+        result["indexed_queries_max_p50_ms"] = max(q["p50_ms"] for q in indexed)
+
+        # Lote do FileWatcher: um arquivo alterado e um novo
+        edited = corpus["needles"]["AURA_NEEDLE_0007"]
+        with open(os.path.join(root, edited), "a") as f:
+            f.write("\n# AURA_EDIT_MARKER\n")
+        with open(os.path.join(root, "copy000", "novo_modulo.py"), "w") as f:
+            f.write("def AURA_NEW_FILE_MARKER():\n    pass\n")
+        changes = ProjectChanges()
+        for directory in (os.path.dirname(edited), "copy000"):
+            changes.directories[directory] = sorted(
+                name for name in os.listdir(os.path.join(root, directory)) if os.path.isfile(os.path.join(root, directory, name)))
+        finished.clear()
+        started = time.perf_counter()
+        indexer.apply_changes(changes)
+        _wait(app, lambda: finished)
+        update_seconds = time.perf_counter() - started
+        _, edit_matches, _ = _search(app, indexer, "AURA_EDIT_MARKER", {})
+        _, new_matches, _ = _search(app, indexer, "AURA_NEW_FILE_MARKER", {})
+        result["incremental_update"] = {
+            "ms": round(update_seconds * 1000, 1), "updated_files": finished[0]["updated_files"] if finished else None,
+            "segments": finished[0]["segments"] if finished else None,
+            "found_edit": [m.path for m in edit_matches] == [edited],
+            "found_new_file": [m.path for m in new_matches] == ["copy000/novo_modulo.py"],
+        }
+
+        if verify:
+            listing = walk_project(root, 8)
+            checks = {}
+            for name, query, options in QUERIES[:5]:
+                _, matches, _ = _search(app, indexer, query, dict(options, max_matches=10 ** 7))
+                checks[name] = {(m.path, m.line) for m in matches} == _brute_force(root, listing, query, options)
+            result["verify"] = checks
+        return result
+    finally:
+        if indexer is not None:
+            indexer.shutdown()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Indexação e pesquisa no conteúdo dos arquivos de uma árvore grande")
+    parser.add_argument("--mb", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=DEFAULT_SEARCH_WORKERS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--verify", action="store_true")
+    args = parser.parse_args()
+    print(json.dumps(run(args.mb, args.workers, args.repeat, args.verify), indent=2))
@@ -0,0 +1,153 @@
+# TextBuffer (tabela de pedaços, core/editor.py) vs. QTextDocument num arquivo de 1M linhas.
+#
+# Uso: python benchmarks/bench_editor_buffer.py [--lines 1000000] [--edits 5000] [--jumps 20000]
+#
+# Para cada estrutura: tempo de carga, edições aleatórias (inserir/apagar em posições
+# aleatórias, com desfazer ligado), saltos para linhas aleatórias (início da linha + texto),
+# deslocamento → linha, e memória (RSS) depois da carga e depois das edições. Cada estrutura
+# corre num processo separado, para a memória de uma não contar na outra. A memória do
+# TextBuffer não inclui o texto carregado: o buffer guarda a própria string, sem a copiar.
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _make_text(lines: int) -> str:
+    rng = random.Random(7)
+    words = ["def", "return", "self", "value", "if", "else", "for", "in", "range", "print", "x", "y", "=", "+", "(", ")"]
+    return "\n".join("    " * rng.randrange(3) + " ".join(rng.choice(words) for _ in range(rng.randrange(2, 10)))
+                     for _ in range(lines)) + "\n"
+
+
+def _timed(function, count: int) -> float:
+    started = time.perf_counter()
+    function()
+    return round((time.perf_counter() - started) / count * 1e6, 2) # µs por operação
+
+
+def measure(kind: str, lines: int, edits: int, jumps: int) -> dict:
+    text = _make_text(lines)
+    rng = random.Random(11)
+    base_rss = _rss_mb()
+    started = time.perf_counter()
+
+    if kind == "buffer":
+        from aura_ide.core.editor import TextBuffer
+        buffer = TextBuffer(text, max_undo=edits)
+        load_seconds = time.perf_counter() - started
+        loaded_rss = _rss_mb()
+        length = len(buffer)
+
+        def do_edits():
+            nonlocal length
+            for i in range(edits):
+                offset = rng.randrange(length)
+                if i % 3 == 2:
+                    buffer.delete(offset, offset + 5)
+                    length = len(buffer)
+                else:
+                    buffer.insert(offset, "abc\n" if i % 7 == 0 else "xy")
+                    length += 4 if i % 7 == 0 else 2
+                buffer.break_undo_group()
+
+        def do_jumps():
+            for _ in range(jumps):
+                buffer.line(rng.randrange(buffer.line_count - 1))
+
+        def do_line_of():
+            for _ in range(jumps):
+                buffer.line_of(rng.randrange(length))
+
+        def do_undo():
+            while buffer.can_undo:
+                buffer.undo()
+
+        line_count = lambda: buffer.line_count
+        current_text = buffer.text
+    else:
+        from PySide6.QtGui import QGuiApplication, QTextCursor, QTextDocument
+        app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+        document = QTextDocument()
+        document.setPlainText(text)
+        document.setUndoRedoEnabled(True)
+        load_seconds = time.perf_counter() - started
+        loaded_rss = _rss_mb()
+        cursor = QTextCursor(document)
+
+        def do_edits():
+            for i in range(edits):
+                length = document.characterCount() - 1
+                offset = rng.randrange(length)
+                cursor.setPosition(offset)
+                if i % 3 == 2:
+                    cursor.setPosition(min(length, offset + 5), QTextCursor.MoveMode.KeepAnchor)
+                    cursor.removeSelectedText()
+                else:
+                    cursor.insertText("abc\n" if i % 7 == 0 else "xy")
+
+        def do_jumps():
+            for _ in range(jumps):
+                document.findBlockByNumber(rng.randrange(document.blockCount() - 1)).text()
+
+        def do_line_of():
+            for _ in range(jumps):
+                document.findBlock(rng.randrange(document.characterCount() - 1)).blockNumber()
+
+        def do_undo():
+            while document.isUndoAvailable():
+                document.undo()
+
+        line_count = document.blockCount
+        current_text = document.toPlainText
+
+    result = {
+        "load_seconds": round(load_seconds, 3),
+        "rss_after_load_mb": round(loaded_rss - base_rss, 1),
+        "edit_us": _timed(do_edits, edits),
+    }
+    result["rss_after_edits_mb"] = round(_rss_mb() - base_rss, 1)
+    result["line_jump_us"] = _timed(do_jumps, jumps)
+    result["offset_to_line_us"] = _timed(do_line_of, jumps)
+    result["lines_after_edits"] = line_count()
+    started = time.perf_counter()
+    do_undo()
+    result["undo_all_seconds"] = round(time.perf_counter() - started, 3)
+    result["undo_restores_original"] = current_text() in (text, text[:-1])
+    return result
+
+
+def run(lines: int = 1000000, edits: int = 5000, jumps: int = 20000) -> dict:
+    results = {"lines": lines}
+    for kind in ("buffer", "qtextdocument"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--only", kind, "--lines", str(lines), "--edits", str(edits), "--jumps", str(jumps)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results[kind] = json.loads(output)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="TextBuffer vs. QTextDocument: edições, saltos de linha e memória")
+    parser.add_argument("--lines", type=int, default=1000000)
+    parser.add_argument("--edits", type=int, default=5000)
+    parser.add_argument("--jumps", type=int, default=20000)
+    parser.add_argument("--only", choices=("buffer", "qtextdocument"), help="Mede só uma estrutura (usado internamente)")
+    args = parser.parse_args()
+    if args.only:
+        print(json.dumps(measure(args.only, args.lines, args.edits, args.jumps)))
+    else:
+        print(json.dumps(run(args.lines, args.edits, args.jumps), indent=2))
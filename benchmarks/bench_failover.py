@@ -0,0 +1,77 @@
+# Latência e taxa de sucesso com falhas injetadas: um provedor instável sozinho vs. o
+# ProviderRouter (novas tentativas + failover) com o mesmo provedor instável e um saudável.
+#
+# Uso: python benchmarks/bench_failover.py [--requests 100] [--failure-rate 0.3]
+#
+# O provedor instável devolve 503 numa fração das requisições e, com --hang, fica pendurado
+# até ao timeout de leitura antes de falhar.
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from aura_ide.ai.deepseek_provider import DeepSeekProvider
+from aura_ide.ai.errors import AIProviderError
+from aura_ide.ai.http_pool import HTTPClientPool
+from aura_ide.ai.provider_router import ProviderRouter
+from fake_openai_server import FakeOpenAIServer
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+def _summary(samples_ms: list, failures: int) -> dict:
+    ordered = sorted(samples_ms) or [0.0]
+    return {
+        "success_rate": round(len(samples_ms) / (len(samples_ms) + failures), 3),
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+    }
+
+
+def _measure(provider, count: int) -> dict:
+    samples, failures = [], 0
+    # Os provedores registam cada erro com print; desviar para stderr para manter o JSON limpo
+    with contextlib.redirect_stdout(sys.stderr):
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                provider.get_chat_completion(MESSAGES)
+            except AIProviderError:
+                failures += 1
+                continue
+            samples.append((time.perf_counter() - started) * 1000)
+    return _summary(samples, failures)
+
+
+def run(count: int = 100, failure_rate: float = 0.3, hang: bool = False, seed: int = 1) -> dict:
+    hang_seconds = 1.0 if hang else 0.0
+    pool = HTTPClientPool(read_timeout=0.5) # Timeout curto para que os "pendurados" terminem depressa
+    with FakeOpenAIServer(reply_tokens=["pong"], first_token_delay=0.02, token_delay=0, failure_rate=failure_rate,
+                          hang_seconds=hang_seconds, seed=seed) as flaky_server, \
+         FakeOpenAIServer(reply_tokens=["pong"], first_token_delay=0.05, token_delay=0) as healthy_server:
+        flaky = DeepSeekProvider(api_key="benchmark", api_url=flaky_server.url, http_pool=pool)
+        healthy = DeepSeekProvider(api_key="benchmark", api_url=healthy_server.url, http_pool=pool)
+        results = {"requests": count, "failure_rate": failure_rate, "hang": hang}
+        results["flaky_alone"] = _measure(flaky, count)
+        # Backoff curto: o objetivo é medir o encaminhamento, não esperar segundos por tentativa
+        router = ProviderRouter([("instavel", flaky), ("saudavel", healthy)], max_retries=1,
+                                backoff_base=0.02, backoff_max=0.2, breaker_reset_timeout=1.0)
+        results["router"] = _measure(router, count)
+        results["router_health"] = router.health_snapshot()
+    pool.close()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Latência p50/p99 e sucesso com falhas injetadas: provedor único vs. router com failover")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--failure-rate", type=float, default=0.3)
+    parser.add_argument("--hang", action="store_true", help="As falhas ficam penduradas até ao timeout de leitura")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.failure_rate, args.hang, args.seed), indent=2))
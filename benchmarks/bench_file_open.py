@@ -0,0 +1,199 @@
+# Abrir arquivos grandes no editor sem bloquear a UI.
+#
+# Uso: python benchmarks/bench_file_open.py [--text-mb 12] [--large-mb 300]
+#
+# Os dois primeiros casos usam o CodeEditor da MainWindow (QTextDocument + TextBuffer) com o
+# SyntaxHighlighter ligado, visível. "sync" é o caminho antigo (f.read() + setPlainText na
+# thread da UI): o ciclo de eventos fica parado durante toda a carga. "chunked" é o da
+# MainWindow: FileLoader (leitura e decodificação numa thread) e CodeEditor.append_text em
+# fatias com orçamento por volta do ciclo, e no fim o lexer e o snapshot. "large" abre um log acima do limite
+# no visualizador mmap: mede o tempo até estar pronto e a latência de saltar para linhas
+# aleatórias. Para cada caso mede-se o maior intervalo entre batidas de um QTimer de 5 ms.
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+from aura_ide.core.file_loader import FileLoader
+from aura_ide.core.file_manager import probe_file
+from aura_ide.core.syntax import lexer_for_file
+from aura_ide.ui.widgets.code_editor import CodeEditor
+from aura_ide.ui.widgets.large_file_view import LargeFileView
+from aura_ide.ui.widgets.syntax_highlighter import SyntaxHighlighter
+
+TIMEOUT_SECONDS = 300
+
+
+def _write_log(path: str, megabytes: float):
+    line_template = "2025-05-01 12:{:02d}:{:02d}.{:03d} INFO  [worker-{}] pedido {} processado em {} ms — ok\n"
+    target = int(megabytes * 1024 * 1024)
+    with open(path, "w", encoding="utf-8") as f:
+        written = 0
+        n = 0
+        block = []
+        while written < target:
+            line = line_template.format(n // 60 % 60, n % 60, n % 1000, n % 8, n, n % 97)
+            block.append(line)
+            written += len(line.encode("utf-8"))
+            n += 1
+            if len(block) == 10000:
+                f.write("".join(block))
+                block = []
+        f.write("".join(block))
+
+
+class _Heartbeat:
+    """Mede o maior intervalo entre batidas de um QTimer (quanto tempo a UI ficou parada)."""
+
+    def __init__(self):
+        self.max_gap = 0.0
+        self._last = time.perf_counter()
+        self._timer = QTimer()
+        self._timer.timeout.connect(self._beat)
+        self._timer.start(5)
+
+    def _beat(self):
+        now = time.perf_counter()
+        self.max_gap = max(self.max_gap, now - self._last)
+        self._last = now
+
+    def stop(self):
+        self._timer.stop()
+
+
+def _editor():
+    editor = CodeEditor()
+    editor.resize(900, 700)
+    editor.show()
+    highlighter = SyntaxHighlighter(editor)
+    return editor, highlighter
+
+
+def run_sync(path: str) -> dict:
+    editor, highlighter = _editor()
+    heartbeat = _Heartbeat()
+    QTimer.singleShot(10, lambda: editor.setPlainText(open(path, encoding="utf-8").read()))
+    loop = QEventLoop()
+    QTimer.singleShot(50, loop.quit)
+    loop.exec()
+    heartbeat.stop()
+    # Tudo acontece dentro de uma só volta do ciclo: a carga dura o mesmo que o maior intervalo
+    result = {"seconds": round(heartbeat.max_gap, 3), "max_event_loop_gap_ms": round(heartbeat.max_gap * 1000, 1),
+              "blocks": editor.document().blockCount()}
+    editor.deleteLater() # Destruído pelo Qt: o SyntaxHighlighter filho sai com ele
+    return result
+
+
+def _load_with(path: str, large_file_bytes: int, on_ready):
+    loader = FileLoader(large_file_bytes=large_file_bytes)
+    loop = QEventLoop()
+    state = {}
+    loader.large_file_ready.connect(lambda load_id, mapped: state.setdefault("mapped", mapped))
+    loader.text_chunk.connect(lambda load_id, text: on_ready(text))
+    loader.finished.connect(lambda load_id: loop.quit())
+    loader.failed.connect(lambda load_id, error: (state.setdefault("error", error), loop.quit()))
+    heartbeat = _Heartbeat()
+    started = time.perf_counter()
+    loader.load(path)
+    QTimer.singleShot(TIMEOUT_SECONDS * 1000, loop.quit)
+    loop.exec()
+    elapsed = time.perf_counter() - started
+    heartbeat.stop()
+    if "error" in state:
+        raise RuntimeError(state["error"])
+    return elapsed, heartbeat.max_gap, state.get("mapped")
+
+
+def run_chunked(path: str) -> dict:
+    # Como MainWindow._open_file / _handle_file_text_chunk / _handle_file_loaded
+    editor, highlighter = _editor()
+    highlighter.set_lexer(None)
+    editor.clear()
+    editor.setReadOnly(True)
+    inserts = []
+
+    def insert(text):
+        started = time.perf_counter()
+        editor.append_text(text)
+        inserts.append(time.perf_counter() - started)
+
+    elapsed, max_gap, _ = _load_with(path, 1 << 62, insert)
+    editor.setReadOnly(False)
+    editor.buffer.clear_history()
+    editor.snapshot()
+    highlighter.set_lexer(lexer_for_file(path, editor.buffer.line(0)))
+    result = {"seconds": round(elapsed, 3), "max_event_loop_gap_ms": round(max_gap * 1000, 1),
+              "inserts": len(inserts), "max_insert_ms": round(max(inserts, default=0.0) * 1000, 1),
+              "blocks": editor.document().blockCount()}
+    editor.deleteLater() # Destruído pelo Qt: o SyntaxHighlighter filho sai com ele
+    return result
+
+
+def run_large(path: str, jumps: int = 200) -> dict:
+    elapsed, max_gap, mapped = _load_with(path, 0, lambda text: None)
+    view = LargeFileView()
+    view.resize(900, 700)
+    view.set_file(mapped)
+    view.show()
+    rng = random.Random(1)
+    latencies = []
+    for _ in range(jumps):
+        line = rng.randrange(mapped.line_count)
+        started = time.perf_counter()
+        view.go_to_line(line)
+        view.grab() # Força a pintura das linhas visíveis
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    result = {
+        "megabytes": round(mapped.size / (1024 * 1024), 1),
+        "lines": mapped.line_count,
+        "seconds_to_ready": round(elapsed, 3),
+        "max_event_loop_gap_ms": round(max_gap * 1000, 1),
+        "jump_and_paint_p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "jump_and_paint_max_ms": round(latencies[-1] * 1000, 2),
+    }
+    view.clear()
+    return result
+
+
+def run_binary_probe() -> dict:
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(os.urandom(8 * 1024 * 1024))
+    started = time.perf_counter()
+    probe = probe_file(f.name)
+    elapsed = time.perf_counter() - started
+    os.unlink(f.name)
+    return {"kind": probe.kind, "probe_ms": round(elapsed * 1000, 2)}
+
+
+def run(text_mb: float = 12, large_mb: float = 300) -> dict:
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, "medio.log")
+        _write_log(text_path, text_mb)
+        results["sync"] = run_sync(text_path)
+        results["chunked"] = run_chunked(text_path)
+        if large_mb > 0:
+            large_path = os.path.join(directory, "grande.log")
+            _write_log(large_path, large_mb)
+            results["large"] = run_large(large_path)
+    results["binary"] = run_binary_probe()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Abertura de arquivos grandes: síncrona vs. aos pedaços vs. mmap")
+    parser.add_argument("--text-mb", type=float, default=12, help="Tamanho do arquivo aberto no editor normal")
+    parser.add_argument("--large-mb", type=float, default=300, help="Tamanho do arquivo aberto no visualizador (0 para não medir)")
+    args = parser.parse_args()
+    print(json.dumps(run(args.text_mb, args.large_mb), indent=2))
@@ -0,0 +1,158 @@
+# Observação de arquivos (core/file_watcher.py): um "git checkout" que renomeia 10k arquivos.
+#
+# Uso: python benchmarks/bench_file_watch.py [--files 10000] [--per-dir 20]
+#
+# O índice do projeto (ProjectIndexer) e o FileWatcher são ligados como no MainWindow.
+# Um processo à parte renomeia todos os arquivos, o mais depressa que consegue. Mede:
+# eventos do sistema recebidos vs. lotes relidos; quanto tempo depois do fim da tempestade
+# o índice fica certo (comparado com percorrer a árvore outra vez); o maior bloqueio do
+# ciclo de eventos durante tudo (QTimer de 5 ms); e, para comparação, quanto custaria
+# reconstruir o índice inteiro a cada lote em vez de o atualizar.
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from PySide6.QtCore import QCoreApplication, QElapsedTimer, QTimer
+
+from aura_ide.core.file_manager import walk_project
+from aura_ide.core.file_watcher import FileWatcher
+from aura_ide.core.project_index import ProjectIndex
+from aura_ide.core.project_indexer import ProjectIndexer
+
+PROBE_INTERVAL_MS = 5
+WAIT_SECONDS = 60
+
+_RENAME_SCRIPT = """
+import os, sys
+root = sys.argv[1]
+for directory, _, files in os.walk(root):
+    for name in files:
+        if name.endswith(".py"):
+            os.rename(os.path.join(directory, name), os.path.join(directory, "moved_" + name[:-3] + ".txt"))
+"""
+
+
+class EventLoopProbe:
+    """Regista os intervalos entre disparos de um QTimer periódico."""
+
+    def __init__(self):
+        self.gaps_ms = []
+        self._clock = QElapsedTimer()
+        self._timer = QTimer()
+        self._timer.setInterval(PROBE_INTERVAL_MS)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self):
+        self.gaps_ms.clear()
+        self._clock.start()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def _tick(self):
+        self.gaps_ms.append(self._clock.restart())
+
+    def summary(self) -> dict:
+        gaps = sorted(self.gaps_ms) or [0]
+        return {"max_stall_ms": gaps[-1], "p99_gap_ms": gaps[min(len(gaps) - 1, int(len(gaps) * 0.99))]}
+
+
+def _create_tree(root: str, files: int, per_dir: int) -> int:
+    directories = 0
+    for i in range(0, files, per_dir):
+        directory = os.path.join(root, "src", f"pkg{i // (per_dir * 25)}", f"mod{i // per_dir}")
+        os.makedirs(directory)
+        directories += 1
+        for j in range(i, min(files, i + per_dir)):
+            open(os.path.join(directory, f"file{j}.py"), "w").close()
+    return directories
+
+
+def _wait(app, condition, timeout: float = WAIT_SECONDS) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        app.processEvents()
+        if condition():
+            return True
+        time.sleep(0.001)
+    return False
+
+
+def run(files: int = 10000, per_dir: int = 20) -> dict:
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    workspace = tempfile.mkdtemp(prefix="aura_watch_bench_")
+    os.environ["XDG_CACHE_HOME"] = os.path.join(workspace, "cache") # O índice gravado não vai para a cache real
+    root = os.path.join(workspace, "projeto")
+    try:
+        directories = _create_tree(root, files, per_dir)
+        indexer = ProjectIndexer()
+        watcher = FileWatcher()
+        indexer.directories_walked.connect(watcher.watch_project)
+        watcher.changes_ready.connect(indexer.apply_changes)
+        batches = []
+        watcher.changes_ready.connect(batches.append)
+        indexer.start(root, use_cache=False)
+        # src, src/pkgN e os diretórios dos arquivos, mais a raiz
+        expected_watches = directories + 2 + (directories - 1) // 25
+        if not _wait(app, lambda: not indexer.indexing and watcher.watched_directories >= expected_watches):
+            raise RuntimeError("indexação inicial não terminou")
+        result = {"files": len(indexer.index), "watched_directories": watcher.watched_directories}
+
+        probe = EventLoopProbe()
+        probe.start()
+        started = time.monotonic()
+        renamer = subprocess.Popen([sys.executable, "-c", _RENAME_SCRIPT, root])
+        _wait(app, lambda: renamer.poll() is not None)
+        storm_seconds = time.monotonic() - started
+        storm_end = time.monotonic()
+
+        def index_is_current():
+            index = indexer.index
+            return (not index.search("file0.py", 1) and any(m.path.endswith("moved_file0.txt") for m in index.search("moved_file0.txt", 5))
+                    and len(index) == files)
+
+        current = _wait(app, index_is_current)
+        latency = time.monotonic() - storm_end
+        _wait(app, lambda: False, 0.3) # Lotes atrasados
+        probe.stop()
+
+        index = indexer.index
+        walked = walk_project(root, 1)
+        on_disk = sorted(f"{d}/{name}" if d else name for d, names in walked for name in names)
+        result.update({
+            "rename_storm_seconds": round(storm_seconds, 3),
+            "events": sum(changes.events for changes in batches),
+            "batches": len(batches),
+            "rescan_seconds_total": round(sum(changes.scan_seconds for changes in batches), 3),
+            "index_current_after_storm_ms": round(latency * 1000, 1) if current else None,
+            "index_matches_disk": sorted(index.paths()) == on_disk,
+            "event_loop": probe.summary(),
+        })
+
+        # Alternativa sem atualização incremental: reconstruir o índice em cada lote
+        started = time.perf_counter()
+        rebuilt = ProjectIndex.from_listing(root, walk_project(root, 1))
+        rebuilt.prepare()
+        result["full_rebuild_seconds"] = round(time.perf_counter() - started, 3)
+        result["full_rebuild_per_batch_seconds"] = round(result["full_rebuild_seconds"] * len(batches), 3)
+        watcher.stop()
+        return result
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="FileWatcher + índice do projeto durante uma renomeação em massa")
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--per-dir", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.files, args.per_dir), indent=2))
@@ -0,0 +1,75 @@
+# Latência por requisição com e sem o pool de ligações partilhado, contra um servidor HTTPS local.
+#
+# Uso: python benchmarks/bench_http_pool.py [--requests 50] [--http2]
+#
+# "sem pool" reproduz o comportamento antigo (requests.post avulso: novo TCP + TLS por
+# mensagem); "com pool" usa o HTTPClientPool partilhado pelos provedores compatíveis com OpenAI.
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import requests
+
+from aura_ide.ai.deepseek_provider import DeepSeekProvider
+from aura_ide.ai.http_pool import HTTPClientPool
+from fake_openai_server import FakeOpenAIServer, make_self_signed_cert
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+class _UnpooledSession:
+    """Imita a interface do HTTPClientPool com um `requests.post` novo por chamada."""
+
+    def __init__(self, verify):
+        self.verify = verify
+
+    def post(self, url, headers=None, json=None):
+        return requests.post(url, headers=headers, json=json, timeout=30, verify=self.verify)
+
+
+def _percentiles(samples_ms: list) -> dict:
+    ordered = sorted(samples_ms)
+    return {
+        "median_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "mean_ms": round(statistics.fmean(ordered), 2),
+    }
+
+
+def _time_requests(provider, count: int) -> list:
+    provider.get_chat_completion(MESSAGES) # Aquecimento (no pool, abre a primeira ligação)
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        provider.get_chat_completion(MESSAGES)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def run(count: int = 50, http2: bool = False) -> dict:
+    cert_path, server_context = make_self_signed_cert()
+    with FakeOpenAIServer(reply_tokens=["pong"], first_token_delay=0, token_delay=0, ssl_context=server_context) as server:
+        unpooled = DeepSeekProvider(api_key="benchmark", api_url=server.url, http_pool=_UnpooledSession(cert_path))
+        pool = HTTPClientPool(verify=cert_path, http2=http2)
+        pooled = DeepSeekProvider(api_key="benchmark", api_url=server.url, http_pool=pool)
+        results = {
+            "requests": count,
+            "http2": pool.http2,
+            "without_pool": _percentiles(_time_requests(unpooled, count)),
+            "with_pool": _percentiles(_time_requests(pooled, count)),
+        }
+        pool.close()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Latência por requisição com e sem pool HTTP (HTTPS local)")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--http2", action="store_true", help="Usar HTTP/2 via httpx, se instalado")
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.http2), indent=2))
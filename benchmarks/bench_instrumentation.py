@@ -0,0 +1,129 @@
+# Custo da instrumentação (utils/instrumentation.py) e validade dos traces exportados.
+#
+# Uso: python benchmarks/bench_instrumentation.py [--iterations 200000] [--spans 20000]
+#
+# Mede, em nanossegundos por chamada, counter.add, observe, span() e record_span() ligados e
+# desligados (instruments.enabled = False), e o custo de ler os percentis e de exportar
+# --spans intervalos aninhados em duas threads como trace do Chrome e como OTLP/JSON. Os
+# arquivos exportados são relidos e verificados (eventos "X" com ts/dur, spans com traceId,
+# spanId e pais que existem).
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from aura_ide.utils.instrumentation import TRACE_FORMAT_CHROME, TRACE_FORMAT_OTLP, Instrumentation
+
+
+def _ns_per_call(function, iterations: int) -> float:
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        function()
+    return round((time.perf_counter_ns() - started) / iterations, 1)
+
+
+def _operations(instruments: Instrumentation) -> dict:
+    counter = instruments.counter("bench.counter")
+
+    def span():
+        with instruments.span("bench.span", value=1):
+            pass
+
+    def record_span():
+        instruments.record_span("bench.record_span", instruments.now_ns())
+
+    return {
+        "counter_add": counter.add,
+        "observe": lambda: instruments.observe("bench.observe", 1.5),
+        "span": span,
+        "record_span": record_span,
+        "log": lambda: instruments.log("bench.event", value=1),
+    }
+
+
+def run_overhead(iterations: int = 200000) -> dict:
+    results = {}
+    baseline = _ns_per_call(lambda: None, iterations) # O custo do próprio ciclo e da chamada
+    for enabled in (True, False):
+        instruments = Instrumentation()
+        instruments.enabled = enabled
+        results["enabled" if enabled else "disabled"] = {
+            name: round(_ns_per_call(function, iterations) - baseline, 1) for name, function in _operations(instruments).items()
+        }
+    results["loop_baseline_ns"] = baseline
+    return results
+
+
+def _check_chrome(document: dict, expected: int) -> dict:
+    spans = [event for event in document["traceEvents"] if event["ph"] == "X"]
+    assert len(spans) == expected, f"{len(spans)} eventos X, esperados {expected}"
+    assert all(event["dur"] >= 0 and event["ts"] >= 0 for event in spans)
+    threads = {event["args"]["name"] for event in document["traceEvents"] if event["ph"] == "M"}
+    return {"events": len(spans), "threads": sorted(threads)}
+
+
+def _check_otlp(document: dict, expected: int) -> dict:
+    spans = document["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(spans) == expected, f"{len(spans)} spans, esperados {expected}"
+    ids = {span["spanId"] for span in spans}
+    assert len(ids) == len(spans), "spanId repetido"
+    assert len({span["traceId"] for span in spans}) == 1
+    parents = [span["parentSpanId"] for span in spans if "parentSpanId" in span]
+    assert all(parent in ids for parent in parents), "pai inexistente"
+    assert all(int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"]) for span in spans)
+    return {"spans": len(spans), "with_parent": len(parents)}
+
+
+def run_export(total_spans: int = 20000) -> dict:
+    instruments = Instrumentation()
+
+    def worker(prefix: str, count: int):
+        for i in range(count // 2):
+            with instruments.span(f"{prefix}.outer", index=i):
+                with instruments.span(f"{prefix}.inner"):
+                    pass
+
+    threads = [threading.Thread(target=worker, args=(f"bench{n}", total_spans // 2), name=f"bench-{n}") for n in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    expected = len(instruments.spans())
+
+    started = time.perf_counter()
+    metrics = instruments.metrics()
+    metrics_ms = (time.perf_counter() - started) * 1000
+
+    workspace = tempfile.mkdtemp(prefix="aura_instrumentation_bench_")
+    try:
+        results = {"spans": expected, "histograms": len(metrics["histograms"]), "metrics_ms": round(metrics_ms, 2)}
+        for trace_format, check in ((TRACE_FORMAT_CHROME, _check_chrome), (TRACE_FORMAT_OTLP, _check_otlp)):
+            path = os.path.join(workspace, f"trace.{trace_format}.json")
+            started = time.perf_counter()
+            instruments.export(path, trace_format)
+            export_ms = (time.perf_counter() - started) * 1000
+            with open(path, encoding="utf-8") as f:
+                document = json.load(f)
+            results[trace_format] = dict(check(document, expected), export_ms=round(export_ms, 1),
+                                         kilobytes=round(os.path.getsize(path) / 1024))
+        return results
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def run(iterations: int = 200000, spans: int = 20000) -> dict:
+    return {"overhead_ns": run_overhead(iterations), "export": run_export(spans)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Custo da instrumentação e validação dos traces exportados")
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--spans", type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.iterations, args.spans), indent=2))
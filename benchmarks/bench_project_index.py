@@ -0,0 +1,211 @@
+# Índice do projeto (core/project_index.py): arranque a frio vs. a quente e latência de "ir para arquivo".
+#
+# Uso: python benchmarks/bench_project_index.py [--tree-files 100000] [--paths 500000] [--threads 8]
+#                                               [--listing caminhos.txt]
+#
+# Arranque: cria uma árvore sintética em disco (com um .gitignore que exclui um diretório
+# de build e os *.log) e mede percorrer + construir o índice (1 thread e --threads threads;
+# com a cache de páginas quente, por isso a diferença entre os dois subestima a de um disco
+# frio ou de rede), gravar, e carregar o índice gravado até à primeira pesquisa.
+# Pesquisa: índice com --paths caminhos sintéticos (sem disco), ou com os de --listing;
+# pesquisas tiradas de caminhos existentes (início do nome, abreviaturas, diretório/nome,
+# sem resultados) e cada prefixo de algumas delas, como se fossem escritas tecla a tecla.
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from aura_ide.core.file_manager import DEFAULT_WALK_THREADS, walk_project
+from aura_ide.core.project_index import ProjectIndex
+
+QUERY_TARGET_MS = 50
+
+_COMMON_WORDS = (
+    "app api auth base buffer cache client common config core data db editor engine event file format "
+    "handler http index io json lexer loader log main manager model net parser plugin project provider "
+    "query render request router runtime schema search server service session shell storage store sync "
+    "syntax task terminal test text theme token tool type ui user util view watcher widget worker"
+).split()
+_SYLLABLES = "ba be bi bo ca ce co da de di fa fe fi ga go ha he hi ja ka ke ki la le li lo ma me mi mo na ne ni no pa pe pi po ra re ri ro sa se si so ta te ti to va ve vi wa xe ya ze zo".split()
+_EXTENSIONS = (".py", ".ts", ".tsx", ".js", ".go", ".rs", ".c", ".h", ".md", ".json", ".yaml")
+_COMMON_NAMES = ("__init__.py", "index.ts", "README.md", "BUILD", "package.json", "mod.rs", "utils.py")
+
+
+def _make_listing(files: int, seed: int = 5) -> list:
+    """[(diretório, [nomes])]: uma árvore com ~12 arquivos por diretório, como num repositório real."""
+    rng = random.Random(seed)
+    # Palavras comuns a todos os projetos e ~3000 identificadores próprios deste
+    words = _COMMON_WORDS + ["".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(3000)]
+    directories = [""]
+    listing = []
+    count = 0
+    while count < files:
+        parent = rng.choice(directories[-200:] if rng.random() < 0.7 else directories)
+        depth = parent.count("/") + 1 if parent else 0
+        if depth >= 8:
+            continue
+        name = rng.choice(words) + (rng.choice(("", "s", "_" + rng.choice(words), str(rng.randint(1, 9)))))
+        directory = f"{parent}/{name}" if parent else name
+        directories.append(directory)
+        names = set()
+        for _ in range(rng.randint(3, 20)):
+            if rng.random() < 0.15:
+                names.add(rng.choice(_COMMON_NAMES))
+            else:
+                parts = rng.sample(words, rng.randint(1, 3))
+                names.add("_".join(parts) + rng.choice(_EXTENSIONS))
+        listing.append((directory, sorted(names)))
+        count += len(names)
+    return listing
+
+
+def _create_tree(root: str, listing: list) -> int:
+    """Cria a árvore em disco; devolve quantos arquivos criou (incluindo os ignorados)."""
+    created = 0
+    for directory, names in listing:
+        path = os.path.join(root, directory)
+        os.makedirs(path, exist_ok=True)
+        for name in names:
+            open(os.path.join(path, name), "w").close()
+            created += 1
+    # Conteúdo ignorado pelo .gitignore: não deve ser percorrido nem indexado
+    for i in range(200):
+        ignored = os.path.join(root, "build", f"out{i}")
+        os.makedirs(ignored, exist_ok=True)
+        for j in range(20):
+            open(os.path.join(ignored, f"obj{j}.o"), "w").close()
+        open(os.path.join(root, listing[i % len(listing)][0], f"debug{i}.log"), "w").close()
+        created += 21
+    with open(os.path.join(root, ".gitignore"), "w") as f:
+        f.write("/build/\n*.log\n")
+    return created + 1
+
+
+def _percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+        "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+def measure_startup(tree_files: int, threads: int) -> dict:
+    listing = _make_listing(tree_files, seed=9)
+    root = tempfile.mkdtemp(prefix="aura_index_bench_")
+    index_path = os.path.join(root, "..", os.path.basename(root) + ".idx")
+    try:
+        result = {"files_on_disk": _create_tree(root, listing)}
+        for walk_threads in sorted({1, threads}):
+            started = time.perf_counter()
+            walked = walk_project(root, walk_threads)
+            walk_seconds = time.perf_counter() - started
+            index = ProjectIndex.from_listing(root, walked)
+            result[f"cold_walk_threads_{walk_threads}_seconds"] = round(walk_seconds, 3)
+            result[f"cold_build_threads_{walk_threads}_seconds"] = round(time.perf_counter() - started, 3)
+        result["indexed_files"] = len(index)
+        started = time.perf_counter()
+        index.save(index_path)
+        result["save_seconds"] = round(time.perf_counter() - started, 3)
+        result["index_file_kb"] = os.path.getsize(index_path) // 1024
+        started = time.perf_counter()
+        loaded = ProjectIndex.load(root, index_path)
+        result["warm_load_seconds"] = round(time.perf_counter() - started, 3)
+        loaded.search("config")
+        result["warm_load_to_first_query_seconds"] = round(time.perf_counter() - started, 3)
+        result["warm_index_matches_cold"] = sorted(loaded.paths()) == sorted(index.paths())
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+    return result
+
+
+def _queries(index: ProjectIndex, rng: random.Random) -> dict:
+    paths = list(index.paths())
+    sample = rng.sample(paths, 60)
+    queries = {"name_prefix": [], "abbreviation": [], "directory_and_name": [], "no_match": []}
+    for path in sample[:20]:
+        name = path.rpartition("/")[2]
+        queries["name_prefix"].append(name[:rng.randint(3, 8)])
+    for path in sample[20:40]:
+        name = path.rpartition("/")[2].split(".")[0]
+        queries["abbreviation"].append("".join(part[:2] for part in name.split("_")))
+    for path in sample[40:60]:
+        directory, _, name = path.rpartition("/")
+        queries["directory_and_name"].append(f"{directory.rpartition('/')[2][:4]}/{name[:4]}")
+    queries["no_match"] = ["zqxj", "configxyzzy", "qqq/www", "handlerzz", "k9k9"]
+    return queries
+
+
+def _read_listing(path: str) -> list:
+    """Uma lista de caminhos relativos, um por linha (p. ex. `git ls-files > caminhos.txt`)."""
+    directories = {}
+    with open(path, encoding="utf-8", errors="surrogateescape") as f:
+        for line in f:
+            directory, _, name = line.rstrip("\n").strip("/").rpartition("/")
+            if name:
+                directories.setdefault(directory, []).append(name)
+    return list(directories.items())
+
+
+def measure_queries(paths: int, listing_path: str = None) -> dict:
+    listing = _read_listing(listing_path) if listing_path else _make_listing(paths)
+    started = time.perf_counter()
+    index = ProjectIndex.from_listing("/projeto", listing)
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    index.prepare()
+    prepare_seconds = time.perf_counter() - started
+    rng = random.Random(13)
+    result = {
+        "indexed_paths": len(index), "distinct_names": len(index.names), "directories": len(index.directories),
+        "build_seconds": round(build_seconds, 2), "prepare_seconds": round(prepare_seconds, 2),
+    }
+    everything = []
+    for kind, queries in _queries(index, rng).items():
+        samples = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query)
+            samples.append(time.perf_counter() - started)
+        result[kind] = _percentiles(samples)
+        everything += samples
+    # Tecla a tecla: cada prefixo de uma pesquisa é uma pesquisa nova
+    typing = []
+    for query in ("terminal_view", "syntax/lexer", "rendtok", "config.json", "widget/ui_tool"):
+        for end in range(1, len(query) + 1):
+            started = time.perf_counter()
+            index.search(query[:end])
+            typing.append(time.perf_counter() - started)
+    result["typing_each_prefix"] = _percentiles(typing)
+    everything += typing
+    result["all_queries"] = _percentiles(everything)
+    result["under_target"] = max(everything) * 1000 < QUERY_TARGET_MS
+    return result
+
+
+def run(tree_files: int = 100000, paths: int = 500000, threads: int = DEFAULT_WALK_THREADS,
+        listing_path: str = None) -> dict:
+    return {
+        "query_target_ms": QUERY_TARGET_MS,
+        "startup": measure_startup(tree_files, threads),
+        "queries": measure_queries(paths, listing_path),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Índice do projeto: arranque a frio/quente e latência das pesquisas")
+    parser.add_argument("--tree-files", type=int, default=100000)
+    parser.add_argument("--paths", type=int, default=500000)
+    parser.add_argument("--threads", type=int, default=DEFAULT_WALK_THREADS)
+    parser.add_argument("--listing", help="Pesquisar numa lista de caminhos real (um por linha) em vez dos sintéticos")
+    args = parser.parse_args()
+    print(json.dumps(run(args.tree_files, args.paths, args.threads, args.listing), indent=2))
@@ -0,0 +1,75 @@
+# Arranque dos provedores de IA configurados no config.ini (um servidor compatível com
+# OpenAI por secção [PROVIDER:nome], cada um a responder à lista de modelos com --delay
+# segundos): criados um a um vs. em paralelo pelo ProviderRegistry. Depois mede a latência
+# de cada provedor (tempo até ao primeiro pedaço) como o diálogo "Provedores de IA" faz.
+#
+# Uso: python benchmarks/bench_provider_registry.py [--providers 4] [--delay 0.2]
+import argparse
+import configparser
+import contextlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from aura_ide.ai.provider_registry import provider_registry, provider_specs_from_config
+from aura_ide.ai.provider_router import ProviderRouter
+from fake_openai_server import FakeOpenAIServer
+
+
+def _config(servers: list) -> configparser.ConfigParser:
+    config = configparser.ConfigParser()
+    for index, server in enumerate(servers):
+        config[f"PROVIDER:Local{index}"] = {"TYPE": "openai_compatible", "URL": server.url}
+    return config
+
+
+def _init_ms(config, concurrent: bool) -> float:
+    specs = provider_specs_from_config(config)
+    started = time.perf_counter()
+    if concurrent:
+        provider_registry.create_providers(specs)
+    else:
+        for spec in specs:
+            provider_registry._create(spec, None)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    assert all(spec.provider is not None for spec in specs), [spec.error for spec in specs]
+    return round(elapsed_ms, 1)
+
+
+def run(providers: int = 4, delay: float = 0.2) -> dict:
+    # O servidor i responde (lista de modelos e primeiro pedaço) em delay * (i + 1) segundos
+    servers = [FakeOpenAIServer(first_token_delay=delay * (index + 1), token_delay=0.0, reply_tokens=["ok"],
+                                models=[f"modelo-{index}"]).start() for index in range(providers)]
+    try:
+        config = _config(servers)
+        # Os prints de cada provedor criado vão para stderr para manter o JSON limpo
+        with contextlib.redirect_stdout(sys.stderr):
+            sequential_ms = _init_ms(config, concurrent=False)
+            concurrent_ms = _init_ms(config, concurrent=True)
+            specs = provider_registry.create_providers(provider_specs_from_config(config))
+            router = ProviderRouter([(spec.name, spec.provider) for spec in specs])
+            latencies = {name: round(router.measure_latency(name) * 1000, 1) for name, _ in router.providers}
+        return {
+            "providers": providers,
+            "delay_s": delay,
+            "sequential_init_ms": sequential_ms,
+            "concurrent_init_ms": concurrent_ms,
+            "speedup": round(sequential_ms / concurrent_ms, 2) if concurrent_ms else None,
+            "models": {name: models for name, models, _ in router.models_by_provider()},
+            "latency_ms": latencies,
+            "fastest": min(latencies, key=latencies.get),
+        }
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--providers", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=0.2)
+    args = parser.parse_args()
+    print(json.dumps(run(args.providers, args.delay), indent=2))
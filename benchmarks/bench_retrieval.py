@@ -0,0 +1,201 @@
+# Contexto recuperado para a IA (ai/retrieval.py, ai/retrieval_indexer.py) numa árvore grande.
+#
+# Uso: python benchmarks/bench_retrieval.py [--mb 64] [--repeat 20] [--top-k 8] [--dimensions 512]
+#
+# A árvore é a de bench_code_search.py (cópias dos .py da biblioteca padrão com as letras
+# trocadas e "agulhas" AURA_NEEDLE_#### em arquivos ao acaso), indexada primeiro pelo
+# CodeIndexer, como no IDE. Mede, com o embedder local: a primeira indexação (arquivos/s,
+# trechos/s, tamanho em disco); um arranque a quente (índice gravado, nada mudou: nenhum
+# trecho calculado); a atualização depois de um arquivo alterado; a latência de uma
+# recuperação completa (vetor da pergunta, top-k, leitura dos trechos) e só do top-k, com
+# numpy e em Python puro, uma pergunta de cada vez e em lote; e em quantas perguntas pelas
+# agulhas o arquivo certo vem no top-k.
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from PySide6.QtCore import QCoreApplication
+
+from aura_ide.ai import retrieval
+from aura_ide.ai.retrieval import DEFAULT_TOP_K, HASH_DIMENSIONS, EmbeddingIndex, HashingEmbedder
+from aura_ide.ai.retrieval_indexer import RetrievalIndexer
+from aura_ide.core.code_indexer import CodeIndexer, DEFAULT_SEARCH_WORKERS
+from aura_ide.core.file_manager import walk_project
+from aura_ide.core.project_index import ProjectIndex
+
+from bench_code_search import MB, WAIT_SECONDS, _create_corpus, _wait
+
+QUERIES = [
+    "como é feito o parse dos cabeçalhos de email?",
+    "HTTPConnection request send headers",
+    "where is the json decoder scanning strings",
+    "thread pool executor shutdown wait",
+    "AURA_NEEDLE_0042",
+]
+BATCH_SIZE = 16
+
+
+def _update(app, indexer, code_index) -> dict:
+    finished = []
+    failed = []
+    indexer.finished.connect(finished.append)
+    indexer.failed.connect(failed.append)
+    try:
+        indexer.update(code_index)
+        _wait(app, lambda: finished or failed)
+    finally:
+        indexer.finished.disconnect(finished.append)
+        indexer.failed.disconnect(failed.append)
+    if failed:
+        raise RuntimeError(failed[0])
+    return finished[0]
+
+
+def _retrieve(app, indexer, query: str, top_k: int) -> tuple:
+    """(segundos até ao resultado, resultado)."""
+    outcome = {}
+    started = time.perf_counter()
+    retrieve_id = indexer.retrieve(query, top_k)
+
+    def on_retrieved(current_id, result):
+        if current_id == retrieve_id:
+            outcome["seconds"] = time.perf_counter() - started
+            outcome["result"] = result
+
+    def on_failed(current_id, error):
+        if current_id == retrieve_id:
+            outcome["error"] = error
+
+    indexer.retrieved.connect(on_retrieved)
+    indexer.retrieve_failed.connect(on_failed)
+    try:
+        _wait(app, lambda: outcome)
+    finally:
+        indexer.retrieved.disconnect(on_retrieved)
+        indexer.retrieve_failed.disconnect(on_failed)
+    if "error" in outcome:
+        raise RuntimeError(f"{query!r}: {outcome['error']}")
+    return outcome["seconds"], outcome["result"]
+
+
+def _latency(samples: list) -> dict:
+    return {"p50_ms": round(statistics.median(samples) * 1000, 2), "max_ms": round(max(samples) * 1000, 2)}
+
+
+def _measure_top_k(index, vectors: list, top_k: int, repeat: int) -> dict:
+    single = []
+    batched = []
+    batch = (vectors * BATCH_SIZE)[:BATCH_SIZE]
+    for _ in range(repeat):
+        for vector in vectors:
+            started = time.perf_counter()
+            index.search([vector], top_k)
+            single.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        index.search(batch, top_k)
+        batched.append((time.perf_counter() - started) / len(batch))
+    return {"single": _latency(single), "batched_per_query": _latency(batched)}
+
+
+def run(megabytes: int = 64, repeat: int = 20, top_k: int = DEFAULT_TOP_K, dimensions: int = HASH_DIMENSIONS) -> dict:
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    workspace = tempfile.mkdtemp(prefix="aura_retrieval_bench_")
+    os.environ["XDG_CACHE_HOME"] = os.path.join(workspace, "cache") # O índice gravado não vai para a cache real
+    root = os.path.join(workspace, "projeto")
+    code_indexer = None
+    try:
+        corpus = _create_corpus(root, megabytes)
+        result = {"corpus": {"files": corpus["files"], "mb": round(corpus["bytes"] / MB, 1)},
+                  "numpy": retrieval._load_numpy() is not None, "dimensions": dimensions}
+
+        code_indexer = CodeIndexer(workers=DEFAULT_SEARCH_WORKERS)
+        code_indexer.start(root, ProjectIndex.from_listing(root, walk_project(root, 8)))
+        _wait(app, lambda: code_indexer.index is not None and not code_indexer.indexing, WAIT_SECONDS)
+        code_index = code_indexer.index
+
+        indexer = RetrievalIndexer(embedder=HashingEmbedder(dimensions))
+        stats = _update(app, indexer, code_index)
+        index = indexer.index
+        disk_bytes = sum(os.path.getsize(os.path.join(index.directory, name)) for name in os.listdir(index.directory))
+        result["cold_index"] = {
+            "seconds": round(stats["seconds"], 2), "files": stats["files"], "chunks": stats["chunks"],
+            "files_per_second": round(stats["files"] / stats["seconds"]),
+            "chunks_per_second": round(stats["embedded_chunks"] / stats["seconds"]),
+            "mb_per_second": round(corpus["bytes"] / MB / stats["seconds"], 2),
+            "reused_chunks": stats["reused_chunks"], "index_mb": round(disk_bytes / MB, 1),
+        }
+
+        # Nova sessão: o índice gravado é carregado e nada mudou
+        warm = RetrievalIndexer(embedder=HashingEmbedder(dimensions))
+        started = time.perf_counter()
+        warm_stats = _update(app, warm, code_index)
+        result["warm_start"] = {"ms": round((time.perf_counter() - started) * 1000, 1),
+                                "embedded_chunks": warm_stats["embedded_chunks"],
+                                "updated_files": warm_stats["updated_files"]}
+
+        # Um arquivo alterado: só os trechos dele que mudaram são recalculados
+        edited = corpus["needles"]["AURA_NEEDLE_0007"]
+        with open(os.path.join(root, edited), "a") as f:
+            f.write("\n\ndef aura_edit_marker():\n    return 'AURA_EDIT_MARKER'\n")
+        finished = []
+        code_indexer.finished.connect(finished.append)
+        code_indexer.start(root, ProjectIndex.from_listing(root, walk_project(root, 8)))
+        _wait(app, lambda: finished)
+        started = time.perf_counter()
+        stats = _update(app, indexer, code_indexer.index)
+        result["incremental_update"] = {"ms": round((time.perf_counter() - started) * 1000, 1),
+                                        "updated_files": stats["updated_files"],
+                                        "embedded_chunks": stats["embedded_chunks"], "reused_chunks": stats["reused_chunks"]}
+
+        # Recuperação completa, como no envio de uma pergunta
+        _retrieve(app, indexer, "aquecimento", top_k)
+        samples = []
+        for _ in range(repeat):
+            for query in QUERIES:
+                seconds, last = _retrieve(app, indexer, query, top_k)
+                samples.append(seconds)
+        result["retrieve"] = dict(_latency(samples), context_chars=len(last["context"]))
+
+        # Só o top-k, com e sem numpy
+        index = EmbeddingIndex.load(root, indexer.embedder.name)
+        embedder = HashingEmbedder(dimensions)
+        vectors = [vector for query in QUERIES for vector in embedder.embed([query], task="query")]
+        top_k_latency = {}
+        numpy_module = retrieval.np
+        if numpy_module is not None:
+            top_k_latency["numpy"] = _measure_top_k(index, vectors, top_k, repeat)
+        retrieval.np = None
+        try:
+            top_k_latency["python"] = _measure_top_k(index, vectors, top_k, max(1, repeat // 4))
+        finally:
+            retrieval.np = numpy_module
+        result["top_k"] = top_k_latency
+
+        # As agulhas: o arquivo onde cada uma está deve vir no top-k
+        needles = sorted(corpus["needles"].items())
+        found = index.search(embedder.embed([needle for needle, _ in needles], task="query"), top_k)
+        hits = sum(1 for (needle, path), chunks in zip(needles, found) if any(chunk.path == path for chunk in chunks))
+        result["needle_hit_rate"] = round(hits / len(needles), 2)
+        return result
+    finally:
+        if code_indexer is not None:
+            code_indexer.shutdown()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Indexação de embeddings e recuperação de contexto numa árvore grande")
+    parser.add_argument("--mb", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--dimensions", type=int, default=HASH_DIMENSIONS)
+    args = parser.parse_args()
+    print(json.dumps(run(args.mb, args.repeat, args.top_k, args.dimensions), indent=2))
@@ -0,0 +1,121 @@
+# Cão de guarda dos bloqueios da UI (core/stall_watchdog.py): atribuição e custo da amostragem.
+#
+# Uso: python benchmarks/bench_stall_watchdog.py [--stall-ms 400] [--repeat 3]
+#
+# Com um EventLoopLagProbe e um StallWatchdog como no MainWindow, bloqueia a thread da UI de
+# propósito dentro de funções conhecidas (um ciclo Python e um time.sleep) e verifica que cada
+# bloqueio é detetado, com a duração certa e atribuído à função culpada no relatório .folded.
+# Mede também quanto a amostragem abranda o trabalho bloqueante (o mesmo ciclo com e sem o cão
+# de guarda).
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+
+from aura_ide.core.event_loop_probe import EventLoopLagProbe
+from aura_ide.core.stall_watchdog import StallWatchdog
+
+
+def busy_python_loop(seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def blocking_sleep(seconds: float):
+    time.sleep(seconds)
+
+
+def fixed_work(iterations: int) -> int:
+    total = 0
+    for i in range(iterations):
+        total += i % 7
+    return total
+
+
+def _run_in_event_loop(app, probe, actions: list, settle_ms: int = 400):
+    """Corre as ações na thread da UI, uma por volta do ciclo, com `settle_ms` entre elas."""
+    pending = list(actions)
+
+    def next_action():
+        if not pending:
+            QTimer.singleShot(settle_ms, app.quit)
+            return
+        pending.pop(0)()
+        QTimer.singleShot(settle_ms, next_action)
+
+    probe.start()
+    QTimer.singleShot(settle_ms, next_action)
+    app.exec()
+    probe.stop()
+
+
+def run(stall_ms: float = 400, repeat: int = 3) -> dict:
+    app = QApplication.instance() or QApplication([])
+    workspace = tempfile.mkdtemp(prefix="aura_stall_bench_")
+    try:
+        probe = EventLoopLagProbe()
+        watchdog = StallWatchdog(probe.interval_ms, report_dir=workspace)
+        probe.set_watchdog(watchdog)
+        seconds = stall_ms / 1000
+        actions = []
+        for _ in range(repeat):
+            actions.append(lambda: busy_python_loop(seconds))
+            actions.append(lambda: blocking_sleep(seconds))
+        _run_in_event_loop(app, probe, actions)
+
+        summary = watchdog.summary(top=2 * repeat)
+        folded_path, json_path = watchdog.report_paths()
+        with open(folded_path, encoding="utf-8") as f:
+            folded = f.read().splitlines()
+        attributed = {
+            name: sum(int(line.rsplit(" ", 1)[1]) for line in folded if line.rsplit(" ", 1)[0].split(";")[-1].startswith(name + " "))
+            for name in ("busy_python_loop", "blocking_sleep")
+        }
+        durations = sorted(stall["duration_ms"] for stall in summary["slowest"])
+
+        # Custo: o mesmo trabalho fixo num bloqueio, com e sem amostragem
+        iterations = 10_000_000 # ~1 s aqui: bem acima do limite, para haver amostragem
+        timings = {}
+        for label, enabled in (("without_watchdog", False), ("with_watchdog", True)):
+            probe.set_watchdog(StallWatchdog(probe.interval_ms, report_dir=workspace) if enabled else None)
+            elapsed = []
+            _run_in_event_loop(app, probe, [lambda: elapsed.append(_timed(fixed_work, iterations)) for _ in range(repeat)])
+            timings[label] = min(elapsed)
+        return {
+            "stalls_expected": 2 * repeat,
+            "stalls_detected": summary["stalls"],
+            "stall_ms": {"requested": stall_ms, "min": durations[0] if durations else None, "max": durations[-1] if durations else None},
+            "samples_attributed": attributed,
+            "hottest_frame": summary["hot_frames"][0]["frame"] if summary["hot_frames"] else None,
+            "folded_lines": len(folded),
+            "fixed_work_s": {label: round(value, 3) for label, value in timings.items()},
+            "sampling_overhead_pct": round((timings["with_watchdog"] / timings["without_watchdog"] - 1) * 100, 1),
+        }
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def _timed(function, *args) -> float:
+    started = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - started
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Deteção, atribuição e custo do cão de guarda dos bloqueios da UI")
+    parser.add_argument("--stall-ms", type=float, default=400)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.stall_ms, args.repeat), indent=2))
@@ -0,0 +1,149 @@
+# Arranque do IDE a frio: do lançamento do processo à primeira pintura da janela e ao fim do
+# arranque (shells iniciados, provedores de IA criados).
+#
+# Uso: python benchmarks/bench_startup.py [--runs 5] [--target-ms 600] [--no-keys]
+#
+# Cada execução é um processo novo (como `python run.py`), num projeto temporário com um
+# config.ini com chaves falsas de Gemini e DeepSeek (sem --no-keys), para que os SDKs dos
+# provedores sejam mesmo importados. Mostra a mediana e o máximo, a linha do tempo interna da
+# execução mediana (utils/startup.py), os SDKs que já estavam importados na primeira pintura (o
+# esperado é nenhum) e as importações mais lentas segundo `python -X importtime`. Termina com
+# código 1 se a mediana até à primeira pintura passar de --target-ms.
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+HEAVY_MODULES = ("google.generativeai", "grpc", "requests", "numpy")
+CONFIG_WITH_KEYS = "[API_KEYS]\nGEMINI_API_KEY = chave-falsa-de-benchmark\nDEEPSEEK_API_KEY = chave-falsa-de-benchmark\n"
+TIMEOUT_SECONDS = 60
+IMPORTTIME_TOP = 10
+
+
+def child():
+    """Uma execução: o arranque de aura_ide.main.run_app, sem ciclo de eventos infinito."""
+    launched = float(os.environ["AURA_BENCH_LAUNCHED"])
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, SRC_DIR)
+    import contextlib
+
+    with contextlib.redirect_stdout(sys.stderr): # Só o JSON vai para o stdout
+        from aura_ide.utils.startup import startup_timeline
+        with startup_timeline.span("importar o Qt"):
+            from PySide6.QtCore import QEvent, QObject, QTimer
+            from PySide6.QtWidgets import QApplication
+        with startup_timeline.span("importar a MainWindow"):
+            from aura_ide.ui.main_window import MainWindow
+
+        class FirstPaint(QObject):
+            def __init__(self):
+                super().__init__()
+                self.seconds = None
+                self.heavy_modules = None
+
+            def eventFilter(self, watched, event):
+                if event.type() == QEvent.Type.Paint and self.seconds is None:
+                    self.seconds = time.time() - launched
+                    self.heavy_modules = [name for name in HEAVY_MODULES if name in sys.modules]
+                return False
+
+        with startup_timeline.span("QApplication"):
+            app = QApplication(sys.argv[:1])
+        with startup_timeline.span("criar a MainWindow"):
+            window = MainWindow()
+        first_paint = FirstPaint()
+        window.installEventFilter(first_paint)
+        window.show()
+        ready = []
+        window.startup_finished.connect(lambda: ready.append(time.time() - launched))
+        window.startup_finished.connect(app.quit)
+        QTimer.singleShot(TIMEOUT_SECONDS * 1000, app.quit)
+        app.exec()
+        result = {
+            "first_paint_ms": round(first_paint.seconds * 1000, 1) if first_paint.seconds is not None else None,
+            "ready_ms": round(ready[0] * 1000, 1) if ready else None,
+            "interpreter_ms": round((time.time() - launched - startup_timeline.elapsed_ms() / 1000) * 1000, 1),
+            "heavy_modules_at_first_paint": first_paint.heavy_modules,
+            "timeline": startup_timeline.to_dict(),
+        }
+        window.close()
+        window.ai_terminal.close_session()
+        window.user_terminal.close_session()
+    print(json.dumps(result))
+
+
+def _launch(project: str, env: dict, extra_args: list = ()) -> subprocess.CompletedProcess:
+    env = dict(env, AURA_BENCH_LAUNCHED=repr(time.time()))
+    return subprocess.run([sys.executable, *extra_args, os.path.abspath(__file__), "--child"], cwd=project, env=env,
+                          capture_output=True, text=True, timeout=TIMEOUT_SECONDS * 2)
+
+
+def _slowest_imports(stderr: str) -> list:
+    """As importações de topo (e as que elas pedem diretamente) com mais tempo acumulado."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2 # Dois espaços por nível, depois do separador
+        if depth <= 1:
+            imports.append((int(cumulative_us), name.strip()))
+    return [{"module": name, "ms": round(us / 1000, 1)} for us, name in sorted(imports, reverse=True)[:IMPORTTIME_TOP]]
+
+
+def run(runs: int = 5, target_ms: float = 600, keys: bool = True) -> dict:
+    workspace = tempfile.mkdtemp(prefix="aura_startup_bench_")
+    project = os.path.join(workspace, "projeto")
+    os.makedirs(os.path.join(project, "src"))
+    with open(os.path.join(project, "src", "app.py"), "w") as f:
+        f.write("print('olá')\n")
+    if keys:
+        with open(os.path.join(project, "config.ini"), "w") as f:
+            f.write(CONFIG_WITH_KEYS)
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", XDG_CACHE_HOME=os.path.join(workspace, "cache"))
+    try:
+        samples = []
+        for _ in range(runs):
+            completed = _launch(project, env)
+            if completed.returncode != 0:
+                raise RuntimeError(completed.stderr[-2000:])
+            samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        samples.sort(key=lambda sample: sample["first_paint_ms"])
+        median = samples[len(samples) // 2]
+        first_paint = [sample["first_paint_ms"] for sample in samples]
+        ready = [sample["ready_ms"] for sample in samples if sample["ready_ms"] is not None]
+        importtime = _launch(project, env, ["-X", "importtime"])
+        return {
+            "runs": runs,
+            "first_paint_ms": {"p50": statistics.median(first_paint), "max": max(first_paint)},
+            "ready_ms": {"p50": statistics.median(ready), "max": max(ready)} if ready else None,
+            "target_ms": target_ms,
+            "within_target": statistics.median(first_paint) <= target_ms,
+            "interpreter_ms": median["interpreter_ms"],
+            "heavy_modules_at_first_paint": median["heavy_modules_at_first_paint"],
+            "timeline": median["timeline"],
+            "slowest_imports": _slowest_imports(importtime.stderr),
+        }
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Arranque do IDE a frio: primeira pintura e fim do arranque")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=600, help="Limite para a mediana até à primeira pintura")
+    parser.add_argument("--no-keys", action="store_true", help="Sem config.ini (nenhum provedor de IA)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+    else:
+        result = run(args.runs, args.target_ms, not args.no_keys)
+        print(json.dumps(result, indent=2))
+        sys.exit(0 if result["within_target"] else 1)
@@ -0,0 +1,329 @@
+# Conjunto dos caminhos quentes do IDE, sem ecrã, comparado com uma linha de base.
+#
+# Uso: python benchmarks/bench_suite.py [--only terminal,file_open,chat,startup] [--repeat 5]
+#                                       [--baseline benchmarks/baseline.json] [--update-baseline]
+#                                       [--tolerance 0.25] [--output resultados.json]
+#
+# Cada cenário corre num processo novo (QT_QPA_PLATFORM=offscreen), num projeto temporário e
+# com uma cache própria, e devolve métricas {nome: {value, unit, better}}:
+#   terminal:  débito de `yes | head -c` no SimpleTerminal (bash num PTY) e no AITerminalWidget
+#              (comando da IA, saída capturada), e o maior intervalo do ciclo de eventos;
+#   file_open: latência de _open_file_from_tree na MainWindow (arquivo pequeno e de 2 MB);
+#   chat:      ida e volta de uma pergunta no chat da MainWindow com um provedor simulado e com
+#              o DeepSeekProvider contra o servidor local de benchmarks/fake_openai_server.py;
+#   startup:   primeira pintura e fim do arranque da MainWindow (bench_startup.py).
+# Os resultados vão para benchmarks/results/<data>.json (ou --output). Com uma linha de base
+# (--update-baseline grava a atual), cada métrica pior do que a base mais --tolerance é uma
+# regressão, e o processo termina com código 1.
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..', 'src'))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+SCENARIOS = ("terminal", "file_open", "chat", "startup")
+DEFAULT_TOLERANCE = 0.25 # 25% pior do que a base é regressão
+MIN_DELTA = {"ms": 5.0} # Diferenças absolutas abaixo disto são ruído, qualquer que seja a percentagem
+TERMINAL_MB = 20
+SCENARIO_TIMEOUT_SECONDS = 600
+LOWER, HIGHER = "lower", "higher" # Qual o sentido "melhor" de cada métrica
+
+
+def _metric(value, unit: str, better: str = LOWER) -> dict:
+    return {"value": round(value, 2), "unit": unit, "better": better}
+
+
+# --- Cenários (correm no processo filho) ---
+
+class _GapProbe:
+    """Sonda de 5 ms: o maior intervalo entre disparos é o pior bloqueio do ciclo de eventos."""
+
+    def __init__(self):
+        from PySide6.QtCore import QTimer
+
+        self.last = None
+        self.max_gap = 0.0
+        self.timer = QTimer()
+        self.timer.setInterval(5)
+        self.timer.timeout.connect(self._beat)
+        self.timer.start()
+
+    def _beat(self):
+        now = time.perf_counter()
+        if self.last is not None:
+            self.max_gap = max(self.max_gap, now - self.last)
+        self.last = now
+
+    def stop(self) -> float:
+        """Para a sonda e devolve o maior intervalo, em ms."""
+        self.timer.stop()
+        return self.max_gap * 1000
+
+
+def scenario_terminal(repeat: int) -> dict:
+    from bench_agent_loop import _wait_until
+    from aura_ide.ui.widgets.ai_terminal_widget import AITerminalWidget
+    from aura_ide.ui.widgets.simple_terminal import SimpleTerminal
+
+    class _BenchTerminal(SimpleTerminal):
+        def __init__(self):
+            super().__init__(autostart=False)
+            self.records = []
+            self.start_shell()
+
+        def _handle_command_finished(self, record):
+            self.records.append(record)
+            super()._handle_command_finished(record)
+
+    command = f"yes | head -c {TERMINAL_MB * 1024 * 1024}"
+    metrics = {}
+
+    terminal = _BenchTerminal()
+    terminal.resize(900, 500)
+    terminal.show()
+    _wait_until(lambda: terminal.records) # Primeiro prompt
+    samples, gaps = [], []
+    for _ in range(repeat):
+        done = len(terminal.records)
+        probe = _GapProbe()
+        terminal.session.protocol.begin_command(command)
+        started = time.perf_counter()
+        terminal.send_text(command + "\r")
+        _wait_until(lambda: len(terminal.records) > done)
+        samples.append(TERMINAL_MB / (time.perf_counter() - started))
+        gaps.append(probe.stop())
+    terminal.close_session()
+    metrics["terminal.simple_mb_s"] = _metric(statistics.median(samples), "MB/s", HIGHER)
+    metrics["terminal.simple_max_gap_ms"] = _metric(statistics.median(gaps), "ms")
+
+    ai_terminal = AITerminalWidget(pool_size=1)
+    ai_terminal.resize(900, 500)
+    ai_terminal.show()
+    _wait_until(lambda: ai_terminal.shell_running and ai_terminal._primary.ready)
+    outputs = {}
+    ai_terminal.command_output_ready.connect(lambda job_id, _, output: outputs.__setitem__(job_id, len(output)))
+    samples, gaps = [], []
+    for _ in range(repeat):
+        probe = _GapProbe()
+        started = time.perf_counter()
+        job_id = ai_terminal.execute_ai_command(command, parallel=False)
+        _wait_until(lambda: job_id in outputs)
+        samples.append(TERMINAL_MB / (time.perf_counter() - started))
+        gaps.append(probe.stop())
+    ai_terminal.close_session()
+    metrics["terminal.ai_mb_s"] = _metric(statistics.median(samples), "MB/s", HIGHER)
+    metrics["terminal.ai_max_gap_ms"] = _metric(statistics.median(gaps), "ms")
+    return metrics
+
+
+def _create_window():
+    from bench_agent_loop import _wait_until
+    from aura_ide.ui.main_window import MainWindow
+
+    window = MainWindow()
+    window.show()
+    _wait_until(lambda: window._startup_done)
+    return window
+
+
+def _close_window(window):
+    window.close()
+    window.ai_terminal.close_session()
+    window.user_terminal.close_session()
+
+
+def scenario_file_open(repeat: int) -> dict:
+    from bench_agent_loop import _wait_until
+
+    files = {"small": ("app.py", "def f(x):\n    return x * 2\n" * 800), # ~22 KB
+             "medium": ("dados.txt", "".join(f"linha {i:07d} com algum texto de exemplo\n" for i in range(50000)))} # ~2 MB
+    for name, text in files.values():
+        with open(name, "w", encoding="utf-8") as f:
+            f.write(text)
+    window = _create_window()
+    loaded = []
+    window.file_loader.finished.connect(lambda load_id: loaded.append(time.perf_counter()))
+    metrics = {}
+    for label, (name, _) in files.items():
+        path = os.path.abspath(name)
+        _wait_until(lambda: window.file_system_model.index(path).isValid())
+        samples, gaps = [], []
+        for _ in range(repeat):
+            probe = _GapProbe()
+            done = len(loaded)
+            started = time.perf_counter()
+            window._open_file_from_tree(window.file_system_model.index(path))
+            _wait_until(lambda: len(loaded) > done)
+            samples.append((loaded[-1] - started) * 1000)
+            gaps.append(probe.stop())
+        metrics[f"file_open.{label}_ms"] = _metric(statistics.median(samples), "ms")
+        metrics[f"file_open.{label}_max_gap_ms"] = _metric(statistics.median(gaps), "ms")
+    _close_window(window)
+    return metrics
+
+
+def _chat_round_trips(window, provider, repeat: int) -> list:
+    from bench_agent_loop import _wait_until
+
+    window.ai_provider = provider
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        window._send_chat_message_from_input_widget(f"Pergunta {i}: o que faz app.py?")
+        _wait_until(lambda: not window.agent_loop.running and not window._ai_streams)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def scenario_chat(repeat: int) -> dict:
+    from aura_ide.ai.deepseek_provider import DeepSeekProvider
+    from fake_openai_server import FakeOpenAIServer
+    from mock_providers import SlowMockProvider
+
+    window = _create_window()
+    metrics = {}
+    mock = _chat_round_trips(window, SlowMockProvider(delay=0.0, reply="Multiplica x por 2."), repeat)
+    metrics["chat.mock_round_trip_ms"] = _metric(statistics.median(mock), "ms")
+    with FakeOpenAIServer(first_token_delay=0.0, token_delay=0.0) as server:
+        http = _chat_round_trips(window, DeepSeekProvider(api_key="benchmark", api_url=server.url), repeat)
+    metrics["chat.http_round_trip_ms"] = _metric(statistics.median(http), "ms")
+    _close_window(window)
+    return metrics
+
+
+def scenario_startup(repeat: int) -> dict:
+    import bench_startup
+
+    result = bench_startup.run(runs=repeat, keys=False)
+    metrics = {"startup.first_paint_ms": _metric(result["first_paint_ms"]["p50"], "ms")}
+    if result["ready_ms"] is not None:
+        metrics["startup.ready_ms"] = _metric(result["ready_ms"]["p50"], "ms")
+    return metrics
+
+
+def child(scenario: str, repeat: int):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, SRC_DIR)
+    with contextlib.redirect_stdout(sys.stderr): # Só o JSON vai para o stdout
+        from PySide6.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication(sys.argv[:1])
+        metrics = globals()[f"scenario_{scenario}"](repeat)
+    print(json.dumps(metrics))
+
+
+# --- Processo principal ---
+
+def _run_scenario(scenario: str, repeat: int) -> dict:
+    workspace = tempfile.mkdtemp(prefix=f"aura_suite_{scenario}_")
+    project = os.path.join(workspace, "projeto")
+    os.makedirs(project)
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", XDG_CACHE_HOME=os.path.join(workspace, "cache"))
+    try:
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", scenario, "--repeat", str(repeat)],
+                                   cwd=project, env=env, capture_output=True, text=True, timeout=SCENARIO_TIMEOUT_SECONDS)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Cenário {scenario} falhou:\n{completed.stderr[-2000:]}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(metrics: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """Métricas presentes nas duas, com a variação relativa e se é uma regressão."""
+    comparisons = []
+    for name, current in sorted(metrics.items()):
+        base = baseline.get(name)
+        if base is None or not base["value"]:
+            continue
+        delta = current["value"] - base["value"]
+        change = delta / base["value"]
+        worse = change > tolerance if current["better"] == LOWER else change < -tolerance
+        if abs(delta) < MIN_DELTA.get(current["unit"], 0):
+            worse = False
+        comparisons.append({"metric": name, "baseline": base["value"], "current": current["value"], "unit": current["unit"],
+                            "change_pct": round(change * 100, 1), "regression": worse})
+    return comparisons
+
+
+def run(scenarios=SCENARIOS, repeat: int = 5, baseline_path: str = DEFAULT_BASELINE, tolerance: float = DEFAULT_TOLERANCE,
+        update_baseline: bool = False, output: str = None) -> dict:
+    metrics = {}
+    seconds = {}
+    for scenario in scenarios:
+        started = time.perf_counter()
+        metrics.update(_run_scenario(scenario, repeat))
+        seconds[scenario] = round(time.perf_counter() - started, 1)
+    result = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "scenario_seconds": seconds,
+        "metrics": metrics,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    result["output"] = output
+
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+    if baseline is not None:
+        result["comparison"] = compare(metrics, baseline["metrics"], tolerance)
+        result["regressions"] = [entry["metric"] for entry in result["comparison"] if entry["regression"]]
+    else:
+        result["regressions"] = []
+    if update_baseline:
+        # Métricas de cenários que não correram agora ficam como estavam
+        merged = dict(baseline["metrics"]) if baseline is not None else {}
+        merged.update(metrics)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(dict(result, metrics=merged, comparison=None, regressions=None, output=None), f, indent=2)
+        result["baseline_updated"] = baseline_path
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Caminhos quentes do IDE sem ecrã, comparados com uma linha de base")
+    parser.add_argument("--only", default=",".join(SCENARIOS), help=f"Cenários separados por vírgulas ({', '.join(SCENARIOS)})")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições por medida (vale a mediana)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Gravar estes resultados como a nova linha de base")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Piora relativa aceite (0.25 = 25%%)")
+    parser.add_argument("--output", help="Arquivo dos resultados (por omissão benchmarks/results/<data>.json)")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.repeat)
+    else:
+        selected = [name.strip() for name in args.only.split(",") if name.strip()]
+        unknown = [name for name in selected if name not in SCENARIOS]
+        if unknown:
+            parser.error(f"cenário(s) desconhecido(s): {', '.join(unknown)}")
+        result = run(selected, args.repeat, args.baseline, args.tolerance, args.update_baseline, args.output)
+        print(json.dumps(result, indent=2))
+        sys.exit(1 if result["regressions"] else 0)
@@ -0,0 +1,182 @@
+# Realce de sintaxe num arquivo Python de 100k linhas: incremental (SyntaxHighlighter) vs.
+# um QSyntaxHighlighter ingénuo com o mesmo tokenizador.
+#
+# Uso: python benchmarks/bench_syntax_highlight.py [--lines 100000] [--keys 200]
+#
+# Mede: quanto tempo a UI fica parada ao ativar o realce (o QSyntaxHighlighter tokeniza o
+# documento inteiro de uma vez; o incremental só as linhas visíveis, o resto numa thread);
+# a latência tecla → pintura a meio do arquivo, para teclas normais e para `"""` (abre uma
+# string que muda o estado de todas as linhas seguintes: o QSyntaxHighlighter volta a
+# tokenizar até ao fim do arquivo antes de pintar). Um frame a 60 Hz são 16.7 ms.
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEvent, QObject, Qt
+from PySide6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QTextCursor
+from PySide6.QtTest import QTest
+from PySide6.QtWidgets import QApplication
+
+from aura_ide.core.syntax import LEXERS
+from aura_ide.ui.widgets.code_editor import CodeEditor
+from aura_ide.ui.widgets.syntax_highlighter import SyntaxHighlighter
+
+FRAME_MS = 1000 / 60
+WAIT_SECONDS = 120
+
+_SAMPLE = '''@decorator
+class Example{n}(Base):
+    """Docstring da classe {n}."""
+
+    def method(self, value: int = 0x1F) -> str:
+        # comentário {n}
+        result = [x * 2.5 for x in range(value) if x % 3]
+        return f"valor {{value}}: {{len(result)}}" + 'fim'
+'''
+
+
+def _make_source(lines: int) -> str:
+    text = []
+    count = 0
+    n = 0
+    while count < lines:
+        chunk = _SAMPLE.format(n=n)
+        text.append(chunk)
+        count += chunk.count("\n")
+        n += 1
+    return "".join(text)
+
+
+class _NaiveHighlighter(QSyntaxHighlighter):
+    def __init__(self, document, lexer):
+        super().__init__(document)
+        self.lexer = lexer
+        self.text_format = QTextCharFormat()
+        self.text_format.setForeground(QColor("#0033b3"))
+
+    def highlightBlock(self, text):
+        previous = self.previousBlockState()
+        tokens, state = self.lexer.tokenize(text, previous if previous >= 0 else 0)
+        for start, length, _ in tokens:
+            self.setFormat(start, length, self.text_format)
+        self.setCurrentBlockState(state)
+
+
+def _percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+        "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+class _PaintCounter(QObject):
+    def __init__(self):
+        super().__init__()
+        self.paints = 0
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            self.paints += 1
+        return False
+
+
+def _keystroke(app, editor, key) -> float:
+    """Da tecla até à pintura seguinte do editor (a que o ciclo de eventos agenda)."""
+    counter = editor.paint_counter
+    counter.paints = 0
+    started = time.perf_counter()
+    if isinstance(key, str):
+        QTest.keyClicks(editor, key)
+    else:
+        QTest.keyClick(editor, key)
+    app.processEvents()
+    if not counter.paints:
+        editor.viewport().repaint()
+    return time.perf_counter() - started
+
+
+def _measure(app, source: str, keys: int, naive: bool) -> dict:
+    editor = CodeEditor()
+    editor.resize(1000, 800)
+    editor.paint_counter = _PaintCounter()
+    editor.viewport().installEventFilter(editor.paint_counter)
+    editor.show()
+    editor.setPlainText(source)
+    app.processEvents()
+    lexer = LEXERS["python"]
+
+    started = time.perf_counter()
+    if naive:
+        highlighter = _NaiveHighlighter(editor.document(), lexer)
+    else:
+        highlighter = SyntaxHighlighter(editor)
+        highlighter.set_lexer(lexer)
+    app.processEvents()
+    result = {"enable_blocking_ms": round((time.perf_counter() - started) * 1000, 1)}
+    if not naive:
+        while not highlighter.idle and time.perf_counter() - started < WAIT_SECONDS:
+            app.processEvents()
+        result["background_full_pass_seconds"] = round(time.perf_counter() - started, 2)
+
+    # A meio do arquivo, dentro de um método
+    middle = editor.document().findBlockByNumber(editor.document().blockCount() // 2)
+    cursor = QTextCursor(middle)
+    cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock)
+    editor.setTextCursor(cursor)
+    editor.centerCursor()
+    app.processEvents()
+
+    rng = random.Random(3)
+    samples = []
+    for i in range(keys):
+        if i % 20 == 19:
+            samples.append(_keystroke(app, editor, Qt.Key.Key_Return))
+        elif i % 5 == 4:
+            samples.append(_keystroke(app, editor, Qt.Key.Key_Backspace))
+        else:
+            samples.append(_keystroke(app, editor, rng.choice("abcxyz_ (),.:=")))
+    result["keystroke"] = _percentiles(samples)
+
+    # Abrir e fechar uma string de aspas triplas: muda o estado de todo o resto do arquivo
+    QTest.keyClick(editor, Qt.Key.Key_Return)
+    triple = []
+    for _ in range(3):
+        triple.append(_keystroke(app, editor, '"'))
+    result["open_triple_quote_ms"] = round(max(triple) * 1000, 2)
+    for _ in range(3):
+        triple.append(_keystroke(app, editor, Qt.Key.Key_Backspace))
+    result["close_triple_quote_ms"] = round(max(triple[3:]) * 1000, 2)
+
+    worst = max(samples + triple)
+    result["under_one_frame"] = worst * 1000 < FRAME_MS
+    editor.close()
+    editor.deleteLater()
+    app.processEvents()
+    return result
+
+
+def run(lines: int = 100000, keys: int = 200) -> dict:
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    source = _make_source(lines)
+    return {
+        "lines": source.count("\n"),
+        "frame_ms": round(FRAME_MS, 1),
+        "incremental": _measure(app, source, keys, naive=False),
+        "qsyntaxhighlighter": _measure(app, source, keys, naive=True),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Realce de sintaxe incremental vs. QSyntaxHighlighter num arquivo grande")
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--keys", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.lines, args.keys), indent=2))
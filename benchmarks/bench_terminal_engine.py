@@ -0,0 +1,155 @@
+# Débito do motor de terminal (PTY + parser VT + ecrã com registo de danos).
+#
+# Uso: python benchmarks/bench_terminal_engine.py [--engine-mb 100] [--pty-mb 200]
+#
+# "engine" alimenta um TerminalSession diretamente (sem processo nem Qt), com saída do tipo
+# `yes` e com saída de build cheia de cores (SGR). "pty" corre `yes | head -c N` num bash
+# real dentro de um TerminalView e mede o débito, o maior intervalo entre eventos do ciclo
+# Qt e o número de repaints; "pty_raw" lê o mesmo comando do PTY sem o processar, que é o
+# limite imposto pelo kernel nesta máquina.
+import argparse
+import json
+import os
+import select
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from aura_ide.core.terminal import PtyProcess, TerminalSession
+
+CHUNK_BYTES = 64 * 1024
+ROWS, COLS = 40, 120
+
+
+def _yes_chunk() -> bytes:
+    return (b"y\r\n" * (CHUNK_BYTES // 3 + 1))[:CHUNK_BYTES]
+
+
+def _ansi_chunk() -> bytes:
+    lines = []
+    size = 0
+    n = 0
+    while size < CHUNK_BYTES:
+        line = (f"\x1b[2m[{n:06d}]\x1b[0m \x1b[32mINFO\x1b[0m \x1b[1;34mbuild\x1b[0m modulo_{n % 977}.py ... "
+                f"\x1b[38;5;{n % 256}mok\x1b[0m ({n % 83} ms)\r\n").encode()
+        lines.append(line)
+        size += len(line)
+        n += 1
+    return b"".join(lines)
+
+
+def run_engine(total_mb: float = 100, kind: str = "yes") -> dict:
+    session = TerminalSession(rows=ROWS, cols=COLS)
+    chunk = _yes_chunk() if kind == "yes" else _ansi_chunk()
+    total = int(total_mb * 1024 * 1024)
+    fed = 0
+    slowest = 0.0
+    started = time.perf_counter()
+    while fed < total:
+        chunk_started = time.perf_counter()
+        session.feed(chunk)
+        slowest = max(slowest, time.perf_counter() - chunk_started)
+        fed += len(chunk)
+    elapsed = time.perf_counter() - started
+    return {
+        "kind": kind,
+        "megabytes": round(fed / (1024 * 1024), 1),
+        "throughput_mb_s": round(fed / (1024 * 1024) / elapsed, 1),
+        "slowest_64k_chunk_ms": round(slowest * 1000, 2),
+        "scrollback_lines": len(session.scrollback),
+    }
+
+
+def run_pty_raw(total_mb: float = 200) -> dict:
+    process = PtyProcess(["/bin/sh", "-c", f"yes | head -c {int(total_mb * 1024 * 1024)}"], rows=ROWS, cols=COLS)
+    received = 0
+    started = time.perf_counter()
+    while True:
+        select.select([process.fd], [], [], 1)
+        data = process.read()
+        if data is None:
+            break
+        received += len(data)
+    elapsed = time.perf_counter() - started
+    process.close()
+    return {"megabytes": total_mb, "throughput_mb_s": round(total_mb / elapsed, 1), "pty_bytes": received}
+
+
+def run_pty(total_mb: float = 200) -> dict:
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    from aura_ide.ui.widgets.terminal_view import TerminalView
+
+    class _BenchView(TerminalView):
+        paint_count = 0
+        records = []
+
+        def paintEvent(self, event):
+            self.paint_count += 1
+            super().paintEvent(event)
+
+        def _handle_command_finished(self, record):
+            self.records.append(record)
+            if record.command:
+                QApplication.instance().quit()
+
+    app = QApplication.instance() or QApplication([])
+    view = _BenchView()
+    view.resize(1000, 700)
+    view.show()
+    view.start_shell({"AURA_NO_HISTORY": "1"})
+    deadline = time.time() + 30
+    while not view.records and time.time() < deadline: # Esperar pelo primeiro prompt
+        app.processEvents()
+        time.sleep(0.01)
+
+    state = {"max_gap": 0.0, "last": None}
+
+    def heartbeat():
+        now = time.perf_counter()
+        if state["last"] is not None:
+            state["max_gap"] = max(state["max_gap"], now - state["last"])
+        state["last"] = now
+
+    timer = QTimer()
+    timer.setInterval(5)
+    timer.timeout.connect(heartbeat)
+    timer.start()
+    command = f"yes | head -c {int(total_mb * 1024 * 1024)}"
+    view.session.protocol.begin_command(command)
+    started = time.perf_counter()
+    view.send_text(command + "\r")
+    app.exec()
+    elapsed = time.perf_counter() - started
+    timer.stop()
+    view.close_session()
+    record = view.records[-1]
+    return {
+        "megabytes": total_mb,
+        "seconds": round(elapsed, 2),
+        "throughput_mb_s": round(total_mb / elapsed, 1),
+        "max_event_loop_gap_ms": round(state["max_gap"] * 1000, 1),
+        "paints": view.paint_count,
+        "exit_code": record.exit_code,
+    }
+
+
+def run(engine_mb: float = 100, pty_mb: float = 200) -> dict:
+    results = {
+        "engine_yes": run_engine(engine_mb, "yes"),
+        "engine_ansi": run_engine(engine_mb / 4, "ansi"),
+    }
+    if pty_mb > 0:
+        results["pty_raw"] = run_pty_raw(pty_mb)
+        results["pty"] = run_pty(pty_mb)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Débito do motor de terminal (parser VT, ecrã e PTY)")
+    parser.add_argument("--engine-mb", type=float, default=100)
+    parser.add_argument("--pty-mb", type=float, default=200, help="Volume de `yes | head -c` no PTY (0 para não medir)")
+    args = parser.parse_args()
+    print(json.dumps(run(args.engine_mb, args.pty_mb), indent=2))
@@ -0,0 +1,135 @@
+# Débito e memória ao empurrar muita saída (p.ex. `cat` de um log enorme) para o terminal.
+#
+# Uso: python benchmarks/bench_terminal_output.py [--mb 100] [--legacy-mb 5]
+#
+# "view" usa a TerminalView (emulador VT sobre histórico circular + um repaint por frame + vista virtualizada);
+# "legacy" reproduz o caminho antigo (QPlainTextEdit: moveCursor + insertPlainText +
+# ensureCursorVisible por pedaço, histórico ilimitado). Cada modo corre num processo
+# separado para que o pico de RSS de um não contamine o do outro.
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QTextCursor
+from PySide6.QtWidgets import QApplication, QPlainTextEdit
+
+from aura_ide.ui.widgets.terminal_view import TerminalView
+
+CHUNK_BYTES = 64 * 1024 # Tamanho típico de uma leitura do QProcess com saída intensa
+
+
+def _make_chunk(index: int) -> str:
+    # Linhas de log com tamanhos variados, como a saída de um build
+    lines = []
+    size = 0
+    n = index * 1000
+    while size < CHUNK_BYTES:
+        line = f"[{n:09d}] INFO compilando modulo_{n % 977}.py ... ok ({n % 83} ms)" + " detalhe" * (n % 7)
+        lines.append(line)
+        size += len(line) + 1
+        n += 1
+    return "\n".join(lines) + "\n"
+
+
+def _make_pty_chunk(index: int) -> bytes:
+    # O que o TerminalView recebe de um PTY: '\n' já convertido em '\r\n' (ONLCR)
+    return _make_chunk(index).replace("\n", "\r\n").encode()
+
+
+class _LegacyTerminal(QPlainTextEdit):
+    def append_text(self, text):
+        self.moveCursor(QTextCursor.MoveOperation.End)
+        self.insertPlainText(text)
+        self.ensureCursorVisible()
+
+    def flush_output(self):
+        pass
+
+
+class _CountingView(TerminalView):
+    paint_count = 0
+
+    def append_text(self, data):
+        self.feed_output(data)
+
+    def paintEvent(self, event):
+        self.paint_count += 1
+        super().paintEvent(event)
+
+
+def run(total_mb: float = 100, mode: str = "view") -> dict:
+    app = QApplication.instance() or QApplication([])
+    widget = _CountingView() if mode == "view" else _LegacyTerminal()
+    widget.resize(900, 400)
+    widget.show()
+    make_chunk = _make_pty_chunk if mode == "view" else _make_chunk
+    chunks = [make_chunk(i) for i in range(16)] # Reutilizados: gerar texto não deve contar no tempo
+    total_chunks = max(1, int(total_mb * 1024 * 1024 / CHUNK_BYTES))
+    state = {"sent": 0, "max_event_gap_ms": 0.0, "last_event": None}
+
+    def feed_next_chunk():
+        now = time.perf_counter()
+        if state["last_event"] is not None:
+            state["max_event_gap_ms"] = max(state["max_event_gap_ms"], (now - state["last_event"]) * 1000)
+        state["last_event"] = now
+        if state["sent"] >= total_chunks:
+            widget.flush_output()
+            app.quit()
+            return
+        # Um pedaço por volta do ciclo de eventos, como os sinais readyReadStandardOutput
+        widget.append_text(chunks[state["sent"] % len(chunks)])
+        state["sent"] += 1
+        QTimer.singleShot(0, feed_next_chunk)
+
+    started = time.perf_counter()
+    QTimer.singleShot(0, feed_next_chunk)
+    app.exec()
+    app.processEvents() # Último repaint
+    elapsed = time.perf_counter() - started
+
+    megabytes = total_chunks * CHUNK_BYTES / (1024 * 1024)
+    results = {
+        "mode": mode,
+        "megabytes": round(megabytes, 1),
+        "seconds": round(elapsed, 2),
+        "throughput_mb_s": round(megabytes / elapsed, 1),
+        "max_event_loop_gap_ms": round(state["max_event_gap_ms"], 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1), # ru_maxrss em KiB no Linux
+    }
+    if mode == "view":
+        results["lines_kept"] = len(widget.session.scrollback)
+        results["paints"] = widget.paint_count
+    else:
+        results["lines_kept"] = widget.blockCount()
+    return results
+
+
+def _run_in_subprocess(total_mb: float, mode: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--mode", mode, "--mb", str(total_mb)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Débito e pico de RSS ao enviar muita saída para o terminal")
+    parser.add_argument("--mb", type=float, default=100)
+    parser.add_argument("--legacy-mb", type=float, default=5, help="Volume para o caminho antigo (0 para não medir)")
+    parser.add_argument("--mode", choices=["view", "legacy"], help="Medir só um modo, neste processo")
+    args = parser.parse_args()
+    if args.mode:
+        print(json.dumps(run(args.mb, args.mode), indent=2))
+    else:
+        results = {"view": _run_in_subprocess(args.mb, "view")}
+        if args.legacy_mb > 0:
+            results["legacy"] = _run_in_subprocess(args.legacy_mb, "legacy")
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,152 @@
+# Ferramentas tipadas (ai/tools.py) vs. um comando de terminal por resposta, com um modelo
+# simulado (sem rede).
+#
+# Uso: python benchmarks/bench_tool_calls.py [--model-delay 0.4]
+#
+# A mesma tarefa (corrigir um erro em src/calc.py num projeto temporário e confirmar com o
+# teste) é resolvida pela MainWindow real, com bash num PTY, de três formas:
+#   "sequential":   protocolo antigo, uma linha EXECUTE_TERMINAL_IA/SEARCH_CODE_IA por resposta
+#                   (ls, cat, cat, pesquisa, sed, teste, resposta final);
+#   "text_tools":   chamadas TOOL_CALL em JSON no texto (formato de reserva): list_dir, dois
+#                   read_file e search numa só resposta, depois write_file, run_command e a
+#                   resposta final;
+#   "native_tools": as mesmas chamadas como chamadas de funções nativas (mensagens 'tool').
+# Para cada uma: segundos, pedidos ao modelo, caracteres enviados e se o teste passou no fim.
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from aura_ide.ai.agent_loop import COMMAND_PREFIX, SEARCH_PREFIX
+from aura_ide.ai.tools import TOOL_CALL_PREFIX
+from aura_ide.ui.main_window import MainWindow
+from bench_agent_loop import _wait_until
+from mock_providers import ScriptedAgentProvider, ScriptedToolProvider
+
+BUGGY_CALC = "def add(a, b):\n    return a - b\n\n\ndef mul(a, b):\n    return a * b\n"
+FIXED_CALC = BUGGY_CALC.replace("a - b", "a + b")
+CHECK_CALC = (
+    "import os\nimport sys\n\n"
+    "sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))\n\n"
+    "from calc import add, mul\n\n"
+    "assert add(2, 3) == 5, add(2, 3)\nassert mul(2, 3) == 6\nprint('ok')\n"
+)
+FILLER_FILES = 20
+
+# Os passos da tarefa, como chamadas (ferramenta, argumentos)
+EXPLORE = [("list_dir", {"path": ""}), ("read_file", {"path": "src/calc.py"}),
+           ("read_file", {"path": "tests/check_calc.py"}), ("search", {"query": "def add"})]
+FIX = [("write_file", {"path": "src/calc.py", "content": FIXED_CALC})]
+VERIFY = [("run_command", {"command": "python3 tests/check_calc.py"})]
+FINAL = "add() subtraía em vez de somar; corrigido em src/calc.py e o teste passa."
+
+
+def _create_project(root: str):
+    os.makedirs(os.path.join(root, "src"))
+    os.makedirs(os.path.join(root, "tests"))
+    with open(os.path.join(root, "src", "calc.py"), "w") as f:
+        f.write(BUGGY_CALC)
+    with open(os.path.join(root, "tests", "check_calc.py"), "w") as f:
+        f.write(CHECK_CALC)
+    for i in range(FILLER_FILES):
+        with open(os.path.join(root, "src", f"module_{i:02d}.py"), "w") as f:
+            f.write(f"def helper_{i}(value):\n    return value * {i}\n")
+
+
+def _solved(root: str) -> bool:
+    """O teste passa? Repõe o erro a seguir, para o cenário seguinte."""
+    check = subprocess.run([sys.executable, os.path.join("tests", "check_calc.py")], cwd=root,
+                           capture_output=True, text=True)
+    with open(os.path.join(root, "src", "calc.py"), "w") as f:
+        f.write(BUGGY_CALC)
+    return check.returncode == 0 and check.stdout.strip() == "ok"
+
+
+def _text_call(name: str, arguments: dict) -> str:
+    return f"{TOOL_CALL_PREFIX} {json.dumps({'name': name, 'arguments': arguments})}"
+
+
+def run_scenario(window, root: str, provider) -> dict:
+    window.ai_provider = provider
+    started = time.perf_counter()
+    window._send_chat_message_from_input_widget("O teste tests/check_calc.py falha. Corrija o erro.")
+    _wait_until(lambda: not window.agent_loop.running)
+    elapsed = time.perf_counter() - started
+    loop = window.agent_loop
+    result = {
+        "seconds": round(elapsed, 3),
+        "model_requests": provider.calls,
+        "prompt_chars": provider.prompt_chars,
+        "steps": len(loop.steps),
+        "stop_reason": loop.stop_reason,
+        "solved": _solved(root),
+        "trace": loop.trace(),
+    }
+    if isinstance(provider, ScriptedToolProvider):
+        result["tool_results"] = provider.tool_results
+        result["offered_tools"] = provider.offered_tools
+    return result
+
+
+def run(model_delay: float = 0.4) -> dict:
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    workspace = tempfile.mkdtemp(prefix="aura_tools_bench_")
+    os.environ["XDG_CACHE_HOME"] = os.path.join(workspace, "cache") # Índices fora da cache real
+    root = os.path.join(workspace, "projeto")
+    _create_project(root)
+    previous_cwd = os.getcwd()
+    os.chdir(root) # O terminal da IA, o índice e as ferramentas de arquivos partem da pasta atual
+    window = None
+    try:
+        # A MainWindow regista cada passo com print; desviar para stderr para manter o JSON limpo
+        with contextlib.redirect_stdout(sys.stderr):
+            window = MainWindow()
+            _wait_until(lambda: window.ai_terminal.shell_running and window.ai_terminal._primary.ready)
+            _wait_until(lambda: window.code_indexer.index is not None and not window.code_indexer.indexing)
+            window.agent_loop.max_steps = 10
+            sequential = [
+                f"{COMMAND_PREFIX} ls -R",
+                f"{COMMAND_PREFIX} cat src/calc.py",
+                f"{COMMAND_PREFIX} cat tests/check_calc.py",
+                f"{SEARCH_PREFIX} def add",
+                f"{COMMAND_PREFIX} sed -i 's/a - b/a + b/' src/calc.py",
+                f"{COMMAND_PREFIX} python3 tests/check_calc.py",
+                FINAL,
+            ]
+            text_tools = ["Vou ver o projeto.\n" + "\n".join(_text_call(*call) for call in EXPLORE),
+                          _text_call(*FIX[0]), _text_call(*VERIFY[0]), FINAL]
+            native_tools = [("Vou ver o projeto.", EXPLORE), ("", FIX), ("", VERIFY), (FINAL, [])]
+            results = {
+                "sequential": run_scenario(window, root, ScriptedAgentProvider(sequential, delay=model_delay)),
+                "text_tools": run_scenario(window, root, ScriptedAgentProvider(text_tools, delay=model_delay)),
+                "native_tools": run_scenario(window, root, ScriptedToolProvider(native_tools, delay=model_delay)),
+            }
+        sequential_requests = results["sequential"]["model_requests"]
+        for name in ("text_tools", "native_tools"):
+            results[name]["speedup"] = round(results["sequential"]["seconds"] / results[name]["seconds"], 2)
+            results[name]["round_trips_saved"] = sequential_requests - results[name]["model_requests"]
+        return results
+    finally:
+        if window is not None:
+            with contextlib.redirect_stdout(sys.stderr):
+                window.close()
+                window.ai_terminal.close_session()
+        os.chdir(previous_cwd)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ferramentas tipadas vs. um comando de terminal por resposta")
+    parser.add_argument("--model-delay", type=float, default=0.4, help="Latência simulada de cada pedido ao modelo")
+    args = parser.parse_args()
+    print(json.dumps(run(args.model_delay), indent=2))
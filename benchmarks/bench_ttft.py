@@ -0,0 +1,57 @@
+# Mede o tempo até ao primeiro token (TTFT) com e sem streaming, contra um servidor SSE local.
+#
+# Uso: python benchmarks/bench_ttft.py [--runs 5] [--first-token-delay 0.3] [--token-delay 0.02]
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from aura_ide.ai.deepseek_provider import DeepSeekProvider
+from fake_openai_server import FakeOpenAIServer
+
+MESSAGES = [{"role": "user", "content": "O que faz este erro?"}]
+
+
+def _measure_blocking(provider) -> dict:
+    started = time.perf_counter()
+    provider.get_chat_completion(MESSAGES)
+    total_ms = (time.perf_counter() - started) * 1000
+    return {"ttft_ms": total_ms, "total_ms": total_ms} # Sem streaming o primeiro token chega com o último
+
+
+def _measure_streaming(provider) -> dict:
+    started = time.perf_counter()
+    first_token_ms = None
+    for _ in provider.stream_chat_completion(MESSAGES):
+        if first_token_ms is None:
+            first_token_ms = (time.perf_counter() - started) * 1000
+    return {"ttft_ms": first_token_ms, "total_ms": (time.perf_counter() - started) * 1000}
+
+
+def _median(samples: list, key: str) -> float:
+    return round(statistics.median(s[key] for s in samples), 1)
+
+
+def run(runs: int = 5, first_token_delay: float = 0.3, token_delay: float = 0.02) -> dict:
+    with FakeOpenAIServer(first_token_delay=first_token_delay, token_delay=token_delay) as server:
+        provider = DeepSeekProvider(api_key="benchmark", api_url=server.url)
+        blocking = [_measure_blocking(provider) for _ in range(runs)]
+        streaming = [_measure_streaming(provider) for _ in range(runs)]
+    return {
+        "runs": runs,
+        "blocking": {"ttft_ms": _median(blocking, "ttft_ms"), "total_ms": _median(blocking, "total_ms")},
+        "streaming": {"ttft_ms": _median(streaming, "ttft_ms"), "total_ms": _median(streaming, "total_ms")},
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="TTFT com e sem streaming contra um servidor SSE local")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+    print(json.dumps(run(args.runs, args.first_token_delay, args.token_delay), indent=2))
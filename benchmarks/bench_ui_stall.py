@@ -0,0 +1,116 @@
+# Mede quanto tempo o loop de eventos do Qt fica bloqueado durante uma chamada lenta à IA.
+#
+# Uso: python benchmarks/bench_ui_stall.py [--delay 2.0]
+#
+# Compara a chamada síncrona antiga (get_chat_completion na thread da UI) com o
+# pipeline assíncrono do MainWindow (AIRequestManager). Um QTimer de 5 ms serve de
+# sonda: o maior intervalo entre dois disparos é o pior "congelamento" visto pelo usuário.
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from PySide6.QtCore import QElapsedTimer, QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+from aura_ide.ui.main_window import MainWindow
+from mock_providers import SlowMockProvider
+
+PROBE_INTERVAL_MS = 5
+
+
+class EventLoopProbe:
+    """Regista os intervalos entre disparos de um QTimer periódico."""
+
+    def __init__(self):
+        self.gaps_ms = []
+        self._clock = QElapsedTimer()
+        self._timer = QTimer()
+        self._timer.setInterval(PROBE_INTERVAL_MS)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self):
+        self.gaps_ms.clear()
+        self._clock.start()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def _tick(self):
+        self.gaps_ms.append(self._clock.restart())
+
+    def summary(self) -> dict:
+        gaps = sorted(self.gaps_ms) or [0]
+        return {
+            "ticks": len(self.gaps_ms),
+            "max_stall_ms": gaps[-1],
+            "p99_gap_ms": gaps[min(len(gaps) - 1, int(len(gaps) * 0.99))],
+            "stall_time_ms": sum(g - PROBE_INTERVAL_MS for g in gaps if g > 2 * PROBE_INTERVAL_MS),
+        }
+
+
+def _spin(ms: int):
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec()
+
+
+def measure_sync(provider, window) -> dict:
+    probe = EventLoopProbe()
+    probe.start()
+    loop = QEventLoop()
+
+    def call_on_gui_thread():
+        provider.get_chat_completion([{"role": "user", "content": "olá"}])
+        loop.quit()
+
+    QTimer.singleShot(50, call_on_gui_thread)
+    loop.exec()
+    _spin(50)
+    probe.stop()
+    return probe.summary()
+
+
+def measure_async(provider, window) -> dict:
+    window.ai_provider = provider
+    probe = EventLoopProbe()
+    probe.start()
+    loop = QEventLoop()
+    window.ai_requests.request_finished.connect(lambda *_: loop.quit())
+    started = time.perf_counter()
+    QTimer.singleShot(50, lambda: window._send_chat_message_from_input_widget("olá"))
+    loop.exec()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _spin(50)
+    probe.stop()
+    result = probe.summary()
+    result["round_trip_ms"] = round(elapsed_ms, 1)
+    return result
+
+
+def run(delay: float = 2.0) -> dict:
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    _spin(300)  # Deixar os shells arrancarem antes de medir
+
+    provider = SlowMockProvider(delay=delay)
+    results = {
+        "provider_delay_ms": delay * 1000,
+        "sync_gui_thread": measure_sync(provider, window),
+        "async_request_manager": measure_async(provider, window),
+    }
+    window.close()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Stall do loop de eventos durante uma chamada lenta à IA")
+    parser.add_argument("--delay", type=float, default=2.0, help="Latência simulada do provedor (s)")
+    args = parser.parse_args()
+    print(json.dumps(run(args.delay), indent=2))
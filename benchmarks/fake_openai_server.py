@@ -0,0 +1,162 @@
+# Servidor local que imita o endpoint /v1/chat/completions das APIs compatíveis com
+# OpenAI (DeepSeek, etc.), com latências configuráveis. Usado pelos benchmarks.
+import json
+import os
+import random
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _ChatCompletionsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive nas respostas com Content-Length
+    disable_nagle_algorithm = True # Cabeçalhos e corpo saem em write()s separados
+
+    def log_message(self, format, *args):
+        pass # Silencioso: os benchmarks imprimem apenas JSON
+
+    def do_GET(self):
+        # A lista de modelos, como a dos servidores de inferência locais (llama.cpp, vLLM)
+        if self.path.rstrip("/").endswith("/models"):
+            time.sleep(self.server.first_token_delay)
+            self._send_json(200, {"object": "list", "data": [{"id": model, "object": "model"} for model in self.server.models]})
+        else:
+            self._send_json(404, {"error": {"message": "não encontrado"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        server.request_count += 1
+        model = payload.get("model", "fake-model")
+
+        if server.failure_rate and server.random.random() < server.failure_rate:
+            if server.hang_seconds:
+                time.sleep(server.hang_seconds) # Simula um provedor pendurado (o cliente deve dar timeout)
+            self._send_json(server.failure_status, {"error": {"message": "falha injetada", "type": "server_error"}})
+            return
+
+        time.sleep(server.first_token_delay)
+        if payload.get("stream"):
+            self._send_stream(model)
+        else:
+            time.sleep(server.token_delay * max(0, len(server.reply_tokens) - 1))
+            self._send_json(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(server.reply_tokens)}, "finish_reason": "stop"}],
+            })
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, model: str):
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close") # Sem Content-Length: o fim do stream fecha a ligação
+        self.end_headers()
+        self.close_connection = True
+        for i, token in enumerate(server.reply_tokens):
+            if i:
+                time.sleep(server.token_delay)
+            event = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class FakeOpenAIServer:
+    """
+    Servidor HTTP numa thread em segundo plano.
+
+    Args:
+        reply_tokens (list): Pedaços de texto da resposta (um evento SSE por pedaço).
+        first_token_delay (float): Segundos até ao primeiro pedaço (ou à resposta inteira).
+        token_delay (float): Segundos entre pedaços consecutivos.
+        failure_rate (float): Fração de requisições que falham (injeção de falhas).
+        failure_status (int): Código HTTP das falhas injetadas (p.ex. 503 ou 429).
+        hang_seconds (float): Espera antes de responder a uma falha injetada (simula timeouts).
+        seed (int): Semente do gerador das falhas, para resultados reprodutíveis.
+        models (list): Modelos listados em GET /v1/models.
+    """
+
+    def __init__(self, reply_tokens=None, first_token_delay: float = 0.3, token_delay: float = 0.02,
+                 handler_class=_ChatCompletionsHandler, ssl_context=None, failure_rate: float = 0.0,
+                 failure_status: int = 503, hang_seconds: float = 0.0, seed: int = None,
+                 models=None):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        self.ssl_context = ssl_context
+        if ssl_context is not None:
+            self.httpd.socket = ssl_context.wrap_socket(self.httpd.socket, server_side=True)
+        self.httpd.daemon_threads = True
+        self.httpd.reply_tokens = reply_tokens or [f"ação{i} " for i in range(50)] # UTF-8 cru, sem charset (como os servidores reais)
+        self.httpd.first_token_delay = first_token_delay
+        self.httpd.token_delay = token_delay
+        self.httpd.request_count = 0
+        self.httpd.failure_rate = failure_rate
+        self.httpd.failure_status = failure_status
+        self.httpd.hang_seconds = hang_seconds
+        self.httpd.random = random.Random(seed)
+        self.httpd.models = models or ["fake-model"]
+        self._thread = None
+
+    @property
+    def scheme(self) -> str:
+        return "https" if self.ssl_context is not None else "http"
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"{self.scheme}://{host}:{port}/v1/chat/completions"
+
+    @property
+    def request_count(self) -> int:
+        return self.httpd.request_count
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def make_self_signed_cert(directory: str = None):
+    """
+    Gera um certificado autoassinado para 127.0.0.1 com o `openssl` do sistema.
+    Devolve (caminho_cert, contexto_ssl_do_servidor); o certificado serve de CA
+    para o cliente (`verify=caminho_cert`).
+    """
+    directory = directory or tempfile.mkdtemp(prefix="aura_bench_tls_")
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", key_path, "-out", cert_path, "-subj", "/CN=127.0.0.1",
+         "-addext", "subjectAltName=IP:127.0.0.1",
+         "-addext", "basicConstraints=critical,CA:TRUE"],
+        check=True, capture_output=True
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert_path, key_path)
+    return cert_path, context
@@ -0,0 +1,82 @@
+# Provedores falsos usados pelos benchmarks (sem rede, latência controlada)
+import time
+
+from aura_ide.ai.base_provider import BaseAIProvider
+from aura_ide.ai.tools import ToolCall
+
+
+class SlowMockProvider(BaseAIProvider):
+    """Simula um provedor lento: bloqueia a thread chamadora durante `delay` segundos."""
+
+    def __init__(self, delay: float = 2.0, reply: str = "Resposta simulada."):
+        self.delay = delay
+        self.reply = reply
+        self.calls = 0
+
+    def get_chat_completion(self, messages: list, model_name: str = None) -> str:
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.reply
+
+    def get_available_models(self) -> list:
+        return ["mock-slow"]
+
+
+class ScriptedAgentProvider(BaseAIProvider):
+    """
+    Simula um modelo que resolve uma tarefa com comandos no terminal: devolve as respostas
+    de `script` por ordem, uma por pedido (a última repete-se), depois de `delay` segundos.
+    """
+
+    def __init__(self, script: list, delay: float = 0.3):
+        self.script = list(script)
+        self.delay = delay
+        self.calls = 0
+        self.prompt_chars = 0 # Total de caracteres enviados em todos os pedidos
+
+    def get_chat_completion(self, messages: list, model_name: str = None) -> str:
+        self.calls += 1
+        self.prompt_chars += sum(len(message["content"]) for message in messages)
+        time.sleep(self.delay)
+        return self.script[min(self.calls, len(self.script)) - 1]
+
+    def get_available_models(self) -> list:
+        return ["mock-agent"]
+
+
+class ScriptedToolProvider(BaseAIProvider):
+    """
+    Como ScriptedAgentProvider, mas com chamadas de funções nativas: cada resposta de `script`
+    é (texto, [(ferramenta, argumentos)]), produzida em streaming com as chamadas como ToolCall.
+    Conta os resultados ('tool') que recebe, para confirmar que cada chamada teve resposta.
+    """
+    supports_tools = True
+
+    def __init__(self, script: list, delay: float = 0.3):
+        self.script = list(script)
+        self.delay = delay
+        self.calls = 0
+        self.prompt_chars = 0
+        self.tool_results = 0 # Mensagens 'tool' recebidas a seguir à resposta anterior
+        self.offered_tools = []
+
+    def get_chat_completion(self, messages: list, model_name: str = None) -> str:
+        return "".join(chunk for chunk in self.stream_chat_completion(messages, model_name) if isinstance(chunk, str))
+
+    def stream_chat_completion(self, messages: list, model_name: str = None, tools: list = None):
+        self.calls += 1
+        self.prompt_chars += sum(len(message.get("content") or "") for message in messages)
+        for message in reversed(messages):
+            if message["role"] == "assistant":
+                break
+            self.tool_results += message["role"] == "tool"
+        self.offered_tools = [spec.name for spec in tools or ()]
+        time.sleep(self.delay)
+        text, calls = self.script[min(self.calls, len(self.script)) - 1]
+        if text:
+            yield text
+        for name, arguments in calls:
+            yield ToolCall(name, arguments, native=True)
+
+    def get_available_models(self) -> list:
+        return ["mock-tools"]
@@ -0,0 +1,404 @@
+import json
+import re
+import time
+
+COMMAND_PREFIX = "EXECUTE_TERMINAL_IA:"
+SEARCH_PREFIX = "SEARCH_CODE_IA:"
+DEFAULT_MAX_STEPS = 8 # Respostas com comandos por ciclo, antes de exigir uma resposta final
+DEFAULT_MAX_SECONDS = 300.0 # Duração máxima de um ciclo (modelo + terminal)
+DEFAULT_OUTPUT_CHARS = 2000 # Saída de cada comando enviada ao modelo, depois de comprimida
+HEAD_LINES = 15
+TAIL_LINES = 15
+MAX_ERROR_LINES = 20
+MAX_LINE_CHARS = 300
+DEFAULT_SEARCH_RESULTS = 50 # Resultados de uma pesquisa de código pedida pelo modelo
+MAX_SEARCH_RESULTS = 200
+
+# Linhas do meio de uma saída longa que valem a pena manter
+_ERROR_LINE_RE = re.compile(
+    r"error|erro|fail|falh|fatal|exception|traceback|warning|aviso|denied|negad|not found|no such|cannot|não foi",
+    re.IGNORECASE,
+)
+_DIGITS_RE = re.compile(r"\d+")
+
+# Motivos para o fim de um ciclo
+STOP_FINAL_ANSWER = "resposta final"
+STOP_MAX_STEPS = "limite de passos"
+STOP_MAX_SECONDS = "limite de tempo"
+
+
+def parse_commands(reply: str):
+    """
+    Separa os comandos de uma resposta do modelo do texto restante. Devolve (comandos, texto).
+
+    Cada linha que começa por `EXECUTE_TERMINAL_IA:` é um comando. Se o prefixo vier sozinho
+    (ou seguido de ```) a linha seguinte abre um bloco de código, e o bloco inteiro é um só
+    comando (várias linhas).
+    """
+    commands = []
+    text_lines = []
+    lines = reply.splitlines()
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        index += 1
+        stripped = line.strip()
+        if not stripped.startswith(COMMAND_PREFIX):
+            text_lines.append(line)
+            continue
+        rest = stripped[len(COMMAND_PREFIX):].strip()
+        if rest and not rest.startswith("```"):
+            if len(rest) > 1 and rest[0] == "`" and rest[-1] == "`":
+                rest = rest[1:-1].strip() # `comando` em código inline
+            if rest:
+                commands.append(rest)
+            continue
+        # Bloco de código: do ``` de abertura (nesta linha ou na seguinte) até ao de fecho
+        if not rest:
+            if index >= len(lines) or not lines[index].strip().startswith("```"):
+                continue
+            index += 1
+        block = []
+        while index < len(lines) and not lines[index].strip().startswith("```"):
+            block.append(lines[index])
+            index += 1
+        index += 1 # ``` de fecho
+        command = "\n".join(block).strip()
+        if command:
+            commands.append(command)
+    return commands, "\n".join(text_lines).strip()
+
+
+def parse_searches(text: str):
+    """
+    Separa as pesquisas de código de uma resposta do modelo do texto restante. Devolve
+    (pesquisas, texto).
+
+    Cada linha que começa por `SEARCH_CODE_IA:` é uma pesquisa: um objeto JSON
+    {"query", "regex", "case_sensitive", "path", "max_results"} (só "query" é obrigatório) ou,
+    se não for JSON, o texto literal a procurar.
+    """
+    searches = []
+    text_lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped.startswith(SEARCH_PREFIX):
+            text_lines.append(line)
+            continue
+        rest = stripped[len(SEARCH_PREFIX):].strip()
+        if len(rest) > 1 and rest[0] == "`" and rest[-1] == "`":
+            rest = rest[1:-1].strip()
+        try:
+            arguments = json.loads(rest)
+        except ValueError:
+            arguments = None
+        if not isinstance(arguments, dict):
+            arguments = {"query": rest}
+        query = str(arguments.get("query") or "")
+        if not query:
+            continue
+        try:
+            max_results = int(arguments.get("max_results") or DEFAULT_SEARCH_RESULTS)
+        except (TypeError, ValueError):
+            max_results = DEFAULT_SEARCH_RESULTS
+        searches.append({
+            "query": query,
+            "regex": bool(arguments.get("regex", False)),
+            "case_sensitive": bool(arguments.get("case_sensitive", False)),
+            "path": str(arguments.get("path") or ""),
+            "max_results": max(1, min(MAX_SEARCH_RESULTS, max_results)),
+        })
+    return searches, "\n".join(text_lines).strip()
+
+
+def tool_result_message(call, content: str) -> dict:
+    """Resultado de uma chamada nativa de ferramenta (ai/tools.py ToolCall), para o histórico."""
+    return {"role": "tool", "tool_call_id": call.id, "name": call.name, "content": content}
+
+
+def describe_search(search: dict) -> str:
+    """Descrição curta de uma pesquisa (chat e mensagem de seguimento)."""
+    options = [option for option, enabled in (("regex", search["regex"]), ("maiúsculas", search["case_sensitive"]))
+               if enabled]
+    if search["path"]:
+        options.append(f"em {search['path']}")
+    return f"pesquisa {json.dumps(search['query'], ensure_ascii=False)}" + (f" ({', '.join(options)})" if options else "")
+
+
+def format_search_results(matches: list, stats: dict = None, max_chars: int = DEFAULT_OUTPUT_CHARS) -> str:
+    """
+    Resultados de uma pesquisa de código para o modelo: uma linha `caminho:linha: texto` por
+    resultado, até `max_chars` (não passam por compress_output, que juntaria linhas que só
+    diferem no número da linha).
+    """
+    lines = []
+    size = 0
+    for match in matches:
+        line = f"{match.path}:{match.line}: {match.text.strip()[:MAX_LINE_CHARS]}"
+        size += len(line) + 1
+        if size > max_chars and lines:
+            lines.append(f"... ({len(matches) - len(lines)} resultados omitidos: refine a pesquisa)")
+            break
+        lines.append(line)
+    if not lines:
+        lines.append("(nenhum resultado)")
+    elif stats is not None and stats.get("truncated"):
+        lines.append(f"(limite de {len(matches)} resultados atingido: refine a pesquisa)")
+    return "\n".join(lines)
+
+
+def compress_output(output: str, max_chars: int = DEFAULT_OUTPUT_CHARS) -> str:
+    """
+    Reduz a saída de um comando para o modelo, sem perder o essencial:
+
+    - linhas seguidas iguais (ou que só diferem nos números, como barras de progresso)
+      ficam numa só, com a contagem;
+    - se ainda for longa: primeiras e últimas linhas, mais as linhas do meio com erros ou
+      avisos (sem repetições);
+    - por fim, um corte duro em `max_chars`.
+    """
+    groups = [] # [primeira, última, contagem, chave]
+    for line in output.splitlines():
+        if len(line) > MAX_LINE_CHARS:
+            line = line[:MAX_LINE_CHARS] + "…"
+        key = _DIGITS_RE.sub("#", line)
+        if groups and groups[-1][3] == key:
+            groups[-1][1] = line
+            groups[-1][2] += 1
+        else:
+            groups.append([line, line, 1, key])
+
+    lines = []
+    for first, last, count, _ in groups:
+        if count == 1:
+            lines.append(first)
+        elif first == last:
+            lines.append(f"{first}  [repetida {count}x]")
+        else:
+            lines.append(f"{first}  [+{count - 2} linhas semelhantes]" if count > 2 else first)
+            lines.append(last)
+
+    text = "\n".join(lines)
+    if len(text) <= max_chars:
+        return text
+
+    if len(lines) > HEAD_LINES + TAIL_LINES:
+        middle = lines[HEAD_LINES:-TAIL_LINES]
+        seen = set()
+        error_lines = []
+        for line in middle:
+            if _ERROR_LINE_RE.search(line) and line not in seen:
+                seen.add(line)
+                error_lines.append(line)
+                if len(error_lines) == MAX_ERROR_LINES:
+                    break
+        omitted = len(middle) - len(error_lines)
+        marker = f"... ({omitted} linhas omitidas"
+        marker += "; linhas com erros/avisos:)" if error_lines else ")"
+        kept = lines[:HEAD_LINES] + [marker] + error_lines + (["..."] if error_lines else []) + lines[-TAIL_LINES:]
+        text = "\n".join(kept)
+    if len(text) > max_chars:
+        half = max(1, (max_chars - 40) // 2)
+        text = f"{text[:half]}\n... ({len(text) - 2 * half} caracteres omitidos) ...\n{text[-half:]}"
+    return text
+
+
+class AgentStep:
+    """Um passo do ciclo: as chamadas de ferramentas (comandos, pesquisas...) de uma resposta do modelo e os seus resultados."""
+
+    def __init__(self, number: int, commands: list, model_seconds: float):
+        self.number = number
+        self.commands = list(commands) # Descrições das chamadas
+        self.model_seconds = model_seconds # Do envio do pedido até à resposta completa
+        self.job_ids = []
+        self.calls = {} # job_id -> ToolCall (ai/tools.py), se a tarefa veio de uma
+        self.results = {} # job_id -> {"command", "output", "exit_code", "state", "seconds"}
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.feedback_sent = False
+
+    @property
+    def complete(self) -> bool:
+        return len(self.results) >= len(self.commands)
+
+    @property
+    def terminal_seconds(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+
+class AgentLoop:
+    """
+    Ciclo fechado modelo → terminal da IA → modelo.
+
+    Cada resposta com comandos (chamadas de ferramentas) é um passo: todas as chamadas da
+    resposta correm (em paralelo quando o terminal o permite) e as saídas, comprimidas,
+    voltam ao modelo num só pedido de seguimento. O ciclo termina com uma resposta sem comandos ou quando se
+    esgota o orçamento de passos ou de tempo. Cada passo regista os seus tempos (modelo e
+    terminal), para se ver onde o ciclo gasta o tempo.
+
+    Não depende do Qt nem da rede: a MainWindow envia os pedidos e corre os comandos,
+    e informa o ciclo com `request_sent`, `begin_step`, `track_job` e `add_result`.
+    """
+
+    def __init__(self, max_steps: int = DEFAULT_MAX_STEPS, max_seconds: float = DEFAULT_MAX_SECONDS,
+                 max_output_chars: int = DEFAULT_OUTPUT_CHARS):
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.max_output_chars = max_output_chars
+        self.running = False
+        self.stop_reason = None
+        self.steps = []
+        self.final_model_seconds = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self._request_sent_at = None
+
+    def start(self):
+        """Novo ciclo (uma mensagem do usuário). Um ciclo anterior ainda em curso é abandonado."""
+        self.running = True
+        self.stop_reason = None
+        self.steps = []
+        self.final_model_seconds = 0.0
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self._request_sent_at = self.started_at
+
+    def request_sent(self):
+        self._request_sent_at = time.monotonic()
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def current_step(self):
+        return self.steps[-1] if self.steps else None
+
+    def budget_exhausted(self):
+        """Motivo pelo qual não pode haver mais passos (None se ainda houver orçamento)."""
+        if len(self.steps) >= self.max_steps:
+            return STOP_MAX_STEPS
+        if self.elapsed_seconds >= self.max_seconds:
+            return STOP_MAX_SECONDS
+        return None
+
+    def begin_step(self, commands: list) -> bool:
+        """Resposta do modelo com comandos. False (e o ciclo termina) se o orçamento acabou."""
+        model_seconds = self._model_seconds()
+        if not self.running:
+            return False
+        reason = self.budget_exhausted()
+        if reason:
+            self.final_model_seconds = model_seconds
+            self.stop(reason)
+            return False
+        self.steps.append(AgentStep(len(self.steps) + 1, commands, model_seconds))
+        return True
+
+    def finish(self):
+        """Resposta do modelo sem comandos: fim do ciclo."""
+        if self.running:
+            self.final_model_seconds = self._model_seconds()
+            self.stop(STOP_FINAL_ANSWER)
+
+    def stop(self, reason: str):
+        if self.running:
+            self.running = False
+            self.stop_reason = reason
+            self.finished_at = time.monotonic()
+
+    def track_job(self, job_id, call=None):
+        """Associa uma tarefa (id de um comando, pesquisa ou chamada) ao passo atual."""
+        if self.current_step is not None:
+            self.current_step.job_ids.append(job_id)
+            if call is not None:
+                self.current_step.calls[job_id] = call
+
+    def owns(self, job_id: int) -> bool:
+        return self.running and self.current_step is not None and job_id in self.current_step.job_ids
+
+    def pending_job_ids(self) -> list:
+        step = self.current_step
+        if step is None:
+            return []
+        return [job_id for job_id in step.job_ids if job_id not in step.results]
+
+    def add_result(self, job_id: int, command: str, output: str, exit_code=None, state: str = None,
+                   seconds: float = 0.0, tool: str = None) -> bool:
+        """
+        Regista o resultado de um comando do passo atual (ou, com `tool`, de outra ferramenta,
+        como uma pesquisa de código). True quando o passo ficou completo.
+        """
+        step = self.current_step
+        if not self.owns(job_id) or job_id in step.results:
+            return False
+        step.results[job_id] = {"command": command, "output": output, "exit_code": exit_code,
+                                "state": state, "seconds": seconds, "tool": tool}
+        if step.complete:
+            step.finished_at = time.monotonic()
+            return True
+        return False
+
+    def build_feedback(self, reason: str = None) -> list:
+        """
+        Mensagens de seguimento com as saídas (comprimidas) de todas as chamadas do passo: uma
+        mensagem 'tool' por chamada nativa (pela ordem das chamadas, como as APIs exigem) e uma
+        mensagem do usuário com as restantes. Com `reason`, o passo foi interrompido: as chamadas
+        sem resultado ficam como não executadas (o histórico não pode ficar com chamadas
+        nativas sem resposta); as outras são omitidas.
+        """
+        step = self.current_step
+        step.feedback_sent = True
+        messages = []
+        parts = []
+        for job_id in step.job_ids:
+            call = step.calls.get(job_id)
+            native = call is not None and call.native
+            if reason is not None and not native:
+                continue # O ciclo acabou: o modelo não vai ler estes resultados
+            result = step.results.get(job_id)
+            if result is None:
+                label = ""
+                status, output = "não executado", f"({reason or 'sem resultado'})"
+            else:
+                status = f"código de saída {result['exit_code']}" if result["exit_code"] is not None else result["state"]
+                status = f"{status}, {result['seconds']:.1f}s"
+                if result["tool"]:
+                    label, output = result["command"], result["output"] # Já formatada pela ferramenta
+                else:
+                    label = f"$ {result['command']}"
+                    output = compress_output(result["output"], self.max_output_chars) or "(sem saída)"
+            if native:
+                messages.append(tool_result_message(call, f"({status})\n{output}"))
+            else:
+                parts.append(f"{label}\n({status})\n```\n{output}\n```")
+        if parts:
+            parts.insert(0, f"Resultados dos comandos (passo {step.number} de no máximo {self.max_steps}):")
+        if reason is None and self.budget_exhausted():
+            parts.append("Limite do ciclo atingido: responda agora, sem pedir mais comandos.")
+        if parts:
+            messages.append({"role": "user", "content": "\n\n".join(parts)})
+        return messages
+
+    def trace(self) -> list:
+        """Tempos por passo: [{passo, comandos, segundos no modelo, segundos no terminal}]."""
+        return [{
+            "step": step.number,
+            "commands": len(step.commands),
+            "model_seconds": round(step.model_seconds, 3),
+            "terminal_seconds": round(step.terminal_seconds, 3),
+            "command_seconds": [round(result["seconds"], 3) for result in step.results.values()],
+        } for step in self.steps]
+
+    def summary(self) -> str:
+        model_seconds = sum(step.model_seconds for step in self.steps) + self.final_model_seconds
+        terminal_seconds = sum(step.terminal_seconds for step in self.steps)
+        commands = sum(len(step.commands) for step in self.steps)
+        return (f"{len(self.steps)} passo(s), {commands} comando(s) em {self.elapsed_seconds:.1f}s "
+                f"(modelo {model_seconds:.1f}s, terminal {terminal_seconds:.1f}s)"
+                + (f"; fim: {self.stop_reason}" if self.stop_reason else ""))
+
+    def _model_seconds(self) -> float:
+        return time.monotonic() - (self._request_sent_at or time.monotonic())
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+from .context_window import estimate_tokens
+
 class BaseAIProvider(ABC):
     """
     Classe base abstrata para provedores de serviços de IA.
@@ -23,10 +25,76 @@ class BaseAIProvider(ABC):
 
         Raises:
             NotImplementedError: Se o método não for implementado pela subclasse.
-            Exception: Pode levantar exceções específicas do provedor em caso de erro na API.
+            AIProviderError: Em caso de erro na API, uma das exceções tipadas de
+                             ai/errors.py (RateLimitError, ServerError, ...). Os provedores
+                             não devem devolver mensagens de erro como se fossem respostas.
         """
         pass
 
+    # True se stream_chat_completion aceita `tools` (chamadas de funções nativas da API)
+    supports_tools = False
+
+    def stream_chat_completion(self, messages: list, model_name: str = None, tools: list = None):
+        """
+        Obtém uma completude de chat em streaming, produzindo pedaços de texto
+        à medida que o modelo os gera.
+
+        A implementação padrão não faz streaming real: produz a resposta completa de
+        `get_chat_completion` num único pedaço. Provedores que suportam streaming
+        devem sobrescrever este método.
+
+        Args:
+            messages (list): Mesmo formato de `get_chat_completion`. Com chamadas de funções,
+                             o histórico pode ter também mensagens {'role': 'assistant',
+                             'content', 'tool_calls': [{'id', 'name', 'arguments'}]} e
+                             {'role': 'tool', 'tool_call_id', 'name', 'content'} (ai/tools.py);
+                             provedores sem `supports_tools` recebem-nas já em texto
+                             (`flatten_tool_messages`).
+            model_name (str, optional): O nome específico do modelo a ser usado.
+            tools (list, optional): Ferramentas (ToolSpec) que o modelo pode chamar. Só
+                                    usado quando `supports_tools` é True.
+
+        Yields:
+            str: Pedaços consecutivos da resposta; concatenados formam a resposta completa.
+            ToolCall: Com `tools`, as chamadas de ferramentas pedidas pelo modelo (com
+                      native=True), normalmente depois do texto.
+        """
+        yield self.get_chat_completion(messages, model_name=model_name)
+
+    def count_tokens(self, text: str, model_name: str = None) -> int:
+        """
+        Conta os tokens de um texto para este provedor. Usado pela gestão do contexto,
+        é chamado uma vez por mensagem e na thread da UI, por isso não deve ir à rede.
+
+        A implementação padrão é uma estimativa local; provedores com um tokenizador
+        local exato devem sobrescrever este método.
+        """
+        return estimate_tokens(text)
+
+    # Modelo de embeddings usado por omissão; None se o provedor não os fornece
+    embedding_model = None
+
+    def get_embeddings(self, texts: list, model_name: str = None, task: str = "document") -> list:
+        """
+        Vetores de embeddings para uma lista de textos (recuperação de contexto, ai/retrieval.py).
+        Opcional: provedores sem embeddings deixam `embedding_model` a None e não sobrescrevem
+        este método, e o índice do projeto usa então o embedder local (sem rede).
+
+        Args:
+            texts (list): Os textos, no máximo umas dezenas por chamada.
+            model_name (str, optional): Modelo de embeddings; por omissão, `embedding_model`.
+            task (str): "document" para os trechos indexados, "query" para a pergunta
+                        (alguns modelos calculam-nos de forma diferente).
+
+        Returns:
+            list: Um vetor (lista de floats) por texto, pela mesma ordem, todos com a mesma dimensão.
+
+        Raises:
+            NotImplementedError: Se o provedor não fornece embeddings.
+            AIProviderError: Em caso de erro na API.
+        """
+        raise NotImplementedError(f"{type(self).__name__} não fornece embeddings.")
+
     @abstractmethod
     def get_available_models(self) -> list:
         """
@@ -38,4 +106,4 @@ class BaseAIProvider(ABC):
         pass
 
 # Você pode adicionar mais métodos abstratos aqui no futuro,
-# por exemplo, para embeddings, geração de imagem, etc., conforme necessário.
\ No newline at end of file
+# por exemplo, para geração de imagem, etc., conforme necessário.
\ No newline at end of file
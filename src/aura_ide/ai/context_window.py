@@ -0,0 +1,213 @@
+import json
+from array import array
+from collections import deque
+
+DEFAULT_CONTEXT_BUDGET_TOKENS = 8000
+DEFAULT_SUMMARY_BUDGET_TOKENS = 1000
+MESSAGE_OVERHEAD_TOKENS = 4 # Papel + delimitadores que as APIs acrescentam a cada mensagem
+SUMMARY_HEADER = "\n\nResumo da conversa anterior (mensagens mais antigas já não enviadas):\n"
+SUMMARY_LINE_MAX_CHARS = 200
+RETRIEVED_CONTEXT_HEADER = "\n\nTrechos do projeto possivelmente relevantes (recuperados automaticamente; podem estar incompletos):\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimativa local e barata do número de tokens de um texto (~4 caracteres por token,
+    a regra prática para texto em línguas latinas e código com os tokenizadores BPE atuais).
+    """
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
+
+class ConversationHistory:
+    """
+    Histórico do chat com a IA, limitado por um orçamento de tokens.
+
+    - A instrução de sistema fica sempre fixa no início do pedido.
+    - As mensagens são guardadas numa estrutura só de acréscimo, com a soma acumulada
+      de tokens pré-calculada; o total da janela é `cumulative[fim] - cumulative[início]`.
+    - Quando o orçamento é ultrapassado, as mensagens mais antigas saem da janela e
+      passam a um resumo rolante (anexado à instrução de sistema), também limitado.
+    - O contexto recuperado do projeto (`set_retrieved_context`) vai junto da pergunta a
+      que diz respeito, só no pedido (o histórico guarda a pergunta tal como foi escrita),
+      e conta para o orçamento. A instrução de sistema não muda de pergunta para pergunta.
+
+    Cada mensagem é contada uma vez ao ser acrescentada e sai da janela no máximo uma
+    vez, pelo que manter a janela custa O(1) amortizado por mensagem; montar o pedido
+    custa apenas o tamanho da janela, que é limitado pelo orçamento e não pela sessão.
+
+    Args:
+        budget_tokens (int): Máximo de tokens por pedido (sistema + resumo + contexto recuperado + janela).
+        summary_budget_tokens (int): Máximo de tokens do resumo rolante.
+        token_counter (callable): Função texto -> tokens. Por omissão, `estimate_tokens`;
+            normalmente recebe `BaseAIProvider.count_tokens` do provedor ativo.
+        summarizer (callable, optional): Função (resumo_atual, [mensagens_removidas]) -> novo resumo.
+            Por omissão usa um resumo extrativo local (início de cada mensagem), sem rede.
+    """
+
+    def __init__(self, budget_tokens: int = DEFAULT_CONTEXT_BUDGET_TOKENS,
+                 summary_budget_tokens: int = DEFAULT_SUMMARY_BUDGET_TOKENS,
+                 token_counter=None, summarizer=None):
+        self.budget_tokens = budget_tokens
+        self.summary_budget_tokens = summary_budget_tokens
+        self.token_counter = token_counter or estimate_tokens
+        self.summarizer = summarizer
+        self._system_message = None
+        self._system_tokens = 0
+        self._messages = []
+        self._cumulative = array('q', [0]) # _cumulative[i] = tokens das mensagens [0, i)
+        self._window_start = 0
+        self._summary_lines = deque() # (linha, tokens) do resumo extrativo
+        self._summary_text = ""
+        self._summary_tokens = 0
+        self._retrieved_context = None # (mensagem do usuário, texto)
+        self._retrieved_tokens = 0
+
+    # --- Instrução de sistema ---
+
+    def set_system_prompt(self, content: str):
+        if self._system_message is not None and self._system_message["content"] == content:
+            return
+        self._system_message = {"role": "system", "content": content}
+        self._system_tokens = self._count_message(self._system_message)
+        self._trim_to_budget()
+
+    @property
+    def system_prompt(self):
+        return self._system_message["content"] if self._system_message else None
+
+    # --- Contexto recuperado ---
+
+    def set_retrieved_context(self, message: dict, text: str):
+        """
+        Trechos do projeto a enviar junto de `message` (a pergunta do usuário, já no histórico,
+        comparada por identidade). Substitui o contexto anterior; texto vazio retira-o.
+        """
+        if not text:
+            self.clear_retrieved_context()
+            return
+        self._retrieved_context = (message, RETRIEVED_CONTEXT_HEADER + text)
+        self._retrieved_tokens = self.token_counter(self._retrieved_context[1])
+        self._trim_to_budget()
+
+    def clear_retrieved_context(self):
+        self._retrieved_context = None
+        self._retrieved_tokens = 0
+
+    @property
+    def retrieved_context_tokens(self) -> int:
+        return self._retrieved_tokens
+
+    # --- Mensagens ---
+
+    def append(self, message: dict):
+        """Acrescenta uma mensagem {'role': ..., 'content': ...} e ajusta a janela ao orçamento."""
+        if message.get("role") == "system":
+            self.set_system_prompt(message.get("content", ""))
+            return
+        self._messages.append(message)
+        self._cumulative.append(self._cumulative[-1] + self._count_message(message))
+        self._trim_to_budget()
+
+    def remove(self, message: dict) -> bool:
+        """
+        Remove uma mensagem (comparada por identidade), tipicamente a pergunta de uma
+        requisição cancelada ou falhada. Procura a partir do fim, onde estas mensagens
+        estão, e recalcula apenas as somas acumuladas seguintes.
+        """
+        for i in range(len(self._messages) - 1, self._window_start - 1, -1):
+            if self._messages[i] is message:
+                if self._retrieved_context is not None and self._retrieved_context[0] is message:
+                    self.clear_retrieved_context()
+                removed_tokens = self._cumulative[i + 1] - self._cumulative[i]
+                del self._messages[i]
+                del self._cumulative[i + 1]
+                for j in range(i + 1, len(self._cumulative)):
+                    self._cumulative[j] -= removed_tokens
+                return True
+        return False
+
+    def build_messages(self) -> list:
+        """Lista de mensagens a enviar ao provedor: sistema (+ resumo) e a janela atual."""
+        request_messages = []
+        if self._system_message is not None or self._summary_text:
+            system_content = self._system_message["content"] if self._system_message else ""
+            if self._summary_text:
+                system_content += SUMMARY_HEADER + self._summary_text
+            request_messages.append({"role": "system", "content": system_content})
+        window = self._messages[self._window_start:]
+        if self._retrieved_context is not None:
+            anchor, context = self._retrieved_context
+            window = [dict(message, content=(message.get("content") or "") + context) if message is anchor else message
+                      for message in window]
+        request_messages.extend(window)
+        return request_messages
+
+    def window_tokens(self) -> int:
+        """Tokens estimados do próximo pedido."""
+        return (self._system_tokens + self._summary_tokens + self._retrieved_tokens
+                + self._cumulative[-1] - self._cumulative[self._window_start])
+
+    def total_tokens(self) -> int:
+        """Tokens de toda a sessão (o que seria enviado sem gestão de contexto)."""
+        return self._system_tokens + self._cumulative[-1]
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __getitem__(self, index):
+        return self._messages[index]
+
+    def __iter__(self):
+        return iter(self._messages)
+
+    # --- Interno ---
+
+    def _count_message(self, message: dict) -> int:
+        tokens = self.token_counter(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+        for call in message.get("tool_calls") or (): # Chamadas de ferramentas: os argumentos também vão no pedido
+            tokens += self.token_counter(json.dumps(call.get("arguments"), ensure_ascii=False)) + MESSAGE_OVERHEAD_TOKENS
+        return tokens
+
+    def _trim_to_budget(self):
+        evicted = []
+        last_index = len(self._messages) - 1
+        # Nunca remover a última mensagem: sem ela o pedido não faz sentido
+        while self._window_start < last_index and self.window_tokens() > self.budget_tokens:
+            evicted.append(self._messages[self._window_start])
+            self._window_start += 1
+            # A janela deve começar com uma mensagem do usuário (exigência do Gemini, entre outros)
+            while (self._window_start < last_index
+                   and self._messages[self._window_start].get("role") != "user"):
+                evicted.append(self._messages[self._window_start])
+                self._window_start += 1
+            if self._retrieved_context is not None and any(message is self._retrieved_context[0] for message in evicted):
+                self.clear_retrieved_context() # A pergunta saiu da janela: o contexto dela também
+            # O resumo cresce à medida que a janela anda; conta para o orçamento no ciclo seguinte
+            self._add_to_summary(evicted)
+            evicted = []
+
+    def _add_to_summary(self, evicted_messages: list):
+        if not evicted_messages:
+            return
+        if self.summarizer is not None:
+            self._summary_text = self.summarizer(self._summary_text, evicted_messages)
+            self._summary_tokens = self.token_counter(self._summary_text) if self._summary_text else 0
+            return
+
+        # Resumo extrativo: primeira linha (truncada) de cada mensagem removida
+        for message in evicted_messages:
+            speaker = {"user": "Usuário", "tool": "Ferramenta"}.get(message.get("role"), "Aura")
+            first_line = (message.get("content") or "").strip().split("\n", 1)[0]
+            if len(first_line) > SUMMARY_LINE_MAX_CHARS:
+                first_line = first_line[:SUMMARY_LINE_MAX_CHARS] + "..."
+            line = f"- {speaker}: {first_line}"
+            line_tokens = self.token_counter(line) + 1
+            self._summary_lines.append((line, line_tokens))
+            self._summary_tokens += line_tokens
+        # Limitar o resumo ao seu orçamento, esquecendo primeiro as linhas mais antigas
+        while self._summary_lines and self._summary_tokens > self.summary_budget_tokens:
+            _, line_tokens = self._summary_lines.popleft()
+            self._summary_tokens -= line_tokens
+        self._summary_text = "\n".join(line for line, _ in self._summary_lines)
@@ -0,0 +1,90 @@
+class AIProviderError(Exception):
+    """
+    Erro base dos provedores de IA.
+
+    Attributes:
+        provider_name (str): Provedor que originou o erro (p.ex. "Gemini", "DeepSeek").
+        status_code (int): Código HTTP, quando existe.
+        retry_after (float): Segundos sugeridos pelo servidor antes de tentar de novo (429/503).
+        retryable (bool): Se vale a pena repetir a mesma requisição mais tarde.
+    """
+    retryable = False
+
+    def __init__(self, message: str, provider_name: str = None, status_code: int = None, retry_after: float = None):
+        super().__init__(message)
+        self.provider_name = provider_name
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AuthenticationError(AIProviderError):
+    """Chave de API inválida ou sem permissão (401/403)."""
+
+
+class InvalidRequestError(AIProviderError):
+    """Requisição rejeitada pelo provedor (4xx), p.ex. modelo inexistente ou histórico mal formado."""
+
+
+class ContentBlockedError(AIProviderError):
+    """O provedor recusou-se a responder (filtros de segurança)."""
+
+
+class InvalidResponseError(AIProviderError):
+    """Resposta num formato inesperado ou sem conteúdo."""
+    retryable = True
+
+
+class RateLimitError(AIProviderError):
+    """Limite de requisições excedido (429)."""
+    retryable = True
+
+
+class ServerError(AIProviderError):
+    """Falha do lado do provedor (5xx)."""
+    retryable = True
+
+
+class ProviderTimeoutError(AIProviderError):
+    """O provedor não respondeu dentro do timeout."""
+    retryable = True
+
+
+class ProviderConnectionError(AIProviderError):
+    """Falha de rede ao contactar o provedor (DNS, ligação recusada, TLS...)."""
+    retryable = True
+
+
+class CircuitOpenError(AIProviderError):
+    """O circuit breaker do provedor está aberto: demasiadas falhas recentes."""
+    retryable = True
+
+
+class AllProvidersFailedError(AIProviderError):
+    """Nenhum dos provedores configurados conseguiu responder."""
+
+    def __init__(self, message: str, errors: list = None):
+        super().__init__(message)
+        self.errors = errors or [] # Último erro de cada provedor tentado
+
+
+def error_from_http_status(status_code: int, message: str, provider_name: str = None, retry_after: float = None) -> AIProviderError:
+    """Escolhe a exceção tipada correspondente a um código HTTP de erro."""
+    if status_code in (401, 403):
+        error_class = AuthenticationError
+    elif status_code == 429:
+        error_class = RateLimitError
+    elif status_code in (408, 504):
+        error_class = ProviderTimeoutError
+    elif status_code >= 500:
+        error_class = ServerError
+    else:
+        error_class = InvalidRequestError
+    return error_class(message, provider_name=provider_name, status_code=status_code, retry_after=retry_after)
+
+
+def parse_retry_after(value) -> float:
+    """Interpreta o cabeçalho Retry-After (apenas a forma em segundos); None se ausente/inválido."""
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
@@ -1,5 +1,18 @@
+import threading
+from collections import OrderedDict
+
 import google.generativeai as genai
+from aura_ide.utils.instrumentation import instruments
 from .base_provider import BaseAIProvider
+from .errors import (
+    AIProviderError,
+    ContentBlockedError,
+    InvalidRequestError,
+    InvalidResponseError,
+    error_from_http_status
+)
+from .model_cache import DEFAULT_MODEL_LIST_TTL, ModelListCache
+from .tools import ToolCall
 
 # Modelos Gemini comuns.
 # O modelo exato pode depender da sua chave e dos modelos disponíveis para ela.
@@ -7,101 +20,313 @@ from .base_provider import BaseAIProvider
 # 'gemini-1.5-flash-latest' é mais rápido e mais barato, 'gemini-1.5-pro-latest' é mais capaz.
 # Para este exemplo, vamos permitir que o usuário escolha ou usar um padrão.
 DEFAULT_GEMINI_MODEL = "gemini-1.5-flash-latest"
+DEFAULT_GEMINI_EMBEDDING_MODEL = "models/text-embedding-004"
+
+MAX_CACHED_CHAT_SESSIONS = 8
+
+
+def _turn_fingerprint(message: dict):
+    # Identifica uma mensagem do histórico sem guardar o texto; o strip() acompanha o
+    # que a MainWindow grava no histórico a partir da resposta devolvida.
+    return (message.get("role"), hash((message.get("content") or "").strip()))
+
+
+def _gemini_role(message: dict) -> str:
+    # Os resultados das ferramentas vão do lado do usuário, como partes function_response
+    return "model" if message.get("role") == "assistant" else "user"
+
+
+def _gemini_parts(message: dict) -> list:
+    """As partes de uma mensagem do histórico: texto, chamadas de funções ou resultados."""
+    role = message.get("role")
+    content = message.get("content")
+    if role == "tool":
+        return [genai.protos.Part(function_response=genai.protos.FunctionResponse(
+            name=message.get("name") or "", response={"result": content or ""}))]
+    tool_calls = message.get("tool_calls") if role == "assistant" else None
+    if not tool_calls:
+        return [content]
+    parts = [content] if content else []
+    parts.extend(genai.protos.Part(function_call=genai.protos.FunctionCall(name=call["name"], args=call["arguments"]))
+                 for call in tool_calls)
+    return parts
+
+
+def _gemini_contents(messages: list) -> list:
+    """
+    O histórico no formato do Gemini: 'user'/'model', com mensagens seguidas do mesmo lado
+    (resultados de ferramentas e a mensagem do usuário a seguir) juntas num só conteúdo.
+    """
+    contents = []
+    for message in messages:
+        role = _gemini_role(message)
+        if contents and contents[-1]["role"] == role:
+            contents[-1]["parts"].extend(_gemini_parts(message))
+        else:
+            contents.append({"role": role, "parts": _gemini_parts(message)})
+    return contents
+
+
+def _function_declarations(tools: list) -> list:
+    return [{"function_declarations": [{"name": spec.name, "description": spec.description, "parameters": spec.schema()}
+                                       for spec in tools]}]
+
+
+class _ChatSessionEntry:
+    """Sessão de chat Gemini reutilizável entre mensagens consecutivas da mesma conversa."""
+    __slots__ = ("model", "chat_session", "history_fingerprints", "prompt_fingerprints")
+
+    def __init__(self, model, chat_session, history_fingerprints: tuple):
+        self.model = model
+        self.chat_session = chat_session
+        self.history_fingerprints = history_fingerprints # Uma por mensagem já em chat_session.history
+        self.prompt_fingerprints = () # As do prompt em curso, que entram no histórico no check-in
+
 
 class GeminiProvider(BaseAIProvider):
-    def __init__(self, api_key: str):
+    embedding_model = DEFAULT_GEMINI_EMBEDDING_MODEL
+    supports_tools = True
+
+    def __init__(self, api_key: str, on_models_updated=None, model_list_ttl: float = DEFAULT_MODEL_LIST_TTL):
+        """
+        Args:
+            api_key (str): Chave da API Gemini.
+            on_models_updated (callable, optional): Chamado com a nova lista de modelos quando
+                a atualização em segundo plano termina. Pode ser chamado a partir de outra thread.
+            model_list_ttl (float): Validade (s) da lista de modelos guardada em disco.
+        """
         if not api_key:
             raise ValueError("API Key para Gemini não fornecida.")
+        self.on_models_updated = on_models_updated
+        self._model_list_cache = ModelListCache("gemini", api_key, ttl=model_list_ttl)
+        # LRU de (modelo, instrução de sistema) -> _ChatSessionEntry
+        self._chat_sessions = OrderedDict()
+        self._chat_sessions_lock = threading.Lock()
         try:
             genai.configure(api_key=api_key)
-            # Teste rápido para ver se a configuração funcionou (opcional, mas bom)
-            # Tentaremos listar modelos para verificar a chave indiretamente.
-            self.available_models_list = [m.name.replace("models/", "") for m in genai.list_models() if 'generateContent' in m.supported_generation_methods]
-            if not self.available_models_list: # Se a lista estiver vazia após o filtro
-                raise Exception("Nenhum modelo Gemini adequado (com generateContent) encontrado ou chave inválida.")
-            print(f"Modelos Gemini disponíveis (com generateContent): {self.available_models_list}")
-
         except Exception as e:
-            print(f"Erro ao configurar a API Gemini ou listar modelos: {e}")
+            print(f"Erro ao configurar a API Gemini: {e}")
             # Re-levantar a exceção para que a MainWindow possa tratá-la
             raise ValueError(f"Falha na configuração do GeminiProvider: {e}") from e
 
+        # A lista de modelos vem da cache em disco; list_models() (rede) corre em segundo
+        # plano para não bloquear o arranque do IDE.
+        cached_models, is_fresh = self._model_list_cache.load()
+        if cached_models:
+            self.available_models_list = cached_models
+            self.models_verified = True
+            print(f"Modelos Gemini disponíveis (cache): {self.available_models_list}")
+            if not is_fresh:
+                self.refresh_models_in_background()
+        else:
+            # Primeira execução: usar o modelo padrão até a lista real chegar
+            self.available_models_list = [DEFAULT_GEMINI_MODEL]
+            self.models_verified = False
+            self.refresh_models_in_background()
 
-    def get_chat_completion(self, messages: list, model_name: str = None) -> str:
+    def refresh_models(self) -> list:
         """
-        Obtém uma completude de chat da API Gemini.
+        Consulta `genai.list_models()` (bloqueante), atualiza a cache em disco e
+        notifica `on_models_updated`. Também serve para validar a chave de API.
+        """
+        models = [m.name.replace("models/", "") for m in genai.list_models() if 'generateContent' in m.supported_generation_methods]
+        if not models: # Se a lista estiver vazia após o filtro
+            raise Exception("Nenhum modelo Gemini adequado (com generateContent) encontrado ou chave inválida.")
+        self.available_models_list = models
+        self.models_verified = True
+        self._model_list_cache.store(models)
+        print(f"Modelos Gemini disponíveis (com generateContent): {models}")
+        if self.on_models_updated:
+            self.on_models_updated(models[:])
+        return models
+
+    def refresh_models_in_background(self):
+        def refresh_worker():
+            try:
+                self.refresh_models()
+            except Exception as e:
+                print(f"Erro ao listar modelos Gemini (chave inválida ou sem rede?): {e}")
+
+        threading.Thread(target=refresh_worker, name="gemini-list-models", daemon=True).start()
+
+    def _checkout_chat_session(self, messages: list, model_name: str = None, tools: list = None):
+        """
+        Obtém a sessão de chat para esta requisição e a mensagem nova a enviar.
+
         A API do Gemini espera um histórico de chat um pouco diferente (sem 'system' role diretamente no chat).
-        A mensagem de sistema pode ser passada como `system_instruction` no `GenerativeModel`.
+        A mensagem de sistema (primeira mensagem do histórico) é passada como `system_instruction`
+        no `GenerativeModel`, e faz parte da chave da LRU de sessões (tal como as ferramentas).
+
+        O prompt atual são as mensagens depois da última resposta do modelo: a pergunta do
+        usuário ou os resultados das ferramentas que o modelo pediu (e o que vier com eles).
+        Se a sessão em cache já contém exatamente o histórico anterior desta requisição (mensagem
+        a mensagem, tal como foram enviadas), só esse prompt é enviado; caso contrário a sessão é
+        recriada com o histórico da requisição. Assim, quando a janela da conversa é cortada ou
+        resumida, ou quando o contexto recuperado do projeto muda de pergunta, a sessão não
+        continua a reenviar turnos antigos (nem o contexto que foi junto deles). A sessão é
+        retirada da LRU enquanto está em uso (ver `_checkin_chat_session`).
+
+        Returns:
+            tuple: (chave, entrada, partes_do_prompt_atual).
+
+        Raises:
+            InvalidRequestError: Modelo indisponível ou histórico que não termina no usuário.
         """
         selected_model_name = model_name if model_name else DEFAULT_GEMINI_MODEL
-        
-        # A API Gemini espera 'parts' dentro de 'content' e usa 'user' e 'model' para roles.
-        # A mensagem de 'system' pode ser tratada como instrução do modelo.
+
+        # Verificar se o modelo está realmente na lista de modelos disponíveis
+        # (enquanto a lista ainda não foi obtida da API, aceitar qualquer nome).
+        if self.models_verified and selected_model_name not in self.available_models_list: # Checa contra o nome limpo
+            raise InvalidRequestError(f"Modelo Gemini '{selected_model_name}' não está entre os disponíveis ou adequados.", provider_name="Gemini")
+
         system_instruction_content = None
-        gemini_chat_history = []
-
-        for msg in messages:
-            role = msg.get("role")
-            content = msg.get("content")
-            if role == "system":
-                system_instruction_content = content # Captura a última instrução de sistema
-            elif role == "user":
-                gemini_chat_history.append({'role': 'user', 'parts': [content]})
-            elif role == "assistant": # A API Gemini usa 'model' para as respostas do assistente
-                gemini_chat_history.append({'role': 'model', 'parts': [content]})
-        
-        try:
+        first_turn_index = 0
+        if messages and messages[0].get("role") == "system":
+            system_instruction_content = messages[0].get("content")
+            first_turn_index = 1
+
+        # O histórico vai até à última resposta do modelo; o resto é o prompt atual.
+        prompt_start = len(messages)
+        while prompt_start > first_turn_index and messages[prompt_start - 1].get("role") != "assistant":
+            prompt_start -= 1
+        if prompt_start == len(messages):
+            raise InvalidRequestError("A última mensagem para Gemini deve ser do usuário.", provider_name="Gemini")
+        current_prompt_parts = []
+        for message in messages[prompt_start:]:
+            current_prompt_parts.extend(_gemini_parts(message))
+
+        session_key = (selected_model_name, system_instruction_content, tuple(spec.name for spec in tools or ()))
+        with self._chat_sessions_lock:
+            entry = self._chat_sessions.pop(session_key, None)
+
+        history_messages = messages[first_turn_index:prompt_start]
+        history_fingerprints = tuple(_turn_fingerprint(message) for message in history_messages)
+        prompt_fingerprints = tuple(_turn_fingerprint(message) for message in messages[prompt_start:])
+        if entry is not None and history_messages and entry.history_fingerprints == history_fingerprints:
+            entry.prompt_fingerprints = prompt_fingerprints
+            return session_key, entry, current_prompt_parts # Caminho rápido: só a nova mensagem
+
+        # Recriar a sessão a partir do histórico completo.
+        # A API Gemini espera 'parts' dentro de 'content' e usa 'user' e 'model' para roles.
+        gemini_chat_history = _gemini_contents(history_messages)
+
+        if entry is not None:
+            model = entry.model # O GenerativeModel não depende do histórico: reutilizar
+        else:
             # Adicionar "models/" ao nome do modelo se não estiver presente, pois a API do genai espera.
             if not selected_model_name.startswith("models/"):
                 api_model_name_formatted = f"models/{selected_model_name}"
             else:
                 api_model_name_formatted = selected_model_name
-
-            # Verificar se o modelo formatado está realmente na lista de modelos disponíveis
-            # Isto é uma checagem extra, já que list_models() já filtrou.
-            if selected_model_name not in self.available_models_list: # Checa contra o nome limpo
-                 return f"Erro: Modelo Gemini '{selected_model_name}' não está entre os disponíveis ou adequados."
-
-
             model_args = {}
             if system_instruction_content:
                 model_args["system_instruction"] = system_instruction_content
-            
+            if tools:
+                model_args["tools"] = _function_declarations(tools)
             model = genai.GenerativeModel(api_model_name_formatted, **model_args)
 
-            # Se houver histórico, podemos iniciar um chat para manter o contexto.
-            # Se for uma única pergunta (última mensagem é do usuário), podemos usar generate_content diretamente.
-            # Para simplificar, vamos tratar a última mensagem como o prompt atual, e o resto como histórico.
-            
-            if not gemini_chat_history or gemini_chat_history[-1]['role'] != 'user':
-                return "Erro: A última mensagem para Gemini deve ser do usuário."
+        entry = _ChatSessionEntry(model, model.start_chat(history=gemini_chat_history), history_fingerprints)
+        entry.prompt_fingerprints = prompt_fingerprints
+        return session_key, entry, current_prompt_parts
+
+    def _checkin_chat_session(self, session_key, entry: _ChatSessionEntry, reply_text: str):
+        # A sessão ganhou o prompt do usuário e a resposta do modelo
+        entry.history_fingerprints += entry.prompt_fingerprints + (_turn_fingerprint({"role": "assistant", "content": reply_text}),)
+        entry.prompt_fingerprints = ()
+        with self._chat_sessions_lock:
+            self._chat_sessions[session_key] = entry
+            self._chat_sessions.move_to_end(session_key)
+            while len(self._chat_sessions) > MAX_CACHED_CHAT_SESSIONS:
+                self._chat_sessions.popitem(last=False)
 
-            current_prompt_parts = gemini_chat_history.pop()['parts'] # Pega a última mensagem do usuário
+    def get_chat_completion(self, messages: list, model_name: str = None) -> str:
+        """
+        Obtém uma completude de chat da API Gemini.
 
-            if gemini_chat_history: # Se houver histórico anterior
-                chat_session = model.start_chat(history=gemini_chat_history)
-                response = chat_session.send_message(current_prompt_parts)
-            else: # Sem histórico anterior, apenas um prompt
-                response = model.generate_content(current_prompt_parts)
+        Raises:
+            AIProviderError: Uma das exceções tipadas de ai/errors.py.
+        """
+        try:
+            session_key, entry, current_prompt_parts = self._checkout_chat_session(messages, model_name)
+            response = entry.chat_session.send_message(current_prompt_parts)
 
             if response.candidates and response.candidates[0].content.parts:
-                return response.candidates[0].content.parts[0].text.strip()
+                reply_text = response.candidates[0].content.parts[0].text.strip()
+                self._checkin_chat_session(session_key, entry, reply_text)
+                return reply_text
             elif response.prompt_feedback and response.prompt_feedback.block_reason:
-                return f"Resposta bloqueada pela API Gemini: {response.prompt_feedback.block_reason_message}"
+                raise ContentBlockedError(f"Resposta bloqueada pela API Gemini: {response.prompt_feedback.block_reason_message}", provider_name="Gemini")
             else:
                 # Tentar obter o texto mesmo que a estrutura não seja a esperada
                 try:
                     return response.text.strip()
-                except AttributeError:
+                except (AttributeError, ValueError):
                     print(f"Resposta inesperada ou vazia da API Gemini: {response}")
-                    return "Erro: Resposta inesperada ou vazia da API Gemini."
+                    raise InvalidResponseError("Resposta inesperada ou vazia da API Gemini.", provider_name="Gemini")
 
         except Exception as e:
-            print(f"Erro ao chamar a API Gemini: {e}")
-            # Tentar extrair mais detalhes se for um erro da API do Google
-            if hasattr(e, 'message'): # Muitos erros da API Google têm um atributo 'message'
-                return f"Erro na API Gemini: {e.message}"
-            return f"Erro ao comunicar com a API Gemini: {e}"
+            raise self._translate_error(e) from e
+
+    def stream_chat_completion(self, messages: list, model_name: str = None, tools: list = None):
+        """
+        Obtém uma completude de chat da API Gemini em streaming (`stream=True`),
+        produzindo o texto de cada pedaço assim que chega. Com `tools`, as partes
+        function_call da resposta são produzidas como ToolCall (a chamada automática
+        de funções do SDK não é usada: as ferramentas correm na MainWindow).
+        """
+        try:
+            session_key, entry, current_prompt_parts = self._checkout_chat_session(messages, model_name, tools)
+            response = entry.chat_session.send_message(current_prompt_parts, stream=True)
+
+            # Se o consumidor fechar o gerador a meio, a sessão fica incompleta e não volta à LRU
+            reply_chunks = []
+            for chunk in response:
+                if chunk.candidates and chunk.candidates[0].content.parts:
+                    chunk_text = ""
+                    for part in chunk.candidates[0].content.parts:
+                        if "function_call" in part:
+                            function_call = part.function_call
+                            fields = type(function_call).to_dict(function_call)
+                            yield ToolCall(function_call.name, fields.get("args") or {}, fields.get("id") or None, native=True)
+                        else:
+                            chunk_text += part.text
+                    if chunk_text:
+                        reply_chunks.append(chunk_text)
+                        yield chunk_text
+                elif chunk.prompt_feedback and chunk.prompt_feedback.block_reason:
+                    raise ContentBlockedError(f"Resposta bloqueada pela API Gemini: {chunk.prompt_feedback.block_reason_message}", provider_name="Gemini")
+            self._checkin_chat_session(session_key, entry, "".join(reply_chunks))
+
+        except Exception as e:
+            raise self._translate_error(e) from e
+
+    def get_embeddings(self, texts: list, model_name: str = None, task: str = "document") -> list:
+        """Embeddings de vários textos numa só chamada (`embed_content` aceita uma lista)."""
+        try:
+            response = genai.embed_content(
+                model=model_name or self.embedding_model,
+                content=list(texts),
+                task_type="retrieval_query" if task == "query" else "retrieval_document"
+            )
+            vectors = response["embedding"]
+        except Exception as e:
+            raise self._translate_error(e) from e
+        if len(vectors) != len(texts):
+            raise InvalidResponseError("Número inesperado de embeddings na resposta da API Gemini.", provider_name="Gemini")
+        return vectors
+
+    def _translate_error(self, error: Exception) -> AIProviderError:
+        """Converte exceções do SDK (google.api_core) nas exceções tipadas de ai/errors.py."""
+        if isinstance(error, AIProviderError):
+            return error
+        print(f"Erro ao chamar a API Gemini: {error}")
+        instruments.log("ai.provider_error", level="error", provider="Gemini", status=getattr(error, 'code', None), error=str(error))
+        # Muitos erros da API Google têm 'message' e 'code' (código HTTP equivalente)
+        message = f"Erro na API Gemini: {getattr(error, 'message', None) or error}"
+        status_code = getattr(error, 'code', None)
+        if isinstance(status_code, int) and status_code >= 400:
+            return error_from_http_status(status_code, message, provider_name="Gemini")
+        return AIProviderError(message, provider_name="Gemini")
 
     def get_available_models(self) -> list:
         """
@@ -0,0 +1,57 @@
+import requests
+
+from .openai_compatible_provider import OpenAICompatibleProvider
+
+LOCAL_SERVER_URL = "http://127.0.0.1:8080/v1/chat/completions" # llama.cpp (llama-server); vLLM usa a porta 8000
+MODELS_TIMEOUT_SECONDS = 3.0 # A lista de modelos é pedida no arranque: um servidor desligado não o pode atrasar
+
+
+class GenericOpenAIProvider(OpenAICompatibleProvider):
+    """
+    Qualquer servidor com a API `/v1/chat/completions` da OpenAI, em particular servidores
+    de inferência locais (llama.cpp, vLLM, Ollama, LM Studio): sem rede nem chave, e com a
+    latência de uma ligação em localhost. A chave é opcional. Os modelos vêm de
+    `GET /v1/models` (ver `refresh_models`), ou de `model` se o servidor não os listar.
+
+    Args:
+        api_url (str): URL completo do endpoint de chat (…/v1/chat/completions).
+        model (str, optional): Modelo pedido por omissão; sem ele, o primeiro que o servidor listar.
+        api_key (str, optional): Enviada como "Authorization: Bearer" se existir.
+        label (str): Nome do provedor nas mensagens de erro e na UI.
+    """
+    requires_api_key = False
+
+    def __init__(self, api_url: str = LOCAL_SERVER_URL, model: str = None, api_key: str = None,
+                 label: str = "OpenAI-compatível", http_pool=None):
+        self.provider_label = label
+        super().__init__(api_key, api_url=api_url, http_pool=http_pool)
+        self.default_model = model or None
+        self.models = [model] if model else []
+
+    @property
+    def models_url(self) -> str:
+        base_url = self.api_url.rstrip("/")
+        if base_url.endswith("/chat/completions"):
+            base_url = base_url[:-len("/chat/completions")]
+        return base_url + "/models"
+
+    def refresh_models(self) -> list:
+        """Pede a lista de modelos ao servidor (bloqueante; chamado fora da thread da UI)."""
+        try:
+            response = self.http_pool.get(self.models_url, headers=self.headers, timeout=MODELS_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"AVISO: {self.provider_label}: não foi possível obter a lista de modelos de {self.models_url}: {e}")
+            return self.models
+        listed = [entry.get("id") for entry in data.get("data", []) if isinstance(entry, dict) and entry.get("id")] \
+            if isinstance(data, dict) else []
+        if listed:
+            # O modelo configurado fica primeiro, mesmo que o servidor o chame de outra forma
+            self.models = ([self.default_model] if self.default_model and self.default_model not in listed else []) + listed
+            if self.default_model is None:
+                self.default_model = listed[0]
+        return self.models
+
+    def get_available_models(self) -> list:
+        return list(self.models)
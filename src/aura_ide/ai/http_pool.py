@@ -0,0 +1,153 @@
+import threading
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try: # HTTP/2 é opcional: requer 'httpx[http2]' (não está no requirements.txt)
+    import httpx
+except ImportError:
+    httpx = None
+
+DEFAULT_MAX_CONNECTIONS = 8
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 30.0
+
+
+class _HTTPXResponseAdapter:
+    """
+    Expõe uma resposta do httpx com a interface de `requests.Response` usada pelos
+    provedores (status_code, reason, text, json(), iter_lines(), raise_for_status()),
+    para que o código dos provedores não dependa do backend HTTP escolhido.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = response.headers
+
+    @property
+    def text(self):
+        self._response.read() # Respostas em streaming só têm corpo depois de lidas
+        return self._response.text
+
+    def json(self):
+        self._response.read()
+        return self._response.json()
+
+    def iter_lines(self, decode_unicode=True):
+        return self._response.iter_lines()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} {self.reason}", response=self)
+
+
+class HTTPClientPool:
+    """
+    Pool de ligações HTTP partilhado pelos provedores de IA.
+
+    - Keep-alive: as ligações TCP/TLS são reutilizadas entre mensagens, evitando um
+      novo handshake por requisição (como acontecia com `requests.post` avulso).
+    - Concorrência limitada: no máximo `max_connections` requisições em simultâneo;
+      as restantes esperam por uma ligação livre.
+    - Timeouts configuráveis de conexão e de leitura.
+    - HTTP/2 opcional (multiplexação numa única ligação) se o `httpx` estiver instalado;
+      caso contrário, usa HTTP/1.1 com keep-alive via `requests.Session`.
+
+    Erros de transporte são sempre levantados como exceções de `requests`, qualquer
+    que seja o backend.
+    """
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 http2: bool = False, verify=True):
+        self.max_connections = max_connections
+        self.timeout = (connect_timeout, read_timeout)
+        self.verify = verify
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+        self.http2 = bool(http2 and httpx is not None)
+        if http2 and not self.http2:
+            print("AVISO: HTTP/2 pedido mas 'httpx[http2]' não está instalado; a usar HTTP/1.1 com keep-alive.")
+
+        if self.http2:
+            self._client = httpx.Client(
+                http2=True,
+                verify=verify,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            )
+        else:
+            self._client = requests.Session()
+            # pool_maxsize = ligações mantidas vivas por host; pool_block evita abrir ligações extra
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_connections, pool_block=True)
+            self._client.mount("https://", adapter)
+            self._client.mount("http://", adapter)
+
+    def post(self, url: str, headers: dict = None, json: dict = None):
+        """POST com corpo completo; devolve um objeto com a interface de `requests.Response`."""
+        with self._slots:
+            if self.http2:
+                try:
+                    return _HTTPXResponseAdapter(self._client.post(url, headers=headers, json=json))
+                except httpx.TimeoutException as e:
+                    raise requests.exceptions.Timeout(str(e)) from e
+                except httpx.TransportError as e:
+                    raise requests.exceptions.ConnectionError(str(e)) from e
+            # verify é passado por chamada: em Session.verify seria sobreposto por REQUESTS_CA_BUNDLE
+            return self._client.post(url, headers=headers, json=json, timeout=self.timeout, verify=self.verify)
+
+    def get(self, url: str, headers: dict = None, timeout: float = None):
+        """GET (p.ex. a lista de modelos); `timeout` substitui os de conexão e leitura do pool."""
+        with self._slots:
+            if self.http2:
+                try:
+                    return _HTTPXResponseAdapter(self._client.get(url, headers=headers, timeout=timeout or httpx.USE_CLIENT_DEFAULT))
+                except httpx.TimeoutException as e:
+                    raise requests.exceptions.Timeout(str(e)) from e
+                except httpx.TransportError as e:
+                    raise requests.exceptions.ConnectionError(str(e)) from e
+            return self._client.get(url, headers=headers, timeout=timeout or self.timeout, verify=self.verify)
+
+    @contextmanager
+    def stream(self, url: str, headers: dict = None, json: dict = None):
+        """
+        POST em streaming. A ligação (e a vaga de concorrência) fica reservada até
+        o bloco `with` terminar, e volta depois ao pool para ser reutilizada.
+        """
+        with self._slots:
+            if self.http2:
+                try:
+                    with self._client.stream("POST", url, headers=headers, json=json) as response:
+                        yield _HTTPXResponseAdapter(response)
+                except httpx.TimeoutException as e:
+                    raise requests.exceptions.Timeout(str(e)) from e
+                except httpx.TransportError as e:
+                    raise requests.exceptions.ConnectionError(str(e)) from e
+            else:
+                with self._client.post(url, headers=headers, json=json, stream=True, timeout=self.timeout, verify=self.verify) as response:
+                    yield response
+
+    def close(self):
+        self._client.close()
+
+
+_shared_pools = {}
+_shared_pools_lock = threading.Lock()
+
+
+def get_shared_http_pool(name: str = "default", **pool_options) -> HTTPClientPool:
+    """
+    Devolve o pool partilhado com este nome, criando-o na primeira chamada.
+    As opções só têm efeito na criação; chamadas seguintes reutilizam o mesmo pool,
+    para que todos os provedores compatíveis com OpenAI partilhem as mesmas ligações.
+    """
+    with _shared_pools_lock:
+        pool = _shared_pools.get(name)
+        if pool is None:
+            pool = HTTPClientPool(**pool_options)
+            _shared_pools[name] = pool
+        return pool
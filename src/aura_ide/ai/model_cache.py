@@ -0,0 +1,57 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from aura_ide.utils.app_dirs import get_cache_dir
+
+DEFAULT_MODEL_LIST_TTL = 24 * 60 * 60 # 24h: a lista de modelos de um provedor muda raramente
+
+
+class ModelListCache:
+    """
+    Cache persistente (JSON em disco) das listas de modelos de cada provedor, para que
+    o arranque do IDE não tenha de esperar por uma chamada de rede como `list_models()`.
+
+    As entradas são indexadas por provedor e por um hash da chave de API (a chave em si
+    nunca é gravada), porque contas diferentes podem ter acesso a modelos diferentes.
+    """
+
+    def __init__(self, provider_name: str, api_key: str, ttl: float = DEFAULT_MODEL_LIST_TTL, cache_path: str = None):
+        self.ttl = ttl
+        self.cache_path = cache_path or os.path.join(get_cache_dir(), "model_lists.json")
+        key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+        self.entry_key = f"{provider_name}:{key_hash}"
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Devolve (modelos, está_fresco) ou (None, False) se não houver nada em cache.
+        """
+        entry = self._read_all().get(self.entry_key)
+        if not entry or not entry.get("models"):
+            return None, False
+        is_fresh = (time.time() - entry.get("fetched_at", 0)) < self.ttl
+        return list(entry["models"]), is_fresh
+
+    def store(self, models: list):
+        with self._lock:
+            all_entries = self._read_all()
+            all_entries[self.entry_key] = {"models": list(models), "fetched_at": time.time()}
+            # Escrita atómica: outro processo do IDE pode estar a ler o mesmo ficheiro
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(all_entries, f)
+                os.replace(tmp_path, self.cache_path)
+            except OSError as e:
+                print(f"AVISO: Não foi possível gravar a cache de modelos em '{self.cache_path}': {e}")
+
+    def _read_all(self) -> dict:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
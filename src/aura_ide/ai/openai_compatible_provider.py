@@ -0,0 +1,210 @@
+import json
+
+import requests
+
+try: # Tokenizador exato opcional (não está no requirements.txt)
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from aura_ide.utils.instrumentation import instruments
+from .base_provider import BaseAIProvider
+from .errors import (
+    InvalidResponseError,
+    ProviderConnectionError,
+    ProviderTimeoutError,
+    error_from_http_status,
+    parse_retry_after
+)
+from .http_pool import get_shared_http_pool
+from .sse import iter_sse_data
+from .tools import ToolCall
+
+OPENAI_COMPATIBLE_POOL_NAME = "openai_compatible"
+
+_tiktoken_encoding = None
+
+
+def _api_messages(messages: list) -> list:
+    """O histórico no formato da API: chamadas de ferramentas com os argumentos em texto JSON."""
+    converted = []
+    for message in messages:
+        role = message.get("role")
+        if role == "assistant" and message.get("tool_calls"):
+            converted.append({
+                "role": "assistant",
+                "content": message.get("content") or None,
+                "tool_calls": [{"id": call["id"], "type": "function",
+                                "function": {"name": call["name"],
+                                             "arguments": json.dumps(call["arguments"], ensure_ascii=False)}}
+                               for call in message["tool_calls"]],
+            })
+        elif role == "tool":
+            converted.append({"role": "tool", "tool_call_id": message.get("tool_call_id"), "content": message.get("content") or ""})
+        else:
+            converted.append({"role": role, "content": message.get("content")})
+    return converted
+
+
+def _api_tools(tools: list) -> list:
+    return [{"type": "function", "function": {"name": spec.name, "description": spec.description, "parameters": spec.schema()}}
+            for spec in tools]
+
+
+def _get_tiktoken_encoding():
+    # Carregado na primeira utilização: a criação do encoding lê as tabelas BPE do disco
+    global _tiktoken_encoding, tiktoken
+    if _tiktoken_encoding is None and tiktoken is not None:
+        try:
+            _tiktoken_encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e: # Ex.: tabelas BPE indisponíveis offline
+            print(f"AVISO: tiktoken indisponível, a estimar tokens localmente: {e}")
+            tiktoken = None # Não voltar a tentar a cada mensagem
+    return _tiktoken_encoding
+
+
+class OpenAICompatibleProvider(BaseAIProvider):
+    """
+    Base para provedores que falam o formato REST `/v1/chat/completions` da OpenAI
+    (DeepSeek e afins). Todas as instâncias partilham o mesmo HTTPClientPool, pelo que
+    as ligações keep-alive são reutilizadas entre mensagens e entre provedores.
+    """
+    provider_label = "OpenAI-compatível" # Usado nas mensagens de erro
+    default_model = None
+    supports_tools = True
+    requires_api_key = True # Servidores locais (llama.cpp, vLLM...) normalmente não pedem chave
+
+    def __init__(self, api_key: str, api_url: str, http_pool=None):
+        if not api_key and self.requires_api_key:
+            raise ValueError(f"API Key para {self.provider_label} não fornecida.")
+        self.api_key = api_key
+        self.api_url = api_url # Permite apontar para um servidor local (testes/benchmarks)
+        self.http_pool = http_pool if http_pool is not None else get_shared_http_pool(OPENAI_COMPATIBLE_POOL_NAME)
+        self.headers = {"Content-Type": "application/json"}
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {self.api_key}"
+
+    def get_chat_completion(self, messages: list, model_name: str = None) -> str:
+        """
+        Obtém uma completude de chat da API.
+        """
+        selected_model = model_name if model_name else self.default_model
+
+        payload = {
+            "model": selected_model,
+            "messages": _api_messages(messages),
+            # Você pode adicionar outros parâmetros aqui, como:
+            # "temperature": 0.7,
+            # "max_tokens": 2048,
+            # "stream": False # Para streaming, ver stream_chat_completion
+        }
+
+        try:
+            response = self.http_pool.post(self.api_url, headers=self.headers, json=payload)
+            response.raise_for_status()  # Levanta HTTPError para respostas de erro (4xx ou 5xx)
+            response_data = response.json()
+        except ValueError as json_err: # Corpo que não é JSON (antes de RequestException: o JSONDecodeError do requests é ambos)
+            raise InvalidResponseError(f"Resposta da API {self.provider_label} não é JSON válido: {json_err}", provider_name=self.provider_label) from json_err
+        except requests.exceptions.RequestException as req_err:
+            raise self._translate_request_error(req_err) from req_err
+
+        if isinstance(response_data, dict) and response_data.get("choices") and len(response_data["choices"]) > 0:
+            ai_message = response_data["choices"][0].get("message", {}).get("content")
+            if ai_message:
+                return ai_message.strip()
+            raise InvalidResponseError("Resposta da IA não continha conteúdo de mensagem.", provider_name=self.provider_label)
+        # Log detalhado da resposta pode ser útil aqui
+        print(f"Resposta inesperada da API {self.provider_label}: {response_data}")
+        raise InvalidResponseError(f"Formato de resposta inesperado da API {self.provider_label}.", provider_name=self.provider_label)
+
+    def stream_chat_completion(self, messages: list, model_name: str = None, tools: list = None):
+        """
+        Obtém uma completude de chat em streaming (SSE), produzindo o texto de cada
+        'delta' assim que chega. Com `tools`, as chamadas de funções chegam aos bocados
+        (nome e argumentos em fragmentos, por índice) e são produzidas como ToolCall
+        no fim do stream, já completas.
+        """
+        selected_model = model_name if model_name else self.default_model
+        payload = {
+            "model": selected_model,
+            "messages": _api_messages(messages),
+            "stream": True,
+        }
+        if tools:
+            payload["tools"] = _api_tools(tools)
+        tool_call_parts = {} # índice -> {"id", "name", "arguments": [fragmentos]}
+
+        try:
+            with self.http_pool.stream(self.api_url, headers=self.headers, json=payload) as response:
+                response.raise_for_status()
+                # Linhas em bytes: sem charset no Content-Type, o requests decodificaria
+                # text/event-stream como ISO-8859-1; iter_sse_data decodifica-as em UTF-8
+                for data in iter_sse_data(response.iter_lines()):
+                    if data == "[DONE]":
+                        break
+                    try:
+                        event = json.loads(data)
+                    except json.JSONDecodeError:
+                        print(f"Evento SSE inválido da API {self.provider_label}: {data!r}")
+                        continue
+                    choices = event.get("choices") or []
+                    if not choices:
+                        continue
+                    delta = choices[0].get("delta") or {}
+                    delta_text = delta.get("content")
+                    if delta_text:
+                        yield delta_text
+                    for fragment in delta.get("tool_calls") or ():
+                        parts = tool_call_parts.setdefault(fragment.get("index", len(tool_call_parts)),
+                                                           {"id": None, "name": "", "arguments": []})
+                        function = fragment.get("function") or {}
+                        parts["id"] = fragment.get("id") or parts["id"]
+                        parts["name"] += function.get("name") or ""
+                        parts["arguments"].append(function.get("arguments") or "")
+        except requests.exceptions.RequestException as req_err:
+            raise self._translate_request_error(req_err) from req_err
+        for _, parts in sorted(tool_call_parts.items()):
+            yield ToolCall.from_json_arguments(parts["name"], "".join(parts["arguments"]), parts["id"], native=True)
+
+    def _translate_request_error(self, req_err):
+        """Converte uma exceção do `requests` na exceção tipada correspondente (ver ai/errors.py)."""
+        if isinstance(req_err, requests.exceptions.HTTPError) and req_err.response is not None:
+            error_details = self._http_error_details(req_err)
+            status_code = req_err.response.status_code
+            print(f"Erro HTTP da API {self.provider_label}: {req_err} - Detalhes: {error_details}")
+            instruments.log("ai.provider_error", level="error", provider=self.provider_label, status=status_code, error=error_details or str(req_err))
+            return error_from_http_status(
+                status_code,
+                f"Erro na API {self.provider_label}: {status_code} - {error_details if error_details else req_err.response.reason}",
+                provider_name=self.provider_label,
+                retry_after=parse_retry_after(req_err.response.headers.get("Retry-After"))
+            )
+        print(f"Erro de requisição para API {self.provider_label}: {req_err}")
+        instruments.log("ai.provider_error", level="error", provider=self.provider_label, error=f"{type(req_err).__name__}: {req_err}")
+        if isinstance(req_err, requests.exceptions.Timeout):
+            return ProviderTimeoutError(f"Timeout na API {self.provider_label}: {req_err}", provider_name=self.provider_label)
+        return ProviderConnectionError(f"Erro de conexão com a API {self.provider_label}: {req_err}", provider_name=self.provider_label)
+
+    def _http_error_details(self, http_err) -> str:
+        # Tentar obter mais detalhes do corpo da resposta se for um erro da API
+        try:
+            error_data = http_err.response.json()
+            return error_data.get("error", {}).get("message", "") if isinstance(error_data, dict) else ""
+        except ValueError:
+            return http_err.response.text # Se não for JSON
+
+    def count_tokens(self, text: str, model_name: str = None) -> int:
+        """
+        Conta tokens com o tokenizador BPE 'cl100k_base' se o `tiktoken` estiver instalado
+        (exato para modelos OpenAI, muito próximo para os compatíveis); senão, estima.
+        """
+        encoding = _get_tiktoken_encoding()
+        if encoding is None:
+            return super().count_tokens(text, model_name)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def get_available_models(self) -> list:
+        return [self.default_model] if self.default_model else []
+
+    def get_default_model_name(self) -> str:
+        return self.default_model
@@ -0,0 +1,161 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.metadata import entry_points
+
+from aura_ide.utils.instrumentation import instruments
+from aura_ide.utils.startup import startup_timeline
+
+# Provedores de IA configurados no config.ini e criados por fábricas registadas por tipo.
+#
+#   [PROVIDER:Local]                 # Uma secção por provedor; o nome aparece na UI
+#   TYPE = openai_compatible         # gemini, deepseek, openai_compatible ou o de um plugin
+#   URL = http://127.0.0.1:8080/v1/chat/completions
+#   MODEL = qwen2.5-coder-7b-instruct
+#   API_KEY =                        # Opcional para servidores locais
+#   ENABLED = true
+#
+# As chaves de [API_KEYS] (GEMINI_API_KEY, DEEPSEEK_API_KEY) continuam a valer como os
+# provedores "Gemini" e "DeepSeek". Outros pacotes acrescentam tipos com um entry point do
+# grupo ENTRY_POINT_GROUP que aponta para uma fábrica `fabrica(settings, on_models_updated=None)`:
+# `settings` são as opções da secção (chaves em minúsculas, mais "name") e a fábrica devolve
+# um BaseAIProvider (ou levanta ValueError se a configuração não servir).
+
+ENTRY_POINT_GROUP = "aura_ide.providers"
+PROVIDER_SECTION_PREFIX = "PROVIDER:"
+KIND_GEMINI = "gemini"
+KIND_DEEPSEEK = "deepseek"
+KIND_OPENAI_COMPATIBLE = "openai_compatible"
+MAX_INIT_WORKERS = 8
+# (nome, tipo, opção em [API_KEYS], valor de exemplo que não conta como chave)
+_LEGACY_API_KEYS = (
+    ("Gemini", KIND_GEMINI, "GEMINI_API_KEY", "SUA_CHAVE_API_GEMINI_AQUI"),
+    ("DeepSeek", KIND_DEEPSEEK, "DEEPSEEK_API_KEY", "SUA_CHAVE_API_DEEPSEEK_AQUI"),
+)
+
+
+class ProviderSpec:
+    """Um provedor pedido no config.ini e, depois de `create_providers`, o resultado da criação."""
+
+    def __init__(self, name: str, kind: str, settings: dict):
+        self.name = name
+        self.kind = kind
+        self.settings = dict(settings, name=name)
+        self.provider = None # O BaseAIProvider criado
+        self.error = None # Porque não foi criado
+        self.init_ms = None # Tempo da criação (importar o SDK, pedir a lista de modelos...)
+
+
+def provider_specs_from_config(config) -> list:
+    """Os provedores ativos do config.ini, pela ordem das secções (depois os de [API_KEYS])."""
+    specs = []
+    for section in config.sections():
+        if not section.upper().startswith(PROVIDER_SECTION_PREFIX):
+            continue
+        name = section[len(PROVIDER_SECTION_PREFIX):].strip()
+        if not name or not config.getboolean(section, 'ENABLED', fallback=True):
+            continue
+        kind = config.get(section, 'TYPE', fallback=KIND_OPENAI_COMPATIBLE).strip().lower()
+        specs.append(ProviderSpec(name, kind, {key: value.strip() for key, value in config.items(section)}))
+    names = {spec.name.lower() for spec in specs}
+    for name, kind, option, placeholder in _LEGACY_API_KEYS:
+        api_key = config.get('API_KEYS', option, fallback='').strip()
+        if api_key and api_key != placeholder and name.lower() not in names:
+            specs.append(ProviderSpec(name, kind, {"api_key": api_key}))
+    return specs
+
+
+def _create_gemini(settings: dict, on_models_updated=None):
+    from .gemini_provider import GeminiProvider
+    # A lista de modelos vem da cache em disco; a atualização pela rede chega depois
+    return GeminiProvider(api_key=settings.get("api_key"), on_models_updated=on_models_updated)
+
+
+def _create_deepseek(settings: dict, on_models_updated=None):
+    from .deepseek_provider import DEEPSEEK_API_URL, DeepSeekProvider
+    return DeepSeekProvider(api_key=settings.get("api_key"), api_url=settings.get("url") or DEEPSEEK_API_URL)
+
+
+def _create_openai_compatible(settings: dict, on_models_updated=None):
+    from .generic_openai_provider import LOCAL_SERVER_URL, GenericOpenAIProvider
+    provider = GenericOpenAIProvider(api_url=settings.get("url") or LOCAL_SERVER_URL, model=settings.get("model"),
+                                     api_key=settings.get("api_key"), label=settings["name"])
+    provider.refresh_models()
+    return provider
+
+
+class ProviderRegistry:
+    """
+    Fábricas de provedores por tipo: as incluídas no IDE e as dos entry points instalados
+    (carregadas só quando um tipo desconhecido é pedido). Os tipos incluídos não podem ser
+    substituídos por plugins.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._entry_points = None # nome -> EntryPoint, lidos na primeira vez que fazem falta
+        self._lock = threading.Lock()
+
+    def register(self, kind: str, factory):
+        self._factories[kind.lower()] = factory
+
+    def kinds(self) -> list:
+        return sorted(set(self._factories) | set(self._discover()))
+
+    def factory(self, kind: str):
+        """A fábrica do tipo `kind`, ou None se nenhuma estiver registada ou instalada."""
+        kind = kind.lower()
+        factory = self._factories.get(kind)
+        if factory is None:
+            entry_point = self._discover().get(kind)
+            if entry_point is not None:
+                factory = entry_point.load()
+                self._factories[kind] = factory
+        return factory
+
+    def create_providers(self, specs: list, on_models_updated=None) -> list:
+        """
+        Cria os provedores de `specs` em paralelo (cada SDK a importar e cada servidor a
+        contactar numa thread) e devolve as mesmas specs, com `provider` ou `error`.
+        """
+        if specs:
+            with ThreadPoolExecutor(max_workers=min(len(specs), MAX_INIT_WORKERS), thread_name_prefix="aura-provider-init") as pool:
+                for spec in specs:
+                    pool.submit(self._create, spec, on_models_updated)
+        return specs
+
+    def _create(self, spec: ProviderSpec, on_models_updated):
+        started = time.perf_counter()
+        with startup_timeline.span(f"provedor {spec.name}"), instruments.span("ai.provider_init", category="ai", provider=spec.name, kind=spec.kind) as attributes:
+            try:
+                factory = self.factory(spec.kind)
+                if factory is None:
+                    raise ValueError(f"tipo de provedor desconhecido '{spec.kind}' (disponíveis: {', '.join(self.kinds())})")
+                spec.provider = factory(spec.settings, on_models_updated=on_models_updated)
+                print(f"Provedor {spec.name} IA inicializado.")
+            except ImportError as e:
+                spec.error = f"dependência em falta: {e}"
+            except Exception as e: # Um plugin com defeito não pode impedir os outros provedores
+                spec.error = str(e) or type(e).__name__
+            if spec.error:
+                attributes["error"] = spec.error
+                print(f"Erro ao inicializar o provedor {spec.name} ({spec.kind}): {spec.error}")
+        spec.init_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def _discover(self) -> dict:
+        with self._lock:
+            if self._entry_points is None:
+                self._entry_points = {}
+                try:
+                    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                        self._entry_points.setdefault(entry_point.name.lower(), entry_point)
+                except Exception as e: # Metadados de um pacote instalado estragados
+                    print(f"AVISO: Não foi possível ler os plugins de provedores ({ENTRY_POINT_GROUP}): {e}")
+            return self._entry_points
+
+
+# O do processo, com os tipos incluídos no IDE
+provider_registry = ProviderRegistry()
+provider_registry.register(KIND_GEMINI, _create_gemini)
+provider_registry.register(KIND_DEEPSEEK, _create_deepseek)
+provider_registry.register(KIND_OPENAI_COMPATIBLE, _create_openai_compatible)
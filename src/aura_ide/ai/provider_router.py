@@ -0,0 +1,342 @@
+import random
+import threading
+import time
+
+from aura_ide.utils.instrumentation import instruments
+from .base_provider import BaseAIProvider
+from .errors import AIProviderError, AllProvidersFailedError, CircuitOpenError
+from .tools import flatten_tool_messages
+
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 8.0
+DEFAULT_REQUEST_DEADLINE = 45.0 # Tempo máximo gasto em novas tentativas por mensagem (todas as tentativas)
+EWMA_ALPHA = 0.3 # Peso da observação mais recente nas médias de latência e de erro
+MODEL_SEPARATOR = "::" # "Provedor::modelo" escolhe o provedor além do modelo (ver qualified_model)
+LATENCY_PROBE_MESSAGES = [{"role": "user", "content": "Responda apenas: ok"}]
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker clássico com três estados:
+
+    - fechado: as requisições passam; `failure_threshold` falhas seguidas abrem o circuito;
+    - aberto: as requisições são recusadas de imediato durante `reset_timeout` segundos;
+    - meio-aberto: passa uma requisição de teste; sucesso fecha, falha volta a abrir.
+    """
+    CLOSED = "fechado"
+    OPEN = "aberto"
+    HALF_OPEN = "meio-aberto"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+class ProviderHealth:
+    """Latência e taxa de erro recentes (médias exponenciais) de um provedor."""
+
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+        self.latency_ewma = None # segundos; None até à primeira resposta
+        self.error_rate_ewma = 0.0
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record(self, success: bool, latency: float = None):
+        with self._lock:
+            self.requests += 1
+            self.error_rate_ewma = (1 - EWMA_ALPHA) * self.error_rate_ewma + EWMA_ALPHA * (0.0 if success else 1.0)
+            if success:
+                self.latency_ewma = latency if self.latency_ewma is None else (1 - EWMA_ALPHA) * self.latency_ewma + EWMA_ALPHA * latency
+            else:
+                self.failures += 1
+        if success:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def score(self) -> float:
+        """Menor é melhor: latência recente penalizada pela taxa de erro."""
+        latency = self.latency_ewma if self.latency_ewma is not None else 1.0
+        return latency * (1.0 + 4.0 * self.error_rate_ewma)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.breaker.state,
+                "latency_ms": round(self.latency_ewma * 1000) if self.latency_ewma is not None else None,
+                "error_rate": round(self.error_rate_ewma, 3),
+                "requests": self.requests,
+                "failures": self.failures,
+            }
+
+
+def backoff_delay(attempt: int, base: float = DEFAULT_BACKOFF_BASE, maximum: float = DEFAULT_BACKOFF_MAX, retry_after: float = None) -> float:
+    """Backoff exponencial com 'full jitter'; respeita o Retry-After do servidor se existir."""
+    if retry_after is not None:
+        return min(retry_after, maximum)
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+def qualified_model(provider_name: str, model_name: str) -> str:
+    """O nome de modelo que faz o ProviderRouter pedir `model_name` a `provider_name`."""
+    return f"{provider_name}{MODEL_SEPARATOR}{model_name or ''}"
+
+
+class ProviderRouter(BaseAIProvider):
+    """
+    Encaminha as requisições por vários provedores com novas tentativas e failover.
+
+    - Erros com `retryable` (429, 5xx, timeouts, rede) são repetidos com backoff
+      exponencial com jitter, até `max_retries` vezes por provedor.
+    - Cada provedor tem um circuit breaker; com o circuito aberto é saltado sem custo.
+    - A ordem de tentativa favorece o provedor dono do modelo escolhido e, entre os
+      restantes, o de menor latência recente ponderada pela taxa de erro. Um modelo na
+      forma "Provedor::modelo" (`qualified_model`) escolhe também o provedor, quando dois
+      servem modelos com o mesmo nome.
+    - `request_deadline` limita o tempo total gasto numa mensagem: quando não há tempo
+      para mais uma espera de backoff, passa-se logo ao provedor seguinte.
+
+    Args:
+        providers (list): Lista de (nome, BaseAIProvider), por ordem de preferência.
+    """
+
+    def __init__(self, providers: list, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE, backoff_max: float = DEFAULT_BACKOFF_MAX,
+                 request_deadline: float = DEFAULT_REQUEST_DEADLINE, breaker_failure_threshold: int = 3,
+                 breaker_reset_timeout: float = 30.0):
+        if not providers:
+            raise ValueError("ProviderRouter precisa de pelo menos um provedor.")
+        self.providers = list(providers)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_deadline = request_deadline
+        self.health = {
+            name: ProviderHealth(CircuitBreaker(breaker_failure_threshold, breaker_reset_timeout))
+            for name, _ in self.providers
+        }
+
+    # --- Interface BaseAIProvider ---
+
+    def get_chat_completion(self, messages: list, model_name: str = None) -> str:
+        errors = []
+        started = time.monotonic()
+        for name, provider, provider_model in self._candidates(model_name):
+            for attempt in range(self.max_retries + 1):
+                if not self.health[name].breaker.allow_request():
+                    errors.append(CircuitOpenError(f"Circuito aberto para {name}.", provider_name=name))
+                    break
+                attempt_started = time.monotonic()
+                attempt_started_ns = instruments.now_ns()
+                try:
+                    response_text = provider.get_chat_completion(messages, model_name=provider_model)
+                except Exception as e:
+                    # Qualquer exceção conta como falha: um circuito meio-aberto tem de libertar a sonda
+                    e = self._as_provider_error(name, e)
+                    self.health[name].record(success=False)
+                    self._record_attempt(name, provider_model, attempt_started_ns, type(e).__name__)
+                    errors.append(e)
+                    if not self._should_retry(e, attempt, started):
+                        break
+                    continue
+                self.health[name].record(success=True, latency=time.monotonic() - attempt_started)
+                self._record_attempt(name, provider_model, attempt_started_ns, "ok")
+                return response_text
+        raise self._all_failed(errors)
+
+    @property
+    def supports_tools(self):
+        return any(getattr(provider, "supports_tools", False) for _, provider in self.providers)
+
+    def stream_chat_completion(self, messages: list, model_name: str = None, tools: list = None):
+        # Só se repete ou muda de provedor antes do primeiro pedaço; depois disso o texto
+        # já foi mostrado e um erro é propagado tal como está.
+        # Provedores sem chamadas de funções nativas recebem o histórico em texto.
+        flattened_messages = None
+        errors = []
+        started = time.monotonic()
+        for name, provider, provider_model in self._candidates(model_name):
+            for attempt in range(self.max_retries + 1):
+                if not self.health[name].breaker.allow_request():
+                    errors.append(CircuitOpenError(f"Circuito aberto para {name}.", provider_name=name))
+                    break
+                attempt_started = time.monotonic()
+                attempt_started_ns = instruments.now_ns()
+                try:
+                    if tools is not None and getattr(provider, "supports_tools", False):
+                        stream = provider.stream_chat_completion(messages, model_name=provider_model, tools=tools)
+                    else:
+                        if flattened_messages is None:
+                            flattened_messages = flatten_tool_messages(messages)
+                        stream = provider.stream_chat_completion(flattened_messages, model_name=provider_model)
+                    first_chunk = next(stream, None)
+                except Exception as e:
+                    e = self._as_provider_error(name, e)
+                    self.health[name].record(success=False)
+                    self._record_attempt(name, provider_model, attempt_started_ns, type(e).__name__)
+                    errors.append(e)
+                    if not self._should_retry(e, attempt, started):
+                        break
+                    continue
+                # A latência registada é o tempo até ao primeiro pedaço (o que o usuário sente)
+                self.health[name].record(success=True, latency=time.monotonic() - attempt_started)
+                self._record_attempt(name, provider_model, attempt_started_ns, "ok")
+                try:
+                    if first_chunk is not None:
+                        yield first_chunk
+                    yield from stream
+                finally:
+                    stream.close()
+                return
+        raise self._all_failed(errors)
+
+    def get_available_models(self) -> list:
+        models = []
+        for _, provider in self.providers:
+            for model in provider.get_available_models():
+                if model not in models:
+                    models.append(model)
+        return models
+
+    def models_by_provider(self) -> list:
+        """[(nome do provedor, [modelos], modelo padrão)], pela ordem dos provedores."""
+        result = []
+        for name, provider in self.providers:
+            default_model = provider.get_default_model_name() if hasattr(provider, 'get_default_model_name') else None
+            result.append((name, provider.get_available_models(), default_model))
+        return result
+
+    def get_default_model_name(self) -> str:
+        _, first_provider = self.providers[0]
+        if hasattr(first_provider, 'get_default_model_name'):
+            return first_provider.get_default_model_name()
+        models = first_provider.get_available_models()
+        return models[0] if models else None
+
+    def count_tokens(self, text: str, model_name: str = None) -> int:
+        return self.providers[0][1].count_tokens(text, model_name)
+
+    # --- Estado ---
+
+    def health_snapshot(self) -> dict:
+        """{nome_do_provedor: {state, latency_ms, error_rate, requests, failures}}"""
+        return {name: self.health[name].snapshot() for name, _ in self.providers}
+
+    def measure_latency(self, name: str) -> float:
+        """
+        Pede uma resposta mínima ao provedor `name` e devolve os segundos até ao primeiro
+        pedaço (bloqueante; fora da thread da UI). Conta para a saúde do provedor como um
+        pedido normal, sem novas tentativas nem failover. Levanta AIProviderError se falhar.
+        """
+        provider = dict(self.providers)[name]
+        started = time.monotonic()
+        started_ns = instruments.now_ns()
+        stream = None
+        try:
+            stream = provider.stream_chat_completion(LATENCY_PROBE_MESSAGES)
+            next(stream, None)
+        except Exception as e:
+            e = self._as_provider_error(name, e)
+            self.health[name].record(success=False)
+            self._record_attempt(name, None, started_ns, type(e).__name__)
+            raise e
+        finally:
+            if stream is not None:
+                stream.close()
+        latency = time.monotonic() - started
+        self.health[name].record(success=True, latency=latency)
+        self._record_attempt(name, None, started_ns, "ok")
+        return latency
+
+    # --- Interno ---
+
+    def _candidates(self, model_name: str):
+        """
+        Ordem de tentativa: (nome, provedor, modelo a pedir). O dono do modelo escolhido vai
+        primeiro com esse modelo; os outros usam o seu modelo padrão (model_name=None).
+        """
+        owner = None
+        if model_name and MODEL_SEPARATOR in model_name:
+            provider_name, _, provider_model = model_name.partition(MODEL_SEPARATOR)
+            if any(name == provider_name for name, _ in self.providers):
+                owner, model_name = provider_name, provider_model or None
+        if model_name and owner is None:
+            for name, provider in self.providers:
+                if model_name in provider.get_available_models():
+                    owner = name
+                    break
+        ordered = sorted(
+            (entry for entry in self.providers if entry[0] != owner),
+            key=lambda entry: self.health[entry[0]].score()
+        )
+        if owner is not None:
+            ordered.insert(0, next(entry for entry in self.providers if entry[0] == owner))
+        return [(name, provider, model_name if name == owner else None) for name, provider in ordered]
+
+    def _record_attempt(self, name: str, model_name: str, started_ns: int, outcome: str):
+        # Uma tentativa num provedor: a resposta completa, ou o primeiro pedaço em streaming
+        instruments.record_span(f"ai.provider.{name}", started_ns, category="ai", model=model_name or "", outcome=outcome)
+
+    def _should_retry(self, error: AIProviderError, attempt: int, started: float) -> bool:
+        if not error.retryable or attempt >= self.max_retries:
+            return False
+        delay = backoff_delay(attempt, self.backoff_base, self.backoff_max, error.retry_after)
+        if time.monotonic() - started + delay > self.request_deadline:
+            return False # Sem tempo para esperar: melhor tentar já o próximo provedor
+        time.sleep(delay)
+        return True
+
+    def _as_provider_error(self, name: str, error: Exception) -> AIProviderError:
+        """
+        Erros que não são AIProviderError (exceções do httpx, JSON ou KeyError num parser de
+        um provedor) passam a AIProviderError sem nova tentativa: o router muda de provedor.
+        """
+        if isinstance(error, AIProviderError):
+            return error
+        print(f"Erro inesperado do provedor {name}: {type(error).__name__}: {error}")
+        wrapped = AIProviderError(f"{type(error).__name__}: {error}", provider_name=name)
+        wrapped.__cause__ = error
+        return wrapped
+
+    def _all_failed(self, errors: list) -> AIProviderError:
+        if len(errors) == 1 and not isinstance(errors[0], CircuitOpenError):
+            return errors[0] # Um só provedor e uma só falha: manter o tipo original
+        last_by_provider = {}
+        for error in errors:
+            last_by_provider[error.provider_name] = error
+        details = "; ".join(f"{name}: {error}" for name, error in last_by_provider.items())
+        return AllProvidersFailedError(f"Nenhum provedor de IA respondeu ({details})", errors=list(last_by_provider.values()))
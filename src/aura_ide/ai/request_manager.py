@@ -0,0 +1,193 @@
+import itertools
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from aura_ide.utils.instrumentation import instruments
+from .context_window import estimate_tokens
+
+_tokens_in = instruments.counter("ai.tokens_in", "tokens")
+_tokens_out = instruments.counter("ai.tokens_out", "tokens")
+
+
+class _RequestSignals(QObject):
+    # Sinais emitidos a partir da thread de trabalho; como o QObject vive na thread
+    # principal, o Qt entrega-os via conexão enfileirada (queued) no loop de eventos da UI.
+    finished = Signal(int, str)  # (id_da_requisicao, resposta)
+    failed = Signal(int, str)    # (id_da_requisicao, mensagem_de_erro)
+    chunk = Signal(int, str)     # (id_da_requisicao, pedaço_de_texto) - apenas em streaming
+    tool_calls = Signal(int, list) # (id_da_requisicao, [ToolCall]) - apenas em streaming, antes de finished
+
+
+class _ProviderRequestTask(QRunnable):
+    """Executa uma chamada bloqueante ao provedor de IA numa thread do pool."""
+
+    def __init__(self, request_id: int, provider, messages: list, model_name: str, cancel_event: threading.Event, options: dict, stream: bool = False):
+        super().__init__()
+        self.setAutoDelete(False)  # O AIRequestManager controla o tempo de vida da tarefa
+        self.request_id = request_id
+        self.provider = provider
+        self.messages = messages
+        self.model_name = model_name
+        self.cancel_event = cancel_event
+        self.options = options
+        self.stream = stream
+        self.signals = _RequestSignals()
+        self.first_chunk_ns = None # Tempo até ao primeiro pedaço (streaming), para a instrumentação
+
+    def run(self):
+        # Os sinais são sempre emitidos (mesmo após cancelamento) para que o manager
+        # saiba que a thread largou a tarefa e possa libertá-la na thread principal.
+        if self.cancel_event.is_set():
+            self.signals.failed.emit(self.request_id, "cancelada")  # Nem chega a ir à rede
+            return
+        started = instruments.now_ns()
+        try:
+            if self.stream:
+                response_text = self._run_stream()
+            else:
+                response_text = self.provider.get_chat_completion(self.messages, model_name=self.model_name, **self.options)
+        except Exception as e:
+            self._record(started, type(e).__name__, None)
+            self.signals.failed.emit(self.request_id, str(e))
+            return
+        if response_text is None:
+            self._record(started, "cancelada", None)
+            self.signals.failed.emit(self.request_id, "cancelada")
+            return
+        self._record(started, "ok", response_text)
+        self.signals.finished.emit(self.request_id, response_text)
+
+    def _record(self, started: int, outcome: str, response_text: str):
+        # Latência, tempo até ao primeiro pedaço e tokens (estimados) de cada pedido ao modelo
+        if not instruments.enabled:
+            return
+        tokens_in = sum(estimate_tokens(message.get("content") or "") for message in self.messages)
+        tokens_out = estimate_tokens(response_text)
+        _tokens_in.add(tokens_in)
+        _tokens_out.add(tokens_out)
+        ttft_ms = None
+        if self.first_chunk_ns is not None:
+            ttft_ms = round((self.first_chunk_ns - started) / 1e6, 1)
+            instruments.observe("ai.ttft", ttft_ms)
+        ended = instruments.now_ns()
+        instruments.record_span("ai.request", started, ended, category="ai", model=self.model_name or "", stream=self.stream,
+                                outcome=outcome, tokens_in=tokens_in, tokens_out=tokens_out)
+        instruments.log("ai.request", model=self.model_name, stream=self.stream, outcome=outcome,
+                        ms=round((ended - started) / 1e6, 1), ttft_ms=ttft_ms, tokens_in=tokens_in, tokens_out=tokens_out)
+
+    def _run_stream(self):
+        # Em streaming o cancelamento é real: o gerador é fechado entre dois pedaços,
+        # o que fecha a ligação HTTP subjacente.
+        chunks = []
+        tool_calls = []
+        stream = self.provider.stream_chat_completion(self.messages, model_name=self.model_name, **self.options)
+        try:
+            for chunk_text in stream:
+                if self.cancel_event.is_set():
+                    return None
+                if not isinstance(chunk_text, str): # Chamada de ferramenta (ToolCall), com `tools`
+                    tool_calls.append(chunk_text)
+                    continue
+                if self.first_chunk_ns is None:
+                    self.first_chunk_ns = instruments.now_ns()
+                chunks.append(chunk_text)
+                self.signals.chunk.emit(self.request_id, chunk_text)
+        finally:
+            stream.close()
+        if tool_calls:
+            self.signals.tool_calls.emit(self.request_id, tool_calls)
+        return "".join(chunks)
+
+
+class AIRequestManager(QObject):
+    """
+    Pipeline assíncrono para chamadas a um BaseAIProvider.
+
+    As chamadas aos provedores são bloqueantes (HTTP/gRPC), por isso correm num
+    QThreadPool dedicado e os resultados voltam para a thread da UI através de sinais.
+    Várias requisições podem estar em voo ao mesmo tempo e cada uma pode ser cancelada.
+
+    O cancelamento é cooperativo: uma chamada de rede já iniciada não é interrompida,
+    mas o seu resultado é descartado e `request_cancelled` é emitido de imediato.
+    """
+    request_started = Signal(int)
+    request_finished = Signal(int, str)   # (id_da_requisicao, resposta)
+    request_failed = Signal(int, str)     # (id_da_requisicao, mensagem_de_erro)
+    request_cancelled = Signal(int)
+    chunk_received = Signal(int, str)     # (id_da_requisicao, pedaço_de_texto)
+    tool_calls_received = Signal(int, list) # (id_da_requisicao, [ToolCall]), emitido logo antes de request_finished
+    pending_count_changed = Signal(int)
+
+    def __init__(self, max_workers: int = 4, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_workers)
+        self._id_counter = itertools.count(1)
+        self._tasks = {}      # request_id -> tarefa ainda visível (não terminada nem cancelada)
+        self._in_flight = {}  # request_id -> tarefa ainda na posse do pool (inclui canceladas)
+
+    def submit(self, provider, messages: list, model_name: str = None, stream: bool = False, **options) -> int:
+        """
+        Agenda `provider.get_chat_completion(messages, model_name, **options)` numa thread
+        de trabalho e devolve o id da requisição. A lista de mensagens é copiada para que
+        alterações posteriores no histórico não afetem a requisição em curso.
+
+        Com `stream=True` usa `provider.stream_chat_completion` e emite `chunk_received`
+        para cada pedaço; `request_finished` continua a trazer a resposta completa no fim.
+        Só em streaming as opções podem incluir `tools` (provedores com `supports_tools`):
+        as chamadas de ferramentas da resposta chegam em `tool_calls_received`, antes do fim.
+        """
+        request_id = next(self._id_counter)
+        task = _ProviderRequestTask(request_id, provider, list(messages), model_name, threading.Event(), options, stream=stream)
+        task.signals.finished.connect(self._on_task_finished)
+        task.signals.failed.connect(self._on_task_failed)
+        task.signals.chunk.connect(self._on_task_chunk)
+        task.signals.tool_calls.connect(self._on_task_tool_calls)
+        self._tasks[request_id] = task
+        self._in_flight[request_id] = task
+        self.thread_pool.start(task)
+        self.request_started.emit(request_id)
+        self.pending_count_changed.emit(len(self._tasks))
+        return request_id
+
+    def cancel(self, request_id: int) -> bool:
+        task = self._tasks.pop(request_id, None)
+        if task is None:
+            return False  # Já terminou ou já foi cancelada
+        task.cancel_event.set()
+        # Se ainda estiver na fila, retira-a sem esperar por uma thread livre
+        if self.thread_pool.tryTake(task):
+            self._in_flight.pop(request_id, None)
+        self.request_cancelled.emit(request_id)
+        self.pending_count_changed.emit(len(self._tasks))
+        return True
+
+    def cancel_all(self):
+        for request_id in list(self._tasks):
+            self.cancel(request_id)
+
+    def pending_requests(self) -> list:
+        return list(self._tasks)
+
+    def _on_task_chunk(self, request_id: int, chunk_text: str):
+        if request_id in self._tasks: # Ignorar pedaços que chegam depois de um cancelamento
+            self.chunk_received.emit(request_id, chunk_text)
+
+    def _on_task_tool_calls(self, request_id: int, tool_calls: list):
+        if request_id in self._tasks:
+            self.tool_calls_received.emit(request_id, tool_calls)
+
+    def _on_task_finished(self, request_id: int, response_text: str):
+        self._in_flight.pop(request_id, None)
+        if self._tasks.pop(request_id, None) is None:
+            return  # Cancelada entretanto: descartar o resultado
+        self.request_finished.emit(request_id, response_text)
+        self.pending_count_changed.emit(len(self._tasks))
+
+    def _on_task_failed(self, request_id: int, error_message: str):
+        self._in_flight.pop(request_id, None)
+        if self._tasks.pop(request_id, None) is None:
+            return
+        self.request_failed.emit(request_id, error_message)
+        self.pending_count_changed.emit(len(self._tasks))
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from aura_ide.utils.app_dirs import get_cache_dir
+from .base_provider import BaseAIProvider
+
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_MAX_DISK_BYTES = 50 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+_TRAILING_SPACES_RE = re.compile(r"[ \t]+\n")
+
+
+def _normalize_content(content: str) -> str:
+    # Diferenças irrelevantes (CRLF, espaços no fim das linhas, margens) não devem gerar
+    # chaves diferentes, p.ex. a mesma saída de terminal colada duas vezes.
+    content = (content or "").replace("\r\n", "\n").strip()
+    return _TRAILING_SPACES_RE.sub("\n", content)
+
+
+def _normalize_message(message: dict) -> list:
+    normalized = [(message.get("role") or "").lower(), _normalize_content(message.get("content"))]
+    # Chamadas de ferramentas e os seus resultados (ai/tools.py) também distinguem as conversas
+    if message.get("tool_calls"):
+        normalized.append([[call.get("name"), call.get("arguments")] for call in message["tool_calls"]])
+    if message.get("tool_call_id"):
+        normalized.append(message["tool_call_id"])
+    return normalized
+
+
+def make_cache_key(messages: list, model_name: str, provider_name: str = "", tools: list = None) -> str:
+    """Hash SHA-256 da lista de mensagens normalizada, do modelo, do provedor e das ferramentas oferecidas."""
+    normalized = [_normalize_message(m) for m in messages]
+    key_parts = [provider_name, model_name or "", normalized]
+    if tools:
+        key_parts.append([spec.name for spec in tools])
+    payload = json.dumps(key_parts, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache de respostas em dois níveis: LRU em memória e SQLite em disco.
+
+    - TTL: entradas mais antigas que `ttl` segundos são ignoradas (e apagadas).
+    - Tamanho: a memória guarda até `max_memory_entries` respostas; o disco até
+      `max_disk_bytes`, removendo primeiro as entradas acedidas há mais tempo.
+    - Métricas de acertos/falhas em `metrics()`.
+
+    É seguro usar a partir de várias threads (as requisições correm no pool do AIRequestManager).
+    """
+
+    def __init__(self, db_path: str = None, max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES, ttl: float = DEFAULT_TTL_SECONDS):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory = OrderedDict() # chave -> (resposta, criada_em)
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self.db_path = db_path or os.path.join(get_cache_dir(), "responses.sqlite3")
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+        self._db.commit()
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response_text, created_at = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return response_text
+                del self._memory[key]
+
+            row = self._db.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                response_text, created_at = row
+                if now - created_at < self.ttl:
+                    self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember_in_memory(key, response_text, created_at)
+                    self._stats["disk_hits"] += 1
+                    return response_text
+                self._delete_from_disk(key)
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, response_text: str):
+        now = time.time()
+        size = len(response_text.encode("utf-8"))
+        with self._lock:
+            self._remember_in_memory(key, response_text, now)
+            old_row = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, response_text, size, now, now)
+            )
+            self._disk_bytes += size - (old_row[0] if old_row else 0)
+            self._evict_disk_over_limit()
+            self._db.commit()
+            self._stats["stores"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._disk_bytes = 0
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_bytes"] = self._disk_bytes
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _remember_in_memory(self, key: str, response_text: str, created_at: float):
+        self._memory[key] = (response_text, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _delete_from_disk(self, key: str):
+        row = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+            self._disk_bytes -= row[0]
+
+    def _evict_disk_over_limit(self):
+        # Apagar por ordem de último acesso (LRU) até voltar abaixo do limite; as expiradas primeiro
+        expired_before = time.time() - self.ttl
+        freed = self._db.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM responses WHERE created_at < ?", (expired_before,)).fetchone()
+        if freed[1]:
+            self._db.execute("DELETE FROM responses WHERE created_at < ?", (expired_before,))
+            self._disk_bytes -= freed[0]
+            self._stats["evictions"] += freed[1]
+        while self._disk_bytes > self.max_disk_bytes:
+            rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_access LIMIT 64").fetchall()
+            if not rows:
+                self._disk_bytes = 0
+                break
+            for key, size in rows:
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                self._disk_bytes -= size
+                self._stats["evictions"] += 1
+
+
+class CachedAIProvider(BaseAIProvider):
+    """
+    Envolve qualquer BaseAIProvider com uma ResponseCache.
+
+    Cada chamada aceita `use_cache=False` para prompts em que respostas diferentes são
+    esperadas (p.ex. "dá-me outra ideia"). Métodos que não pertencem à interface base
+    (get_default_model_name, refresh_models, ...) são delegados ao provedor envolvido.
+    """
+
+    def __init__(self, provider: BaseAIProvider, cache: ResponseCache = None):
+        self.provider = provider
+        self.cache = cache if cache is not None else ResponseCache()
+        self._provider_name = type(provider).__name__
+
+    def __getattr__(self, name):
+        # Só é chamado para atributos que não existem no wrapper
+        return getattr(self.provider, name)
+
+    @property
+    def supports_tools(self):
+        return getattr(self.provider, "supports_tools", False)
+
+    def _cache_key(self, messages: list, model_name: str, tools: list = None) -> str:
+        if not model_name and hasattr(self.provider, "get_default_model_name"):
+            model_name = self.provider.get_default_model_name()
+        return make_cache_key(messages, model_name, self._provider_name, tools)
+
+    def get_chat_completion(self, messages: list, model_name: str = None, use_cache: bool = True) -> str:
+        if not use_cache:
+            return self.provider.get_chat_completion(messages, model_name=model_name)
+        key = self._cache_key(messages, model_name)
+        cached_text = self.cache.get(key)
+        if cached_text is not None:
+            return cached_text
+        response_text = self.provider.get_chat_completion(messages, model_name=model_name)
+        if response_text: # Erros chegam como exceções e nunca são guardados
+            self.cache.put(key, response_text)
+        return response_text
+
+    def stream_chat_completion(self, messages: list, model_name: str = None, tools: list = None, use_cache: bool = True):
+        tool_options = {"tools": tools} if tools is not None else {}
+        if not use_cache:
+            yield from self.provider.stream_chat_completion(messages, model_name=model_name, **tool_options)
+            return
+        key = self._cache_key(messages, model_name, tools)
+        cached_text = self.cache.get(key)
+        if cached_text is not None:
+            yield cached_text # Acerto: a resposta inteira num único pedaço
+            return
+        chunks = []
+        has_tool_calls = False
+        for chunk_text in self.provider.stream_chat_completion(messages, model_name=model_name, **tool_options):
+            if isinstance(chunk_text, str):
+                chunks.append(chunk_text)
+            else:
+                has_tool_calls = True # A cache só guarda texto: uma resposta com chamadas nativas não entra
+            yield chunk_text
+        # Só chega aqui se o stream foi consumido até ao fim (não cancelado)
+        response_text = "".join(chunks).strip()
+        if response_text and not has_tool_calls:
+            self.cache.put(key, response_text)
+
+    def count_tokens(self, text: str, model_name: str = None) -> int:
+        return self.provider.count_tokens(text, model_name)
+
+    def get_available_models(self) -> list:
+        return self.provider.get_available_models()
@@ -0,0 +1,498 @@
+import hashlib
+import json
+import keyword
+import math
+import mmap
+import os
+import re
+import sys
+import zlib
+from array import array
+from collections import Counter
+from heapq import nlargest
+from itertools import repeat
+from operator import add, mul
+
+from aura_ide.utils.app_dirs import get_cache_dir
+from .context_window import estimate_tokens
+
+# Recuperação de contexto para a IA: os arquivos de código do projeto são cortados em trechos,
+# cada trecho vira um vetor (embedding) e os vetores ficam num arquivo mapeado em memória; a
+# pergunta do usuário é comparada com todos (cosseno) e os trechos mais próximos vão no pedido.
+# Este módulo não usa o Qt (ver ai/retrieval_indexer.py).
+
+# numpy dá produtos de matrizes rápidos (não está no requirements.txt); sem ele, o mesmo cálculo
+# em Python puro. Só é importado na primeira pesquisa (ver _load_numpy): demora mais a importar
+# do que o resto do arranque do IDE.
+np = None
+_numpy_checked = False
+
+RETRIEVAL_FORMAT_VERSION = 1
+CHUNK_MAX_CHARS = 1500
+CHUNK_MAX_LINES = 60
+CHUNK_MIN_LINES = 8 # Um trecho só é cortado antes do limite (numa fronteira boa) depois de tantas linhas
+MAX_EMBED_CHARS = 6000 # Texto enviado ao embedder por trecho (linhas enormes de arquivos minificados)
+HASH_DIMENSIONS = 512
+EMBEDDING_BATCH = 32 # Trechos por chamada a um provedor
+DEFAULT_TOP_K = 8
+DEFAULT_RETRIEVAL_BUDGET_TOKENS = 1500
+MIN_SCORE = 0.05 # Trechos menos parecidos do que isto com a pergunta não são enviados
+SEARCH_BLOCK_ROWS = 65536 # Linhas da matriz por produto (numpy), para limitar a memória temporária
+COMPACT_MIN_ROWS = 1024 # Abaixo disto, os vetores que já não são usados ficam no arquivo
+SOURCE_EXTENSIONS = frozenset((
+    ".py", ".pyi", ".pyx", ".js", ".jsx", ".mjs", ".ts", ".tsx", ".java", ".kt", ".scala", ".go", ".rs",
+    ".c", ".h", ".cc", ".cpp", ".cxx", ".hpp", ".cs", ".swift", ".m", ".rb", ".php", ".lua", ".pl", ".r",
+    ".sh", ".bash", ".zsh", ".sql", ".html", ".css", ".scss", ".vue", ".svelte",
+    ".md", ".rst", ".txt", ".toml", ".ini", ".cfg", ".yaml", ".yml",
+))
+SOURCE_NAMES = frozenset(("Makefile", "Dockerfile", "CMakeLists.txt", "requirements.txt"))
+
+_MANIFEST_NAME = "manifest.json"
+_VECTORS_NAME_RE = re.compile(r"vectors-(\d+)")
+_IDENTIFIER_RE = re.compile(r"[^\W\d]\w*")
+_SUBWORD_RE = re.compile(r"[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])")
+_STOPWORDS = frozenset(word.lower() for word in keyword.kwlist) | frozenset((
+    "self", "cls", "this", "var", "let", "const", "function", "new", "null", "nil", "void", "int", "str",
+    "the", "of", "to", "and", "in", "is", "it", "for", "on", "be", "an", "or", "if",
+    "de", "da", "do", "das", "dos", "que", "em", "um", "uma", "para", "com", "os", "as", "no", "na", "se", "por",
+))
+_FEATURE_CACHE_MAX = 200000
+
+
+def _load_numpy():
+    """O módulo numpy (importado na primeira chamada), ou None se não estiver instalado."""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+        _numpy_checked = True
+    return np
+
+
+def is_source_file(path: str) -> bool:
+    """Se um caminho (relativo) entra no índice de recuperação: código, configuração e documentação."""
+    name = path.rpartition("/")[2]
+    return name in SOURCE_NAMES or os.path.splitext(name)[1].lower() in SOURCE_EXTENSIONS
+
+
+def retrieval_index_dir(root: str, embedder_name: str) -> str:
+    """Diretório com o índice de um projeto para um embedder (vetores de embedders diferentes não se misturam)."""
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    directory = os.path.join(get_cache_dir(), "retrieval_index", digest, re.sub(r"[^\w.-]+", "_", embedder_name))
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+# --- Trechos ---
+
+def _good_cut(lines: list, position: int) -> bool:
+    # Começar um trecho numa definição de topo (não num fecho de bloco nem a seguir a um decorador)
+    line = lines[position]
+    return bool(line) and not line[0].isspace() and line[0] not in ")]}" and not lines[position - 1].startswith("@")
+
+
+def chunk_text(text: str) -> list:
+    """
+    Corta um texto em trechos de até CHUNK_MAX_LINES linhas e CHUNK_MAX_CHARS caracteres,
+    de preferência antes de uma linha de topo (def, class, função...) ou de uma linha em branco.
+    Devolve [(primeira linha, última linha, texto)], com as linhas a partir de 1.
+    """
+    lines = text.split("\n")
+    chunks = []
+    start = 0
+    while start < len(lines):
+        end = start
+        chars = 0
+        while end < len(lines) and end - start < CHUNK_MAX_LINES and (end == start or chars + len(lines[end]) < CHUNK_MAX_CHARS):
+            chars += len(lines[end]) + 1
+            end += 1
+        if end < len(lines):
+            cuts = range(end, start + CHUNK_MIN_LINES, -1)
+            cut = next((position for position in cuts if _good_cut(lines, position)), None)
+            if cut is None:
+                cut = next((position for position in cuts if not lines[position].strip()), end)
+            end = cut
+        body = "\n".join(lines[start:end])
+        if body.strip():
+            chunks.append((start + 1, end, body))
+        start = end
+    return chunks
+
+
+def embedding_text(path: str, body: str) -> str:
+    """O texto de um trecho tal como é dado ao embedder: o caminho também diz do que o trecho trata."""
+    return f"{path}\n{body}"[:MAX_EMBED_CHARS]
+
+
+def content_hash(text: str) -> str:
+    """Identifica o texto de um trecho: trechos iguais reutilizam o vetor já calculado."""
+    return hashlib.sha1(text.encode("utf-8", "surrogateescape")).hexdigest()[:16]
+
+
+def _normalized(values) -> array:
+    vector = array("f", values)
+    norm = math.sqrt(sum(value * value for value in vector))
+    if norm > 0:
+        vector = array("f", (value / norm for value in vector))
+    return vector
+
+
+# --- Embedders ---
+
+class HashingEmbedder:
+    """
+    Embeddings locais, sem rede: cada identificador (e as partes de snake_case/camelCase)
+    é espalhado por `dimensions` posições com uma função de hash e um sinal (hashing trick),
+    com peso 1 + log(frequência). Pergunta e trechos ficam parecidos quando partilham nomes.
+    """
+
+    def __init__(self, dimensions: int = HASH_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"local-hash{dimensions}-v1"
+        self._features = {} # palavra -> [(posição, peso com sinal)]
+
+    def _word_features(self, word: str) -> list:
+        features = self._features.get(word)
+        if features is not None:
+            return features
+        parts = [word.lower()]
+        subwords = [part.lower() for piece in word.split("_")
+                    for part in (_SUBWORD_RE.findall(piece) if piece.isascii() else None) or (piece,)]
+        if len(subwords) > 1:
+            parts.extend(subwords)
+        features = []
+        for number, part in enumerate(parts):
+            if len(part) < 2 or part in _STOPWORDS or part.isdigit():
+                continue
+            if len(part) > 3 and part[-1] == "s" and part[-2] != "s":
+                part = part[:-1] # Plural simples: "trigrams" e "trigram" contam como a mesma palavra
+            digest = zlib.crc32(part.encode("utf-8", "surrogateescape"))
+            weight = 1.0 if number == 0 else 0.5
+            features.append((digest % self.dimensions, weight if digest & 0x80000000 else -weight))
+        if len(self._features) >= _FEATURE_CACHE_MAX:
+            self._features.clear()
+        self._features[word] = features
+        return features
+
+    def embed(self, texts: list, task: str = "document") -> list:
+        """Um vetor normalizado (array('f')) por texto."""
+        vectors = []
+        for text in texts:
+            values = [0.0] * self.dimensions
+            for word, count in Counter(_IDENTIFIER_RE.findall(text)).items():
+                scale = 1.0 + math.log(count)
+                for position, weight in self._word_features(word):
+                    values[position] += weight * scale
+            vectors.append(_normalized(values))
+        return vectors
+
+
+class ProviderEmbedder:
+    """Embeddings de um provedor de IA (BaseAIProvider.get_embeddings), pedidos em lotes."""
+
+    def __init__(self, provider, model_name: str = None, batch_size: int = EMBEDDING_BATCH):
+        self.provider = provider
+        self.model_name = model_name or provider.embedding_model
+        self.batch_size = batch_size
+        self.name = f"{type(provider).__name__}-{self.model_name}"
+
+    def embed(self, texts: list, task: str = "document") -> list:
+        """Idem. Lança AIProviderError (ou NotImplementedError) se o provedor falhar."""
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [text[:MAX_EMBED_CHARS] for text in texts[start:start + self.batch_size]]
+            vectors.extend(_normalized(values) for values in self.provider.get_embeddings(batch, self.model_name, task=task))
+        return vectors
+
+
+# --- Índice de vetores ---
+
+class RetrievedChunk:
+    """Um trecho encontrado: caminho relativo, linhas (a partir de 1), semelhança com a pergunta e o texto."""
+
+    def __init__(self, path: str, start_line: int, end_line: int, score: float, text: str = None):
+        self.path = path
+        self.start_line = start_line
+        self.end_line = end_line
+        self.score = score
+        self.text = text
+
+    def __repr__(self):
+        return f"RetrievedChunk({self.path!r}, {self.start_line}-{self.end_line}, score={self.score:.3f})"
+
+
+class EmbeddingIndex:
+    """
+    Os vetores dos trechos do projeto para um embedder: uma matriz de float32 (uma linha por
+    vetor, normalizada) num arquivo mapeado em memória, e um manifesto com, para cada arquivo,
+    a assinatura (tamanho, mtime) e os trechos (linhas, linha da matriz), e o hash do texto de
+    cada linha da matriz.
+
+    Como o CodeIndex, é imutável: `with_changes` acrescenta os vetores novos ao fim do arquivo
+    (que as instâncias anteriores não veem) e dá um índice novo. As linhas que deixam de ser
+    usadas ficam no arquivo e são reaproveitadas se o mesmo texto voltar (p.ex. ao desfazer);
+    quando são mais do que as usadas, o arquivo é reescrito só com estas (com outro nome).
+    """
+
+    def __init__(self, root: str, directory: str, embedder_name: str, dimensions: int = 0, vectors_name: str = None,
+                 row_hashes=(), files=None):
+        self.root = root
+        self.directory = directory
+        self.embedder_name = embedder_name
+        self.dimensions = dimensions
+        self.vectors_name = vectors_name
+        self.row_hashes = list(row_hashes) # linha da matriz -> hash do texto
+        self.files = files or {} # caminho -> [tamanho, mtime, [[primeira linha, última linha, linha da matriz], ...]]
+        self._mapped = None
+        self._hashes = None
+        self._row_chunks = None
+        self._dead_rows = None
+
+    @classmethod
+    def empty(cls, root: str, embedder_name: str):
+        return cls(os.path.abspath(root), retrieval_index_dir(root, embedder_name), embedder_name)
+
+    @property
+    def rows(self) -> int:
+        return len(self.row_hashes)
+
+    @property
+    def chunks(self) -> int:
+        return sum(len(entry[2]) for entry in self.files.values())
+
+    def hashes(self) -> dict:
+        """Hash do texto -> linha da matriz (também as linhas já sem trecho)."""
+        if self._hashes is None:
+            self._hashes = {row_hash: row for row, row_hash in enumerate(self.row_hashes)}
+        return self._hashes
+
+    def row_chunks(self) -> dict:
+        """Linha da matriz -> (caminho, primeira linha, última linha), só das linhas em uso."""
+        if self._row_chunks is None:
+            row_chunks = {}
+            for path, (_, _, chunks) in self.files.items():
+                for start_line, end_line, row in chunks:
+                    row_chunks.setdefault(row, (path, start_line, end_line))
+            self._row_chunks = row_chunks
+        return self._row_chunks
+
+    def dead_rows(self) -> list:
+        """Linhas da matriz sem trecho (ficam de fora da pesquisa)."""
+        if self._dead_rows is None:
+            row_chunks = self.row_chunks()
+            self._dead_rows = [row for row in range(self.rows) if row not in row_chunks]
+        return self._dead_rows
+
+    def with_changes(self, updated: dict, removed=(), vectors: dict = None):
+        """
+        Um índice novo com os arquivos de `updated` ({caminho: (assinatura, [(primeira linha,
+        última linha, hash)])}) postos no lugar dos anteriores e `removed` retirados. Os vetores
+        dos hashes que o índice ainda não tem vêm em `vectors` ({hash: array('f')}) e são
+        gravados agora no arquivo da matriz. Lança OSError.
+        """
+        vectors = vectors or {}
+        files = dict(self.files)
+        for path in removed:
+            files.pop(path, None)
+        hashes = dict(self.hashes())
+        row_hashes = list(self.row_hashes)
+        appended = []
+        dimensions = self.dimensions
+        for path, (signature, chunks) in updated.items():
+            entries = []
+            for start_line, end_line, chunk_hash in chunks:
+                row = hashes.get(chunk_hash)
+                if row is None:
+                    vector = vectors[chunk_hash]
+                    dimensions = dimensions or len(vector)
+                    if len(vector) != dimensions:
+                        raise ValueError(f"dimensão do embedding mudou ({len(vector)} em vez de {dimensions})")
+                    row = hashes[chunk_hash] = len(row_hashes)
+                    row_hashes.append(chunk_hash)
+                    appended.append(vector)
+                entries.append([start_line, end_line, row])
+            files[path] = [signature[0], signature[1], entries]
+        index = EmbeddingIndex(self.root, self.directory, self.embedder_name, dimensions, self.vectors_name, row_hashes, files)
+        live = len(index.row_chunks())
+        if index.rows >= COMPACT_MIN_ROWS and index.rows - live > live:
+            return index._compacted(self, appended)
+        if appended:
+            index.vectors_name = index.vectors_name or "vectors-1.f32"
+            index._append(self.rows, appended)
+        return index
+
+    def _append(self, first_row: int, vectors: list):
+        path = os.path.join(self.directory, self.vectors_name)
+        with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+            f.truncate(first_row * self.dimensions * 4) # Vetores de uma atualização interrompida
+            f.seek(first_row * self.dimensions * 4)
+            for vector in vectors:
+                f.write(vector.tobytes())
+
+    def _compacted(self, previous, appended: list):
+        """Este índice com a matriz reescrita num arquivo novo, só com as linhas em uso."""
+        rows = sorted(self.row_chunks())
+        renumber = {row: number for number, row in enumerate(rows)}
+        generation = int(_VECTORS_NAME_RE.match(self.vectors_name or "vectors-0").group(1)) + 1
+        vectors_name = f"vectors-{generation}.f32"
+        view = previous._vector_bytes()
+        row_bytes = self.dimensions * 4
+        tmp_path = os.path.join(self.directory, vectors_name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            for row in rows:
+                if row < previous.rows:
+                    f.write(view[row * row_bytes:(row + 1) * row_bytes])
+                else:
+                    f.write(appended[row - previous.rows].tobytes())
+        os.replace(tmp_path, os.path.join(self.directory, vectors_name))
+        files = {path: [size, mtime, [[start_line, end_line, renumber[row]] for start_line, end_line, row in chunks]]
+                 for path, (size, mtime, chunks) in self.files.items()}
+        return EmbeddingIndex(self.root, self.directory, self.embedder_name, self.dimensions, vectors_name,
+                              [self.row_hashes[row] for row in rows], files)
+
+    def _vector_bytes(self) -> memoryview:
+        """A matriz (rows x dimensions float32) como bytes, mapeada na primeira vez."""
+        size = self.rows * self.dimensions * 4
+        if size == 0:
+            return memoryview(b"")
+        if self._mapped is None:
+            with open(os.path.join(self.directory, self.vectors_name), "rb") as f:
+                self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._mapped) < size:
+                raise ValueError("arquivo de vetores cortado")
+        return memoryview(self._mapped)[:size]
+
+    # --- Pesquisa ---
+
+    def search(self, query_vectors: list, top_k: int = DEFAULT_TOP_K, min_score: float = MIN_SCORE) -> list:
+        """
+        Os `top_k` trechos mais parecidos (cosseno) com cada vetor de `query_vectors`, todos
+        calculados de uma vez: [[RetrievedChunk, ...] por pergunta], do mais para o menos parecido.
+        """
+        row_chunks = self.row_chunks()
+        if not row_chunks or not query_vectors:
+            return [[] for _ in query_vectors]
+        dead = self.dead_rows()
+        _load_numpy()
+        if np is not None:
+            score_lists = self._scores_numpy(query_vectors, dead)
+        else:
+            score_lists = self._scores_python(query_vectors, dead)
+        results = []
+        for scores in score_lists:
+            if np is not None:
+                best = np.argpartition(scores, -top_k)[-top_k:] if top_k < self.rows else np.arange(self.rows)
+                best = sorted(best.tolist(), key=scores.__getitem__, reverse=True)
+            else:
+                best = nlargest(top_k, range(self.rows), key=scores.__getitem__)
+            results.append([RetrievedChunk(*row_chunks[row], float(scores[row])) for row in best if scores[row] >= min_score])
+        return results
+
+    def _scores_numpy(self, query_vectors: list, dead: list) -> list:
+        matrix = np.frombuffer(self._vector_bytes(), dtype=np.float32).reshape(self.rows, self.dimensions)
+        queries = np.array([list(vector) for vector in query_vectors], dtype=np.float32)
+        scores = np.empty((len(query_vectors), self.rows), dtype=np.float32)
+        for start in range(0, self.rows, SEARCH_BLOCK_ROWS):
+            scores[:, start:start + SEARCH_BLOCK_ROWS] = queries @ matrix[start:start + SEARCH_BLOCK_ROWS].T
+        scores[:, dead] = -np.inf
+        return list(scores)
+
+    def _scores_python(self, query_vectors: list, dead: list) -> list:
+        # Coluna a coluna (vistas com passo sobre o mmap), só nas posições não nulas da pergunta:
+        # os vetores do embedder local têm poucas, e cada coluna é somada por map() em C.
+        view = self._vector_bytes().cast("f")
+        score_lists = []
+        for vector in query_vectors:
+            scores = [0.0] * self.rows
+            for position, weight in enumerate(vector):
+                if weight != 0.0:
+                    scores = list(map(add, scores, map(mul, view[position::self.dimensions], repeat(weight))))
+            for row in dead:
+                scores[row] = -math.inf
+            score_lists.append(scores)
+        return score_lists
+
+    # --- Disco ---
+
+    def save(self):
+        """Grava o manifesto (os vetores já estão no disco; escrita atómica). Lança OSError."""
+        manifest = {
+            "version": RETRIEVAL_FORMAT_VERSION, "root": self.root, "embedder": self.embedder_name,
+            "byteorder": sys.byteorder, "dimensions": self.dimensions, "vectors": self.vectors_name,
+            "row_hashes": self.row_hashes, "files": self.files,
+        }
+        path = os.path.join(self.directory, _MANIFEST_NAME)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def remove_unused_files(self):
+        """Apaga as matrizes que este índice já não usa (substituídas por uma compactação)."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.startswith("vectors-") and name != self.vectors_name:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass # Ainda mapeado (Windows): fica para a próxima vez
+
+    @classmethod
+    def load(cls, root: str, embedder_name: str):
+        """O índice gravado de `root` para o embedder, ou None se não houver (ou for de outra versão ou estiver danificado)."""
+        root = os.path.abspath(root)
+        directory = retrieval_index_dir(root, embedder_name)
+        try:
+            with open(os.path.join(directory, _MANIFEST_NAME), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if (manifest.get("version") != RETRIEVAL_FORMAT_VERSION or manifest.get("root") != root
+                    or manifest.get("embedder") != embedder_name or manifest.get("byteorder") != sys.byteorder):
+                return None
+            index = cls(root, directory, embedder_name, manifest["dimensions"], manifest["vectors"],
+                        manifest["row_hashes"], manifest["files"])
+            index._vector_bytes() # Confirma que a matriz está lá e completa
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return index
+
+
+# --- Contexto para o pedido ---
+
+def chunk_texts(root: str, chunks: list, read_text):
+    """Preenche `text` de cada RetrievedChunk com as suas linhas, lidas do arquivo (`read_text(caminho) -> str ou None`)."""
+    files = {}
+    for chunk in chunks:
+        if chunk.path not in files:
+            text = read_text(os.path.join(root, chunk.path))
+            files[chunk.path] = text.split("\n") if text is not None else None
+        lines = files[chunk.path]
+        chunk.text = "\n".join(lines[chunk.start_line - 1:chunk.end_line]) if lines is not None else None
+
+
+def format_context(chunks: list, budget_tokens: int = DEFAULT_RETRIEVAL_BUDGET_TOKENS, token_counter=None) -> str:
+    """
+    Os trechos (já com texto), do mais parecido para o menos, como texto para o pedido, até
+    `budget_tokens`; o primeiro é cortado se sozinho já passar do orçamento.
+    """
+    token_counter = token_counter or estimate_tokens
+    parts = []
+    used = 0
+    for chunk in chunks:
+        if not chunk.text or not chunk.text.strip():
+            continue
+        part = f"--- {chunk.path} (linhas {chunk.start_line}-{chunk.end_line}) ---\n{chunk.text}"
+        tokens = token_counter(part)
+        if used + tokens > budget_tokens:
+            if parts:
+                continue # Um trecho menor, mais abaixo, ainda pode caber
+            part = part[:budget_tokens * 4]
+            tokens = token_counter(part)
+        parts.append(part)
+        used += tokens
+    return "\n".join(parts)
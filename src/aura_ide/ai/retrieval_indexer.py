@@ -0,0 +1,340 @@
+import itertools
+import os
+import threading
+import time
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from aura_ide.core.code_index import read_text
+from .errors import AIProviderError
+from .retrieval import (
+    DEFAULT_RETRIEVAL_BUDGET_TOKENS,
+    DEFAULT_TOP_K,
+    EmbeddingIndex,
+    HashingEmbedder,
+    chunk_text,
+    chunk_texts,
+    content_hash,
+    embedding_text,
+    format_context,
+    is_source_file,
+)
+
+EMBED_STEP = 256 # Trechos por chamada ao embedder entre verificações de cancelamento
+FLUSH_CHARS = 16 * 1024 * 1024 # Texto lido a partir do qual os vetores já calculados são gravados
+
+
+class _IndexSignals(QObject):
+    # Emitidos da thread de trabalho; entregues na thread da UI (conexão enfileirada)
+    ready = Signal(int, object)         # (id_da_tarefa, EmbeddingIndex)
+    progress = Signal(int, int, int)    # (id_da_tarefa, arquivos lidos, total)
+    done = Signal(int, object)          # (id_da_tarefa, estatísticas; None se não houve atualização)
+    failed = Signal(int, str, bool)     # (id_da_tarefa, mensagem, falha do embedder)
+
+
+class _IndexTask(QRunnable):
+    """
+    Carrega o índice de vetores gravado (se ainda não houver um) e põe-no em dia com o índice
+    de código (CodeIndex): os arquivos de código cuja assinatura (tamanho, mtime) mudou são
+    relidos e cortados em trechos, e só os trechos com um texto (hash) que o índice ainda não
+    tem vão ao embedder. Num arranque sem alterações não se lê nem calcula nada.
+    """
+
+    def __init__(self, task_id: int, root: str, index, code_index, embedder, cancel_event: threading.Event):
+        super().__init__()
+        self.setAutoDelete(False) # O RetrievalIndexer controla o tempo de vida da tarefa
+        self.task_id = task_id
+        self.root = root
+        self.index = index
+        self.code_index = code_index
+        self.embedder = embedder
+        self.cancel_event = cancel_event
+        self.signals = _IndexSignals()
+
+    def run(self):
+        try:
+            stats = self._update()
+        except (AIProviderError, NotImplementedError) as e:
+            self.signals.failed.emit(self.task_id, str(e), True)
+            return
+        except (OSError, ValueError) as e:
+            self.signals.failed.emit(self.task_id, str(e), False)
+            return
+        self.signals.done.emit(self.task_id, stats)
+
+    def _update(self):
+        """Estatísticas da atualização, ou None (cancelada, ou só carregado, sem índice de código)."""
+        started = time.monotonic()
+        index = self.index
+        if index is None:
+            index = EmbeddingIndex.load(self.root, self.embedder.name)
+            if index is not None:
+                index.remove_unused_files()
+                self.signals.ready.emit(self.task_id, index)
+            else:
+                index = EmbeddingIndex.empty(self.root, self.embedder.name)
+        if self.code_index is None:
+            return None
+        listed = {}
+        for path, (segment, file_id) in self.code_index.locations().items():
+            if segment.flags[file_id] and is_source_file(path):
+                listed[path] = segment.signature(file_id)
+        changed = sorted(path for path, signature in listed.items()
+                         if path not in index.files or tuple(index.files[path][:2]) != tuple(signature))
+        removed = [path for path in index.files if path not in listed]
+        embedded = reused = 0
+        updated = {}
+        pending = {} # hash -> texto a dar ao embedder
+        pending_chars = 0
+        for number, path in enumerate(changed, 1):
+            if self.cancel_event.is_set():
+                return None
+            known = index.hashes()
+            chunks = []
+            for start_line, end_line, body in chunk_text(read_text(os.path.join(self.root, path)) or ""):
+                text = embedding_text(path, body)
+                chunk_hash = content_hash(text)
+                if chunk_hash in known or chunk_hash in pending:
+                    reused += 1
+                else:
+                    pending[chunk_hash] = text
+                    pending_chars += len(text)
+                chunks.append((start_line, end_line, chunk_hash))
+            updated[path] = (listed[path], chunks)
+            if pending_chars >= FLUSH_CHARS or number == len(changed):
+                # Gravar aos poucos: uma indexação interrompida não perde o que já foi calculado
+                vectors = self._embed(pending)
+                if vectors is None:
+                    return None
+                embedded += len(vectors)
+                index = index.with_changes(updated, removed, vectors)
+                index.save()
+                self.signals.ready.emit(self.task_id, index)
+                self.signals.progress.emit(self.task_id, number, len(changed))
+                updated, pending, pending_chars, removed = {}, {}, 0, []
+        if removed:
+            index = index.with_changes(removed=removed)
+            index.save()
+            self.signals.ready.emit(self.task_id, index)
+        index.remove_unused_files()
+        return {
+            "files": len(index.files), "chunks": index.chunks, "rows": index.rows, "dimensions": index.dimensions,
+            "updated_files": len(changed), "embedded_chunks": embedded, "reused_chunks": reused,
+            "embedder": self.embedder.name, "seconds": time.monotonic() - started,
+        }
+
+    def _embed(self, pending: dict):
+        """{hash: vetor} dos textos pendentes, ou None se foi cancelado."""
+        hashes = list(pending)
+        vectors = {}
+        for start in range(0, len(hashes), EMBED_STEP):
+            if self.cancel_event.is_set():
+                return None
+            batch = hashes[start:start + EMBED_STEP]
+            vectors.update(zip(batch, self.embedder.embed([pending[chunk_hash] for chunk_hash in batch])))
+        return vectors
+
+
+class _RetrieveSignals(QObject):
+    done = Signal(int, object)          # (id, {"chunks", "context", "seconds"})
+    failed = Signal(int, str, bool)     # (id, mensagem, falha do embedder)
+
+
+class _RetrieveTask(QRunnable):
+    """Calcula o vetor da pergunta, encontra os trechos mais parecidos e monta o texto do contexto."""
+
+    def __init__(self, retrieve_id: int, index, embedder, query: str, top_k: int, budget_tokens: int, token_counter,
+                 cancel_event: threading.Event):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.retrieve_id = retrieve_id
+        self.index = index
+        self.embedder = embedder
+        self.query = query
+        self.top_k = top_k
+        self.budget_tokens = budget_tokens
+        self.token_counter = token_counter
+        self.cancel_event = cancel_event
+        self.signals = _RetrieveSignals()
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            if self.cancel_event.is_set():
+                raise ValueError("cancelada")
+            query_vector = self.embedder.embed([self.query], task="query")[0]
+            chunks = self.index.search([query_vector], self.top_k)[0]
+            chunk_texts(self.index.root, chunks, read_text)
+            context = format_context(chunks, self.budget_tokens, self.token_counter)
+        except (AIProviderError, NotImplementedError) as e:
+            self.signals.failed.emit(self.retrieve_id, str(e), True)
+            return
+        except (OSError, ValueError) as e:
+            self.signals.failed.emit(self.retrieve_id, str(e), False)
+            return
+        self.signals.done.emit(self.retrieve_id, {"chunks": chunks, "context": context, "seconds": time.monotonic() - started})
+
+
+class RetrievalIndexer(QObject):
+    """
+    Contexto recuperado do projeto para os pedidos à IA (ai/retrieval.py).
+
+    `update(code_index)` recebe cada versão do índice de código (CodeIndexer.index_ready) e
+    põe o índice de vetores em dia numa thread, reutilizando os vetores dos trechos que não
+    mudaram; o índice gravado da última sessão é carregado na primeira vez. `retrieve()`
+    devolve um id; os trechos e o texto do contexto chegam em `retrieved` (ou `retrieve_failed`).
+
+    Se os embeddings de um provedor falharem, passa ao embedder local (outro índice, sem rede).
+    """
+    index_ready = Signal(object)        # EmbeddingIndex
+    progress = Signal(int, int)         # (arquivos lidos, total), numa atualização
+    finished = Signal(object)           # Estatísticas da última atualização (dict)
+    failed = Signal(str)
+    retrieved = Signal(int, object)     # (id, {"chunks": [RetrievedChunk], "context": str, "seconds": float})
+    retrieve_failed = Signal(int, str)
+
+    def __init__(self, parent=None, embedder=None):
+        super().__init__(parent)
+        self.embedder = embedder or HashingEmbedder()
+        self.root = None
+        self.index = None
+        self.code_index = None # Última versão recebida do índice de código
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.query_pool = QThreadPool(self)
+        self.query_pool.setMaxThreadCount(1)
+        self._id_counter = itertools.count(1)
+        self._tasks = {} # id -> tarefa ainda na posse de um pool
+        self._current_id = None
+        self._cancel_event = threading.Event()
+        self._pending = None
+        self._needs_load = False
+        self._retrievals = {} # id -> evento de cancelamento
+
+    def set_embedder(self, embedder):
+        """Troca o embedder; o índice passa a ser o dele (carregado do disco e posto em dia)."""
+        changed = embedder.name != self.embedder.name
+        self.embedder = embedder
+        if changed and self.root is not None:
+            self._reset(self.root)
+            self._pending = self.code_index
+            self._start_next()
+
+    def update(self, code_index):
+        """Põe o índice de vetores em dia com uma versão do índice de código (CodeIndex), numa thread."""
+        if code_index.root != self.root:
+            self._reset(code_index.root)
+        self.code_index = code_index
+        self._pending = code_index
+        self._start_next()
+
+    @property
+    def indexing(self) -> bool:
+        return self._current_id is not None
+
+    def retrieve(self, query: str, top_k: int = DEFAULT_TOP_K, budget_tokens: int = DEFAULT_RETRIEVAL_BUDGET_TOKENS,
+                 token_counter=None) -> int:
+        """Começa a procurar os trechos do projeto mais próximos de `query` e devolve o id do pedido."""
+        retrieve_id = next(self._id_counter)
+        if self.index is None or not self.index.rows:
+            message = "O índice de contexto ainda está a ser construído." if self.indexing else "Não há índice de contexto."
+            QTimer.singleShot(0, lambda: self.retrieve_failed.emit(retrieve_id, message))
+            return retrieve_id
+        cancel_event = threading.Event()
+        task = _RetrieveTask(retrieve_id, self.index, self.embedder, query, max(1, top_k), budget_tokens, token_counter,
+                             cancel_event)
+        task.signals.done.connect(self._on_retrieved)
+        task.signals.failed.connect(self._on_retrieve_failed)
+        self._tasks[retrieve_id] = task
+        self._retrievals[retrieve_id] = cancel_event
+        self.query_pool.start(task)
+        return retrieve_id
+
+    def cancel_retrieve(self, retrieve_id: int = None):
+        """Cancela um pedido (ou todos); o resultado deixa de chegar."""
+        for current_id in ([retrieve_id] if retrieve_id is not None else list(self._retrievals)):
+            cancel_event = self._retrievals.pop(current_id, None)
+            if cancel_event is not None:
+                cancel_event.set()
+                task = self._tasks.get(current_id)
+                if task is not None and self.query_pool.tryTake(task):
+                    self._tasks.pop(current_id, None)
+
+    def shutdown(self):
+        """Cancela tudo (ao fechar a janela); o que já foi gravado fica para a próxima sessão."""
+        self._cancel_event.set()
+        self.cancel_retrieve()
+        self._current_id = None
+
+    # --- Interno ---
+
+    def _reset(self, root: str):
+        self._cancel_event.set()
+        self._cancel_event = threading.Event()
+        self.cancel_retrieve()
+        self.root = root
+        self.index = None
+        self._current_id = None
+        self._needs_load = True
+
+    def _start_next(self):
+        if self._current_id is not None or self.root is None:
+            return
+        if not (self._needs_load or self._pending is not None):
+            return
+        task_id = next(self._id_counter)
+        task = _IndexTask(task_id, self.root, self.index, self._pending, self.embedder, self._cancel_event)
+        task.signals.ready.connect(self._on_ready)
+        task.signals.progress.connect(self._on_progress)
+        task.signals.done.connect(self._on_done)
+        task.signals.failed.connect(self._on_failed)
+        self._needs_load = False
+        self._pending = None
+        self._current_id = task_id
+        self._tasks[task_id] = task
+        self.thread_pool.start(task)
+
+    def _fall_back_to_local(self, error_message: str):
+        if isinstance(self.embedder, HashingEmbedder):
+            return
+        print(f"AVISO: Embeddings do provedor indisponíveis ({error_message}); a usar o embedder local.")
+        self.set_embedder(HashingEmbedder())
+
+    def _on_ready(self, task_id: int, index):
+        if task_id == self._current_id:
+            self.index = index
+            self.index_ready.emit(index)
+
+    def _on_progress(self, task_id: int, done: int, total: int):
+        if task_id == self._current_id:
+            self.progress.emit(done, total)
+
+    def _on_done(self, task_id: int, stats):
+        self._tasks.pop(task_id, None)
+        if task_id == self._current_id:
+            self._current_id = None
+            if stats is not None:
+                self.finished.emit(stats)
+            self._start_next()
+
+    def _on_failed(self, task_id: int, error_message: str, embedder_error: bool):
+        self._tasks.pop(task_id, None)
+        if task_id == self._current_id:
+            self._current_id = None
+            self.failed.emit(error_message)
+            if embedder_error:
+                self._pending = self.code_index
+                self._fall_back_to_local(error_message)
+            self._start_next()
+
+    def _on_retrieved(self, retrieve_id: int, result):
+        self._tasks.pop(retrieve_id, None)
+        if self._retrievals.pop(retrieve_id, None) is not None:
+            self.retrieved.emit(retrieve_id, result)
+
+    def _on_retrieve_failed(self, retrieve_id: int, error_message: str, embedder_error: bool):
+        self._tasks.pop(retrieve_id, None)
+        if self._retrievals.pop(retrieve_id, None) is not None:
+            self.retrieve_failed.emit(retrieve_id, error_message)
+        if embedder_error:
+            self._fall_back_to_local(error_message)
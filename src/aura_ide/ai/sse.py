@@ -0,0 +1,28 @@
+# Parser mínimo de Server-Sent Events (SSE), usado pelas APIs compatíveis com OpenAI
+# quando "stream": true.
+
+
+def iter_sse_data(lines):
+    """
+    Recebe um iterável de linhas (str, ou bytes em UTF-8, sem o '\\n') e produz o
+    conteúdo de cada evento SSE (campo 'data'). Eventos com várias linhas 'data:' são
+    unidos por '\\n', comentários (linhas começadas por ':') e outros campos são ignorados.
+    """
+    data_lines = []
+    for line in lines:
+        if line is None:
+            continue
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        if not line: # Linha em branco: fim do evento
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data_lines.append(value[1:] if value.startswith(" ") else value)
+    if data_lines: # Stream terminou sem linha em branco final
+        yield "\n".join(data_lines)
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from .tools import FILE_TOOLS, ToolCallError, run_file_tool
+
+DEFAULT_TOOL_WORKERS = 4
+
+# Estados de um resultado (ToolRunner.finished)
+TOOL_OK = "ok"
+TOOL_ERROR = "erro"
+
+
+class _ToolSignals(QObject):
+    # Emitido da thread de trabalho; entregue na thread da UI (conexão enfileirada)
+    done = Signal(str, str, str, float) # (id_da_chamada, saída, estado, segundos)
+
+
+class _FileToolTask(QRunnable):
+    """Executa uma chamada de read_file, write_file ou list_dir numa thread do pool."""
+
+    def __init__(self, root: str, call, cancel_event: threading.Event):
+        super().__init__()
+        self.setAutoDelete(False) # O ToolRunner controla o tempo de vida da tarefa
+        self.root = root
+        self.call = call
+        self.cancel_event = cancel_event
+        self.signals = _ToolSignals()
+
+    def run(self):
+        started = time.monotonic()
+        state = TOOL_OK
+        try:
+            output = run_file_tool(self.root, self.call, self.cancel_event)
+        except ToolCallError as e:
+            output, state = f"Erro: {e}", TOOL_ERROR
+        except OSError as e:
+            output, state = f"Erro: {e.strerror or e}", TOOL_ERROR
+        self.signals.done.emit(self.call.id, output, state, time.monotonic() - started)
+
+
+class ToolRunner(QObject):
+    """
+    Ferramentas de arquivos do ciclo de comandos (ai/tools.py), fora da thread da UI.
+
+    As chamadas de uma resposta correm em paralelo (várias leituras ao mesmo tempo), exceto
+    as que tocam no mesmo caminho: essas correm pela ordem em que foram pedidas, para que
+    "gravar e depois ler" na mesma resposta leia o que foi gravado. Os comandos e as
+    pesquisas não passam por aqui (terminal da IA e CodeIndexer).
+    """
+    finished = Signal(str, str, str, float) # (id_da_chamada, saída, estado, segundos)
+
+    def __init__(self, parent=None, workers: int = DEFAULT_TOOL_WORKERS):
+        super().__init__(parent)
+        self.root = None
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max(1, workers))
+        self._tasks = {} # id_da_chamada -> tarefa ainda na posse do pool
+        self._running_paths = {} # id_da_chamada -> caminho
+        self._pending = [] # (chamada, caminho) à espera de uma chamada anterior ao mesmo caminho
+        self._cancel_events = {} # id_da_chamada -> evento de cancelamento (em curso ou à espera)
+
+    def run(self, call):
+        """Agenda uma chamada (ToolCall); o resultado chega em `finished` com o id dela."""
+        if call.name not in FILE_TOOLS:
+            raise ValueError(f"{call.name} não é uma ferramenta de arquivos")
+        path = os.path.normpath(call.arguments.get("path") or ".")
+        self._cancel_events[call.id] = threading.Event()
+        self._pending.append((call, path))
+        self._start_next()
+
+    def cancel(self, call_id: str = None):
+        """Cancela uma chamada (ou todas); o resultado dela deixa de chegar."""
+        for current_id in ([call_id] if call_id is not None else list(self._cancel_events)):
+            cancel_event = self._cancel_events.pop(current_id, None)
+            if cancel_event is None:
+                continue
+            cancel_event.set()
+            self._pending = [(call, path) for call, path in self._pending if call.id != current_id]
+            task = self._tasks.get(current_id)
+            if task is not None and self.thread_pool.tryTake(task):
+                self._tasks.pop(current_id, None)
+                self._running_paths.pop(current_id, None)
+        self._start_next()
+
+    def pending_count(self) -> int:
+        return len(self._cancel_events)
+
+    # --- Interno ---
+
+    def _start_next(self):
+        busy = set(self._running_paths.values())
+        waiting = []
+        for call, path in self._pending:
+            if path in busy:
+                waiting.append((call, path))
+                continue
+            busy.add(path) # As seguintes com o mesmo caminho esperam por esta
+            task = _FileToolTask(self.root, call, self._cancel_events[call.id])
+            task.signals.done.connect(self._on_done)
+            self._tasks[call.id] = task
+            self._running_paths[call.id] = path
+            self.thread_pool.start(task)
+        self._pending = waiting
+
+    def _on_done(self, call_id: str, output: str, state: str, seconds: float):
+        self._tasks.pop(call_id, None)
+        self._running_paths.pop(call_id, None)
+        if self._cancel_events.pop(call_id, None) is not None:
+            self.finished.emit(call_id, output, state, seconds)
+        self._start_next()
@@ -0,0 +1,453 @@
+import json
+import os
+import re
+import tempfile
+import uuid
+
+from aura_ide.core.file_manager import KIND_BINARY, inherited_ignores, iter_text_chunks, list_project_directory, probe_file
+from .agent_loop import (
+    DEFAULT_SEARCH_RESULTS,
+    MAX_LINE_CHARS,
+    MAX_SEARCH_RESULTS,
+    describe_search,
+    parse_commands,
+    parse_searches
+)
+
+# Ferramentas que o modelo pode chamar no ciclo de comandos (ai/agent_loop.py): as definições
+# tipadas enviadas aos provedores com chamadas de funções nativas (Gemini, APIs compatíveis
+# com a OpenAI), o formato de reserva em texto (linhas TOOL_CALL: com JSON) e as ferramentas
+# de arquivos, que correm fora da thread da UI (ver ai/tool_runner.py). Este módulo não usa o Qt.
+
+TOOL_CALL_PREFIX = "TOOL_CALL:"
+READ_FILE_MAX_LINES = 400 # Linhas devolvidas por uma leitura sem fim explícito (ou com um intervalo maior)
+READ_FILE_MAX_CHARS = 16000
+LIST_DIR_MAX_ENTRIES = 300
+MAX_WRITE_CHARS = 1024 * 1024
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_START_RE = re.compile(r"\s*`*(?:json\b)?\s*")
+
+
+class ToolCallError(ValueError):
+    """Chamada de ferramenta inválida (ferramenta desconhecida, argumentos em falta ou do tipo errado)."""
+
+
+class ToolSpec:
+    """
+    Uma ferramenta: nome, descrição e parâmetros, cada um {"type", "description"} e, se for
+    opcional, "default" (e "minimum"/"maximum" para inteiros). Os limites e os valores por
+    omissão são aplicados por `coerce`; os provedores só recebem tipos e descrições, o
+    subconjunto de JSON Schema que todos aceitam.
+    """
+
+    def __init__(self, name: str, description: str, parameters: dict, required: tuple = ()):
+        self.name = name
+        self.description = description
+        self.parameters = parameters
+        self.required = tuple(required)
+
+    def schema(self) -> dict:
+        """Os parâmetros em JSON Schema (objeto), para as APIs de chamadas de funções."""
+        return {
+            "type": "object",
+            "properties": {name: {"type": parameter["type"], "description": parameter["description"]}
+                           for name, parameter in self.parameters.items()},
+            "required": list(self.required),
+        }
+
+    def signature(self) -> str:
+        """`nome(a, b?)`: para a instrução de sistema (formato de reserva em texto)."""
+        names = [name if name in self.required else f"{name}?" for name in self.parameters]
+        return f"{self.name}({', '.join(names)})"
+
+    def coerce(self, arguments) -> dict:
+        """Argumentos validados e com os valores por omissão. Lança ToolCallError."""
+        if arguments is None:
+            arguments = {}
+        if not isinstance(arguments, dict):
+            raise ToolCallError(f"{self.name}: os argumentos devem ser um objeto JSON")
+        unknown = sorted(set(arguments) - set(self.parameters))
+        if unknown:
+            raise ToolCallError(f"{self.name}: argumento(s) desconhecido(s): {', '.join(unknown)}")
+        coerced = {}
+        for name, parameter in self.parameters.items():
+            value = arguments.get(name)
+            if value is None:
+                if name in self.required:
+                    raise ToolCallError(f"{self.name}: falta o argumento '{name}'")
+                coerced[name] = parameter.get("default")
+                continue
+            coerced[name] = _coerce_value(self.name, name, parameter, value)
+        return coerced
+
+
+def _coerce_value(tool_name: str, name: str, parameter: dict, value):
+    kind = parameter["type"]
+    if kind == "string":
+        if isinstance(value, (dict, list)):
+            raise ToolCallError(f"{tool_name}: '{name}' deve ser texto")
+        return value if isinstance(value, str) else str(value)
+    if kind == "boolean":
+        if isinstance(value, str) and value.lower() in ("true", "false"):
+            return value.lower() == "true"
+        if not isinstance(value, (bool, int)):
+            raise ToolCallError(f"{tool_name}: '{name}' deve ser true ou false")
+        return bool(value)
+    # Inteiro: o Gemini envia todos os números como float, e alguns modelos escrevem-nos entre aspas
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = None
+    if isinstance(value, bool) or number is None or not number.is_integer():
+        raise ToolCallError(f"{tool_name}: '{name}' deve ser um número inteiro")
+    number = int(number)
+    if "minimum" in parameter:
+        number = max(parameter["minimum"], number)
+    if "maximum" in parameter:
+        number = min(parameter["maximum"], number)
+    return number
+
+
+TOOL_SPECS = (
+    ToolSpec("run_command", "Executa um comando bash no terminal Linux da IA, na raiz do projeto, e devolve a saída "
+                            "(comprimida) e o código de saída. Comandos só de leitura correm em paralelo.",
+             {"command": {"type": "string", "description": "O comando (pode ter várias linhas)."}},
+             required=("command",)),
+    ToolSpec("read_file", f"Lê um arquivo de texto do projeto, com as linhas numeradas. Sem intervalo devolve até "
+                          f"{READ_FILE_MAX_LINES} linhas; para arquivos maiores, leia por partes.",
+             {"path": {"type": "string", "description": "Caminho relativo à raiz do projeto."},
+              "start_line": {"type": "integer", "description": "Primeira linha (a partir de 1). Por omissão, 1.",
+                             "default": 1, "minimum": 1},
+              "end_line": {"type": "integer", "description": "Última linha (inclusive). Por omissão, até ao fim.",
+                           "default": 0, "minimum": 0}},
+             required=("path",)),
+    ToolSpec("write_file", "Grava um arquivo de texto (UTF-8) no projeto com o conteúdo completo dado, criando os "
+                           "diretórios que faltarem. Substitui o arquivo se já existir.",
+             {"path": {"type": "string", "description": "Caminho relativo à raiz do projeto."},
+              "content": {"type": "string", "description": "O conteúdo completo do arquivo."}},
+             required=("path", "content")),
+    ToolSpec("search", "Procura no conteúdo dos arquivos do projeto (índice de trigramas, mais rápido do que grep). "
+                       "Devolve linhas 'caminho:linha: texto'.",
+             {"query": {"type": "string", "description": "Texto a procurar (ou expressão regular, com regex)."},
+              "regex": {"type": "boolean", "description": "A query é uma expressão regular. Por omissão, false.",
+                        "default": False},
+              "case_sensitive": {"type": "boolean", "description": "Distinguir maiúsculas. Por omissão, false.",
+                                 "default": False},
+              "path": {"type": "string", "description": "Limitar a prefixos ou globs separados por vírgulas "
+                                                        "(p.ex. 'src/, *.py').", "default": ""},
+              "max_results": {"type": "integer", "description": f"Máximo de resultados (até {MAX_SEARCH_RESULTS}). "
+                                                               f"Por omissão, {DEFAULT_SEARCH_RESULTS}.",
+                              "default": DEFAULT_SEARCH_RESULTS, "minimum": 1, "maximum": MAX_SEARCH_RESULTS}},
+             required=("query",)),
+    ToolSpec("list_dir", "Lista um diretório do projeto (sem o que os .gitignore excluem); os subdiretórios "
+                         "terminam em '/'.",
+             {"path": {"type": "string", "description": "Caminho relativo à raiz do projeto. Por omissão, a raiz.",
+                       "default": ""}}),
+)
+TOOLS_BY_NAME = {spec.name: spec for spec in TOOL_SPECS}
+FILE_TOOLS = frozenset(("read_file", "write_file", "list_dir")) # Correm no ToolRunner (ai/tool_runner.py)
+
+
+def tool_signatures(specs=TOOL_SPECS) -> str:
+    return ", ".join(spec.signature() for spec in specs)
+
+
+class ToolCall:
+    """
+    Uma chamada de ferramenta pedida pelo modelo. Os argumentos são validados na criação:
+    uma chamada inválida fica com `error` preenchido e não é executada (o erro volta ao
+    modelo como resultado dela).
+
+    `native` distingue as chamadas das APIs de chamadas de funções (o resultado volta numa
+    mensagem 'tool' com o mesmo id) das escritas no texto da resposta (o resultado volta
+    numa mensagem do usuário).
+    """
+
+    def __init__(self, name: str, arguments=None, call_id: str = None, native: bool = False):
+        self.name = name
+        self.id = call_id or f"call_{uuid.uuid4().hex[:16]}"
+        self.native = native
+        self.error = None
+        self.raw_arguments = arguments
+        spec = TOOLS_BY_NAME.get(name)
+        if spec is None:
+            self.arguments = arguments if isinstance(arguments, dict) else {}
+            self.error = f"ferramenta desconhecida: {name!r} (disponíveis: {', '.join(TOOLS_BY_NAME)})"
+            return
+        try:
+            self.arguments = spec.coerce(arguments)
+        except ToolCallError as e:
+            self.arguments = arguments if isinstance(arguments, dict) else {}
+            self.error = str(e)
+
+    @classmethod
+    def from_json_arguments(cls, name: str, arguments_json: str, call_id: str = None, native: bool = False):
+        """Chamada cujos argumentos vêm como texto JSON (o formato das APIs compatíveis com a OpenAI)."""
+        try:
+            arguments = json.loads(arguments_json) if arguments_json and arguments_json.strip() else {}
+        except ValueError as e:
+            call = cls(name, {}, call_id, native)
+            call.raw_arguments = arguments_json
+            call.error = call.error or f"{name}: argumentos não são JSON válido ({e})"
+            return call
+        return cls(name, arguments, call_id, native)
+
+    def to_dict(self) -> dict:
+        """Forma guardada no histórico (mensagem do assistente, chave 'tool_calls')."""
+        arguments = self.raw_arguments if self.error and isinstance(self.raw_arguments, dict) else self.arguments
+        return {"id": self.id, "name": self.name, "arguments": arguments}
+
+    def __repr__(self):
+        return f"ToolCall({self.name!r}, {self.arguments!r}, id={self.id!r}{', native' if self.native else ''})"
+
+
+def describe_call(call: ToolCall) -> str:
+    """Descrição curta de uma chamada (chat e mensagem de seguimento)."""
+    arguments = call.arguments
+    if call.error:
+        return f"{call.name} (inválida)"
+    if call.name == "run_command":
+        return f"$ {arguments['command']}"
+    if call.name == "read_file":
+        lines = ""
+        if arguments["start_line"] > 1 or arguments["end_line"]:
+            lines = f" (linhas {arguments['start_line']}-{arguments['end_line'] or 'fim'})"
+        return f"ler {arguments['path']}{lines}"
+    if call.name == "write_file":
+        return f"gravar {arguments['path']} ({len(arguments['content'])} caracteres)"
+    if call.name == "search":
+        return describe_search(arguments)
+    return f"listar {arguments['path'] or '.'}"
+
+
+def format_call_line(call) -> str:
+    """Uma chamada no formato de reserva em texto (`call` é um ToolCall ou o seu to_dict())."""
+    if isinstance(call, ToolCall):
+        call = call.to_dict()
+    return TOOL_CALL_PREFIX + " " + json.dumps({"name": call["name"], "arguments": call["arguments"]}, ensure_ascii=False)
+
+
+def _calls_from_json(value) -> list:
+    """ToolCalls de um valor JSON: uma chamada, uma lista delas ou {"tool_calls": [...]}."""
+    if isinstance(value, dict) and isinstance(value.get("tool_calls"), list):
+        value = value["tool_calls"]
+    items = value if isinstance(value, list) else [value]
+    calls = []
+    for item in items:
+        if not isinstance(item, dict):
+            calls.append(ToolCall("?", None))
+            continue
+        function = item.get("function")
+        if isinstance(function, dict): # Formato da OpenAI copiado para o texto
+            arguments = function.get("arguments")
+            if isinstance(arguments, str):
+                calls.append(ToolCall.from_json_arguments(str(function.get("name")), arguments))
+            else:
+                calls.append(ToolCall(str(function.get("name")), arguments))
+        else:
+            calls.append(ToolCall(str(item.get("name")), item.get("arguments", item.get("args"))))
+    return calls
+
+
+def parse_tool_calls(reply: str):
+    """
+    Separa as chamadas de ferramentas escritas no texto de uma resposta (formato de reserva,
+    para modelos sem chamadas de funções nativas) do texto restante. Devolve (chamadas, texto).
+
+    Cada `TOOL_CALL:` no início de uma linha é seguido de JSON: {"name", "arguments"}, uma
+    lista destes objetos ou {"tool_calls": [...]}; o JSON pode continuar pelas linhas
+    seguintes e vir dentro de ```. Também são aceites os formatos antigos, uma linha
+    `EXECUTE_TERMINAL_IA:` por comando e `SEARCH_CODE_IA:` por pesquisa (ver agent_loop.py),
+    que viram chamadas de run_command e search.
+    """
+    calls = []
+    text_lines = []
+    lines = reply.splitlines()
+    index = 0
+    while index < len(lines):
+        stripped = lines[index].strip()
+        if not stripped.startswith(TOOL_CALL_PREFIX):
+            text_lines.append(lines[index])
+            index += 1
+            continue
+        # O JSON começa depois do prefixo (e de ``` ou `json`) e pode ocupar várias linhas: o
+        # resto da resposta é decodificado de uma vez e avança-se as linhas que o objeto ocupou
+        rest = "\n".join([stripped[len(TOOL_CALL_PREFIX):]] + lines[index + 1:])
+        opening = _JSON_START_RE.match(rest)
+        try:
+            value, end = _JSON_DECODER.raw_decode(rest, opening.end())
+        except ValueError as e:
+            call = ToolCall("?", None)
+            call.error = f"{TOOL_CALL_PREFIX} sem JSON válido ({e.msg}): {rest[:MAX_LINE_CHARS].strip()}"
+            calls.append(call)
+            index += 1
+            continue
+        calls.extend(_calls_from_json(value))
+        index += 1 + rest.count("\n", 0, end)
+        if "```" in opening.group() and index < len(lines) and lines[index].strip() == "```":
+            index += 1 # ``` de fecho, na linha a seguir ao JSON
+    text = "\n".join(text_lines)
+    commands, text = parse_commands(text)
+    searches, text = parse_searches(text)
+    calls.extend(ToolCall("run_command", {"command": command}) for command in commands)
+    calls.extend(ToolCall("search", search) for search in searches)
+    return calls, text
+
+
+def flatten_tool_messages(messages: list) -> list:
+    """
+    O histórico para um provedor sem chamadas de funções nativas: as chamadas nativas de
+    uma resposta passam a linhas TOOL_CALL: no texto dela, e os resultados ('tool') a uma
+    mensagem do usuário (junta com a seguinte, se também for do usuário).
+    """
+    flattened = []
+    for message in messages:
+        role = message.get("role")
+        if role == "assistant" and message.get("tool_calls"):
+            lines = [message.get("content") or ""] + [format_call_line(call) for call in message["tool_calls"]]
+            flattened.append({"role": "assistant", "content": "\n".join(line for line in lines if line)})
+            continue
+        if role == "tool":
+            message = {"role": "user", "content": f"Resultado de {message.get('name')}:\n{message.get('content') or ''}"}
+        elif role not in ("user", "assistant", "system") or "tool_calls" in message:
+            message = {"role": role, "content": message.get("content") or ""}
+        if role in ("tool", "user") and flattened and flattened[-1]["role"] == "user":
+            flattened[-1] = {"role": "user", "content": f"{flattened[-1]['content']}\n\n{message['content']}"}
+        else:
+            flattened.append(message)
+    return flattened
+
+
+# --- Ferramentas de arquivos (correm numa thread de trabalho) ---
+
+def resolve_project_path(root: str, path: str) -> tuple:
+    """
+    (caminho absoluto, caminho relativo) de um caminho pedido pelo modelo, que tem de ficar
+    dentro do projeto (também depois de seguir ligações simbólicas). Lança ToolCallError.
+    """
+    root = os.path.realpath(root)
+    requested = (path or "").strip()
+    full_path = os.path.realpath(os.path.join(root, requested))
+    if full_path != root and not full_path.startswith(root + os.sep):
+        raise ToolCallError(f"caminho fora do projeto: {requested}")
+    relative = os.path.relpath(full_path, root)
+    return full_path, "" if relative == "." else relative.replace(os.sep, "/")
+
+
+def read_file(root: str, path: str, start_line: int = 1, end_line: int = 0,
+              max_lines: int = READ_FILE_MAX_LINES, max_chars: int = READ_FILE_MAX_CHARS, cancel_event=None) -> str:
+    """
+    As linhas `start_line`..`end_line` (1 = primeira; end_line 0 = até ao fim) de um arquivo
+    de texto, numeradas e limitadas a `max_lines`/`max_chars`. O arquivo é lido por blocos e
+    a leitura para assim que passa da última linha pedida. Lança ToolCallError e OSError.
+    """
+    full_path, relative = resolve_project_path(root, path)
+    if os.path.isdir(full_path):
+        raise ToolCallError(f"{relative or '.'} é um diretório (use list_dir)")
+    probe = probe_file(full_path)
+    if probe.kind == KIND_BINARY:
+        raise ToolCallError(f"{relative} é um arquivo binário ({probe.size} bytes)")
+    start_line = max(1, start_line)
+    last_line = start_line + max_lines - 1
+    if end_line and end_line >= start_line:
+        last_line = min(last_line, end_line)
+    selected = []
+    size = 0
+    line_number = 0
+    next_line = None # Primeira linha que ficou de fora (None: chegou-se ao fim do arquivo)
+
+    def take(line: str) -> bool:
+        nonlocal line_number, size, next_line
+        line_number += 1
+        if line_number < start_line:
+            return True
+        numbered = f"{line_number:>6}| {line}"
+        if line_number > last_line or (selected and size + len(numbered) > max_chars):
+            next_line = line_number
+            return False
+        size += len(numbered) + 1
+        selected.append(numbered)
+        return True
+
+    partial = ""
+    chunks = iter_text_chunks(full_path, probe.encoding, probe.bom_bytes, cancel_event=cancel_event)
+    for text, _ in chunks:
+        pieces = (partial + text).split("\n")
+        partial = pieces.pop()
+        if not all(take(line) for line in pieces):
+            chunks.close() # Já passou da última linha pedida: o resto do arquivo não é lido
+            break
+    else:
+        if partial:
+            take(partial) # Última linha, sem '\n' no fim
+    if not selected:
+        return f"{relative}: sem linhas nesse intervalo (o arquivo tem {line_number} linha(s))"
+    last = start_line + len(selected) - 1
+    header = f"{relative} (linhas {start_line}-{last}"
+    # Cortado pelos limites antes do fim pedido: dizer ao modelo onde continuar
+    cut_short = next_line is not None and (not end_line or next_line <= end_line)
+    header += f"; há mais: continue em start_line={next_line})" if cut_short else ")"
+    return header + "\n" + "\n".join(selected)
+
+
+def write_file(root: str, path: str, content: str) -> str:
+    """
+    Grava `content` em UTF-8, de forma atómica (arquivo temporário no mesmo diretório e
+    os.replace): quem observa o arquivo nunca o vê a meio. Lança ToolCallError e OSError.
+    """
+    full_path, relative = resolve_project_path(root, path)
+    if not relative:
+        raise ToolCallError("falta o nome do arquivo")
+    if os.path.isdir(full_path):
+        raise ToolCallError(f"{relative} é um diretório")
+    if len(content) > MAX_WRITE_CHARS:
+        raise ToolCallError(f"conteúdo demasiado grande ({len(content)} caracteres; máximo {MAX_WRITE_CHARS})")
+    directory = os.path.dirname(full_path)
+    os.makedirs(directory, exist_ok=True)
+    existed = os.path.exists(full_path)
+    mode = os.stat(full_path).st_mode & 0o7777 if existed else None
+    data = content.encode("utf-8")
+    fd, temporary_path = tempfile.mkstemp(prefix=".aura-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if mode is not None:
+            os.chmod(temporary_path, mode)
+        os.replace(temporary_path, full_path)
+    except BaseException:
+        try:
+            os.unlink(temporary_path)
+        except OSError:
+            pass
+        raise
+    lines = content.count("\n") + (1 if content and not content.endswith("\n") else 0)
+    return f"{relative}: {len(data)} bytes, {lines} linha(s) gravados ({'substituído' if existed else 'criado'})"
+
+
+def list_dir(root: str, path: str = "", max_entries: int = LIST_DIR_MAX_ENTRIES) -> str:
+    """Os arquivos e subdiretórios (com '/') de um diretório do projeto, por ordem alfabética."""
+    full_path, relative = resolve_project_path(root, path)
+    if not os.path.isdir(full_path):
+        raise ToolCallError(f"{relative or '.'} não é um diretório")
+    real_root = os.path.realpath(root)
+    files, subdirectories = list_project_directory(real_root, relative, inherited_ignores(real_root, relative, {}))
+    prefix = relative + "/" if relative else ""
+    entries = sorted([subdirectory[len(prefix):] + "/" for subdirectory, _ in subdirectories] + files, key=str.lower)
+    lines = [f"{relative or '.'}/ ({len(subdirectories)} diretório(s), {len(files)} arquivo(s))"]
+    lines.extend(entries[:max_entries])
+    if len(entries) > max_entries:
+        lines.append(f"... (+{len(entries) - max_entries} entradas)")
+    return "\n".join(lines)
+
+
+def run_file_tool(root: str, call: ToolCall, cancel_event=None) -> str:
+    """Executa uma chamada de read_file, write_file ou list_dir. Lança ToolCallError e OSError."""
+    arguments = call.arguments
+    if call.name == "read_file":
+        return read_file(root, arguments["path"], arguments["start_line"], arguments["end_line"], cancel_event=cancel_event)
+    if call.name == "write_file":
+        return write_file(root, arguments["path"], arguments["content"])
+    if call.name == "list_dir":
+        return list_dir(root, arguments["path"])
+    raise ToolCallError(f"{call.name} não é uma ferramenta de arquivos")
@@ -0,0 +1,645 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+try:
+    from re import _constants as _sre, _parser as _sre_parse
+except ImportError: # Python < 3.11
+    import sre_constants as _sre
+    import sre_parse as _sre_parse
+
+from aura_ide.utils.app_dirs import get_cache_dir
+from .file_manager import SAMPLE_BYTES, detect_bom, detect_encoding, is_binary
+
+# Este módulo não usa o Qt: as funções de indexação e de verificação correm em processos
+# à parte (ProcessPoolExecutor, ver core/code_indexer.py).
+
+CODE_INDEX_FORMAT_VERSION = 1
+MAX_FILE_BYTES = 1024 * 1024 # Arquivos maiores não são indexados (minificados, dados, logs)
+SEGMENT_BYTES = 32 * 1024 * 1024 # Texto por segmento; cada segmento é construído por um processo
+SEGMENT_MAX_FILES = 65535 # Ids de arquivo num segmento em 16 bits
+DEFAULT_MAX_MATCHES = 1000
+MAX_MATCH_LINE_CHARS = 400
+MAX_CLASS_EXPANSION = 4 # [abc] numa sequência literal vira alternativas se tiver até isto de caracteres
+MAX_LITERAL_ALTERNATIVES = 16
+
+_SEGMENT_MAGIC = b"AURACSX "
+_MANIFEST_NAME = "manifest.json"
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]+")
+_REPEATS = tuple(getattr(_sre, name) for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(_sre, name))
+_INLINE_FLAGS_RE = re.compile(r"\(\?[-aiLmsux]+[:)]")
+_NUMERIC_ESCAPE_RE = re.compile(r"\\(?:[xuUN0]|[0-7]{3})")
+_UNICODE_SPACES = tuple(chr(code).encode("utf-8") for code in (0x85, 0xa0, 0x1680, *range(0x2000, 0x200b), 0x2028, 0x2029,
+                                                               0x202f, 0x205f, 0x3000))
+# Minúsculas ASCII e \x1c-\x1f como espaços (o \s do `re` também os apanha; bytes.split() não)
+_NORMALIZE_TABLE = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ\x1c\x1d\x1e\x1f", b"abcdefghijklmnopqrstuvwxyz    ")
+_FOLD_TOKEN_RE = re.compile(r"\\.|\(\?P[<=][^>)]*[>)]|([^\\(]+|\()", re.DOTALL)
+
+
+def _encode(text: str) -> bytes:
+    return text.encode("utf-8", "surrogateescape")
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", "surrogateescape")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def code_index_dir(root: str) -> str:
+    """Diretório com o índice de código de um projeto (manifesto + segmentos), na cache do Aura IDE."""
+    digest = hashlib.sha1(_encode(os.path.abspath(root))).hexdigest()[:16]
+    directory = os.path.join(get_cache_dir(), "code_index", digest)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+# --- Trigramas ---
+
+def normalize(data: bytes) -> bytes:
+    """Minúsculas (só ASCII) e cada sequência de espaços e quebras de linha reduzida a um espaço."""
+    return b" ".join(data.translate(_NORMALIZE_TABLE).split())
+
+
+def trigrams(data: bytes) -> set:
+    """
+    Trigramas de `data` (já normalizado), como inteiros de 24 bits.
+
+    Sem um ciclo em Python por posição: para cada posição módulo 4, os três bytes de cada
+    trigrama são copiados (fatias com passo, em C) para blocos de 4 bytes, lidos depois de
+    uma vez como um array de uint32 e juntados ao conjunto.
+    """
+    positions = len(data) - 2
+    result = set()
+    for phase in range(4):
+        count = (positions - phase + 3) // 4
+        if count <= 0:
+            break
+        slots = bytearray(4 * count)
+        for k in range(3):
+            slots[k::4] = data[phase + k::4][:count]
+        values = array("I")
+        values.frombytes(slots)
+        result.update(values)
+    return result
+
+
+def literal_trigrams(text: str) -> set:
+    """
+    Trigramas que um arquivo que contenha `text` tem de ter. Só os caracteres ASCII contam
+    (o índice só junta maiúsculas e minúsculas ASCII, e não sabe a codificação do arquivo).
+    """
+    result = set()
+    for piece in _NON_ASCII_RE.split(text):
+        normalized = normalize(piece.encode("ascii"))
+        if len(normalized) >= 3:
+            result |= trigrams(normalized)
+    return result
+
+
+def _indexable_bytes(data: bytes):
+    """
+    O texto de um arquivo em UTF-8 (descodificado como em read_text), com os espaços não ASCII
+    trocados por espaços simples, como o \\s da pesquisa os vê; None se for binário.
+    """
+    sample = data[:SAMPLE_BYTES]
+    if is_binary(sample):
+        return None
+    if data.isascii():
+        return data
+    encoding, bom_bytes = detect_bom(sample)
+    if encoding is not None and encoding != "utf-8":
+        data = data[bom_bytes:].decode(encoding, "replace").encode("utf-8")
+    else:
+        try:
+            data.decode("utf-8")
+        except UnicodeDecodeError:
+            data = data.decode(detect_encoding(sample), "replace").encode("utf-8")
+    for space in _UNICODE_SPACES:
+        if space in data:
+            data = data.replace(space, b" ")
+    return data
+
+
+# --- Plano de uma pesquisa ---
+
+def _literal_plan(alternatives: list):
+    """Plano para uma sequência literal com uma ou mais formas (de [abc] expandidos)."""
+    if len(alternatives) == 1:
+        found = literal_trigrams(alternatives[0])
+        return (frozenset(found), []) if found else None
+    options = [_literal_plan([alternative]) for alternative in alternatives]
+    if any(option is None for option in options):
+        return None
+    return (frozenset(), [options])
+
+
+def _class_literals(items):
+    """Os caracteres de um [abc] só com literais (até MAX_CLASS_EXPANSION), ou None."""
+    if len(items) > MAX_CLASS_EXPANSION or any(op is not _sre.LITERAL for op, _ in items):
+        return None
+    return [chr(av) for _, av in items]
+
+
+def _is_space(op, av) -> bool:
+    """Um carácter que só pode ser espaço (' ', \\t, \\s, [ \\t]...): no texto normalizado, um espaço."""
+    if op is _sre.LITERAL:
+        return chr(av).isspace()
+    if op is _sre.IN:
+        return bool(av) and all((item_op is _sre.CATEGORY and item_av is _sre.CATEGORY_SPACE)
+                                or (item_op is _sre.LITERAL and chr(item_av).isspace()) for item_op, item_av in av)
+    return False
+
+
+def _sequence_plan(items):
+    """
+    (trigramas obrigatórios, [alternações]) de uma sequência da regex já analisada, ou None se
+    nada for obrigatório. Cada alternação é uma lista de planos dos quais um tem de se verificar.
+    """
+    required = set()
+    alternations = []
+    run = [""] # A sequência literal em curso, em todas as suas formas
+
+    def add(plan):
+        if plan is not None:
+            required.update(plan[0])
+            alternations.extend(plan[1])
+
+    for op, av in items:
+        if op is _sre.LITERAL:
+            run = [text + chr(av) for text in run]
+            continue
+        if _is_space(op, av) or (op in _REPEATS and av[0] >= 1 and len(av[2]) == 1 and _is_space(*av[2][0])):
+            run = [text + " " for text in run] # \s, \s+, " +": uma sequência de espaços, que o índice reduz a um
+            continue
+        if op is _sre.IN:
+            chars = _class_literals(av)
+            if chars is not None and len(run) * len(chars) <= MAX_LITERAL_ALTERNATIVES:
+                run = [text + char for text in run for char in chars]
+                continue
+        add(_literal_plan(run))
+        run = [""]
+        if op is _sre.SUBPATTERN:
+            add(_sequence_plan(av[-1]))
+        elif op in _REPEATS:
+            if av[0] >= 1:
+                add(_sequence_plan(av[2]))
+        elif op is getattr(_sre, "ATOMIC_GROUP", None):
+            add(_sequence_plan(av))
+        elif op is _sre.BRANCH:
+            options = [_sequence_plan(alternative) for alternative in av[1]]
+            if all(option is not None for option in options):
+                alternations.append(options)
+        # Outros (., \d, [^a], âncoras, referências, lookarounds): não obrigam a nada
+    add(_literal_plan(run))
+    if not required and not alternations:
+        return None
+    return (frozenset(required), alternations)
+
+
+def query_plan(pattern: str, flags: int = 0):
+    """
+    Os trigramas que qualquer texto onde a regex `pattern` encontre algo tem de conter:
+    (trigramas obrigatórios, [alternações]), ou None se não houver nenhum (todos os arquivos
+    são candidatos). Lança re.error.
+    """
+    return _sequence_plan(_sre_parse.parse(pattern, flags))
+
+
+def _subpatterns(value):
+    if isinstance(value, _sre_parse.SubPattern):
+        yield value
+    elif isinstance(value, (tuple, list)):
+        for part in value:
+            yield from _subpatterns(part)
+
+
+def _ranges_fold(items) -> bool:
+    """False se algum intervalo de uma classe ([A-z], [Z-a]...) deixa de querer dizer o mesmo em minúsculas."""
+    for op, av in items:
+        if op is _sre.IN:
+            for item_op, item_av in av:
+                if item_op is _sre.RANGE:
+                    low, high = item_av
+                    if not (high < 65 or low > 122 or 65 <= low <= high <= 90 or 97 <= low <= high <= 122
+                            or (low > 90 and high < 97)):
+                        return False
+        elif not all(_ranges_fold(subpattern) for subpattern in _subpatterns(av)):
+            return False
+    return True
+
+
+def folded_pattern(pattern: str, flags: int):
+    """
+    Para uma pesquisa sem distinção de maiúsculas e minúsculas: a mesma regex para aplicar,
+    com distinção, ao texto já passado a minúsculas (só em arquivos ASCII, onde lower() não
+    muda as posições). O `re` com IGNORECASE é várias vezes mais lento. None se a regex não
+    se converte com segurança (não ASCII, flags inline, escapes numéricos, intervalos como [A-z]).
+    """
+    if not flags & re.IGNORECASE or not pattern.isascii() or _INLINE_FLAGS_RE.search(pattern) \
+            or _NUMERIC_ESCAPE_RE.search(pattern):
+        return None
+    try:
+        if not _ranges_fold(_sre_parse.parse(pattern, flags)):
+            return None
+    except (re.error, RecursionError):
+        return None
+    # Só os caracteres fora de escapes e de (?P<nome>, (?P=nome): \S, \W, \D, \B, \A e \Z ficam como estão
+    return _FOLD_TOKEN_RE.sub(lambda found: found.group() if found.group(1) is None else found.group().lower(), pattern)
+
+
+def plan_trigram_count(plan) -> int:
+    if plan is None:
+        return 0
+    return len(plan[0]) + sum(plan_trigram_count(option) for options in plan[1] for option in options)
+
+
+# --- Segmentos ---
+
+def build_segment(root: str, paths: list, directory: str) -> dict:
+    """
+    Lê e indexa `paths` (relativos a `root`) e grava um segmento novo em `directory`.
+    Corre num processo do pool; devolve só um resumo ({"name", "files", "indexed", "bytes"}).
+    """
+    kept_paths = []
+    sizes = array("q")
+    mtimes = array("q")
+    flags = bytearray()
+    postings = defaultdict(list)
+    text_bytes = 0
+    for path in paths:
+        try:
+            with open(os.path.join(root, path), "rb") as f:
+                stat = os.fstat(f.fileno())
+                data = f.read(MAX_FILE_BYTES + 1) if stat.st_size <= MAX_FILE_BYTES else b""
+        except OSError:
+            continue # Apagado entretanto
+        file_id = len(kept_paths)
+        kept_paths.append(path)
+        sizes.append(stat.st_size)
+        mtimes.append(stat.st_mtime_ns)
+        text = _indexable_bytes(data) if data and len(data) <= MAX_FILE_BYTES else None
+        flags.append(text is not None)
+        if text is None:
+            continue # Vazio, binário ou grande demais: fica no segmento (com a assinatura), sem trigramas
+        text_bytes += len(data)
+        for trigram in trigrams(normalize(text)):
+            postings[trigram].append(file_id)
+
+    keys = array("I", sorted(postings))
+    offsets = array("I", [0])
+    ids = array("H")
+    for key in keys:
+        ids.extend(postings[key])
+        offsets.append(len(ids))
+    sections = [_encode("\n".join(kept_paths)), sizes.tobytes(), mtimes.tobytes(), bytes(flags),
+                keys.tobytes(), offsets.tobytes(), ids.tobytes()]
+    header = {
+        "version": CODE_INDEX_FORMAT_VERSION, "byteorder": sys.byteorder, "files": len(kept_paths),
+        "indexed": sum(flags), "bytes": text_bytes, "trigrams": len(keys), "sections": [len(s) for s in sections],
+    }
+    name = f"{time.time_ns():x}-{os.getpid()}-{os.urandom(4).hex()}.seg"
+    path = os.path.join(directory, name)
+    header_line = _SEGMENT_MAGIC + json.dumps(header).encode()
+    header_line += b" " * (_align(len(header_line) + 1) - len(header_line) - 1) + b"\n"
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(header_line)
+        for section in sections:
+            f.write(section)
+            f.write(b"\0" * (_align(len(section)) - len(section)))
+    os.replace(f"{path}.tmp", path)
+    return {"name": name, "files": len(kept_paths), "indexed": header["indexed"], "bytes": text_bytes}
+
+
+class CodeSegment:
+    """
+    Um segmento do índice, mapeado em memória (mmap) e só de leitura: os arquivos (caminho,
+    tamanho, mtime, indexado ou não) e, para cada trigrama, a lista ordenada dos ids dos
+    arquivos que o contêm. Os arrays são vistas sobre o mmap: abrir um segmento não lê as listas.
+    """
+
+    def __init__(self, name: str, header: dict, paths: list, sections: list, mapped=None):
+        self.name = name
+        self.files = header["files"]
+        self.indexed = header["indexed"]
+        self.bytes = header["bytes"]
+        self.paths = paths
+        self.sizes = sections[1].cast("q")
+        self.mtimes = sections[2].cast("q")
+        self.flags = sections[3]
+        self.keys = sections[4].cast("I")
+        self.offsets = sections[5].cast("I")
+        self.ids = sections[6].cast("H")
+        self._mapped = mapped
+        self._indexed_ids = None
+
+    @classmethod
+    def open(cls, directory: str, name: str):
+        """Abre um segmento gravado por build_segment. Lança OSError ou ValueError."""
+        with open(os.path.join(directory, name), "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header_end = mapped.find(b"\n")
+        if not mapped[:len(_SEGMENT_MAGIC)] == _SEGMENT_MAGIC or header_end == -1:
+            raise ValueError(f"segmento inválido: {name}")
+        header = json.loads(mapped[len(_SEGMENT_MAGIC):header_end])
+        if header.get("version") != CODE_INDEX_FORMAT_VERSION or header.get("byteorder") != sys.byteorder:
+            raise ValueError(f"segmento de outra versão: {name}")
+        view = memoryview(mapped)
+        sections = []
+        offset = header_end + 1
+        for length in header["sections"]:
+            if offset + length > len(mapped):
+                raise ValueError(f"segmento cortado: {name}")
+            sections.append(view[offset:offset + length])
+            offset = _align(offset + length)
+        paths = _decode(bytes(sections[0])).split("\n") if header["files"] else []
+        return cls(name, header, paths, sections, mapped)
+
+    def signature(self, file_id: int):
+        return (self.sizes[file_id], self.mtimes[file_id])
+
+    def postings(self, trigram: int):
+        """Ids (ordenados) dos arquivos com `trigram`, ou None se nenhum o tiver."""
+        position = bisect_left(self.keys, trigram)
+        if position == len(self.keys) or self.keys[position] != trigram:
+            return None
+        return self.ids[self.offsets[position]:self.offsets[position + 1]]
+
+    @property
+    def indexed_ids(self) -> list:
+        if self._indexed_ids is None:
+            self._indexed_ids = [file_id for file_id, flag in enumerate(self.flags) if flag]
+        return self._indexed_ids
+
+
+def _contains(ids, file_id: int) -> bool:
+    position = bisect_left(ids, file_id)
+    return position < len(ids) and ids[position] == file_id
+
+
+def segment_candidates(segment: CodeSegment, plan):
+    """Ids do segmento que podem satisfazer o plano (conjunto), ou None se forem todos."""
+    if plan is None:
+        return None
+    required, alternations = plan
+    lists = []
+    for trigram in required:
+        ids = segment.postings(trigram)
+        if ids is None:
+            return set()
+        lists.append(ids)
+    lists.sort(key=len)
+    candidates = None
+    for ids in lists:
+        if candidates is None:
+            candidates = set(ids)
+        elif len(candidates) * 16 < len(ids):
+            # Poucas candidatas e uma lista longa: procura binária em vez de percorrer a lista
+            candidates = {file_id for file_id in candidates if _contains(ids, file_id)}
+        else:
+            candidates.intersection_update(ids)
+        if not candidates:
+            return candidates
+    for options in alternations:
+        union = set()
+        for option in options:
+            found = segment_candidates(segment, option)
+            if found is None:
+                union = None
+                break
+            union |= found
+        if union is not None:
+            candidates = union if candidates is None else candidates & union
+            if not candidates:
+                break
+    return candidates
+
+
+class CodeIndex:
+    """
+    Índice de conteúdo do projeto para a pesquisa de código: segmentos (CodeSegment) mais os
+    ids apagados de cada um (arquivos que mudaram ou desapareceram desde que o segmento foi
+    escrito). É imutável: as alterações (`with_changes`) dão um CodeIndex novo, que partilha
+    os segmentos que não mudaram; uma pesquisa a decorrer continua com o que tinha.
+    """
+
+    def __init__(self, root: str, directory: str, segments=(), deleted=None):
+        self.root = root
+        self.directory = directory
+        self.segments = list(segments)
+        self.deleted = deleted or {} # nome do segmento -> frozenset de ids apagados
+        self._locations = None
+        self._directories = None
+
+    @classmethod
+    def empty(cls, root: str):
+        return cls(os.path.abspath(root), code_index_dir(root))
+
+    def __len__(self):
+        return sum(segment.files - len(self.deleted.get(segment.name, ())) for segment in self.segments)
+
+    @property
+    def indexed_files(self) -> int:
+        return sum(segment.indexed - sum(1 for file_id in self.deleted.get(segment.name, ()) if segment.flags[file_id])
+                   for segment in self.segments)
+
+    @property
+    def text_bytes(self) -> int:
+        return sum(segment.bytes for segment in self.segments)
+
+    def locations(self) -> dict:
+        """Caminho relativo -> (segmento, id) de todos os arquivos vivos (calculado na primeira vez)."""
+        if self._locations is None:
+            locations = {}
+            for segment in self.segments:
+                deleted = self.deleted.get(segment.name, ())
+                for file_id, path in enumerate(segment.paths):
+                    if file_id not in deleted:
+                        locations[path] = (segment, file_id)
+            self._locations = locations
+        return self._locations
+
+    def directories(self) -> dict:
+        """Diretório relativo -> [caminhos dos arquivos diretamente nele]."""
+        if self._directories is None:
+            directories = defaultdict(list)
+            for path in self.locations():
+                directories[path.rpartition("/")[0]].append(path)
+            self._directories = directories
+        return self._directories
+
+    def with_changes(self, new_segments=(), removed_paths=(), dropped_segments=()):
+        """
+        Um índice novo: `removed_paths` apagados (ficam como ids apagados nos seus segmentos),
+        `dropped_segments` (nomes) retirados por inteiro e `new_segments` acrescentados.
+        """
+        locations = self.locations()
+        deleted = {name: set(ids) for name, ids in self.deleted.items()}
+        for path in removed_paths:
+            location = locations.get(path)
+            if location is not None:
+                deleted.setdefault(location[0].name, set()).add(location[1])
+        dropped = set(dropped_segments)
+        segments = [segment for segment in self.segments if segment.name not in dropped] + list(new_segments)
+        return CodeIndex(self.root, self.directory, segments,
+                         {segment.name: frozenset(deleted[segment.name]) for segment in segments if deleted.get(segment.name)})
+
+    def candidates(self, plan, path_filter=None):
+        """Gera (caminho, tamanho) dos arquivos indexados que podem ter resultados, por ordem."""
+        for segment in self.segments:
+            found = segment_candidates(segment, plan)
+            file_ids = segment.indexed_ids if found is None else sorted(found)
+            deleted = self.deleted.get(segment.name, ())
+            paths = segment.paths
+            sizes = segment.sizes
+            for file_id in file_ids:
+                if file_id in deleted:
+                    continue
+                path = paths[file_id]
+                if path_filter is None or path_filter(path):
+                    yield path, sizes[file_id]
+
+    # --- Disco ---
+
+    def save(self):
+        """Grava o manifesto (os segmentos já estão no disco; escrita atómica). Lança OSError."""
+        manifest = {
+            "version": CODE_INDEX_FORMAT_VERSION, "root": self.root,
+            "segments": [{"name": segment.name, "deleted": sorted(self.deleted.get(segment.name, ()))}
+                         for segment in self.segments],
+        }
+        path = os.path.join(self.directory, _MANIFEST_NAME)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def remove_unused_segments(self):
+        """Apaga os segmentos que não fazem parte deste índice (substituídos, ou de uma construção interrompida)."""
+        used = {segment.name for segment in self.segments}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if (name.endswith(".seg") or name.endswith(".seg.tmp")) and name not in used:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass # Ainda mapeado (Windows): fica para a próxima vez
+
+    @classmethod
+    def load(cls, root: str):
+        """O índice gravado de `root`, ou None se não houver (ou for de outra versão ou estiver danificado)."""
+        root = os.path.abspath(root)
+        directory = code_index_dir(root)
+        try:
+            with open(os.path.join(directory, _MANIFEST_NAME), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") != CODE_INDEX_FORMAT_VERSION or manifest.get("root") != root:
+                return None
+            segments = []
+            deleted = {}
+            for entry in manifest["segments"]:
+                segments.append(CodeSegment.open(directory, entry["name"]))
+                if entry["deleted"]:
+                    deleted[entry["name"]] = frozenset(entry["deleted"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return cls(root, directory, segments, deleted)
+
+
+# --- Verificação ---
+
+class CodeMatch:
+    """Uma linha encontrada: caminho relativo, linha (a partir de 1), coluna e comprimento do trecho, e o texto da linha."""
+
+    def __init__(self, path: str, line: int, column: int, length: int, text: str):
+        self.path = path
+        self.line = line
+        self.column = column
+        self.length = length
+        self.text = text
+
+    def __repr__(self):
+        return f"CodeMatch({self.path!r}, line={self.line}, column={self.column})"
+
+
+def read_text(path: str):
+    """O texto de um arquivo para a pesquisa (fins de linha normalizados), ou None se não der."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(MAX_FILE_BYTES + 1)
+    except OSError:
+        return None
+    if len(data) > MAX_FILE_BYTES:
+        return None
+    encoding, bom_bytes = detect_bom(data[:4])
+    try:
+        text = data[bom_bytes:].decode(encoding or "utf-8")
+    except UnicodeDecodeError:
+        sample = data[:SAMPLE_BYTES]
+        if is_binary(sample):
+            return None
+        text = data.decode(detect_encoding(sample), "replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def search_text(path: str, text: str, regex, matches: list, max_matches: int, folded=None):
+    """
+    Acrescenta a `matches` a primeira ocorrência de `regex` em cada linha de `text`. Com
+    `folded` (a regex de folded_pattern, compilada) e texto ASCII, procura-a no texto em minúsculas.
+    """
+    haystack = text
+    if folded is not None and text.isascii():
+        haystack = text.lower()
+        regex = folded
+    position = 0
+    line = 1
+    counted = 0
+    while len(matches) < max_matches:
+        found = regex.search(haystack, position)
+        if found is None:
+            return
+        start = found.start()
+        line += text.count("\n", counted, start)
+        counted = start
+        line_start = text.rfind("\n", 0, start) + 1
+        line_end = text.find("\n", start)
+        if line_end == -1:
+            line_end = len(text)
+        length = max(0, min(found.end(), line_end) - start)
+        matches.append(CodeMatch(path, line, start - line_start, length, text[line_start:line_end][:MAX_MATCH_LINE_CHARS]))
+        position = line_end + 1
+        if position > len(text):
+            return
+
+
+def compile_folded(pattern: str, flags: int):
+    folded = folded_pattern(pattern, flags)
+    return re.compile(folded, flags & ~re.IGNORECASE) if folded is not None else None
+
+
+def search_files(root: str, paths: list, pattern: str, flags: int, max_matches: int) -> list:
+    """Procura a regex em `paths` (relativos a `root`), por ordem; no máximo `max_matches` linhas. Corre num processo do pool."""
+    regex = re.compile(pattern, flags)
+    folded = compile_folded(pattern, flags)
+    matches = []
+    for path in paths:
+        text = read_text(os.path.join(root, path))
+        if text is not None:
+            search_text(path, text, regex, matches, max_matches, folded)
+            if len(matches) >= max_matches:
+                break
+    return matches
@@ -0,0 +1,576 @@
+import fnmatch
+import itertools
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from .code_index import (
+    CodeIndex,
+    DEFAULT_MAX_MATCHES,
+    MAX_FILE_BYTES,
+    SEGMENT_BYTES,
+    SEGMENT_MAX_FILES,
+    CodeSegment,
+    build_segment,
+    compile_folded,
+    plan_trigram_count,
+    query_plan,
+    read_text,
+    search_files,
+    search_text,
+)
+
+DEFAULT_SEARCH_WORKERS = min(4, os.cpu_count() or 1) # Processos a indexar e a verificar candidatas
+MIN_SEGMENT_BYTES = 1024 * 1024 # Numa construção, os segmentos ficam mais pequenos para ocupar todos os processos
+MAX_SMALL_SEGMENTS = 8 # Segmentos abaixo de MIN_SEGMENT_BYTES (das atualizações) a partir dos quais são juntados
+MIN_LIVE_FRACTION = 0.5 # Um segmento com menos arquivos vivos do que isto é reconstruído
+VERIFY_IN_THREAD_BYTES = 2 * 1024 * 1024 # Candidatas até isto são verificadas na thread (sem ida e volta ao pool)
+VERIFY_CHUNK_BYTES = 2 * 1024 * 1024 # Candidatas por tarefa enviada ao pool
+RESULTS_INTERVAL_SECONDS = 0.05 # Resultados entregues à UI no máximo a este ritmo, numa verificação na thread
+STAT_CANCEL_CHECK = 1000
+
+
+def path_filter(patterns: str):
+    """
+    Filtro de caminhos para uma pesquisa: padrões separados por vírgulas; com * ? ou [ são
+    globs (fnmatch; * também apanha '/'), sem eles prefixos ('src/', 'README'). None se vazio.
+    """
+    regexes = []
+    for pattern in (part.strip() for part in patterns.split(",")):
+        if not pattern:
+            continue
+        if not any(char in pattern for char in "*?["):
+            pattern = pattern.rstrip("/") + "*"
+        regexes.append(fnmatch.translate(pattern))
+    if not regexes:
+        return None
+    return re.compile("|".join(regexes)).match
+
+
+def _stat_signature(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class _IndexSignals(QObject):
+    # Emitidos da thread de trabalho; entregues na thread da UI (conexão enfileirada)
+    ready = Signal(int, object)         # (id_da_tarefa, CodeIndex)
+    progress = Signal(int, int, int)    # (id_da_tarefa, arquivos indexados, total)
+    done = Signal(int, object)          # (id_da_tarefa, estatísticas; None se não houve atualização)
+    failed = Signal(int, str)
+
+
+class _IndexTask(QRunnable):
+    """
+    Carrega o índice gravado (se ainda não houver um) e põe-no em dia: com a listagem completa
+    do projeto (ProjectIndex), comparando tamanho e mtime de cada arquivo, ou com lotes do
+    FileWatcher (só os diretórios e arquivos que mudaram). Os arquivos novos ou alterados são
+    indexados no pool de processos, num ou mais segmentos novos.
+    """
+
+    def __init__(self, task_id: int, root: str, index, project_index, batches: list, executor, workers: int,
+                 cancel_event: threading.Event):
+        super().__init__()
+        self.setAutoDelete(False) # O CodeIndexer controla o tempo de vida da tarefa
+        self.task_id = task_id
+        self.root = root
+        self.index = index
+        self.project_index = project_index
+        self.batches = batches
+        self.executor = executor
+        self.workers = workers
+        self.cancel_event = cancel_event
+        self.signals = _IndexSignals()
+
+    def run(self):
+        try:
+            stats = self._update()
+        except (OSError, ValueError) as e:
+            self.signals.failed.emit(self.task_id, str(e))
+            return
+        self.signals.done.emit(self.task_id, stats)
+
+    def _update(self):
+        """Estatísticas da atualização, ou None (cancelada, ou nada gravado e ainda sem a listagem)."""
+        started = time.monotonic()
+        index = self.index
+        if index is None:
+            index = CodeIndex.load(self.root)
+            if index is not None:
+                index.remove_unused_segments() # De uma construção interrompida
+                self.signals.ready.emit(self.task_id, index)
+            elif self.project_index is None:
+                return None
+            else:
+                index = CodeIndex.empty(self.root)
+        if self.project_index is not None:
+            to_index, removed = self._diff_listing(index)
+        else:
+            to_index, removed = self._diff_batches(index)
+        if to_index is None:
+            return None
+        if not to_index and not removed:
+            return self._stats(index, started, [])
+        dropped, rebuilt = self._segments_to_rebuild(index, removed)
+        to_index.update(rebuilt)
+        segments = self._build(index, to_index)
+        if segments is None:
+            return None
+        index = index.with_changes(segments, removed, dropped)
+        index.save()
+        index.remove_unused_segments()
+        self.signals.ready.emit(self.task_id, index)
+        return self._stats(index, started, segments)
+
+    # --- O que mudou ---
+
+    def _check(self, index, path: str, to_index: dict, removed: set):
+        location = index.locations().get(path)
+        signature = _stat_signature(os.path.join(self.root, path))
+        if signature is None:
+            if location is not None:
+                removed.add(path)
+            return
+        if location is not None:
+            if location[0].signature(location[1]) == signature:
+                return
+            removed.add(path)
+        to_index[path] = signature[0]
+
+    def _diff_listing(self, index):
+        """Arquivos a (re)indexar ({caminho: tamanho}) e a retirar, comparando todo o projeto com o índice."""
+        to_index = {}
+        removed = set()
+        listed = set()
+        for directory, names in self.project_index.listing():
+            for name in names:
+                path = f"{directory}/{name}" if directory else name
+                listed.add(path)
+                self._check(index, path, to_index, removed)
+                if len(listed) % STAT_CANCEL_CHECK == 0 and self.cancel_event.is_set():
+                    return None, None
+        removed.update(path for path in index.locations() if path not in listed)
+        return to_index, removed
+
+    def _diff_batches(self, index):
+        """Idem, só para o que os lotes do FileWatcher (ProjectChanges) dizem que mudou."""
+        to_index = {}
+        removed = set()
+        known = index.directories()
+        removed_directories = set()
+        for changes in self.batches:
+            removed_directories |= changes.removed_directories
+            for directory, names in changes.directories.items():
+                listed = set()
+                for name in names:
+                    path = f"{directory}/{name}" if directory else name
+                    listed.add(path)
+                    self._check(index, path, to_index, removed)
+                removed.update(path for path in known.get(directory, ()) if path not in listed)
+            for absolute in changes.changed_files:
+                path = os.path.relpath(absolute, self.root).replace(os.sep, "/")
+                if path in index.locations():
+                    self._check(index, path, to_index, removed)
+        if removed_directories:
+            for directory, paths in known.items():
+                ancestor = directory
+                while ancestor and ancestor not in removed_directories:
+                    ancestor = ancestor.rpartition("/")[0]
+                if ancestor in removed_directories:
+                    removed.update(path for path in paths if path not in to_index)
+        return to_index, removed
+
+    def _segments_to_rebuild(self, index, removed: set):
+        """
+        Segmentos a reconstruir: os que ficariam com poucos arquivos vivos e, se já houver
+        muitos, os pequenos que as atualizações foram acrescentando. Devolve (nomes, {caminho: tamanho}
+        dos arquivos vivos deles).
+        """
+        locations = index.locations()
+        removed_per_segment = {}
+        for path in removed:
+            location = locations.get(path)
+            if location is not None:
+                removed_per_segment[location[0].name] = removed_per_segment.get(location[0].name, 0) + 1
+        dropped = []
+        for segment in index.segments:
+            live = segment.files - len(index.deleted.get(segment.name, ())) - removed_per_segment.get(segment.name, 0)
+            if live < segment.files * MIN_LIVE_FRACTION:
+                dropped.append(segment)
+        small = [segment for segment in index.segments if segment.bytes < MIN_SEGMENT_BYTES and segment not in dropped]
+        if len(small) >= MAX_SMALL_SEGMENTS:
+            dropped.extend(small)
+        rebuilt = {}
+        for segment in dropped:
+            deleted = index.deleted.get(segment.name, ())
+            for file_id, path in enumerate(segment.paths):
+                if file_id not in deleted and path not in removed:
+                    rebuilt[path] = segment.sizes[file_id]
+        return [segment.name for segment in dropped], rebuilt
+
+    # --- Construção ---
+
+    def _chunks(self, to_index: dict) -> list:
+        paths = sorted(to_index) # Segmentos com arquivos vizinhos: os resultados saem por ordem de caminho
+        total = sum(min(size, MAX_FILE_BYTES) for size in to_index.values())
+        target = min(SEGMENT_BYTES, max(MIN_SEGMENT_BYTES, total // max(1, self.workers)))
+        chunks = [[]]
+        chunk_bytes = 0
+        for path in paths:
+            if chunks[-1] and (chunk_bytes >= target or len(chunks[-1]) >= SEGMENT_MAX_FILES):
+                chunks.append([])
+                chunk_bytes = 0
+            chunks[-1].append(path)
+            chunk_bytes += min(to_index[path], MAX_FILE_BYTES)
+        return chunks
+
+    def _build(self, index, to_index: dict):
+        """Segmentos novos (abertos) com `to_index`, por ordem; None se foi cancelado."""
+        if not to_index:
+            return []
+        chunks = self._chunks(to_index)
+        summaries = [None] * len(chunks)
+        done_files = 0
+        executor = self.executor
+        if executor is not None:
+            try:
+                futures = {executor.submit(build_segment, self.root, chunk, index.directory): number
+                           for number, chunk in enumerate(chunks)}
+                for future in as_completed(futures):
+                    if self.cancel_event.is_set():
+                        for pending in futures:
+                            pending.cancel()
+                        return None
+                    summaries[futures[future]] = future.result()
+                    done_files += len(chunks[futures[future]])
+                    self.signals.progress.emit(self.task_id, done_files, len(to_index))
+            except (BrokenProcessPool, RuntimeError) as e:
+                print(f"AVISO: Pool de processos da pesquisa indisponível ({e}); a indexar nesta thread.")
+        for number, chunk in enumerate(chunks):
+            if summaries[number] is None:
+                if self.cancel_event.is_set():
+                    return None
+                summaries[number] = build_segment(self.root, chunk, index.directory)
+                done_files += len(chunk)
+                self.signals.progress.emit(self.task_id, done_files, len(to_index))
+        return [CodeSegment.open(index.directory, summary["name"]) for summary in summaries if summary["files"]]
+
+    @staticmethod
+    def _stats(index, started: float, segments: list) -> dict:
+        disk_bytes = 0
+        for segment in index.segments:
+            try:
+                disk_bytes += os.path.getsize(os.path.join(index.directory, segment.name))
+            except OSError:
+                pass
+        return {
+            "files": len(index), "indexed_files": index.indexed_files, "text_bytes": index.text_bytes,
+            "segments": len(index.segments), "index_bytes": disk_bytes,
+            "updated_files": sum(segment.files for segment in segments),
+            "updated_bytes": sum(segment.bytes for segment in segments), "seconds": time.monotonic() - started,
+        }
+
+
+class _SearchSignals(QObject):
+    results = Signal(int, list)  # (id_da_pesquisa, [CodeMatch])
+    done = Signal(int, object)   # (id_da_pesquisa, estatísticas; None se foi cancelada)
+    failed = Signal(int, str)
+
+
+class _SearchTask(QRunnable):
+    """
+    Uma pesquisa: o índice dá os arquivos candidatos (os que têm todos os trigramas que a
+    regex exige) e só esses são lidos e verificados com a regex. Poucas candidatas são
+    verificadas aqui; muitas, em blocos no pool de processos. Os resultados saem por ordem,
+    aos poucos, até `max_matches`.
+    """
+
+    def __init__(self, search_id: int, index, pattern: str, flags: int, path_filter, max_matches: int,
+                 executor, workers: int, cancel_event: threading.Event):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.search_id = search_id
+        self.index = index
+        self.pattern = pattern
+        self.flags = flags
+        self.path_filter = path_filter
+        self.max_matches = max_matches
+        self.executor = executor
+        self.workers = workers
+        self.cancel_event = cancel_event
+        self.signals = _SearchSignals()
+        self.matches = 0
+        self.files_with_matches = 0
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            regex = re.compile(self.pattern, self.flags)
+            folded = compile_folded(self.pattern, self.flags)
+            plan = query_plan(self.pattern, self.flags)
+        except (re.error, RecursionError) as e:
+            self.signals.failed.emit(self.search_id, f"Expressão regular inválida: {e}")
+            return
+        candidates = list(self.index.candidates(plan, self.path_filter))
+        planned = time.monotonic()
+        candidate_bytes = sum(size for _, size in candidates)
+        if self.executor is None or candidate_bytes <= VERIFY_IN_THREAD_BYTES:
+            searched = self._verify_here(regex, folded, candidates)
+        else:
+            searched = self._verify_in_pool(regex, folded, candidates)
+        if self.cancel_event.is_set():
+            self.signals.done.emit(self.search_id, None) # Só para o CodeIndexer largar a tarefa
+            return
+        self.signals.done.emit(self.search_id, {
+            "matches": self.matches, "files": self.files_with_matches, "truncated": self.matches >= self.max_matches,
+            "candidates": len(candidates), "candidate_bytes": candidate_bytes, "searched_files": searched,
+            "indexed_files": self.index.indexed_files, "trigrams": plan_trigram_count(plan),
+            "plan_seconds": planned - started, "seconds": time.monotonic() - started,
+        })
+
+    def _emit(self, matches: list):
+        if matches:
+            self.matches += len(matches)
+            self.files_with_matches += len({match.path for match in matches})
+            self.signals.results.emit(self.search_id, matches)
+
+    def _verify_here(self, regex, folded, candidates: list, start: int = 0) -> int:
+        pending = []
+        last_emit = time.monotonic()
+        searched = start
+        for path, _ in candidates[start:]:
+            if self.cancel_event.is_set() or self.matches + len(pending) >= self.max_matches:
+                break
+            text = read_text(os.path.join(self.index.root, path))
+            searched += 1
+            if text is not None:
+                search_text(path, text, regex, pending, self.max_matches - self.matches, folded)
+            if pending and time.monotonic() - last_emit >= RESULTS_INTERVAL_SECONDS:
+                self._emit(pending)
+                pending = []
+                last_emit = time.monotonic()
+        self._emit(pending)
+        return searched
+
+    def _verify_in_pool(self, regex, folded, candidates: list) -> int:
+        chunks = [] # (primeira candidata, [caminhos])
+        chunk_bytes = 0
+        for number, (path, size) in enumerate(candidates):
+            if not chunks or chunk_bytes >= VERIFY_CHUNK_BYTES:
+                chunks.append((number, []))
+                chunk_bytes = 0
+            chunks[-1][1].append(path)
+            chunk_bytes += size
+        in_flight = [] # (bloco, future), por ordem: os resultados saem pela ordem das candidatas
+        next_chunk = 0
+        searched = 0
+        try:
+            while next_chunk < len(chunks) or in_flight:
+                while next_chunk < len(chunks) and len(in_flight) < 2 * self.workers:
+                    future = self.executor.submit(search_files, self.index.root, chunks[next_chunk][1], self.pattern,
+                                                  self.flags, self.max_matches - self.matches)
+                    in_flight.append((next_chunk, future))
+                    next_chunk += 1
+                chunk, future = in_flight[0]
+                matches = future.result()
+                in_flight.pop(0)
+                searched += len(chunks[chunk][1])
+                self._emit(matches[:self.max_matches - self.matches])
+                if self.cancel_event.is_set() or self.matches >= self.max_matches:
+                    break
+        except (BrokenProcessPool, RuntimeError) as e:
+            print(f"AVISO: Pool de processos da pesquisa indisponível ({e}); a verificar nesta thread.")
+            return self._verify_here(regex, folded, candidates, chunks[in_flight[0][0]][0] if in_flight else len(candidates))
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+        return searched
+
+
+class CodeIndexer(QObject):
+    """
+    Pesquisa no conteúdo dos arquivos do projeto, com um índice de trigramas gravado em disco
+    (core/code_index.py).
+
+    `start(root)` carrega o índice gravado da última vez (as pesquisas funcionam logo);
+    `start(root, project_index)`, com a listagem completa do projeto, põe-no em dia
+    (arquivos novos, alterados ou apagados desde então); `apply_changes()` aplica os lotes do
+    FileWatcher. Tudo isto corre numa thread, uma tarefa de cada vez, e a indexação em si num
+    pool de processos (`spawn`), para não disputar o GIL com a UI.
+
+    `search()` devolve um id; os resultados chegam aos poucos em `results_ready` e o fim em
+    `search_finished` (ou `search_failed`).
+    """
+    index_ready = Signal(object)         # CodeIndex
+    progress = Signal(int, int)          # (arquivos indexados, total), numa construção
+    finished = Signal(object)            # Estatísticas da última atualização (dict)
+    failed = Signal(str)
+    results_ready = Signal(int, list)    # (id_da_pesquisa, [CodeMatch])
+    search_finished = Signal(int, object) # (id_da_pesquisa, estatísticas)
+    search_failed = Signal(int, str)
+
+    def __init__(self, parent=None, workers: int = DEFAULT_SEARCH_WORKERS):
+        super().__init__(parent)
+        self.workers = workers
+        self.root = None
+        self.index = None
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self.search_pool = QThreadPool(self)
+        self.search_pool.setMaxThreadCount(2)
+        self._executor = None
+        self._id_counter = itertools.count(1)
+        self._tasks = {} # id -> tarefa ainda na posse de um pool
+        self._current_id = None
+        self._cancel_event = threading.Event()
+        self._needs_load = False
+        self._pending_listing = None
+        self._pending_changes = []
+        self._searches = {} # id -> evento de cancelamento
+
+    def start(self, root: str, project_index=None):
+        """Abre o índice de `root` e, com `project_index`, põe-no em dia com a listagem do projeto."""
+        root = os.path.abspath(root)
+        if root != self.root:
+            self._cancel_event.set()
+            self._cancel_event = threading.Event()
+            self.cancel_search()
+            self.root = root
+            self.index = None
+            self._current_id = None
+            self._needs_load = True
+            self._pending_changes = []
+        if project_index is not None:
+            self._pending_listing = project_index
+            self._pending_changes = [] # A listagem completa já as inclui
+        self._start_next()
+
+    def apply_changes(self, changes):
+        """Aplica um lote do FileWatcher (ProjectChanges), numa thread."""
+        if self.root is None or not (changes.directories or changes.removed_directories or changes.changed_files):
+            return
+        self._pending_changes.append(changes)
+        self._start_next()
+
+    @property
+    def indexing(self) -> bool:
+        return self._current_id is not None
+
+    def search(self, query: str, regex: bool = False, case_sensitive: bool = False, paths: str = "",
+               max_matches: int = DEFAULT_MAX_MATCHES) -> int:
+        """Começa uma pesquisa (texto ou regex) e devolve o seu id."""
+        search_id = next(self._id_counter)
+        if self.index is None:
+            message = "O índice de código ainda está a ser construído." if self.indexing else "Não há índice de código."
+            QTimer.singleShot(0, lambda: self.search_failed.emit(search_id, message))
+            return search_id
+        pattern = query if regex else re.escape(query)
+        flags = re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+        cancel_event = threading.Event()
+        task = _SearchTask(search_id, self.index, pattern, flags, path_filter(paths), max(1, max_matches),
+                           self._get_executor(), self.workers, cancel_event)
+        task.signals.results.connect(self._on_results)
+        task.signals.done.connect(self._on_search_done)
+        task.signals.failed.connect(self._on_search_failed)
+        self._tasks[search_id] = task
+        self._searches[search_id] = cancel_event
+        self.search_pool.start(task)
+        return search_id
+
+    def cancel_search(self, search_id: int = None):
+        """Cancela uma pesquisa (ou todas); os resultados dela deixam de chegar."""
+        for current_id in ([search_id] if search_id is not None else list(self._searches)):
+            cancel_event = self._searches.pop(current_id, None)
+            if cancel_event is not None:
+                cancel_event.set()
+                task = self._tasks.get(current_id)
+                if task is not None and self.search_pool.tryTake(task):
+                    self._tasks.pop(current_id, None)
+
+    def shutdown(self):
+        """Cancela tudo e termina o pool de processos (ao fechar a janela)."""
+        self._cancel_event.set()
+        self.cancel_search()
+        self._current_id = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # --- Interno ---
+
+    def _get_executor(self):
+        if self._executor is None and self.workers > 0:
+            try:
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            except (OSError, ValueError) as e:
+                print(f"AVISO: Não foi possível criar o pool de processos da pesquisa: {e}")
+                self.workers = 0
+        return self._executor
+
+    def _start_next(self):
+        if self._current_id is not None or self.root is None:
+            return
+        if not (self._needs_load or self._pending_listing is not None or self._pending_changes):
+            return
+        if self.index is None and self._pending_listing is None and not self._needs_load:
+            return # Só lotes, sem índice: esperam pela listagem do projeto
+        task_id = next(self._id_counter)
+        task = _IndexTask(task_id, self.root, self.index, self._pending_listing, self._pending_changes,
+                          self._get_executor(), max(1, self.workers), self._cancel_event)
+        task.signals.ready.connect(self._on_ready)
+        task.signals.progress.connect(self._on_progress)
+        task.signals.done.connect(self._on_done)
+        task.signals.failed.connect(self._on_failed)
+        self._needs_load = False
+        self._pending_listing = None
+        self._pending_changes = []
+        self._current_id = task_id
+        self._tasks[task_id] = task
+        self.thread_pool.start(task)
+
+    def _on_ready(self, task_id: int, index):
+        if task_id == self._current_id:
+            self.index = index
+            self.index_ready.emit(index)
+
+    def _on_progress(self, task_id: int, done: int, total: int):
+        if task_id == self._current_id:
+            self.progress.emit(done, total)
+
+    def _on_done(self, task_id: int, stats):
+        self._tasks.pop(task_id, None)
+        if task_id == self._current_id:
+            self._current_id = None
+            if stats is not None:
+                self.finished.emit(stats)
+            self._start_next()
+
+    def _on_failed(self, task_id: int, error_message: str):
+        self._tasks.pop(task_id, None)
+        if task_id == self._current_id:
+            self._current_id = None
+            self.failed.emit(error_message)
+            self._start_next()
+
+    def _on_results(self, search_id: int, matches: list):
+        if search_id in self._searches:
+            self.results_ready.emit(search_id, matches)
+
+    def _on_search_done(self, search_id: int, stats):
+        self._tasks.pop(search_id, None)
+        if self._searches.pop(search_id, None) is not None:
+            self.search_finished.emit(search_id, stats)
+
+    def _on_search_failed(self, search_id: int, error_message: str):
+        self._tasks.pop(search_id, None)
+        if self._searches.pop(search_id, None) is not None:
+            self.search_failed.emit(search_id, error_message)
@@ -0,0 +1,243 @@
+import heapq
+import itertools
+import re
+import shlex
+import time
+
+# Prioridades: menor número sai primeiro; dentro da mesma prioridade, por ordem de chegada
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+DEFAULT_COMMAND_TIMEOUT = 120.0 # Segundos; depois disso o comando é interrompido
+
+# Estados de uma tarefa
+JOB_QUEUED = "na fila"
+JOB_RUNNING = "em execução"
+JOB_DONE = "concluída"
+JOB_TIMED_OUT = "tempo esgotado"
+JOB_CANCELLED = "cancelada"
+JOB_FAILED = "falhou"
+
+# Comandos que só leem: podem correr em paralelo, num shell auxiliar, sem mudar o estado
+# que os outros comandos veem (diretório atual, ficheiros, variáveis do shell).
+READ_ONLY_COMMANDS = frozenset({
+    "ls", "ll", "cat", "head", "tail", "less", "more", "grep", "egrep", "fgrep", "rg", "ag",
+    "find", "fd", "wc", "stat", "file", "du", "df", "tree", "pwd", "echo", "printf", "which",
+    "type", "whoami", "id", "uname", "hostname", "date", "printenv", "ps", "uptime",
+    "free", "diff", "cmp", "md5sum", "sha1sum", "sha256sum", "sort", "uniq", "cut", "tr",
+    "sed", "nl", "column", "basename", "dirname", "realpath", "readlink", "true",
+    "false", "test", "[", "sleep", "jq", "xxd", "od", "hexdump", "strings",
+})
+READ_ONLY_GIT_SUBCOMMANDS = frozenset({
+    "status", "log", "diff", "show", "branch", "ls-files", "grep", "blame", "rev-parse",
+    "describe", "shortlog", "remote",
+})
+# `git branch` e `git remote` só listam sem argumentos posicionais e com estas opções; com
+# nomes criam, apagam ou renomeiam ramos e remotos
+_GIT_LISTING_OPTIONS = {
+    "branch": frozenset({"-a", "-r", "-v", "-vv", "-l", "--list", "--all", "--remotes", "--verbose",
+                         "--show-current", "--no-color"}),
+    "remote": frozenset({"-v", "--verbose"}),
+}
+# Opções curtas que escrevem em ficheiros, e as que levam o valor a seguir (o resto do grupo
+# "-abc" ou a palavra seguinte), para ler grupos como `sed -ni` ou `sort -no saida`
+_SED_SHORT_OPTIONS_WITH_VALUE = "efl"
+_SORT_SHORT_OPTIONS_WITH_VALUE = "ktST"
+_UNIQ_SHORT_OPTIONS_WITH_VALUE = "fsw"
+_FIND_WRITING_ACTIONS = frozenset({
+    "-delete", "-exec", "-execdir", "-ok", "-okdir", "-fprint", "-fprint0", "-fprintf", "-fls",
+})
+_COMMAND_SEPARATOR_RE = re.compile(r"&&|\|\||[;|\n]")
+_HARMLESS_REDIRECT_RE = re.compile(r"\d?>\s*/dev/null|\d?>&\d")
+_ENV_ASSIGNMENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+
+
+def is_read_only_command(command: str) -> bool:
+    """
+    Heurística conservadora: True só se todas as partes do comando (separadas por
+    `;`, `&&`, `||` ou `|`) começam por um programa que apenas lê. Redireções para
+    ficheiros, substituições `$(...)`, `cd`, opções que escrevem em ficheiros (`sed -i`,
+    `sort -o`, `uniq ENTRADA SAÍDA`, `tree -o`, `find -delete/-exec/-fprint`) e `git branch`
+    ou `git remote` com nomes fazem o comando correr sozinho no shell principal.
+    """
+    text = _HARMLESS_REDIRECT_RE.sub(" ", command)
+    if ">" in text or "`" in text or "$(" in text or "<(" in text:
+        return False
+    if re.search(r"(^|[^&])&([^&]|$)", text):
+        return False # Processo em segundo plano: continuaria a correr depois do fim da tarefa
+    for part in _COMMAND_SEPARATOR_RE.split(text):
+        try:
+            words = shlex.split(part)
+        except ValueError:
+            return False
+        while words and _ENV_ASSIGNMENT_RE.match(words[0]):
+            words = words[1:]
+        if not words:
+            continue
+        program = words[0]
+        if program == "git":
+            if not _is_read_only_git(words[1:]):
+                return False
+            continue
+        if program not in READ_ONLY_COMMANDS or _writes_files(program, words[1:]):
+            return False
+    return True
+
+
+def _is_read_only_git(args: list) -> bool:
+    position = next((i for i, word in enumerate(args) if not word.startswith("-")), None)
+    if position is None or args[position] not in READ_ONLY_GIT_SUBCOMMANDS:
+        return False
+    listing_options = _GIT_LISTING_OPTIONS.get(args[position])
+    return listing_options is None or all(word in listing_options for word in args[position + 1:])
+
+
+def _short_option_letters(word: str, letters_with_value: str) -> str:
+    """As letras de um grupo de opções curtas ("-nE" -> "nE"), até à primeira que leva um valor."""
+    if not word.startswith("-") or word.startswith("--") or word == "-":
+        return ""
+    for i, letter in enumerate(word[1:]):
+        if letter in letters_with_value:
+            return word[1:i + 2]
+    return word[1:]
+
+
+def _positional_arguments(args: list, letters_with_value: str) -> list:
+    positional = []
+    skip_next = False
+    for word in args:
+        if skip_next:
+            skip_next = False
+        elif word == "-" or not word.startswith("-"):
+            positional.append(word)
+        elif not word.startswith("--"):
+            letters = _short_option_letters(word, letters_with_value)
+            skip_next = letters[-1:] in tuple(letters_with_value) and len(letters) == len(word) - 1
+    return positional
+
+
+def _writes_files(program: str, args: list) -> bool:
+    """Se um programa da lista READ_ONLY_COMMANDS, com estes argumentos, escreve em ficheiros."""
+    if program == "sed":
+        # -i / --in-place, também em grupos como -ni ou -Ei
+        return any(word.startswith("--in-place") or "i" in _short_option_letters(word, _SED_SHORT_OPTIONS_WITH_VALUE)
+                   for word in args)
+    if program == "sort":
+        return any(word.startswith("--output") or "o" in _short_option_letters(word, _SORT_SHORT_OPTIONS_WITH_VALUE)
+                   for word in args)
+    if program == "uniq":
+        return len(_positional_arguments(args, _UNIQ_SHORT_OPTIONS_WITH_VALUE)) > 1 # uniq ENTRADA SAÍDA
+    if program == "tree":
+        return any(word.startswith("-o") for word in args)
+    if program == "find":
+        return any(word in _FIND_WRITING_ACTIONS for word in args)
+    return False
+
+
+class CommandJob:
+    """
+    Um comando da IA a executar num dos shells do terminal da IA.
+
+    Args:
+        job_id (int): Identificador (único por terminal), devolvido a quem submeteu o comando.
+        command (str): Texto do comando.
+        priority (int): PRIORITY_HIGH / PRIORITY_NORMAL / PRIORITY_LOW (ou outro inteiro).
+        timeout (float): Segundos até o comando ser interrompido (None ou 0 = sem limite).
+        parallel (bool): Pode correr ao mesmo tempo que outros (ver is_read_only_command).
+    """
+
+    def __init__(self, job_id: int, command: str, priority: int = PRIORITY_NORMAL,
+                 timeout: float = DEFAULT_COMMAND_TIMEOUT, parallel: bool = False):
+        self.job_id = job_id
+        self.command = command
+        self.priority = priority
+        self.timeout = timeout
+        self.parallel = parallel
+        self.state = JOB_QUEUED
+        self.output = ""
+        self.record = None # CommandRecord do shell (código de saída, cwd, duração)
+        self.shell_index = None # 0 = shell visível; >0 = shells auxiliares
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def exit_code(self):
+        return self.record.exit_code if self.record is not None else None
+
+    @property
+    def finished(self) -> bool:
+        return self.state not in (JOB_QUEUED, JOB_RUNNING)
+
+    @property
+    def wait_seconds(self) -> float:
+        """Tempo passado na fila."""
+        return (self.started_at or self.finished_at or time.monotonic()) - self.submitted_at
+
+    @property
+    def run_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def start(self, shell_index: int):
+        self.state = JOB_RUNNING
+        self.shell_index = shell_index
+        self.started_at = time.monotonic()
+
+    def finish(self, output: str, record=None, state: str = JOB_DONE):
+        """Fecha a tarefa. Um estado já decidido (tempo esgotado, cancelada) prevalece."""
+        self.output = output
+        self.record = record
+        self.finished_at = time.monotonic()
+        if not self.finished:
+            self.state = state
+
+    def __repr__(self):
+        return f"CommandJob(job_id={self.job_id}, command={self.command!r}, state={self.state!r})"
+
+
+class CommandQueue:
+    """
+    Fila de tarefas por prioridade (heap), FIFO dentro da mesma prioridade.
+    Cancelar uma tarefa só a marca; é descartada quando chega ao topo.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._removed = set()
+
+    def push(self, job: CommandJob):
+        heapq.heappush(self._heap, (job.priority, next(self._counter), job))
+
+    def peek(self):
+        """Próxima tarefa, sem a retirar (None se a fila estiver vazia)."""
+        while self._heap and self._heap[0][2].job_id in self._removed:
+            self._removed.discard(heapq.heappop(self._heap)[2].job_id)
+        return self._heap[0][2] if self._heap else None
+
+    def pop(self):
+        job = self.peek()
+        if job is not None:
+            heapq.heappop(self._heap)
+        return job
+
+    def remove(self, job_id: int):
+        """Retira a tarefa da fila. Devolve-a, ou None se não estava à espera."""
+        for _, _, job in self._heap:
+            if job.job_id == job_id and job_id not in self._removed:
+                self._removed.add(job_id)
+                return job
+        return None
+
+    def jobs(self) -> list:
+        """Tarefas à espera, pela ordem em que vão sair."""
+        return [job for _, _, job in sorted(self._heap) if job.job_id not in self._removed]
+
+    def count_parallel(self) -> int:
+        return sum(1 for _, _, job in self._heap if job.parallel and job.job_id not in self._removed)
+
+    def __len__(self):
+        return len(self._heap) - len(self._removed)
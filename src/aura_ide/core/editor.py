@@ -0,0 +1,425 @@
+import bisect
+import random
+from array import array
+from contextlib import contextmanager
+
+ADD_BLOCK_CHARS = 64 * 1024 # Blocos do buffer de adições; texto digitado vai sendo acrescentado ao último
+DEFAULT_MAX_UNDO = 1000 # Grupos de edições guardados para desfazer
+
+
+def _newline_positions(text: str, base: int = 0) -> array:
+    """Posições (somadas a `base`) de todos os '\\n' de `text`."""
+    positions = array("q")
+    find = text.find
+    position = find("\n")
+    while position != -1:
+        positions.append(base + position)
+        position = find("\n", position + 1)
+    return positions
+
+
+class _Piece:
+    """
+    Nó da árvore de pedaços (treap). Cada nó é um pedaço de texto — um intervalo de um
+    bloco, que nunca muda — e guarda os totais (caracteres e '\\n') da sua subárvore.
+
+    Os nós são imutáveis: uma edição cria só os nós no caminho até à raiz (cópia de
+    caminho) e partilha o resto. Por isso versões antigas da árvore continuam válidas,
+    e são elas que servem de vistas (BufferView) e de registo para desfazer.
+    """
+    __slots__ = ("block", "start", "length", "newlines", "priority", "left", "right", "total_length", "total_newlines")
+
+    def __init__(self, block: int, start: int, length: int, newlines: int, priority: float, left=None, right=None):
+        self.block = block
+        self.start = start
+        self.length = length
+        self.newlines = newlines
+        self.priority = priority
+        self.left = left
+        self.right = right
+        self.total_length = length
+        self.total_newlines = newlines
+        if left is not None:
+            self.total_length += left.total_length
+            self.total_newlines += left.total_newlines
+        if right is not None:
+            self.total_length += right.total_length
+            self.total_newlines += right.total_newlines
+
+    def with_children(self, left, right):
+        return _Piece(self.block, self.start, self.length, self.newlines, self.priority, left, right)
+
+
+def _merge(left, right):
+    """Concatena duas árvores (todos os pedaços de `left` vêm antes dos de `right`)."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        return left.with_children(left.left, _merge(left.right, right))
+    return right.with_children(_merge(left, right.left), right.right)
+
+
+class _PieceReader:
+    """Leitura de uma árvore de pedaços: comum ao TextBuffer e às suas vistas."""
+
+    def __init__(self, root, blocks: list, block_newlines: list):
+        self._root = root
+        self._blocks = blocks # Só crescem (e o último só no fim): uma vista antiga continua correta
+        self._block_newlines = block_newlines
+
+    def __len__(self):
+        return self._root.total_length if self._root is not None else 0
+
+    @property
+    def line_count(self) -> int:
+        return (self._root.total_newlines if self._root is not None else 0) + 1
+
+    @property
+    def piece_count(self) -> int:
+        count = 0
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(child for child in (node.left, node.right) if child is not None)
+        return count
+
+    def line_start(self, line: int) -> int:
+        """Deslocamento do início da linha `line` (0 = primeira). O(log n)."""
+        if line <= 0:
+            return 0
+        if line >= self.line_count:
+            return len(self)
+        # Posição do line-ésimo '\n', descendo pelos totais de cada subárvore
+        remaining = line
+        base = 0
+        node = self._root
+        while node is not None:
+            left_newlines = node.left.total_newlines if node.left is not None else 0
+            if remaining <= left_newlines:
+                node = node.left
+                continue
+            remaining -= left_newlines
+            base += node.left.total_length if node.left is not None else 0
+            if remaining <= node.newlines:
+                positions = self._block_newlines[node.block]
+                first = bisect.bisect_left(positions, node.start)
+                return base + positions[first + remaining - 1] - node.start + 1
+            remaining -= node.newlines
+            base += node.length
+            node = node.right
+        return len(self)
+
+    def line_of(self, offset: int) -> int:
+        """Linha (0 = primeira) que contém o deslocamento `offset`. O(log n)."""
+        offset = max(0, min(offset, len(self)))
+        line = 0
+        node = self._root
+        while node is not None:
+            left_length = node.left.total_length if node.left is not None else 0
+            if offset < left_length:
+                node = node.left
+                continue
+            offset -= left_length
+            line += node.left.total_newlines if node.left is not None else 0
+            if offset < node.length:
+                return line + self._count_newlines(node.block, node.start, node.start + offset)
+            offset -= node.length
+            line += node.newlines
+            node = node.right
+        return line
+
+    def iter_chunks(self, start: int = 0, end: int = None):
+        """
+        Gera o texto de [start, end) pedaço a pedaço, sem nunca juntar o documento inteiro:
+        só as fatias pedidas são copiadas dos blocos.
+        """
+        end = len(self) if end is None else min(end, len(self))
+        start = max(0, start)
+        stack = []
+        node = self._root
+        base = 0 # Deslocamento do início da subárvore em `node`
+        while stack or node is not None:
+            # Desce à esquerda enquanto a subárvore esquerda ainda tiver texto do intervalo
+            while node is not None:
+                stack.append((node, base))
+                left_length = node.left.total_length if node.left is not None else 0
+                node = node.left if start < base + left_length else None
+            if not stack:
+                break
+            node, base = stack.pop()
+            left_length = node.left.total_length if node.left is not None else 0
+            piece_begin = base + left_length
+            if piece_begin >= end:
+                return
+            piece_end = piece_begin + node.length
+            if piece_end > start:
+                block = self._blocks[node.block]
+                yield block[node.start + max(0, start - piece_begin):node.start + min(node.length, end - piece_begin)]
+            base = piece_end
+            node = node.right
+
+    def text(self, start: int = 0, end: int = None) -> str:
+        return "".join(self.iter_chunks(start, end))
+
+    def line(self, line: int) -> str:
+        """Texto da linha `line`, sem o '\\n'."""
+        if not 0 <= line < self.line_count:
+            raise IndexError(f"Linha fora do documento: {line}")
+        start = self.line_start(line)
+        end = self.line_start(line + 1) - 1 if line + 1 < self.line_count else len(self)
+        return self.text(start, end)
+
+    def lines(self, first: int, count: int) -> list:
+        """Texto das linhas [first, first + count), sem os '\\n'."""
+        first = max(0, first)
+        last = min(self.line_count, first + count)
+        if last <= first:
+            return []
+        return self.text(self.line_start(first), self.line_start(last) if last < self.line_count else len(self)).split("\n")[:last - first]
+
+    def _count_newlines(self, block: int, start: int, end: int) -> int:
+        positions = self._block_newlines[block]
+        return bisect.bisect_left(positions, end) - bisect.bisect_left(positions, start)
+
+
+class BufferView(_PieceReader):
+    """
+    Vista só de leitura de um TextBuffer, tal como estava ao ser criada (ver
+    TextBuffer.snapshot). Criá-la não copia texto nem pedaços e edições posteriores não
+    a alteram, pelo que pode ser lida noutra thread (p.ex. pelo subsistema de IA) sem
+    travar o editor.
+    """
+
+    def __init__(self, root, blocks: list, block_newlines: list, version: int):
+        super().__init__(root, blocks, block_newlines)
+        self.version = version
+
+
+class _Edit:
+    """Uma edição: em `offset`, `removed` (subárvore) foi substituído por `inserted`."""
+    __slots__ = ("offset", "removed", "inserted")
+
+    def __init__(self, offset: int, removed, inserted):
+        self.offset = offset
+        self.removed = removed
+        self.inserted = inserted
+
+    @property
+    def removed_length(self) -> int:
+        return self.removed.total_length if self.removed is not None else 0
+
+    @property
+    def inserted_length(self) -> int:
+        return self.inserted.total_length if self.inserted is not None else 0
+
+
+class TextBuffer(_PieceReader):
+    """
+    Buffer de texto do editor: uma tabela de pedaços (piece table) guardada numa árvore
+    balanceada (treap).
+
+    - O texto original e o texto acrescentado vivem em blocos que nunca mudam (o último
+      bloco de adições só cresce no fim); o documento é a sequência de pedaços em ordem.
+    - Cada nó guarda os totais de caracteres e de '\\n' da subárvore e cada bloco as
+      posições dos seus '\\n': encontrar uma linha, ou a linha de um deslocamento, é
+      O(log n); inserir e apagar também (cortar e juntar a árvore).
+    - Desfazer/refazer guarda as edições, não cópias do documento: cada edição aponta para
+      as subárvores removida e inserida, que já existem, pelo que nem o texto apagado é
+      copiado. Inserções seguidas (digitação) e apagamentos seguidos ficam num só grupo.
+    - `snapshot()` devolve uma BufferView imutável em O(1).
+
+    Os fins de linha são sempre '\\n' (o FileLoader já os normaliza).
+    """
+
+    def __init__(self, text: str = "", max_undo: int = DEFAULT_MAX_UNDO):
+        self.max_undo = max_undo
+        self.load(text)
+
+    def load(self, text: str):
+        """Substitui todo o conteúdo (abrir um arquivo). Limpa o histórico de desfazer."""
+        # Listas novas: as vistas de antes do load continuam a apontar para as antigas
+        super().__init__(None, [text], [_newline_positions(text)])
+        if text:
+            self._root = _Piece(0, 0, len(text), len(self._block_newlines[0]), random.random())
+        self._tail_block = None # Bloco de adições que ainda pode crescer
+        self.version = 0
+        self.clear_history()
+
+    def clear_history(self):
+        self._undo_stack = [] # Grupos (listas de _Edit), o mais recente no fim
+        self._redo_stack = []
+        self._group_open = 0
+        self._last_edit_kind = None
+
+    # --- Edição ---
+
+    def insert(self, offset: int, text: str):
+        if text:
+            self.replace(offset, offset, text)
+
+    def delete(self, start: int, end: int):
+        if end > start:
+            self.replace(start, end, "")
+
+    def replace(self, start: int, end: int, text: str):
+        """Substitui [start, end) por `text`."""
+        start = max(0, min(start, len(self)))
+        end = max(start, min(end, len(self)))
+        if start == end and not text:
+            return
+        inserted = self._store(text) if text else None
+        edit = self._apply(start, end - start, inserted)
+        self._record(edit, text)
+
+    @contextmanager
+    def edit_group(self):
+        """Todas as edições dentro do `with` desfazem-se de uma só vez (p.ex. substituir tudo)."""
+        self._group_open += 1
+        if self._group_open == 1:
+            self._undo_stack.append([])
+            self._last_edit_kind = None
+        try:
+            yield self
+        finally:
+            self._group_open -= 1
+            if self._group_open == 0:
+                if not self._undo_stack[-1]:
+                    self._undo_stack.pop()
+                self._last_edit_kind = None
+
+    def break_undo_group(self):
+        """A próxima edição começa um novo grupo (p.ex. depois de mover o cursor)."""
+        self._last_edit_kind = None
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo_stack)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo_stack)
+
+    def undo(self) -> list:
+        """
+        Desfaz o último grupo. Devolve as alterações aplicadas, por ordem, como
+        (deslocamento, caracteres_removidos, texto_inserido), para a vista as repetir.
+        """
+        if not self._undo_stack:
+            return []
+        group = self._undo_stack.pop()
+        changes = []
+        for edit in reversed(group):
+            self._apply(edit.offset, edit.inserted_length, edit.removed)
+            changes.append((edit.offset, edit.inserted_length, self.text(edit.offset, edit.offset + edit.removed_length)))
+        self._redo_stack.append(group)
+        self._last_edit_kind = None
+        return changes
+
+    def redo(self) -> list:
+        if not self._redo_stack:
+            return []
+        group = self._redo_stack.pop()
+        changes = []
+        for edit in group:
+            self._apply(edit.offset, edit.removed_length, edit.inserted)
+            changes.append((edit.offset, edit.removed_length, self.text(edit.offset, edit.offset + edit.inserted_length)))
+        self._undo_stack.append(group)
+        self._last_edit_kind = None
+        return changes
+
+    def snapshot(self) -> BufferView:
+        return BufferView(self._root, self._blocks, self._block_newlines, self.version)
+
+    # --- Interno ---
+
+    def _store(self, text: str):
+        """Acrescenta `text` ao buffer de adições e devolve-o como uma (sub)árvore de um pedaço."""
+        block = self._tail_block
+        if block is None or len(self._blocks[block]) + len(text) > ADD_BLOCK_CHARS:
+            block = len(self._blocks)
+            self._blocks.append("")
+            self._block_newlines.append(array("q"))
+            # Um texto maior que um bloco fica sozinho no seu; digitação continua num novo
+            self._tail_block = block if len(text) < ADD_BLOCK_CHARS else None
+        start = len(self._blocks[block])
+        positions = _newline_positions(text, start)
+        self._blocks[block] += text
+        self._block_newlines[block].extend(positions)
+        return _Piece(block, start, len(text), len(positions), random.random())
+
+    def _apply(self, offset: int, remove_length: int, inserted) -> _Edit:
+        left, rest = self._split(self._root, offset)
+        removed, right = self._split(rest, remove_length)
+        if inserted is not None and inserted.left is None and inserted.right is None:
+            left = self._append_piece(left, inserted)
+        else:
+            left = _merge(left, inserted)
+        self._root = _merge(left, right)
+        self.version += 1
+        return _Edit(offset, removed, inserted)
+
+    def _append_piece(self, tree, piece):
+        """Junta um pedaço no fim da árvore; se continuar o último pedaço no mesmo bloco, estende-o."""
+        last = tree
+        while last is not None and last.right is not None:
+            last = last.right
+        if last is not None and last.block == piece.block and last.start + last.length == piece.start:
+            return self._extend_last(tree, piece.length, piece.newlines)
+        return _merge(tree, piece)
+
+    def _extend_last(self, node, length: int, newlines: int):
+        if node.right is not None:
+            return node.with_children(node.left, self._extend_last(node.right, length, newlines))
+        return _Piece(node.block, node.start, node.length + length, node.newlines + newlines, node.priority, node.left, None)
+
+    def _split(self, node, offset: int):
+        """(árvore com os primeiros `offset` caracteres, árvore com o resto)."""
+        if node is None:
+            return None, None
+        left_length = node.left.total_length if node.left is not None else 0
+        if offset <= left_length:
+            left, right = self._split(node.left, offset)
+            return left, node.with_children(right, node.right)
+        offset -= left_length
+        if offset >= node.length:
+            left, right = self._split(node.right, offset - node.length)
+            return node.with_children(node.left, left), right
+        # O corte cai dentro deste pedaço: fica em dois
+        left_newlines = self._count_newlines(node.block, node.start, node.start + offset)
+        head = _Piece(node.block, node.start, offset, left_newlines, node.priority, node.left, None)
+        tail = _Piece(node.block, node.start + offset, node.length - offset, node.newlines - left_newlines, random.random())
+        return head, _merge(tail, node.right)
+
+    def _record(self, edit: _Edit, text: str):
+        self._redo_stack = []
+        if self._group_open:
+            self._undo_stack[-1].append(edit)
+            return
+        kind = self._edit_kind(edit, text)
+        previous = self._undo_stack[-1][-1] if self._undo_stack and self._undo_stack[-1] else None
+        if kind is not None and kind == self._last_edit_kind and previous is not None and self._continues(previous, edit, kind):
+            self._undo_stack[-1].append(edit)
+        else:
+            self._undo_stack.append([edit])
+            if len(self._undo_stack) > self.max_undo:
+                del self._undo_stack[0]
+        self._last_edit_kind = kind
+
+    @staticmethod
+    def _edit_kind(edit: _Edit, text: str):
+        """'digitar' ou 'apagar' para edições pequenas que se podem juntar; None para as outras."""
+        if edit.removed is None and len(text) == 1 and text != "\n":
+            return "digitar"
+        if edit.inserted is None and edit.removed_length == 1:
+            return "apagar"
+        return None
+
+    @staticmethod
+    def _continues(previous: _Edit, edit: _Edit, kind: str) -> bool:
+        if kind == "digitar":
+            return edit.offset == previous.offset + previous.inserted_length
+        # Backspace (recua) ou Delete (fica no mesmo sítio)
+        return edit.offset + edit.removed_length == previous.offset or edit.offset == previous.offset
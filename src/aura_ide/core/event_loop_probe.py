@@ -0,0 +1,60 @@
+import time
+
+from PySide6.QtCore import QObject, Qt, QTimer
+
+from aura_ide.utils.instrumentation import instruments
+
+DEFAULT_PROBE_INTERVAL_MS = 100
+SLOW_LAG_MS = 100 # Atrasos acima disto também vão para o registo de eventos
+
+
+class EventLoopLagProbe(QObject):
+    """
+    Mede o atraso do ciclo de eventos da thread da UI: um temporizador de `interval_ms` que
+    dispara tarde indica que a thread esteve ocupada (trabalho bloqueante num slot). Cada
+    atraso é uma amostra do histograma "ui.event_loop_lag" (ms); custa um disparo por intervalo.
+    Com um `watchdog` (core/stall_watchdog.py), cada disparo é também o seu batimento: os
+    bloqueios longos ficam com as pilhas da thread da UI amostradas.
+    """
+
+    def __init__(self, parent=None, interval_ms: int = DEFAULT_PROBE_INTERVAL_MS):
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self._expected = None
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._on_timeout)
+        self._histogram = instruments.histogram("ui.event_loop_lag")
+        self.watchdog = None
+
+    def set_watchdog(self, watchdog):
+        """Passa a alimentar `watchdog` (um StallWatchdog com beat_interval_ms = interval_ms), ou None."""
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        self.watchdog = watchdog
+        if watchdog is not None and self._timer.isActive():
+            watchdog.start()
+
+    def start(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._timer.start()
+        if self.watchdog is not None:
+            self.watchdog.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._expected = None
+        if self.watchdog is not None:
+            self.watchdog.stop()
+
+    def _on_timeout(self):
+        if self.watchdog is not None:
+            self.watchdog.beat()
+        now = time.perf_counter()
+        lag_ms = max(0.0, (now - self._expected) * 1000)
+        self._expected = now + self.interval_ms / 1000
+        if instruments.enabled:
+            self._histogram.observe(lag_ms)
+            if lag_ms >= SLOW_LAG_MS:
+                instruments.log("ui.stall", level="warning", lag_ms=round(lag_ms, 1))
@@ -0,0 +1,299 @@
+import itertools
+import threading
+import time
+from collections import deque
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from .file_manager import (
+    DEFAULT_LARGE_FILE_BYTES, HEX_PREVIEW_BYTES, KIND_BINARY, KIND_LARGE_TEXT, KIND_TEXT,
+    MappedTextFile, hex_dump, iter_text_chunks, probe_file,
+)
+from .text_merge import line_edits, merge3
+
+FILL_BUDGET_SECONDS = 0.008 # Tempo máximo a inserir texto no documento por volta do ciclo de eventos
+# Os blocos lidos (CHUNK_BYTES) são inseridos em fatias de até tantos caracteres, cortadas num
+# fim de linha: inserir um bloco inteiro (QTextDocument + índice de linhas do TextBuffer) passa
+# bem do orçamento, e o prazo só pode ser verificado entre inserções
+FILL_SLICE_CHARS = 32 * 1024
+
+
+class _LoadSignals(QObject):
+    # Emitidos da thread de trabalho; entregues na thread da UI (conexão enfileirada)
+    probed = Signal(int, object)          # (id_da_carga, FileProbe)
+    chunk = Signal(int, str, int)         # (id_da_carga, texto, bytes_lidos)
+    progress = Signal(int, int, int)      # (id_da_carga, bytes_feitos, total)
+    large_file = Signal(int, object)      # (id_da_carga, MappedTextFile já indexado)
+    binary = Signal(int, str)             # (id_da_carga, pré-visualização em hexadecimal)
+    done = Signal(int)
+    failed = Signal(int, str)
+
+
+class _FileLoadTask(QRunnable):
+    """Lê, deteta e decodifica um arquivo numa thread do pool."""
+
+    def __init__(self, load_id: int, path: str, large_file_bytes: int, cancel_event: threading.Event):
+        super().__init__()
+        self.setAutoDelete(False) # O FileLoader controla o tempo de vida da tarefa
+        self.load_id = load_id
+        self.path = path
+        self.large_file_bytes = large_file_bytes
+        self.cancel_event = cancel_event
+        self.signals = _LoadSignals()
+
+    def run(self):
+        try:
+            self._load()
+        except (OSError, ValueError, LookupError) as e:
+            self.signals.failed.emit(self.load_id, str(e))
+            return
+        self.signals.done.emit(self.load_id)
+
+    def _load(self):
+        probe = probe_file(self.path, self.large_file_bytes)
+        self.signals.probed.emit(self.load_id, probe)
+        if probe.kind == KIND_BINARY:
+            with open(self.path, "rb") as f:
+                data = f.read(HEX_PREVIEW_BYTES)
+            self.signals.binary.emit(self.load_id, hex_dump(data))
+        elif probe.kind == KIND_LARGE_TEXT:
+            mapped = MappedTextFile(self.path, probe.encoding, probe.bom_bytes)
+            report = lambda done, total: self.signals.progress.emit(self.load_id, done, total)
+            if mapped.build_index(progress=report, cancel_event=self.cancel_event):
+                self.signals.large_file.emit(self.load_id, mapped)
+            else:
+                mapped.close()
+        else:
+            for text, done in iter_text_chunks(self.path, probe.encoding, probe.bom_bytes, cancel_event=self.cancel_event):
+                self.signals.chunk.emit(self.load_id, text, done)
+
+
+class _ReloadSignals(QObject):
+    merged = Signal(int, object, str, int, bool) # (id_da_carga, edições ou None, texto no disco, conflitos, juntou alterações locais)
+    failed = Signal(int, str)
+
+
+def _as_text(value) -> str:
+    return value if isinstance(value, str) else value.text() # str ou BufferView
+
+
+class _ReloadTask(QRunnable):
+    """
+    Relê um arquivo de texto já aberto que mudou no disco e calcula as edições que levam o
+    buffer ao conteúdo novo. Se o buffer tem alterações locais (difere de `base`, o texto
+    que estava no disco), as duas versões são juntadas (text_merge.merge3).
+    """
+
+    def __init__(self, load_id: int, path: str, base, local, large_file_bytes: int, cancel_event: threading.Event):
+        super().__init__()
+        self.setAutoDelete(False) # O FileLoader controla o tempo de vida da tarefa
+        self.load_id = load_id
+        self.path = path
+        self.base = base
+        self.local = local
+        self.large_file_bytes = large_file_bytes
+        self.cancel_event = cancel_event
+        self.signals = _ReloadSignals()
+
+    def run(self):
+        try:
+            probe = probe_file(self.path, self.large_file_bytes)
+            if probe.kind != KIND_TEXT:
+                self.signals.merged.emit(self.load_id, None, "", 0, False) # Deixou de ser texto normal: abrir outra vez
+                return
+            chunks = iter_text_chunks(self.path, probe.encoding, probe.bom_bytes, cancel_event=self.cancel_event)
+            theirs = "".join(text for text, _ in chunks)
+        except (OSError, ValueError, LookupError) as e:
+            self.signals.failed.emit(self.load_id, str(e))
+            return
+        if self.cancel_event.is_set():
+            return
+        base = _as_text(self.base)
+        local = _as_text(self.local)
+        conflicts = 0
+        if local == base:
+            edits = line_edits(local, theirs)
+        else:
+            merged, conflicts = merge3(base, local, theirs)
+            edits = line_edits(local, merged)
+        self.signals.merged.emit(self.load_id, edits, theirs, conflicts, local != base)
+
+
+class FileLoader(QObject):
+    """
+    Abre arquivos fora da thread da UI.
+
+    - Só uma amostra do início é lida para decidir o tipo e a codificação (`probed`).
+    - Texto normal chega em pedaços (`text_chunk`), entregues a um ritmo que deixa o ciclo
+      de eventos respirar: fatias de até FILL_SLICE_CHARS caracteres, terminadas num fim de
+      linha, enquanto não passar FILL_BUDGET_SECONDS de inserção nessa volta.
+    - Acima de `large_file_bytes`, o arquivo não é decodificado: é mapeado em memória e
+      indexado por linhas (`large_file_ready` com um MappedTextFile).
+    - Binários dão só uma pré-visualização em hexadecimal (`binary_ready`).
+
+    `reload()` relê um arquivo aberto que mudou no disco e devolve (`reloaded`) só as
+    edições a aplicar ao buffer, juntando as alterações locais que houver.
+
+    Há no máximo uma carga ativa: abrir outro arquivo cancela a anterior.
+    """
+    probed = Signal(int, object)
+    text_chunk = Signal(int, str)
+    progress = Signal(int, int, int)   # (id_da_carga, bytes_feitos, total)
+    large_file_ready = Signal(int, object)
+    binary_ready = Signal(int, str)
+    finished = Signal(int)
+    failed = Signal(int, str)
+    reloaded = Signal(int, object, str, int, bool) # (id_da_carga, edições ou None, texto no disco, conflitos, juntou alterações locais)
+
+    def __init__(self, parent=None, large_file_bytes: int = DEFAULT_LARGE_FILE_BYTES):
+        super().__init__(parent)
+        self.large_file_bytes = large_file_bytes
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self._id_counter = itertools.count(1)
+        self._current_id = None
+        self._cancel_event = None
+        self._tasks = {} # load_id -> tarefa ainda na posse do pool
+        self._pending_chunks = deque() # (texto, bytes_lidos) à espera de serem inseridos
+        self._chunk_offset = 0 # Caracteres do primeiro bloco de _pending_chunks já entregues
+        self._worker_done = False
+        self._size = 0
+        self._fill_timer = QTimer(self)
+        self._fill_timer.setInterval(0)
+        self._fill_timer.timeout.connect(self._deliver_chunks)
+
+    def load(self, path: str) -> int:
+        """Começa a abrir `path` e devolve o id da carga (os sinais trazem-no)."""
+        self.cancel()
+        load_id = next(self._id_counter)
+        self._current_id = load_id
+        self._cancel_event = threading.Event()
+        self._worker_done = False
+        self._size = 0
+        task = _FileLoadTask(load_id, path, self.large_file_bytes, self._cancel_event)
+        task.signals.probed.connect(self._on_probed)
+        task.signals.chunk.connect(self._on_chunk)
+        task.signals.progress.connect(self._on_progress)
+        task.signals.large_file.connect(self._on_large_file)
+        task.signals.binary.connect(self._on_binary)
+        task.signals.done.connect(self._on_done)
+        task.signals.failed.connect(self._on_failed)
+        self._tasks[load_id] = task
+        self.thread_pool.start(task)
+        return load_id
+
+    def reload(self, path: str, base, local) -> int:
+        """
+        Relê `path` depois de mudar no disco. `base` é o texto que foi carregado (str ou
+        BufferView) e `local` a BufferView atual do editor. `reloaded` traz as edições
+        (deslocamento, removidos, texto) a aplicar ao editor, ou None se o arquivo deixou de
+        ser texto normal e deve ser aberto outra vez com `load()`.
+        """
+        self.cancel()
+        load_id = next(self._id_counter)
+        self._current_id = load_id
+        self._cancel_event = threading.Event()
+        task = _ReloadTask(load_id, path, base, local, self.large_file_bytes, self._cancel_event)
+        task.signals.merged.connect(self._on_reloaded)
+        task.signals.failed.connect(self._on_failed)
+        self._tasks[load_id] = task
+        self.thread_pool.start(task)
+        return load_id
+
+    def cancel(self):
+        if self._current_id is None:
+            return
+        self._cancel_event.set()
+        task = self._tasks.get(self._current_id)
+        if task is not None and self.thread_pool.tryTake(task):
+            self._tasks.pop(self._current_id, None)
+        self._current_id = None
+        self._pending_chunks.clear()
+        self._chunk_offset = 0
+        self._fill_timer.stop()
+
+    @property
+    def loading(self) -> bool:
+        return self._current_id is not None
+
+    # --- Interno ---
+
+    def _on_probed(self, load_id: int, probe):
+        if load_id == self._current_id:
+            self._size = probe.size
+            self.probed.emit(load_id, probe)
+
+    def _on_chunk(self, load_id: int, text: str, done: int):
+        if load_id != self._current_id:
+            return
+        self._pending_chunks.append((text, done))
+        if not self._fill_timer.isActive():
+            self._fill_timer.start()
+
+    def _deliver_chunks(self):
+        load_id = self._current_id
+        deadline = time.monotonic() + FILL_BUDGET_SECONDS
+        done = None
+        while self._pending_chunks and time.monotonic() < deadline and load_id == self._current_id:
+            text, chunk_done = self._pending_chunks[0]
+            start = self._chunk_offset
+            end = start + FILL_SLICE_CHARS
+            if end < len(text):
+                newline = text.rfind("\n", start, end)
+                if newline >= 0: # Sem fim de linha (linha muito longa), a fatia fica cortada a meio
+                    end = newline + 1
+            else:
+                end = len(text)
+                self._pending_chunks.popleft()
+                done = chunk_done
+            self._chunk_offset = 0 if end == len(text) else end
+            self.text_chunk.emit(load_id, text[start:end])
+        if load_id != self._current_id:
+            return
+        if done is not None:
+            self.progress.emit(load_id, done, self._size)
+        if not self._pending_chunks:
+            self._fill_timer.stop()
+            if self._worker_done:
+                self._finish(load_id)
+
+    def _on_progress(self, load_id: int, done: int, total: int):
+        if load_id == self._current_id:
+            self.progress.emit(load_id, done, total)
+
+    def _on_large_file(self, load_id: int, mapped_file):
+        if load_id != self._current_id:
+            mapped_file.close() # Carga substituída entretanto
+            return
+        self.large_file_ready.emit(load_id, mapped_file)
+
+    def _on_binary(self, load_id: int, hex_text: str):
+        if load_id == self._current_id:
+            self.binary_ready.emit(load_id, hex_text)
+
+    def _on_done(self, load_id: int):
+        self._tasks.pop(load_id, None)
+        if load_id != self._current_id:
+            return
+        self._worker_done = True
+        if not self._pending_chunks:
+            self._finish(load_id)
+
+    def _on_failed(self, load_id: int, error_message: str):
+        self._tasks.pop(load_id, None)
+        if load_id == self._current_id:
+            self._current_id = None
+            self._pending_chunks.clear()
+            self._chunk_offset = 0
+            self._fill_timer.stop()
+            self.failed.emit(load_id, error_message)
+
+    def _on_reloaded(self, load_id: int, edits, disk_text: str, conflicts: int, merged: bool):
+        self._tasks.pop(load_id, None)
+        if load_id == self._current_id:
+            self._current_id = None
+            self.reloaded.emit(load_id, edits, disk_text, conflicts, merged)
+
+    def _finish(self, load_id: int):
+        self._current_id = None
+        self.finished.emit(load_id)
@@ -0,0 +1,522 @@
+import bisect
+import codecs
+import mmap
+import os
+import queue
+import re
+import threading
+from array import array
+
+# Deteção de codificações que não são UTF-8 (charset_normalizer, que vem com o 'requests'): só é
+# importado quando um arquivo não é UTF-8 nem parece cp1252 (ver _load_charset_detector)
+_detect_charset = None
+_charset_detector_checked = False
+
+SAMPLE_BYTES = 64 * 1024 # Amostra lida do início do arquivo para decidir codificação e tipo
+CHUNK_BYTES = 256 * 1024 # Bytes decodificados (e inseridos no documento) de cada vez
+DEFAULT_LARGE_FILE_BYTES = 16 * 1024 * 1024 # Acima disto: visualizador só de leitura (mmap)
+HEX_PREVIEW_BYTES = 64 * 1024 # Arquivos binários: só o início, em hexadecimal
+HEX_BYTES_PER_LINE = 16
+INDEX_PAGE_BYTES = 64 * 1024 # Granularidade do índice de linhas do MappedTextFile
+MAX_LINE_BYTES = 64 * 1024 # Linhas mais longas são cortadas no visualizador de arquivos grandes
+DEFAULT_WALK_THREADS = 8 # Threads a listar diretórios em paralelo (os.scandir liberta o GIL)
+ALWAYS_IGNORED_DIRS = frozenset((".git", ".hg", ".svn")) # Nunca entram no índice do projeto
+
+# Tipos de arquivo (FileProbe.kind)
+KIND_TEXT = "texto"
+KIND_LARGE_TEXT = "texto grande"
+KIND_BINARY = "binário"
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+# Bytes de controlo que não aparecem em texto (TAB, LF, FF, CR e ESC aparecem)
+_BINARY_CONTROL_BYTES = bytes(set(range(32)) - {9, 10, 12, 13, 27})
+# Caracteres não-ASCII típicos de texto em línguas da Europa ocidental gravado em cp1252
+_WESTERN_CHARS = frozenset("àáâãäåæçèéêëìíîïñòóôõöøùúûüýÿÀÁÂÃÄÅÆÇÈÉÊËÌÍÎÏÑÒÓÔÕÖØÙÚÛÜÝßœŒ"
+                           "–—‘’‚“”„…•€ºª°«»§·¡¿ ")
+
+
+def detect_bom(sample: bytes):
+    """(codificação, tamanho do BOM) ou (None, 0)."""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+    return None, 0
+
+
+def is_binary(sample: bytes) -> bool:
+    """Um NUL, ou mais de 10% de bytes de controlo, numa amostra sem BOM de UTF-16/32."""
+    if not sample or detect_bom(sample)[0] not in (None, "utf-8"):
+        return False
+    if b"\x00" in sample:
+        return True
+    control = len(sample) - len(sample.translate(None, _BINARY_CONTROL_BYTES))
+    return control > len(sample) // 10
+
+
+def _load_charset_detector():
+    """charset_normalizer.from_bytes (importado na primeira chamada), ou None se não estiver instalado."""
+    global _detect_charset, _charset_detector_checked
+    if not _charset_detector_checked:
+        try:
+            from charset_normalizer import from_bytes
+            _detect_charset = from_bytes
+        except ImportError:
+            pass
+        _charset_detector_checked = True
+    return _detect_charset
+
+
+def _looks_like_cp1252(sample: bytes) -> bool:
+    """Acentos e pontuação ocidentais, no meio de uma maioria de letras ASCII."""
+    try:
+        text = sample.decode("cp1252")
+    except UnicodeDecodeError:
+        return False
+    non_ascii = [char for char in text if ord(char) > 127]
+    ascii_letters = sum(1 for char in text if char.isascii() and char.isalpha())
+    return all(char in _WESTERN_CHARS for char in non_ascii) and ascii_letters >= len(non_ascii)
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Codificação de um arquivo de texto a partir de uma amostra do início: BOM; UTF-8 se a
+    amostra for UTF-8 válido (um caractere cortado no fim não conta); cp1252 se parecer texto
+    ocidental com acentos; senão a sugestão do charset_normalizer, se estiver instalado (em
+    amostras curtas engana-se com frequência entre as codificações latinas, daí o passo
+    anterior); por fim cp1252/latin-1, que aceitam tudo.
+    """
+    encoding, _ = detect_bom(sample)
+    if encoding:
+        return encoding
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    if _looks_like_cp1252(sample):
+        return "cp1252"
+    if _load_charset_detector() is not None:
+        best = _detect_charset(sample).best()
+        if best is not None:
+            return best.encoding
+    try:
+        sample.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def hex_dump(data: bytes, offset: int = 0) -> str:
+    """Linhas `deslocamento  bytes em hex  |ASCII|`, 16 bytes por linha."""
+    lines = []
+    for start in range(0, len(data), HEX_BYTES_PER_LINE):
+        row = data[start:start + HEX_BYTES_PER_LINE]
+        hex_part = " ".join(f"{byte:02x}" for byte in row)
+        ascii_part = "".join(chr(byte) if 32 <= byte < 127 else "." for byte in row)
+        lines.append(f"{offset + start:08x}  {hex_part:<{HEX_BYTES_PER_LINE * 3 - 1}}  |{ascii_part}|")
+    return "\n".join(lines)
+
+
+class FileProbe:
+    """O que se sabe de um arquivo antes de o carregar: tamanho, tipo e codificação."""
+
+    def __init__(self, path: str, size: int, kind: str, encoding: str = None, bom_bytes: int = 0, sample: bytes = b""):
+        self.path = path
+        self.size = size
+        self.kind = kind
+        self.encoding = encoding # None para binários
+        self.bom_bytes = bom_bytes
+        self.sample = sample
+
+    def __repr__(self):
+        return f"FileProbe(path={self.path!r}, size={self.size}, kind={self.kind!r}, encoding={self.encoding!r})"
+
+
+def probe_file(path: str, large_file_bytes: int = DEFAULT_LARGE_FILE_BYTES) -> FileProbe:
+    """Lê só uma amostra do início do arquivo e decide como abri-lo. Lança OSError."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        sample = f.read(SAMPLE_BYTES)
+    if is_binary(sample):
+        return FileProbe(path, size, KIND_BINARY, sample=sample)
+    encoding = detect_encoding(sample)
+    _, bom_bytes = detect_bom(sample)
+    kind = KIND_LARGE_TEXT if size > large_file_bytes else KIND_TEXT
+    return FileProbe(path, size, kind, encoding, bom_bytes, sample)
+
+
+def iter_text_chunks(path: str, encoding: str, bom_bytes: int = 0, chunk_bytes: int = CHUNK_BYTES, cancel_event=None):
+    """
+    Gera (texto, bytes_lidos) por blocos, com um decodificador incremental: um caractere
+    partido entre blocos não se perde e nunca há uma segunda leitura do arquivo.
+    Os fins de linha saem normalizados para '\\n'.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending_cr = False
+    done = bom_bytes
+    with open(path, "rb") as f:
+        f.seek(bom_bytes)
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            data = f.read(chunk_bytes)
+            final = not data
+            text = decoder.decode(data, final=final)
+            done += len(data)
+            if pending_cr:
+                text = "\r" + text
+                pending_cr = False
+            if text.endswith("\r") and not final:
+                text = text[:-1] # Pode ser o início de um '\r\n' partido entre blocos
+                pending_cr = True
+            if "\r" in text:
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+            if text:
+                yield text, done
+            if final:
+                return
+
+
+class MappedTextFile:
+    """
+    Arquivo de texto grande, só de leitura, mapeado em memória (mmap).
+
+    Nada é decodificado à cabeça: um índice esparso guarda, por página de INDEX_PAGE_BYTES,
+    quantas linhas começam antes dela (contadas página a página com `bytes.count`, em C).
+    Encontrar a linha N é uma pesquisa binária nas páginas e uma procura dentro de uma só
+    página; só as linhas pedidas (as visíveis) são decodificadas.
+
+    Args:
+        path (str): Caminho do arquivo.
+        encoding (str): Codificação (ver detect_encoding); o BOM, se houver, é saltado.
+        bom_bytes (int): Tamanho do BOM no início do arquivo.
+    """
+
+    def __init__(self, path: str, encoding: str = "utf-8", bom_bytes: int = 0):
+        self.path = path
+        self.encoding = encoding
+        self._newline = "\n".encode(encoding)
+        self._start = bom_bytes
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self._page_bytes = INDEX_PAGE_BYTES
+        self._lines_before_page = array("q")
+        self.line_count = 0
+        self.indexed = False
+
+    def build_index(self, progress=None, cancel_event=None) -> bool:
+        """
+        Conta as linhas de todo o arquivo. `progress(bytes_feitos, total)` é chamado a cada
+        ~16 MB. Devolve False se foi cancelado.
+        """
+        lines_before_page = array("q")
+        newlines = 0
+        data = self._map
+        page = INDEX_PAGE_BYTES - INDEX_PAGE_BYTES % len(self._newline) # Alinhada com o fim de linha
+        progress_every = max(1, (16 * 1024 * 1024) // page)
+        for page_number, offset in enumerate(range(self._start, self.size, page)):
+            lines_before_page.append(newlines)
+            newlines += data[offset:offset + page].count(self._newline)
+            if page_number % progress_every == 0:
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+                if progress is not None:
+                    progress(offset, self.size)
+        self._page_bytes = page
+        self._lines_before_page = lines_before_page
+        ends_with_newline = self.size > self._start and data[self.size - len(self._newline):self.size] == self._newline
+        self.line_count = newlines + (0 if ends_with_newline else 1)
+        self.indexed = True
+        return True
+
+    def line_offset(self, line: int) -> int:
+        """Deslocamento (em bytes) do início da linha `line` (0 = primeira)."""
+        if line <= 0 or not self._lines_before_page:
+            return self._start
+        page = bisect.bisect_right(self._lines_before_page, line - 1) - 1 # Página com o fim da linha anterior
+        position = self._start + page * self._page_bytes
+        for _ in range(line - self._lines_before_page[page]):
+            position = self._map.find(self._newline, position, self.size)
+            if position == -1:
+                return self.size
+            position += len(self._newline)
+        return position
+
+    def lines(self, first: int, count: int) -> list:
+        """Texto das linhas [first, first + count), sem o fim de linha; as muito longas vêm cortadas."""
+        result = []
+        position = self.line_offset(first)
+        newline_size = len(self._newline)
+        for _ in range(min(count, self.line_count - first)):
+            if position >= self.size:
+                break
+            end = self._map.find(self._newline, position, min(self.size, position + MAX_LINE_BYTES))
+            if end == -1 and position + MAX_LINE_BYTES < self.size:
+                raw = self._map[position:position + MAX_LINE_BYTES]
+                text = raw.decode(self.encoding, errors="replace") + " …"
+                end = self._map.find(self._newline, position + MAX_LINE_BYTES, self.size)
+            else:
+                if end == -1:
+                    end = self.size
+                text = self._map[position:end].decode(self.encoding, errors="replace")
+            result.append(text.rstrip("\r"))
+            if end == -1:
+                break
+            position = end + newline_size
+        return result
+
+    def read_bytes(self, offset: int, length: int) -> bytes:
+        return self._map[offset:offset + length]
+
+    def close(self):
+        if self.size:
+            self._map.close()
+        self._file.close()
+
+
+class GitIgnore:
+    """
+    Regras de um arquivo .gitignore, relativas ao diretório onde ele está (`base`, com '/',
+    vazio na raiz do projeto).
+
+    Cada padrão é traduzido para uma expressão regular e todos são juntos numa só
+    alternância por ordem inversa, com um grupo por padrão: o primeiro grupo que coincide é
+    o último padrão do arquivo que se aplica, que é o que decide no git (incluindo `!`).
+    Há duas alternâncias, porque os padrões com '/' final só se aplicam a diretórios.
+    """
+
+    def __init__(self, base: str, lines):
+        self.base = base
+        self._prefix = base + "/" if base else ""
+        file_rules = []
+        dir_rules = []
+        self._negated = []
+        for line in lines:
+            rule = self._parse(line)
+            if rule is None:
+                continue
+            regex, negated, dir_only = rule
+            group = f"g{len(self._negated)}"
+            self._negated.append(negated)
+            dir_rules.append(f"(?P<{group}>{regex})")
+            if not dir_only:
+                file_rules.append(f"(?P<{group}>{regex})")
+        self._file_re = re.compile("|".join(reversed(file_rules)), re.DOTALL) if file_rules else None
+        self._dir_re = re.compile("|".join(reversed(dir_rules)), re.DOTALL) if dir_rules else None
+
+    @classmethod
+    def from_file(cls, path: str, base: str):
+        """Lê um .gitignore; None se não existir ou não tiver padrões."""
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                ignore = cls(base, f.read().splitlines())
+        except OSError:
+            return None
+        return ignore if ignore._dir_re is not None else None
+
+    def match(self, path: str, is_dir: bool):
+        """True se `path` (relativo à raiz do projeto) é ignorado, False se é re-incluído com `!`, None se nenhum padrão se aplica."""
+        if self._prefix:
+            if not path.startswith(self._prefix):
+                return None
+            path = path[len(self._prefix):]
+        regex = self._dir_re if is_dir else self._file_re
+        match = regex.fullmatch(path) if regex is not None else None
+        if match is None:
+            return None
+        return not self._negated[int(match.lastgroup[1:])]
+
+    @staticmethod
+    def _parse(line: str):
+        """(regex, negado, só_diretórios) de uma linha, ou None para comentários e linhas vazias."""
+        if line.endswith("\\ "):
+            line = line[:-2].rstrip() + "\\ " # Espaço final escapado: fica
+        else:
+            line = line.rstrip()
+        if not line or line.startswith("#"):
+            return None
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        elif line.startswith("\\#") or line.startswith("\\!"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return None
+        anchored = "/" in line # Um '/' no início ou no meio prende o padrão ao diretório do .gitignore
+        line = line.lstrip("/")
+        parts = []
+        i = 0
+        while i < len(line):
+            char = line[i]
+            if char == "*":
+                if line.startswith("**", i):
+                    if line.startswith("**/", i):
+                        parts.append("(?:.*/)?")
+                        i += 3
+                    else:
+                        parts.append(".*")
+                        i += 2
+                    continue
+                parts.append("[^/]*")
+            elif char == "?":
+                parts.append("[^/]")
+            elif char == "[":
+                end = line.find("]", i + 2)
+                if end == -1:
+                    parts.append(re.escape(char))
+                else:
+                    content = line[i + 1:end]
+                    if content.startswith("!"):
+                        content = "^" + content[1:]
+                    parts.append("[" + content.replace("\\", "\\\\") + "]")
+                    i = end
+            elif char == "\\" and i + 1 < len(line):
+                i += 1
+                parts.append(re.escape(line[i]))
+            else:
+                parts.append(re.escape(char))
+            i += 1
+        regex = "".join(parts)
+        if not anchored:
+            regex = "(?:.*/)?" + regex # Sem '/': aplica-se ao nome, em qualquer profundidade
+        return regex, negated, dir_only
+
+
+def is_ignored(ignores: tuple, path: str, is_dir: bool) -> bool:
+    """Decide com os .gitignore de `ignores` (da raiz para baixo): o mais profundo que se pronuncia ganha."""
+    for ignore in reversed(ignores):
+        result = ignore.match(path, is_dir)
+        if result is not None:
+            return result
+    return False
+
+
+def _root_ignores(root: str) -> tuple:
+    ignores = []
+    exclude = GitIgnore.from_file(os.path.join(root, ".git", "info", "exclude"), "")
+    if exclude is not None:
+        ignores.append(exclude)
+    return tuple(ignores)
+
+
+def inherited_ignores(root: str, relative: str, cache: dict) -> tuple:
+    """
+    Os .gitignore que se aplicam às entradas de `relative` vindos de cima (.git/info/exclude
+    e os dos diretórios acima; o do próprio diretório é lido ao listá-lo). `cache` é um
+    dicionário guardado entre chamadas, para não reler os mesmos arquivos.
+    """
+    ignores = cache.get(relative)
+    if ignores is None:
+        if not relative:
+            ignores = _root_ignores(root)
+        else:
+            parent = relative.rpartition("/")[0]
+            ignores = inherited_ignores(root, parent, cache)
+            ignore = GitIgnore.from_file(os.path.join(root, parent, ".gitignore"), parent)
+            if ignore is not None:
+                ignores = ignores + (ignore,)
+        cache[relative] = ignores
+    return ignores
+
+
+def list_project_directory(root: str, relative: str, ignores: tuple):
+    """
+    Lê um diretório do projeto: ([arquivos], [(subdiretório, ignores)]), sem o que os
+    .gitignore excluem. `ignores` são os de cima (inherited_ignores); os subdiretórios vêm
+    com os que se lhes aplicam, já com o .gitignore deste. Lança OSError.
+    """
+    directory = os.path.join(root, relative) if relative else root
+    with os.scandir(directory) as entries:
+        entries = list(entries)
+    if any(entry.name == ".gitignore" for entry in entries):
+        ignore = GitIgnore.from_file(os.path.join(directory, ".gitignore"), relative)
+        if ignore is not None:
+            ignores = ignores + (ignore,)
+    files = []
+    subdirectories = []
+    prefix = relative + "/" if relative else ""
+    for entry in entries:
+        name = entry.name
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_dir and name in ALWAYS_IGNORED_DIRS:
+            continue
+        path = prefix + name
+        if ignores and is_ignored(ignores, path, is_dir):
+            continue
+        if is_dir:
+            subdirectories.append((path, ignores))
+        else:
+            files.append(name)
+    return files, subdirectories
+
+
+def walk_project(root: str, threads: int = DEFAULT_WALK_THREADS, cancel_event=None,
+                 start: str = "", ignores: tuple = None) -> list:
+    """
+    Lista os arquivos do projeto em `root`, respeitando os .gitignore (de cada diretório e
+    .git/info/exclude) e saltando ALWAYS_IGNORED_DIRS. Diretórios ignorados nem são abertos.
+
+    Vários diretórios são lidos ao mesmo tempo, por `threads` threads a partilhar uma fila:
+    o `os.scandir` liberta o GIL enquanto espera pelo disco, o que numa árvore grande (ou
+    num disco de rede) é a maior parte do tempo. Ligações simbólicas para diretórios não
+    são seguidas (podem formar ciclos); contam como arquivos, como no git.
+
+    Devolve [(diretório_relativo, [nomes dos arquivos])] com todos os diretórios percorridos
+    (também os que não têm arquivos, que o FileWatcher precisa de observar), por nenhuma
+    ordem em particular ('' é a raiz; separador '/'). `start` percorre só essa subárvore
+    (com `ignores` = inherited_ignores dela). Se `cancel_event` for ativado devolve o que já
+    tinha lido.
+    """
+    root = os.path.abspath(root)
+    pending = queue.Queue()
+    results = []
+    lock = threading.Lock()
+    outstanding = 1 # Diretórios na fila ou a ser lidos
+    threads = max(1, threads)
+
+    def worker():
+        nonlocal outstanding
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            files, subdirectories = [], []
+            listed = False
+            if cancel_event is None or not cancel_event.is_set():
+                try:
+                    files, subdirectories = list_project_directory(root, *item)
+                    listed = True
+                except OSError:
+                    pass # Sem permissão, ou apagado entretanto
+            with lock:
+                if listed:
+                    results.append((item[0], files))
+                outstanding += len(subdirectories)
+            for subdirectory in subdirectories:
+                pending.put(subdirectory)
+            with lock:
+                outstanding -= 1
+                finished = outstanding == 0
+            if finished:
+                for _ in range(threads):
+                    pending.put(None)
+
+    pending.put((start, ignores if ignores is not None else _root_ignores(root)))
+    workers = [threading.Thread(target=worker, name=f"project-walk-{i}", daemon=True) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return results
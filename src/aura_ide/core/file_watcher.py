@@ -0,0 +1,309 @@
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from .file_manager import inherited_ignores, list_project_directory, walk_project
+
+DEBOUNCE_MS = 100 # Silêncio depois do último evento antes de reler o lote
+MAX_BATCH_DELAY_MS = 500 # Numa tempestade contínua (git checkout), um lote pelo menos a cada meio segundo
+WATCH_PATHS_PER_TICK = 2000 # Diretórios acrescentados ao QFileSystemWatcher por volta do ciclo de eventos
+
+
+def _file_signature(path: str):
+    """(inode, tamanho, mtime) de um arquivo, ou None se já não existir."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class ProjectChanges:
+    """Um lote de alterações, já relidas do disco."""
+
+    def __init__(self):
+        self.directories = {} # Diretório relativo -> [arquivos] (listagem atual; inclui os diretórios novos)
+        self.removed_directories = set() # Desapareceram (com tudo o que estava dentro)
+        self.changed_files = [] # Arquivos observados (watch_file) que mudaram ou desapareceram, absolutos
+        self.file_signatures = {} # Caminho absoluto -> assinatura nova (None = já não existe)
+        self.events = 0 # Eventos do sistema juntados neste lote
+        self.scan_seconds = 0.0
+
+    def __bool__(self):
+        return bool(self.directories or self.removed_directories or self.changed_files)
+
+    def __repr__(self):
+        return (f"ProjectChanges(directories={len(self.directories)}, removed={len(self.removed_directories)}, "
+                f"files={len(self.changed_files)}, events={self.events})")
+
+
+class _RescanSignals(QObject):
+    done = Signal(int, object) # (id_do_lote, ProjectChanges; None se foi cancelado)
+
+
+class _RescanTask(QRunnable):
+    """Relê os diretórios e arquivos de um lote numa thread do pool."""
+
+    def __init__(self, batch_id: int, root: str, directories: set, known_directories: set, files: dict,
+                 events: int, ignores_cache: dict, cancel_event: threading.Event):
+        super().__init__()
+        self.setAutoDelete(False) # O FileWatcher controla o tempo de vida da tarefa
+        self.batch_id = batch_id
+        self.root = root
+        self.directories = directories
+        self.known_directories = known_directories # Cópia: a UI continua a alterar a sua
+        self.files = files # Caminho absoluto -> assinatura conhecida
+        self.events = events
+        self.ignores_cache = ignores_cache # Só esta tarefa o usa (o pool tem uma thread)
+        self.cancel_event = cancel_event
+        self.signals = _RescanSignals()
+
+    def run(self):
+        started = time.monotonic()
+        changes = ProjectChanges()
+        changes.events = self.events
+        children = {}
+        for directory in self.known_directories:
+            if directory:
+                children.setdefault(directory.rpartition("/")[0], set()).add(directory)
+        # Os de cima primeiro: um diretório apagado leva os de baixo e não é preciso relê-los
+        for directory in sorted(self.directories, key=lambda d: d.count("/") if d else -1):
+            if self.cancel_event.is_set():
+                self.signals.done.emit(self.batch_id, None)
+                return
+            if directory in changes.directories or self._inside_removed(directory, changes):
+                continue
+            for child in children.get(directory, ()):
+                self.ignores_cache.pop(child, None) # O .gitignore deste diretório pode ter mudado
+            try:
+                ignores = inherited_ignores(self.root, directory, self.ignores_cache)
+                files, subdirectories = list_project_directory(self.root, directory, ignores)
+            except OSError:
+                self._remove(directory, children, changes)
+                continue
+            changes.directories[directory] = files
+            present = set()
+            for subdirectory, subdirectory_ignores in subdirectories:
+                present.add(subdirectory)
+                if subdirectory not in self.known_directories and subdirectory not in changes.directories:
+                    # Diretório novo (criado, ou renomeado para aqui): percorrido por inteiro
+                    for walked, walked_files in walk_project(self.root, 1, self.cancel_event, subdirectory, subdirectory_ignores):
+                        changes.directories[walked] = walked_files
+            for child in children.get(directory, ()):
+                if child not in present:
+                    self._remove(child, children, changes)
+        for path, signature in self.files.items():
+            current = _file_signature(path)
+            if current != signature:
+                changes.changed_files.append(path)
+                changes.file_signatures[path] = current
+        changes.scan_seconds = time.monotonic() - started
+        self.signals.done.emit(self.batch_id, changes)
+
+    @staticmethod
+    def _inside_removed(directory: str, changes: ProjectChanges) -> bool:
+        while directory:
+            directory = directory.rpartition("/")[0]
+            if directory in changes.removed_directories:
+                return True
+        return False
+
+    def _remove(self, directory: str, children: dict, changes: ProjectChanges):
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            changes.removed_directories.add(current)
+            changes.directories.pop(current, None)
+            pending.extend(children.get(current, ()))
+
+
+class FileWatcher(QObject):
+    """
+    Observa os diretórios do projeto (e os arquivos abertos) e avisa das alterações feitas
+    fora do editor: pelo terminal da IA (`sed -i`), por um `git checkout`, etc.
+
+    Usa o QFileSystemWatcher (inotify no Linux), que só diz que "algo mudou neste diretório".
+    Os eventos não são tratados um a um: os diretórios tocados juntam-se num conjunto e,
+    DEBOUNCE_MS depois do último evento (ou no máximo MAX_BATCH_DELAY_MS depois do
+    primeiro), são relidos numa thread, de uma vez. Um checkout que mexe em 10k arquivos
+    dá assim alguns lotes, não 10k atualizações. Cada lote chega em `changes_ready` como um
+    ProjectChanges com a listagem nova dos diretórios relidos.
+
+    Conteúdo: os diretórios só avisam de arquivos criados, apagados ou renomeados; para
+    ver escritas num arquivo aberto, `watch_file()` observa-o também.
+    """
+    changes_ready = Signal(object) # ProjectChanges
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._on_directory_changed)
+        self.watcher.fileChanged.connect(self._on_file_changed)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self._id_counter = itertools.count(1)
+        self._directories = set() # Relativos, observados ou à espera de o ser
+        self._files = {} # Caminho absoluto -> assinatura (arquivos abertos)
+        self._dirty_directories = set()
+        self._dirty_files = False
+        self._events = 0
+        self._first_event = None
+        self._ignores_cache = {}
+        self._cancel_event = threading.Event()
+        self._tasks = {} # id -> tarefa ainda na posse do pool
+        self._running_id = None
+        self._watch_queue = deque()
+        self._watch_failures = 0
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(DEBOUNCE_MS)
+        self._debounce_timer.timeout.connect(self._flush)
+        self._watch_timer = QTimer(self)
+        self._watch_timer.setInterval(0)
+        self._watch_timer.timeout.connect(self._add_queued_watches)
+
+    def watch_project(self, root: str, directories):
+        """
+        Observa `directories` (relativos a `root`, como os de walk_project). Chamado outra vez
+        depois de reindexar: só os diretórios que mudaram são acrescentados ou retirados.
+        """
+        root = os.path.abspath(root)
+        if root != self.root:
+            self.stop()
+            self.root = root
+            self._cancel_event = threading.Event()
+        directories = set(directories)
+        gone = self._directories - directories
+        if gone:
+            self._unwatch(gone)
+        new = directories - self._directories
+        self._directories |= new
+        self._watch_queue.extend(new)
+        if self._watch_queue:
+            self._watch_timer.start()
+
+    def watch_file(self, path: str):
+        """Observa também o conteúdo de `path` (o arquivo aberto no editor)."""
+        path = os.path.abspath(path)
+        self._files[path] = _file_signature(path)
+        self.watcher.addPath(path)
+
+    def unwatch_file(self, path: str):
+        path = os.path.abspath(path)
+        self._files.pop(path, None)
+        if path in self.watcher.files():
+            self.watcher.removePath(path)
+
+    def stop(self):
+        """Deixa de observar tudo (e descarta o lote que estiver a ser relido)."""
+        self._cancel_event.set()
+        self._debounce_timer.stop()
+        self._watch_timer.stop()
+        self._watch_queue.clear()
+        watched = self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        self._directories.clear()
+        self._dirty_directories.clear()
+        self._ignores_cache = {}
+        self._running_id = None
+        self.root = None
+
+    @property
+    def watched_directories(self) -> int:
+        return len(self.watcher.directories())
+
+    # --- Interno ---
+
+    def _absolute(self, directory: str) -> str:
+        return os.path.join(self.root, directory) if directory else self.root
+
+    def _relative(self, path: str) -> str:
+        relative = os.path.relpath(path, self.root).replace(os.sep, "/")
+        return "" if relative == "." else relative
+
+    def _add_queued_watches(self):
+        batch = [self._absolute(self._watch_queue.popleft()) for _ in range(min(WATCH_PATHS_PER_TICK, len(self._watch_queue)))]
+        failed = self.watcher.addPaths(batch) if batch else []
+        if failed:
+            if not self._watch_failures:
+                print(f"AVISO: Não foi possível observar {len(failed)} diretórios (limite do sistema? "
+                      "No Linux: fs.inotify.max_user_watches). Alterações neles só aparecem ao reindexar.")
+            self._watch_failures += len(failed)
+        if not self._watch_queue:
+            self._watch_timer.stop()
+
+    def _unwatch(self, directories):
+        self._directories -= directories
+        watched = set(self.watcher.directories())
+        paths = [path for path in map(self._absolute, directories) if path in watched]
+        if paths:
+            self.watcher.removePaths(paths)
+        if self._watch_queue:
+            self._watch_queue = deque(d for d in self._watch_queue if d not in directories)
+
+    def _on_directory_changed(self, path: str):
+        if self.root is None:
+            return
+        self._dirty_directories.add(self._relative(path))
+        self._schedule()
+
+    def _on_file_changed(self, path: str):
+        if path in self._files:
+            self._dirty_files = True
+            self._schedule()
+
+    def _schedule(self):
+        self._events += 1
+        now = time.monotonic()
+        if self._first_event is None:
+            self._first_event = now
+        # Adiado a cada evento, mas nunca para além de MAX_BATCH_DELAY_MS depois do primeiro
+        remaining_ms = MAX_BATCH_DELAY_MS - (now - self._first_event) * 1000
+        self._debounce_timer.start(max(0, min(DEBOUNCE_MS, int(remaining_ms))))
+
+    def _flush(self):
+        if self._running_id is not None:
+            return # Quando o lote atual acabar, este é lançado
+        if not self._dirty_directories and not self._dirty_files:
+            self._first_event = None
+            return
+        batch_id = next(self._id_counter)
+        task = _RescanTask(batch_id, self.root, self._dirty_directories, set(self._directories), dict(self._files),
+                           self._events, self._ignores_cache, self._cancel_event)
+        task.signals.done.connect(self._on_rescanned)
+        self._dirty_directories = set()
+        self._dirty_files = False
+        self._events = 0
+        self._first_event = None
+        self._running_id = batch_id
+        self._tasks[batch_id] = task
+        self.thread_pool.start(task)
+
+    def _on_rescanned(self, batch_id: int, changes: ProjectChanges):
+        self._tasks.pop(batch_id, None)
+        if batch_id != self._running_id or changes is None:
+            return # Descartado por stop()/watch_project() entretanto
+        self._running_id = None
+        new = [directory for directory in changes.directories if directory not in self._directories]
+        self._directories.update(new)
+        self._watch_queue.extend(new)
+        if self._watch_queue:
+            self._watch_timer.start()
+        if changes.removed_directories:
+            self._unwatch(changes.removed_directories)
+        for path, signature in changes.file_signatures.items():
+            if path in self._files:
+                self._files[path] = signature
+                # Substituído (sed -i grava outro arquivo e renomeia-o): o inotify seguia o antigo
+                if signature is not None and path not in self.watcher.files():
+                    self.watcher.addPath(path)
+        if changes:
+            self.changes_ready.emit(changes)
+        if self._dirty_directories or self._dirty_files:
+            self._debounce_timer.start(DEBOUNCE_MS)
@@ -0,0 +1,215 @@
+import itertools
+import os
+import threading
+import time
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from .file_manager import DEFAULT_WALK_THREADS, walk_project
+from .project_index import COMPACT_CHANGED_FILES, ProjectIndex
+
+
+class _IndexSignals(QObject):
+    # Emitidos da thread de trabalho; entregues na thread da UI (conexão enfileirada)
+    ready = Signal(int, object, bool)  # (id_da_indexação, ProjectIndex, veio_do_disco)
+    walked = Signal(int, object)       # (id_da_indexação, conjunto de todos os diretórios percorridos)
+    done = Signal(int, float)          # (id_da_indexação, segundos a percorrer a árvore)
+    failed = Signal(int, str)
+
+
+class _IndexTask(QRunnable):
+    """Carrega o índice gravado (se houver), percorre a árvore e grava o índice novo."""
+
+    def __init__(self, index_id: int, root: str, threads: int, use_cache: bool, cancel_event: threading.Event):
+        super().__init__()
+        self.setAutoDelete(False) # O ProjectIndexer controla o tempo de vida da tarefa
+        self.index_id = index_id
+        self.root = root
+        self.threads = threads
+        self.use_cache = use_cache
+        self.cancel_event = cancel_event
+        self.signals = _IndexSignals()
+
+    def run(self):
+        try:
+            self._index()
+        except (OSError, ValueError) as e:
+            self.signals.failed.emit(self.index_id, str(e))
+
+    def _index(self):
+        if self.use_cache:
+            cached = ProjectIndex.load(self.root)
+            if cached is not None:
+                self.signals.ready.emit(self.index_id, cached, True)
+                cached.prepare()
+        started = time.monotonic()
+        listing = walk_project(self.root, self.threads, self.cancel_event)
+        if self.cancel_event.is_set():
+            return
+        index = ProjectIndex.from_listing(self.root, listing)
+        index.prepare()
+        if self.cancel_event.is_set():
+            return
+        self.signals.ready.emit(self.index_id, index, False)
+        self.signals.walked.emit(self.index_id, frozenset(directory for directory, _ in listing))
+        try:
+            index.save()
+        except OSError as e:
+            print(f"AVISO: Não foi possível gravar o índice do projeto: {e}")
+        self.signals.done.emit(self.index_id, time.monotonic() - started)
+
+
+class _UpdateSignals(QObject):
+    ready = Signal(int, object) # (id_da_atualização, ProjectIndex)
+
+
+class _UpdateTask(QRunnable):
+    """Aplica lotes do FileWatcher a um índice (with_changes); reconstrói-o se já acumulou muitas alterações."""
+
+    def __init__(self, update_id: int, index: ProjectIndex, batches: list):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.update_id = update_id
+        self.index = index
+        self.batches = batches
+        self.signals = _UpdateSignals()
+
+    def run(self):
+        index = self.index
+        for changes in self.batches:
+            index = index.with_changes(changes.directories, changes.removed_directories)
+        if index.changed_files >= COMPACT_CHANGED_FILES:
+            index = ProjectIndex.from_listing(index.root, index.listing())
+            try:
+                index.save()
+            except OSError as e:
+                print(f"AVISO: Não foi possível gravar o índice do projeto: {e}")
+        index.prepare()
+        self.signals.ready.emit(self.update_id, index)
+
+
+class ProjectIndexer(QObject):
+    """
+    Mantém o índice de arquivos do projeto (core/project_index.py) para "ir para arquivo".
+
+    Ao abrir um projeto, o índice gravado da última vez fica disponível quase de imediato
+    (`index_ready` com from_cache=True); entretanto a árvore é percorrida outra vez numa
+    thread, e o índice novo substitui o antigo e é gravado. Há no máximo uma indexação
+    ativa: começar outra cancela a anterior.
+
+    Depois disso o índice é mantido com os lotes do FileWatcher (`apply_changes`), também
+    numa thread e sem voltar a percorrer a árvore; `directories_walked` diz ao FileWatcher
+    que diretórios observar.
+    """
+    index_ready = Signal(object, bool) # (ProjectIndex, veio_do_disco)
+    directories_walked = Signal(str, object) # (raiz, conjunto de diretórios relativos)
+    finished = Signal(float)           # Segundos a percorrer a árvore e construir o índice
+    failed = Signal(str)
+
+    def __init__(self, parent=None, threads: int = DEFAULT_WALK_THREADS):
+        super().__init__(parent)
+        self.threads = threads
+        self.index = None
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self._id_counter = itertools.count(1)
+        self._current_id = None
+        self._cancel_event = None
+        self._tasks = {} # id -> tarefa ainda na posse do pool
+        self._root = None
+        self._pending_changes = [] # Lotes à espera de uma indexação ou de outra atualização
+        self._update_id = None
+
+    def start(self, root: str, use_cache: bool = True) -> int:
+        """Indexa `root` (cancelando a indexação anterior) e devolve o id desta indexação."""
+        self.cancel()
+        root = os.path.abspath(root)
+        if root != self._root:
+            self.index = None
+            self._pending_changes = []
+        self._root = root
+        index_id = next(self._id_counter)
+        self._current_id = index_id
+        self._cancel_event = threading.Event()
+        task = _IndexTask(index_id, root, self.threads, use_cache, self._cancel_event)
+        task.signals.ready.connect(self._on_ready)
+        task.signals.walked.connect(self._on_walked)
+        task.signals.done.connect(self._on_done)
+        task.signals.failed.connect(self._on_failed)
+        self._tasks[index_id] = task
+        self.thread_pool.start(task)
+        return index_id
+
+    def refresh(self):
+        """Percorre a árvore outra vez, mantendo o índice atual até o novo estar pronto."""
+        if self._root is not None:
+            self.start(self._root, use_cache=False)
+
+    def apply_changes(self, changes):
+        """Aplica um lote do FileWatcher (ProjectChanges) ao índice, numa thread; o resultado chega em `index_ready`."""
+        if not changes.directories and not changes.removed_directories:
+            return
+        self._pending_changes.append(changes)
+        self._start_update()
+
+    def cancel(self):
+        if self._current_id is None:
+            return
+        self._cancel_event.set()
+        task = self._tasks.get(self._current_id)
+        if task is not None and self.thread_pool.tryTake(task):
+            self._tasks.pop(self._current_id, None)
+        self._current_id = None
+
+    @property
+    def indexing(self) -> bool:
+        return self._current_id is not None
+
+    # --- Interno ---
+
+    def _start_update(self):
+        # Uma de cada vez, e só sobre o índice da última indexação completa
+        if self._update_id is not None or self._current_id is not None or self.index is None or not self._pending_changes:
+            return
+        update_id = next(self._id_counter)
+        task = _UpdateTask(update_id, self.index, self._pending_changes)
+        task.signals.ready.connect(self._on_updated)
+        self._pending_changes = []
+        self._update_id = update_id
+        self._tasks[update_id] = task
+        self.thread_pool.start(task)
+
+    def _on_updated(self, update_id: int, index):
+        self._tasks.pop(update_id, None)
+        if update_id != self._update_id:
+            return
+        self._update_id = None
+        if self._current_id is None: # Senão, a indexação em curso começou depois e já vê estas alterações
+            self.index = index
+            self.index_ready.emit(index, False)
+        self._start_update()
+
+    def _on_ready(self, index_id: int, index, from_cache: bool):
+        if index_id != self._current_id:
+            return
+        if from_cache and self.index is not None:
+            return # Já há um índice desta sessão, mais recente do que o gravado
+        self.index = index
+        self.index_ready.emit(index, from_cache)
+
+    def _on_walked(self, index_id: int, directories):
+        if index_id == self._current_id:
+            self.directories_walked.emit(self._root, directories)
+
+    def _on_done(self, index_id: int, seconds: float):
+        self._tasks.pop(index_id, None)
+        if index_id == self._current_id:
+            self._current_id = None
+            self.finished.emit(seconds)
+            self._start_update() # Alterações vistas durante a indexação
+
+    def _on_failed(self, index_id: int, error_message: str):
+        self._tasks.pop(index_id, None)
+        if index_id == self._current_id:
+            self._current_id = None
+            self.failed.emit(error_message)
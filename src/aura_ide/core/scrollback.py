@@ -0,0 +1,184 @@
+DEFAULT_MAX_LINES = 10000
+DEFAULT_MAX_LINE_CHARS = 4096 # Linhas mais longas são partidas (saídas sem '\n', p.ex. minified JS)
+TAB_SIZE = 8
+
+
+class ScrollbackBuffer:
+    """
+    Histórico (scrollback) de um terminal: buffer circular de linhas com tamanho limitado.
+
+    - Guarda no máximo `max_lines` linhas completas; ao passar do limite, as mais antigas
+      são descartadas em O(1) (o índice de início do anel avança).
+    - A linha ainda sem '\\n' fica à parte (`partial_line`), limitada a `max_line_chars`.
+    - Cada linha tem um estilo (0 = normal, 1 = erro...) num bytearray paralelo.
+    - '\\r\\n' é tratado como '\\n'; um '\\r' isolado recomeça a linha (barras de progresso).
+
+    Não depende do Qt: a vista (TerminalView) lê as linhas por índice para desenhar
+    apenas as que estão visíveis.
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, max_line_chars: int = DEFAULT_MAX_LINE_CHARS):
+        if max_lines < 1:
+            raise ValueError("max_lines deve ser pelo menos 1.")
+        self._max_lines = max_lines
+        self.max_line_chars = max_line_chars
+        self.clear()
+
+    def clear(self):
+        self._lines = [] # Cresce até max_lines; depois é reutilizado como anel
+        self._styles = bytearray()
+        self._head = 0 # Índice da linha mais antiga no anel
+        self._partial = ""
+        self._partial_style = 0
+        self._pending_cr = False # '\r' no fim de um pedaço: só se sabe no seguinte se é '\r\n'
+        self.dropped_lines = 0 # Total de linhas descartadas desde o início (numeração absoluta)
+        self.max_line_length = 0 # Maior linha vista, para a barra de deslocamento horizontal
+
+    @property
+    def max_lines(self) -> int:
+        return self._max_lines
+
+    @max_lines.setter
+    def max_lines(self, value: int):
+        if value < 1:
+            raise ValueError("max_lines deve ser pelo menos 1.")
+        lines = [self._lines[(self._head + i) % len(self._lines)] for i in range(len(self._lines))] if self._lines else []
+        styles = bytearray(self._styles[(self._head + i) % len(self._styles)] for i in range(len(self._styles)))
+        excess = max(0, len(lines) - value)
+        self._lines = lines[excess:]
+        self._styles = styles[excess:]
+        self._head = 0
+        self.dropped_lines += excess
+        self._max_lines = value
+
+    def __len__(self):
+        """Número de linhas completas guardadas (sem contar a linha parcial)."""
+        return len(self._lines)
+
+    def line(self, index: int):
+        """(texto, estilo) da linha `index`, com 0 = mais antiga ainda guardada."""
+        if not 0 <= index < len(self._lines):
+            raise IndexError(index)
+        ring_index = (self._head + index) % len(self._lines)
+        return self._lines[ring_index], self._styles[ring_index]
+
+    def partial_line(self):
+        """(texto, estilo) da linha em curso, ainda sem '\\n'."""
+        return self._partial, self._partial_style
+
+    def feed(self, text: str, style: int = 0) -> int:
+        """Acrescenta texto de saída. Devolve quantas linhas completas foram acrescentadas."""
+        if not text:
+            return 0
+        if self._pending_cr:
+            text = "\r" + text
+            self._pending_cr = False
+        if text[-1] == "\r":
+            text = text[:-1]
+            self._pending_cr = True
+        if "\r\n" in text:
+            text = text.replace("\r\n", "\n")
+
+        pieces = text.split("\n")
+        if style:
+            self._partial_style = style
+        if len(pieces) == 1:
+            self._extend_partial(pieces[0])
+            return 0
+
+        first_line = self._partial + pieces[0]
+        first_style = self._partial_style
+        new_partial = pieces[-1]
+        middle = pieces[1:-1]
+        committed = 1 + len(middle)
+
+        # Das linhas do meio só interessam as que ainda cabem no histórico
+        skipped = max(0, len(middle) - self._max_lines)
+        if skipped:
+            middle = middle[skipped:]
+            self.dropped_lines += skipped + 1 # + a primeira linha, que também já não caberia
+        else:
+            self._commit(first_line, first_style)
+        for line_text in middle:
+            self._commit(line_text, style)
+
+        self._partial = ""
+        self._partial_style = style
+        self._extend_partial(new_partial)
+        return committed
+
+    def extend_lines(self, lines: list, style: int = 0):
+        """
+        Acrescenta linhas completas (sem '\\n') de uma só vez, depois da linha parcial.
+        Caminho rápido para grandes volumes: as linhas entram no anel por fatias.
+        """
+        if not lines:
+            return
+        if self._partial or self._pending_cr:
+            self.feed("\n", self._partial_style)
+        skipped = max(0, len(lines) - self._max_lines)
+        if skipped:
+            lines = lines[skipped:]
+            self.dropped_lines += skipped
+        longest = max(map(len, lines))
+        joined = "".join(lines)
+        if longest > self.max_line_chars or "\t" in joined or "\r" in joined:
+            for line_text in lines:
+                self._commit(line_text, style)
+            return
+        self.max_line_length = max(self.max_line_length, longest)
+        free = self._max_lines - len(self._lines)
+        if free > 0:
+            self._lines.extend(lines[:free])
+            self._styles.extend(bytes([style]) * min(free, len(lines)))
+            lines = lines[free:]
+        # Anel cheio: as restantes substituem as mais antigas, no máximo em duas fatias
+        while lines:
+            count = min(len(lines), self._max_lines - self._head)
+            self._lines[self._head:self._head + count] = lines[:count]
+            self._styles[self._head:self._head + count] = bytes([style]) * count
+            self._head = (self._head + count) % self._max_lines
+            self.dropped_lines += count
+            lines = lines[count:]
+
+    def text_range(self, start: int, end: int) -> list:
+        """Textos das linhas [start, end) (índices relativos, como em `line`)."""
+        return [self.line(i)[0] for i in range(max(0, start), min(end, len(self._lines)))]
+
+    # --- Interno ---
+
+    def _extend_partial(self, text: str):
+        if not text:
+            return
+        partial = self._partial + text
+        if "\r" in partial:
+            partial = partial[partial.rfind("\r") + 1:]
+        # Uma saída enorme sem '\n' não pode crescer sem limite: parte-se em linhas
+        while len(partial) > self.max_line_chars:
+            self._commit(partial[:self.max_line_chars], self._partial_style, clean=False)
+            partial = partial[self.max_line_chars:]
+        self._partial = partial
+
+    def _commit(self, line_text: str, style: int, clean: bool = True):
+        if clean:
+            if "\r" in line_text:
+                line_text = line_text[line_text.rfind("\r") + 1:]
+            if "\t" in line_text:
+                line_text = line_text.expandtabs(TAB_SIZE)
+            while len(line_text) > self.max_line_chars:
+                self._push(line_text[:self.max_line_chars], style)
+                line_text = line_text[self.max_line_chars:]
+        self._push(line_text, style)
+
+    def _push(self, line_text: str, style: int):
+        if len(line_text) > self.max_line_length:
+            self.max_line_length = len(line_text)
+        if len(self._lines) < self._max_lines:
+            self._lines.append(line_text)
+            self._styles.append(style)
+            return
+        # Anel cheio: substituir a linha mais antiga
+        self._lines[self._head] = line_text
+        self._styles[self._head] = style
+        self._head = (self._head + 1) % self._max_lines
+        self.dropped_lines += 1
@@ -0,0 +1,153 @@
+import codecs
+import time
+
+# Marcadores escritos pelo shell: sequências OSC (invisíveis num terminal real).
+#   fim de comando:    ESC ] 777;aura-end;<código>;<cwd> BEL
+#   início de comando: ESC ] 777;aura-start BEL  (opcional; o PS0 do bash num PTY)
+MARKER_PREFIX = b"\x1b]777;aura-"
+MARKER_TERMINATOR = b"\x07"
+MAX_MARKER_PAYLOAD_BYTES = 8192 # Um "marcador" maior que isto não é nosso: é tratado como saída
+
+# Comando de shell que emite o marcador; usa o $? do comando anterior
+MARKER_SHELL_COMMAND = "printf '\\033]777;aura-end;%d;%s\\007' \"$?\" \"$PWD\""
+
+
+def wrap_command(command: str) -> str:
+    """
+    Linha(s) a escrever no stdin do shell para executar `command` e sinalizar o fim.
+    O marcador vai numa linha própria: funciona mesmo que o comando termine com '&' ou '#'.
+    """
+    return f"{command}\n{MARKER_SHELL_COMMAND}\n"
+
+
+class CommandRecord:
+    """Resultado de um comando executado num shell com o protocolo de marcadores."""
+
+    def __init__(self, command, exit_code: int, cwd: str, output_bytes: int, duration: float):
+        self.command = command # None para o marcador inicial (sem comando)
+        self.exit_code = exit_code
+        self.cwd = cwd
+        self.output_bytes = output_bytes
+        self.duration = duration # Segundos desde begin_command até ao marcador
+
+    def __repr__(self):
+        return (f"CommandRecord(command={self.command!r}, exit_code={self.exit_code}, cwd={self.cwd!r}, "
+                f"output_bytes={self.output_bytes}, duration={self.duration:.3f})")
+
+
+class ShellProtocolParser:
+    """
+    Separa, em streaming, a saída de um shell dos marcadores de fim de comando.
+
+    - Trabalha sobre bytes; o texto é decodificado com um decodificador UTF-8 incremental,
+      pelo que um caractere partido entre duas leituras não se perde.
+    - Um marcador pode chegar partido em qualquer ponto entre leituras: só os poucos bytes
+      finais que podem ser o início de um marcador ficam retidos até à leitura seguinte.
+    - Cada byte é examinado um número constante de vezes: o custo é linear no tamanho da
+      saída, mesmo para gigabytes, e a memória retida é limitada.
+
+    Args:
+        on_output (callable): Recebe cada pedaço de texto de saída (sem os marcadores).
+        on_command_finished (callable): Recebe um CommandRecord por marcador de fim.
+        on_command_started (callable, optional): Chamado em cada marcador de início; a saída
+            que se segue é a do comando (sem o eco da linha escrita).
+    """
+
+    def __init__(self, on_output, on_command_finished, on_command_started=None):
+        self.on_output = on_output
+        self.on_command_finished = on_command_finished
+        self.on_command_started = on_command_started
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._held = b"" # Bytes retidos: possível início de marcador ou marcador incompleto
+        self._command = None
+        self._command_started = time.monotonic()
+        self._output_bytes = 0
+
+    def begin_command(self, command: str):
+        """Regista o comando que acabou de ser enviado ao shell (para o CommandRecord)."""
+        self._command = command
+        self._command_started = time.monotonic()
+        self._output_bytes = 0
+
+    def feed(self, data: bytes):
+        if self._held:
+            data = self._held + data
+            self._held = b""
+        position = 0
+        while True:
+            marker_start = data.find(MARKER_PREFIX, position)
+            if marker_start == -1:
+                break
+            payload_start = marker_start + len(MARKER_PREFIX)
+            marker_end = data.find(MARKER_TERMINATOR, payload_start, payload_start + MAX_MARKER_PAYLOAD_BYTES)
+            if marker_end == -1:
+                if len(data) - payload_start < MAX_MARKER_PAYLOAD_BYTES:
+                    # Marcador ainda incompleto: emitir a saída anterior e esperar pelo resto
+                    self._emit_output(data[position:marker_start])
+                    self._held = data[marker_start:]
+                    return
+                # Sem terminador dentro do limite: não é um marcador, segue como saída
+                self._emit_output(data[position:payload_start])
+                position = payload_start
+                continue
+            self._emit_output(data[position:marker_start])
+            self._handle_marker(data[payload_start:marker_end])
+            position = marker_end + 1
+
+        # Reter um eventual início de marcador no fim (no máximo len(MARKER_PREFIX) - 1 bytes)
+        tail_start = max(position, len(data) - len(MARKER_PREFIX) + 1)
+        escape_index = data.find(b"\x1b", tail_start)
+        while escape_index != -1 and not MARKER_PREFIX.startswith(data[escape_index:]):
+            escape_index = data.find(b"\x1b", escape_index + 1)
+        if escape_index != -1:
+            self._emit_output(data[position:escape_index])
+            self._held = data[escape_index:]
+        else:
+            self._emit_output(data[position:])
+
+    def flush(self):
+        """Emite o que estiver retido (p.ex. quando o shell termina)."""
+        held, self._held = self._held, b""
+        self._emit_output(held)
+        self._flush_decoder()
+
+    # --- Interno ---
+
+    def _flush_decoder(self):
+        text = self._decoder.decode(b"", final=True)
+        if text:
+            self.on_output(text)
+
+    def _emit_output(self, data: bytes):
+        if not data:
+            return
+        self._output_bytes += len(data)
+        text = self._decoder.decode(data)
+        if text:
+            self.on_output(text)
+
+    def _handle_marker(self, payload: bytes):
+        if payload == b"start":
+            self._flush_decoder()
+            if self._command is None:
+                self._command = "" # Comando escrito pelo usuário: o texto não é conhecido
+            self._command_started = time.monotonic()
+            self._output_bytes = 0
+            if self.on_command_started is not None:
+                self.on_command_started()
+            return
+        if not payload.startswith(b"end;"):
+            return # Marcador de outra versão/extensão: ignorado
+        exit_text, _, cwd = payload[4:].decode("utf-8", errors="replace").partition(";")
+        try:
+            exit_code = int(exit_text)
+        except ValueError:
+            exit_code = -1
+        self._flush_decoder() # Texto pendente (UTF-8 incompleto) pertence à saída deste comando
+        record = CommandRecord(self._command, exit_code, cwd, self._output_bytes,
+                               time.monotonic() - self._command_started)
+        self._command = None
+        self._output_bytes = 0
+        self._command_started = time.monotonic()
+        self.on_command_finished(record)
+
@@ -0,0 +1,183 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from aura_ide.utils.app_dirs import get_cache_dir
+from aura_ide.utils.instrumentation import instruments
+
+DEFAULT_STALL_THRESHOLD_MS = 200 # Atraso do ciclo de eventos a partir do qual se amostra a pilha
+DEFAULT_SAMPLE_INTERVAL_MS = 10
+MAX_STACK_DEPTH = 64
+MAX_KEPT_STALLS = 200 # Bloqueios guardados (e gravados no relatório JSON); os mais antigos saem primeiro
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(code) -> str:
+    # "função (caminho:linha da definição)": a mesma função agrega-se numa só caixa do flame graph
+    filename = code.co_filename
+    if filename.startswith(_PACKAGE_DIR):
+        filename = "aura_ide" + filename[len(_PACKAGE_DIR):]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+class Stall:
+    """Um bloqueio da thread da UI: quando começou, quanto durou e as pilhas amostradas."""
+
+    def __init__(self, started: float, started_unix: float):
+        self.started = started # time.perf_counter()
+        self.started_unix = started_unix
+        self.duration_ms = 0.0
+        self.samples = Counter() # pilha (tuplo de frames, da raiz para a folha) -> amostras
+
+    def top_stack(self) -> tuple:
+        return self.samples.most_common(1)[0][0] if self.samples else ()
+
+    def to_dict(self) -> dict:
+        return {
+            "started_at": round(self.started_unix, 3),
+            "duration_ms": round(self.duration_ms, 1),
+            "samples": sum(self.samples.values()),
+            "top_stack": list(self.top_stack()),
+        }
+
+
+class StallWatchdog:
+    """
+    Cão de guarda dos bloqueios da thread da UI. A thread da UI só tem de chamar `beat()` a
+    cada `beat_interval_ms` (o EventLoopLagProbe faz isso a partir de um QTimer); uma thread
+    à parte verifica a cada `sample_interval_ms` se o batimento está atrasado. Passado
+    `threshold_ms`, amostra a pilha Python da thread da UI (sys._current_frames) até o ciclo
+    de eventos voltar. No fim de cada bloqueio, as pilhas somam-se às da sessão e o relatório é
+    regravado fora da thread da UI:
+
+    - `<sessão>.folded`: pilhas no formato "collapsed" (frame;frame;frame N), que o
+      flamegraph.pl, o speedscope ou o inferno transformam num flame graph;
+    - `<sessão>.json`: a lista dos bloqueios (início, duração, pilha mais frequente).
+    """
+
+    def __init__(self, beat_interval_ms: int, threshold_ms: int = DEFAULT_STALL_THRESHOLD_MS,
+                 sample_interval_ms: int = DEFAULT_SAMPLE_INTERVAL_MS, report_dir: str = None):
+        self.beat_interval = beat_interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.sample_interval = sample_interval_ms / 1000
+        self.report_dir = report_dir
+        session = time.strftime("%Y%m%d-%H%M%S")
+        self.report_name = f"stalls-{session}-{os.getpid()}"
+        self.main_thread_id = threading.main_thread().ident
+        self.stalls = deque(maxlen=MAX_KEPT_STALLS)
+        self.stall_count = 0
+        self.stacks = Counter() # Todas as amostras da sessão, para o .folded
+        self._last_beat = time.perf_counter()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock() # stalls/stacks: escritos pelo cão de guarda, lidos pela UI
+
+    # --- Thread da UI ---
+
+    def beat(self):
+        """Chamado da thread da UI a cada `beat_interval_ms`: só guarda o instante."""
+        self._last_beat = time.perf_counter()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._last_beat = time.perf_counter()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="aura-stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=1)
+        self._thread = None
+
+    def report_paths(self) -> tuple:
+        """(arquivo .folded, arquivo .json) do relatório desta sessão."""
+        directory = self.report_dir or os.path.join(get_cache_dir(), "stalls")
+        return os.path.join(directory, self.report_name + ".folded"), os.path.join(directory, self.report_name + ".json")
+
+    def summary(self, top: int = 5) -> dict:
+        """Bloqueios da sessão e as pilhas (folhas) com mais amostras, para mostrar na UI."""
+        with self._lock:
+            stalls = [stall.to_dict() for stall in self.stalls]
+            leaves = Counter()
+            for stack, samples in self.stacks.items():
+                leaves[stack[-1]] += samples
+        return {
+            "stalls": self.stall_count,
+            "slowest": sorted(stalls, key=lambda stall: stall["duration_ms"], reverse=True)[:top],
+            "hot_frames": [{"frame": frame, "ms": samples * self.sample_interval * 1000} for frame, samples in leaves.most_common(top)],
+        }
+
+    def collapsed_stacks(self) -> list:
+        """Linhas "frame;frame;frame amostras", da pilha com mais amostras para a com menos."""
+        with self._lock:
+            return [f"{';'.join(stack)} {samples}" for stack, samples in self.stacks.most_common()]
+
+    # --- Thread do cão de guarda ---
+
+    def _run(self):
+        stall = None
+        stall_beat = None # O batimento que estava atrasado quando o bloqueio começou
+        while not self._stop_event.wait(self.sample_interval):
+            last_beat = self._last_beat
+            now = time.perf_counter()
+            if stall is not None and last_beat != stall_beat:
+                # O ciclo de eventos voltou: o bloqueio durou até ao batimento que chegou atrasado
+                stall.duration_ms = (last_beat - stall.started) * 1000
+                self._finish(stall)
+                stall = None
+            overdue = now - last_beat - self.beat_interval
+            if overdue < self.threshold:
+                continue
+            if stall is None:
+                stall_beat = last_beat
+                stall = Stall(last_beat + self.beat_interval, time.time() - overdue)
+            stack = self._sample_main_thread()
+            if stack:
+                stall.samples[stack] += 1
+
+    def _sample_main_thread(self) -> tuple:
+        frame = sys._current_frames().get(self.main_thread_id)
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse() # Da raiz para a folha, como no formato "collapsed"
+        return tuple(labels)
+
+    def _finish(self, stall: Stall):
+        with self._lock:
+            self.stall_count += 1
+            self.stalls.append(stall)
+            self.stacks.update(stall.samples)
+        top_stack = stall.top_stack()
+        instruments.record_span("ui.stall", int(stall.started * 1e9), int((stall.started + stall.duration_ms / 1000) * 1e9),
+                                category="ui", samples=sum(stall.samples.values()), frame=top_stack[-1] if top_stack else "")
+        instruments.log("ui.stall_sampled", level="warning", ms=round(stall.duration_ms, 1),
+                        frame=top_stack[-1] if top_stack else None)
+        try:
+            self._write_report()
+        except OSError as e:
+            print(f"AVISO: Não foi possível gravar o relatório de bloqueios da UI: {e}")
+
+    def _write_report(self):
+        folded_path, json_path = self.report_paths()
+        os.makedirs(os.path.dirname(folded_path), exist_ok=True)
+        lines = self.collapsed_stacks()
+        with self._lock:
+            stalls = [stall.to_dict() for stall in self.stalls]
+        document = {"sample_interval_ms": self.sample_interval * 1000, "threshold_ms": self.threshold * 1000,
+                    "stalls": self.stall_count, "recent": stalls}
+        for path, content in ((folded_path, "\n".join(lines) + "\n"), (json_path, json.dumps(document, ensure_ascii=False, indent=1))):
+            temporary_path = f"{path}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(temporary_path, path)
@@ -0,0 +1,274 @@
+import os
+import re
+
+# Tipos de token (o tema da vista decide as cores)
+TOKEN_KEYWORD = "palavra-chave"
+TOKEN_BUILTIN = "embutido"
+TOKEN_CONSTANT = "constante"
+TOKEN_STRING = "texto"
+TOKEN_COMMENT = "comentário"
+TOKEN_NUMBER = "número"
+TOKEN_DEFINITION = "definição"
+TOKEN_DECORATOR = "decorador"
+TOKEN_VARIABLE = "variável"
+TOKEN_KEY = "chave"
+
+STATE_NORMAL = 0 # Estado no fim de uma linha que não deixa nada aberto
+
+
+def _scan_quoted(line: str, position: int, quote: str, escapes: bool = True) -> int:
+    """Índice logo a seguir ao fecho de `quote` a partir de `position`, ou -1 se a linha acabar antes."""
+    while True:
+        end = line.find(quote, position)
+        if end == -1:
+            return -1
+        if escapes:
+            backslashes = 0
+            while end - backslashes - 1 >= position and line[end - backslashes - 1] == "\\":
+                backslashes += 1
+            if backslashes % 2:
+                position = end + 1
+                continue
+        return end + len(quote)
+
+
+class Lexer:
+    """
+    Tokenizador de uma linha de cada vez.
+
+    `tokenize(linha, estado)` recebe o estado em que a linha anterior terminou (p.ex.
+    "dentro de uma string de aspas triplas") e devolve (tokens, estado_no_fim), com os
+    tokens como (início, comprimento, tipo). O estado é um inteiro pequeno, para que o
+    editor guarde um por linha e volte a tokenizar só a partir da linha editada, parando
+    assim que o estado no fim de uma linha volte a ser o que já estava guardado.
+    """
+    name = ""
+
+    def tokenize(self, line: str, state: int = STATE_NORMAL):
+        raise NotImplementedError
+
+
+class PythonLexer(Lexer):
+    name = "python"
+    KEYWORDS = frozenset((
+        "and", "as", "assert", "async", "await", "break", "class", "continue", "def", "del", "elif", "else",
+        "except", "finally", "for", "from", "global", "if", "import", "in", "is", "lambda", "nonlocal", "not",
+        "or", "pass", "raise", "return", "try", "while", "with", "yield", "match", "case",
+    ))
+    CONSTANTS = frozenset(("True", "False", "None", "self", "cls"))
+    BUILTINS = frozenset((
+        "abs", "all", "any", "bool", "bytearray", "bytes", "callable", "chr", "dict", "dir", "divmod",
+        "enumerate", "filter", "float", "format", "frozenset", "getattr", "hasattr", "hash", "id", "input",
+        "int", "isinstance", "issubclass", "iter", "len", "list", "map", "max", "min", "next", "object", "open",
+        "ord", "pow", "print", "property", "range", "repr", "reversed", "round", "set", "setattr", "slice",
+        "sorted", "staticmethod", "classmethod", "str", "sum", "super", "tuple", "type", "vars", "zip",
+        "Exception", "ValueError", "TypeError", "KeyError", "IndexError", "OSError", "RuntimeError",
+        "NotImplementedError", "StopIteration", "AttributeError", "ImportError", "UnicodeDecodeError",
+    ))
+    # Estados: dentro de uma string de aspas triplas que continua na linha seguinte
+    STATE_TRIPLE_SINGLE = 1
+    STATE_TRIPLE_DOUBLE = 2
+    _TRIPLE_QUOTES = {STATE_TRIPLE_SINGLE: "'''", STATE_TRIPLE_DOUBLE: '"""'}
+
+    _TOKEN_RE = re.compile(r"""
+        (?P<comment>\#)
+      | (?P<string>(?<![^\W\d])[rRbBuUfF]{0,2}(?:'''|\"\"\"|'|\"))
+      | (?P<number>(?<![\w.])(?:0[xX][0-9a-fA-F_]+|0[bB][01_]+|0[oO][0-7_]+|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?[jJ]?))
+      | (?P<decorator>^\s*@[^\W\d][\w.]*)
+      | (?P<name>[^\W\d]\w*)
+    """, re.VERBOSE)
+
+    def tokenize(self, line: str, state: int = STATE_NORMAL):
+        tokens = []
+        position = 0
+        if state in self._TRIPLE_QUOTES:
+            end = _scan_quoted(line, 0, self._TRIPLE_QUOTES[state])
+            if end == -1:
+                if line:
+                    tokens.append((0, len(line), TOKEN_STRING))
+                return tokens, state
+            tokens.append((0, end, TOKEN_STRING))
+            position = end
+        previous_name = None
+        search = self._TOKEN_RE.search
+        while True:
+            match = search(line, position)
+            if match is None:
+                return tokens, STATE_NORMAL
+            kind = match.lastgroup
+            start = match.start()
+            if kind == "comment":
+                tokens.append((start, len(line) - start, TOKEN_COMMENT))
+                return tokens, STATE_NORMAL
+            if kind == "string":
+                quote = match.group().lstrip("rRbBuUfF")
+                end = _scan_quoted(line, match.end(), quote)
+                if end == -1:
+                    tokens.append((start, len(line) - start, TOKEN_STRING))
+                    if len(quote) == 3:
+                        return tokens, self.STATE_TRIPLE_SINGLE if quote == "'''" else self.STATE_TRIPLE_DOUBLE
+                    return tokens, STATE_NORMAL # String simples sem fecho: termina com a linha
+                tokens.append((start, end - start, TOKEN_STRING))
+                position = end
+                previous_name = None
+                continue
+            position = match.end()
+            if kind == "number":
+                tokens.append((start, position - start, TOKEN_NUMBER))
+                continue
+            if kind == "decorator":
+                text = match.group()
+                offset = len(text) - len(text.lstrip())
+                tokens.append((start + offset, position - start - offset, TOKEN_DECORATOR))
+                continue
+            word = match.group()
+            if previous_name in ("def", "class"):
+                tokens.append((start, position - start, TOKEN_DEFINITION))
+            elif word in self.KEYWORDS:
+                tokens.append((start, position - start, TOKEN_KEYWORD))
+            elif word in self.CONSTANTS:
+                tokens.append((start, position - start, TOKEN_CONSTANT))
+            elif word in self.BUILTINS and (start == 0 or line[start - 1] != "."):
+                tokens.append((start, position - start, TOKEN_BUILTIN))
+            previous_name = word
+
+
+class ShellLexer(Lexer):
+    name = "shell"
+    KEYWORDS = frozenset((
+        "if", "then", "else", "elif", "fi", "for", "while", "until", "do", "done", "case", "esac", "in",
+        "function", "select", "time",
+    ))
+    BUILTINS = frozenset((
+        "echo", "cd", "export", "local", "return", "source", "alias", "unset", "read", "set", "shift", "exit",
+        "test", "printf", "eval", "exec", "trap", "declare", "readonly", "let", "kill", "pwd", "wait", "true",
+        "false", "shopt", "builtin", "command", "type", "ulimit", "umask", "getopts", "break", "continue",
+    ))
+    # Estados: string que continua na linha seguinte
+    STATE_SINGLE = 1
+    STATE_DOUBLE = 2
+
+    _TOKEN_RE = re.compile(r"""
+        (?P<comment>(?<![^\s;|&(])\#)
+      | (?P<string>['"])
+      | (?P<variable>\$(?:\{[^}]*\}|[A-Za-z_]\w*|[@*\#?$!0-9-]))
+      | (?P<number>(?<![\w.-])\d+(?![\w.]))
+      | (?P<word>[A-Za-z_][\w.-]*)
+    """, re.VERBOSE)
+    _FUNCTION_NAME_RE = re.compile(r"\s+([\w.-]+)")
+    _DEFINITION_RE = re.compile(r"\s*\(\s*\)")
+
+    def tokenize(self, line: str, state: int = STATE_NORMAL):
+        tokens = []
+        position = 0
+        if state in (self.STATE_SINGLE, self.STATE_DOUBLE):
+            quote = "'" if state == self.STATE_SINGLE else '"'
+            end = _scan_quoted(line, 0, quote, escapes=quote == '"')
+            if end == -1:
+                if line:
+                    tokens.append((0, len(line), TOKEN_STRING))
+                return tokens, state
+            tokens.append((0, end, TOKEN_STRING))
+            position = end
+        command_position = True # A próxima palavra é um comando (início de linha, depois de ; | & etc.)
+        search = self._TOKEN_RE.search
+        while True:
+            match = search(line, position)
+            if match is None:
+                return tokens, STATE_NORMAL
+            kind = match.lastgroup
+            start = match.start()
+            between = line[position:start]
+            if any(separator in between for separator in ";|&(`"):
+                command_position = True
+            if kind == "comment":
+                tokens.append((start, len(line) - start, TOKEN_COMMENT))
+                return tokens, STATE_NORMAL
+            if kind == "string":
+                quote = match.group()
+                end = _scan_quoted(line, start + 1, quote, escapes=quote == '"')
+                if end == -1:
+                    tokens.append((start, len(line) - start, TOKEN_STRING))
+                    return tokens, self.STATE_SINGLE if quote == "'" else self.STATE_DOUBLE
+                tokens.append((start, end - start, TOKEN_STRING))
+                position = end
+                command_position = False
+                continue
+            position = match.end()
+            if kind == "variable":
+                tokens.append((start, position - start, TOKEN_VARIABLE))
+            elif kind == "number":
+                tokens.append((start, position - start, TOKEN_NUMBER))
+            else:
+                word = match.group()
+                if word in self.KEYWORDS:
+                    tokens.append((start, position - start, TOKEN_KEYWORD))
+                    command_position = word not in ("in", "function")
+                    if word == "function":
+                        following = self._FUNCTION_NAME_RE.match(line, position)
+                        if following:
+                            tokens.append((following.start(1), len(following.group(1)), TOKEN_DEFINITION))
+                            position = following.end()
+                    continue
+                if self._DEFINITION_RE.match(line, position):
+                    tokens.append((start, position - start, TOKEN_DEFINITION)) # nome() { ... }
+                elif command_position and word in self.BUILTINS:
+                    tokens.append((start, position - start, TOKEN_BUILTIN))
+            command_position = False
+
+
+class JsonLexer(Lexer):
+    name = "json"
+    _TOKEN_RE = re.compile(r"""
+        (?P<string>")
+      | (?P<number>-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?)
+      | (?P<constant>\b(?:true|false|null)\b)
+    """, re.VERBOSE)
+    _KEY_RE = re.compile(r"\s*:")
+
+    def tokenize(self, line: str, state: int = STATE_NORMAL):
+        # Em JSON nada atravessa linhas: o estado é sempre STATE_NORMAL
+        tokens = []
+        position = 0
+        search = self._TOKEN_RE.search
+        while True:
+            match = search(line, position)
+            if match is None:
+                return tokens, STATE_NORMAL
+            kind = match.lastgroup
+            start = match.start()
+            if kind == "string":
+                end = _scan_quoted(line, start + 1, '"')
+                if end == -1:
+                    tokens.append((start, len(line) - start, TOKEN_STRING))
+                    return tokens, STATE_NORMAL
+                is_key = self._KEY_RE.match(line, end) is not None
+                tokens.append((start, end - start, TOKEN_KEY if is_key else TOKEN_STRING))
+                position = end
+                continue
+            position = match.end()
+            tokens.append((start, position - start, TOKEN_NUMBER if kind == "number" else TOKEN_CONSTANT))
+
+
+LEXERS = {lexer.name: lexer for lexer in (PythonLexer(), ShellLexer(), JsonLexer())}
+
+_EXTENSIONS = {
+    ".py": "python", ".pyw": "python", ".pyi": "python",
+    ".sh": "shell", ".bash": "shell", ".zsh": "shell", ".ksh": "shell",
+    ".json": "json", ".jsonl": "json", ".ipynb": "json",
+}
+_SHELL_NAMES = (".bashrc", ".bash_profile", ".profile", ".zshrc")
+
+
+def lexer_for_file(path: str, first_line: str = ""):
+    """Tokenizador para um arquivo, pela extensão ou pelo shebang; None se não houver."""
+    name = os.path.basename(path)
+    language = _EXTENSIONS.get(os.path.splitext(name)[1].lower())
+    if language is None and name in _SHELL_NAMES:
+        language = "shell"
+    if language is None and first_line.startswith("#!"):
+        if "python" in first_line:
+            language = "python"
+        elif re.search(r"\b(ba|z|k|da)?sh\b", first_line):
+            language = "shell"
+    return LEXERS.get(language)
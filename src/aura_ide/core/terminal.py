@@ -0,0 +1,1053 @@
+import errno
+import fcntl
+import os
+import pty
+import re
+import signal
+import struct
+import subprocess
+import termios
+import time
+import unicodedata
+import weakref
+
+from aura_ide.utils.app_dirs import get_cache_dir
+from aura_ide.utils.instrumentation import instruments
+from .scrollback import ScrollbackBuffer, DEFAULT_MAX_LINES
+from .shell_protocol import ShellProtocolParser
+
+READ_CHUNK_BYTES = 64 * 1024
+READ_BATCH_BYTES = 256 * 1024 # Máximo processado por chamada a read_available
+_bytes_read = instruments.counter("terminal.bytes", "bytes") # Saída de todos os shells (a taxa vê-se no painel Desempenho)
+TAB_WIDTH = 8
+
+# --- Atributos das células ---
+# Um atributo é um tuplo (cor_do_texto, cor_de_fundo, flags). Cores: DEFAULT_COLOR, um
+# índice da paleta de 256 cores, ou TRUECOLOR | 0xRRGGBB.
+DEFAULT_COLOR = -1
+TRUECOLOR = 1 << 24
+BOLD, DIM, ITALIC, UNDERLINE, BLINK, REVERSE, HIDDEN, STRIKE = (1 << i for i in range(8))
+DEFAULT_ATTR = (DEFAULT_COLOR, DEFAULT_COLOR, 0)
+
+_SGR_FLAGS_ON = {1: BOLD, 2: DIM, 3: ITALIC, 4: UNDERLINE, 5: BLINK, 7: REVERSE, 8: HIDDEN, 9: STRIKE}
+_SGR_FLAGS_OFF = {22: BOLD | DIM, 23: ITALIC, 24: UNDERLINE, 25: BLINK, 27: REVERSE, 28: HIDDEN, 29: STRIKE}
+
+SHELL_INTEGRATION_SCRIPT = r"""# Gerado pelo Aura IDE: marcadores de início/fim de comando para os terminais.
+if [ -z "$AURA_SKIP_BASHRC" ] && [ -f ~/.bashrc ]; then . ~/.bashrc; fi
+__aura_prompt_command() { printf '\033]777;aura-end;%d;%s\007' "$?" "$PWD"; }
+PROMPT_COMMAND="__aura_prompt_command${PROMPT_COMMAND:+; $PROMPT_COMMAND}"
+PS0=$'\033]777;aura-start\007'"${PS0}"
+if [ -n "$AURA_PS1" ]; then PS1="$AURA_PS1"; fi
+if [ -n "$AURA_NO_HISTORY" ]; then unset HISTFILE; fi
+"""
+
+
+def shell_integration_rcfile() -> str:
+    """
+    Caminho de um --rcfile para o bash que carrega o ~/.bashrc do usuário e acrescenta
+    os marcadores do protocolo (ver core/shell_protocol.py) via PROMPT_COMMAND e PS0.
+    Com AURA_SKIP_BASHRC no ambiente o ~/.bashrc não é lido (arranque rápido dos shells
+    auxiliares do terminal da IA).
+    """
+    path = os.path.join(get_cache_dir(), "bash_integration.sh")
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == SHELL_INTEGRATION_SCRIPT:
+                return path
+    except OSError:
+        pass
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(SHELL_INTEGRATION_SCRIPT)
+    return path
+
+
+def strip_ansi(text: str) -> str:
+    """Remove sequências de escape e '\\r' de texto de terminal (p.ex. para enviar à IA)."""
+    return _ANSI_RE.sub("", text).replace("\r\n", "\n").replace("\r", "")
+
+
+# --- PTY ---
+
+def _set_window_size(fd: int, rows: int, cols: int):
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, cols, 0, 0))
+
+
+def _make_controlling_tty():
+    # Corre no processo filho, já numa sessão nova: o stdin (o PTY) passa a terminal de controlo,
+    # o que dá ao shell controlo de jobs e Ctrl+C/Ctrl+Z
+    fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+
+
+class PtyProcess:
+    """Processo ligado a um pseudo-terminal. Só funciona em sistemas POSIX (Linux, macOS)."""
+
+    def __init__(self, argv: list, env: dict = None, cwd: str = None, rows: int = 24, cols: int = 80):
+        master_fd, slave_fd = pty.openpty()
+        try:
+            _set_window_size(slave_fd, rows, cols)
+            self.process = subprocess.Popen(
+                argv, stdin=slave_fd, stdout=slave_fd, stderr=slave_fd, env=env, cwd=cwd,
+                start_new_session=True, preexec_fn=_make_controlling_tty, close_fds=True
+            )
+        except Exception:
+            os.close(master_fd)
+            raise
+        finally:
+            os.close(slave_fd)
+        os.set_blocking(master_fd, False)
+        self.fd = master_fd
+        # Fechar o master faz o kernel enviar SIGHUP ao shell, mesmo que close() nunca seja chamado
+        self._finalizer = weakref.finalize(self, os.close, master_fd)
+
+    def read(self, max_bytes: int = READ_CHUNK_BYTES):
+        """Bytes disponíveis (b"" se ainda não há nada), ou None quando o terminal foi fechado."""
+        try:
+            data = os.read(self.fd, max_bytes)
+        except BlockingIOError:
+            return b""
+        except OSError as e:
+            if e.errno == errno.EIO: # Linux: o lado do processo fechou
+                return None
+            raise
+        return data if data else None
+
+    def write(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self.fd, view)
+            except BlockingIOError:
+                # Buffer do PTY cheio (colagem grande): esperar que o processo leia
+                os.set_blocking(self.fd, True)
+                try:
+                    written = os.write(self.fd, view)
+                finally:
+                    os.set_blocking(self.fd, False)
+            view = view[written:]
+
+    def resize(self, rows: int, cols: int):
+        _set_window_size(self.fd, rows, cols) # O kernel envia SIGWINCH ao processo em primeiro plano
+
+    def line_mode(self) -> bool:
+        """
+        True se o PTY está em modo canónico (o kernel ecoa e junta as linhas): o programa
+        ainda não está a ler teclas, p.ex. o bash entre o fim de um comando e o readline.
+        """
+        try:
+            return bool(termios.tcgetattr(self.fd)[3] & termios.ICANON)
+        except termios.error:
+            return False
+
+    def poll(self):
+        return self.process.poll()
+
+    def wait(self, timeout: float = None):
+        """Código de saída do processo, ou None se não terminar dentro de `timeout` segundos."""
+        try:
+            return self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGHUP)
+            except (ProcessLookupError, PermissionError):
+                pass
+        self._finalizer()
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+# --- Modelo do ecrã ---
+
+class TerminalScreen:
+    """
+    Grelha de células (linhas x colunas) com cursor, atributos, região de scroll, ecrã
+    alternativo e registo de danos (linhas alteradas desde o último repaint).
+
+    As linhas que saem pelo topo do ecrã principal vão para o ScrollbackBuffer (só texto).
+    Cada linha é uma lista de caracteres com uma lista paralela de atributos: escrever uma
+    sequência de texto é uma atribuição de fatia, feita em C.
+    """
+
+    def __init__(self, rows: int = 24, cols: int = 80, scrollback: ScrollbackBuffer = None):
+        self.rows = max(1, rows)
+        self.cols = max(1, cols)
+        self.scrollback = scrollback
+        self.title = ""
+        self.bell_count = 0
+        self.reset()
+
+    def reset(self):
+        self.lines = [self._blank_line() for _ in range(self.rows)]
+        self.attrs = [[DEFAULT_ATTR] * self.cols for _ in range(self.rows)]
+        self.cursor_row = 0
+        self.cursor_col = 0
+        self.pending_wrap = False # Cursor na última coluna: a quebra só acontece no próximo caractere
+        self.attr = DEFAULT_ATTR
+        self.scroll_top = 0
+        self.scroll_bottom = self.rows - 1
+        self.autowrap = True
+        self.insert_mode = False
+        self.cursor_visible = True
+        self.application_cursor_keys = False
+        self.bracketed_paste = False
+        self.alternate = False
+        self._saved_cursor = None
+        self._main_grid = None # (lines, attrs) do ecrã principal enquanto o alternativo está ativo
+        self._attr_cache = {DEFAULT_ATTR: DEFAULT_ATTR}
+        self._damaged = set()
+        self._scrolled = 0
+        self._full_damage = True
+
+    # --- Danos ---
+
+    def take_damage(self):
+        """(linhas alteradas, linhas deslocadas, redesenhar tudo) desde a última chamada."""
+        damage = (self._damaged, self._scrolled, self._full_damage)
+        self._damaged = set()
+        self._scrolled = 0
+        self._full_damage = False
+        return damage
+
+    # --- Texto ---
+
+    def draw(self, text: str):
+        if not text:
+            return
+        if not text.isascii():
+            self._draw_unicode(text)
+            return
+        cols = self.cols
+        while text:
+            if self.pending_wrap:
+                self.pending_wrap = False
+                if self.autowrap:
+                    self.cursor_col = 0
+                    self.index()
+                elif len(text) > 1:
+                    text = text[-1] # Sem autowrap, só o último caractere fica (na última coluna)
+            row = self.cursor_row
+            col = self.cursor_col
+            part = text[:cols - col]
+            text = text[cols - col:]
+            count = len(part)
+            line = self.lines[row]
+            attrs = self.attrs[row]
+            if self.insert_mode:
+                line[col:col] = part
+                del line[cols:]
+                attrs[col:col] = [self.attr] * count
+                del attrs[cols:]
+            else:
+                line[col:col + count] = part
+                attrs[col:col + count] = [self.attr] * count
+            self._damaged.add(row)
+            col += count
+            if col >= cols:
+                self.cursor_col = cols - 1
+                self.pending_wrap = True
+            else:
+                self.cursor_col = col
+
+    def draw_lines(self, pieces: list):
+        """Escreve pieces[0] no cursor e cada peça seguinte depois de um CR+LF."""
+        self.draw(pieces[0])
+        for piece in pieces[1:]:
+            self.carriage_return()
+            self.index()
+            self.draw(piece)
+
+    def can_scroll_out(self) -> bool:
+        """Se linhas que saem pelo topo vão para o histórico (ver `scroll_out_lines`)."""
+        return (not self.alternate and self.scrollback is not None
+                and self.scroll_top == 0 and self.scroll_bottom == self.rows - 1)
+
+    def scroll_out_lines(self, lines: list):
+        """
+        Equivale a escrever lines[0] a partir do início da linha do cursor e cada linha
+        seguinte depois de um CR+LF, sabendo que todas vão sair do ecrã logo a seguir.
+
+        As linhas acima do cursor e as novas vão de uma só vez para o histórico (só texto),
+        sem passar pela grelha: com saída intensa (p.ex. `yes`), o custo por bloco fica
+        proporcional ao tamanho do ecrã, não ao número de linhas. A última linha fica na
+        primeira linha do ecrã.
+        """
+        # As linhas que já não caberiam no histórico só contam para a numeração: não são tratadas
+        kept_from = max(0, len(lines) - 1 - self.scrollback.max_lines)
+        tail = lines[kept_from:]
+        cols = self.cols
+        if max(map(len, tail)) > cols: # Como na grelha, as linhas longas ocupam várias linhas
+            tail = [line[start:start + cols] for line in tail for start in range(0, max(1, len(line)), cols)]
+        new_lines = tail[:-1]
+        if " \n" in "\n".join(new_lines) + "\n": # Como na grelha, sem espaços no fim
+            new_lines = [line.rstrip() for line in new_lines]
+        new_lines = lines[:kept_from] + new_lines
+        self.scrollback.extend_lines(["".join(line).rstrip() for line in self.lines[:self.cursor_row]] + new_lines)
+        self._scrolled += self.cursor_row + len(new_lines)
+        self._full_damage = True
+        self.lines = [self._blank_line() for _ in range(self.rows)]
+        self.attrs = [self._blank_attrs() for _ in range(self.rows)]
+        self.cursor_row = 0
+        self.cursor_col = 0
+        self.pending_wrap = False
+        self.draw(tail[-1])
+
+    def _draw_unicode(self, text: str):
+        for char in text:
+            if unicodedata.combining(char) or char in "​‌‍️":
+                self._append_to_previous_cell(char)
+                continue
+            if char.isascii():
+                self.draw(char)
+                continue
+            width = 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+            if self.pending_wrap or (width == 2 and self.cursor_col == self.cols - 1):
+                if self.autowrap:
+                    self.pending_wrap = False
+                    self.cursor_col = 0
+                    self.index()
+                else:
+                    self.pending_wrap = False
+                    width = 1
+            row = self.cursor_row
+            col = self.cursor_col
+            self.lines[row][col] = char
+            self.attrs[row][col] = self.attr
+            if width == 2:
+                self.lines[row][col + 1] = "" # Metade direita de um caractere largo
+                self.attrs[row][col + 1] = self.attr
+            self._damaged.add(row)
+            if col + width >= self.cols:
+                self.cursor_col = self.cols - 1
+                self.pending_wrap = True
+            else:
+                self.cursor_col = col + width
+
+    def _append_to_previous_cell(self, char: str):
+        row = self.cursor_row
+        col = self.cursor_col if self.pending_wrap else self.cursor_col - 1
+        if col > 0 and self.lines[row][col] == "":
+            col -= 1
+        if col >= 0:
+            self.lines[row][col] += char
+            self._damaged.add(row)
+
+    # --- Controlos ---
+
+    def carriage_return(self):
+        self.cursor_col = 0
+        self.pending_wrap = False
+
+    def index(self):
+        """LF: desce uma linha, fazendo scroll no fundo da região."""
+        self.pending_wrap = False
+        if self.cursor_row == self.scroll_bottom:
+            self.scroll_up(1)
+        elif self.cursor_row < self.rows - 1:
+            self.cursor_row += 1
+
+    def reverse_index(self):
+        self.pending_wrap = False
+        if self.cursor_row == self.scroll_top:
+            self.scroll_down(1)
+        elif self.cursor_row > 0:
+            self.cursor_row -= 1
+
+    def backspace(self):
+        self.pending_wrap = False
+        self.cursor_col = max(0, self.cursor_col - 1)
+
+    def tab(self):
+        self.pending_wrap = False
+        self.cursor_col = min(self.cols - 1, (self.cursor_col // TAB_WIDTH + 1) * TAB_WIDTH)
+
+    def bell(self):
+        self.bell_count += 1
+
+    # --- Scroll ---
+
+    def scroll_up(self, count: int = 1):
+        top, bottom = self.scroll_top, self.scroll_bottom
+        count = min(count, bottom - top + 1)
+        if count <= 0:
+            return
+        if top == 0 and not self.alternate and self.scrollback is not None:
+            self.scrollback.extend_lines(["".join(line).rstrip() for line in self.lines[:count]])
+        del self.lines[top:top + count]
+        del self.attrs[top:top + count]
+        insert_at = bottom + 1 - count
+        self.lines[insert_at:insert_at] = [self._blank_line() for _ in range(count)]
+        self.attrs[insert_at:insert_at] = [self._blank_attrs() for _ in range(count)]
+        if top == 0 and bottom == self.rows - 1:
+            self._scrolled += count
+            self._full_damage = True
+        else:
+            self._damaged.update(range(top, bottom + 1))
+
+    def scroll_down(self, count: int = 1):
+        top, bottom = self.scroll_top, self.scroll_bottom
+        count = min(count, bottom - top + 1)
+        if count <= 0:
+            return
+        del self.lines[bottom + 1 - count:bottom + 1]
+        del self.attrs[bottom + 1 - count:bottom + 1]
+        self.lines[top:top] = [self._blank_line() for _ in range(count)]
+        self.attrs[top:top] = [self._blank_attrs() for _ in range(count)]
+        self._damaged.update(range(top, bottom + 1))
+
+    def set_scroll_region(self, top: int, bottom: int):
+        """Argumentos em base 1, como no CSI r."""
+        top = max(1, top) - 1
+        bottom = min(self.rows, bottom) - 1
+        if top < bottom:
+            self.scroll_top, self.scroll_bottom = top, bottom
+            self.set_position(1, 1)
+
+    # --- Cursor ---
+
+    def set_position(self, row: int, col: int):
+        """Argumentos em base 1, como no CSI H."""
+        self.pending_wrap = False
+        self.cursor_row = min(max(row, 1), self.rows) - 1
+        self.cursor_col = min(max(col, 1), self.cols) - 1
+
+    def set_column(self, col: int):
+        self.pending_wrap = False
+        self.cursor_col = min(max(col, 1), self.cols) - 1
+
+    def set_row(self, row: int):
+        self.pending_wrap = False
+        self.cursor_row = min(max(row, 1), self.rows) - 1
+
+    def cursor_up(self, count: int = 1):
+        self.pending_wrap = False
+        limit = self.scroll_top if self.cursor_row >= self.scroll_top else 0
+        self.cursor_row = max(limit, self.cursor_row - count)
+
+    def cursor_down(self, count: int = 1):
+        self.pending_wrap = False
+        limit = self.scroll_bottom if self.cursor_row <= self.scroll_bottom else self.rows - 1
+        self.cursor_row = min(limit, self.cursor_row + count)
+
+    def cursor_forward(self, count: int = 1):
+        self.pending_wrap = False
+        self.cursor_col = min(self.cols - 1, self.cursor_col + count)
+
+    def cursor_back(self, count: int = 1):
+        self.pending_wrap = False
+        self.cursor_col = max(0, self.cursor_col - count)
+
+    def save_cursor(self):
+        self._saved_cursor = (self.cursor_row, self.cursor_col, self.attr, self.pending_wrap)
+
+    def restore_cursor(self):
+        if self._saved_cursor is None:
+            self.set_position(1, 1)
+            return
+        row, col, self.attr, self.pending_wrap = self._saved_cursor
+        self.cursor_row = min(row, self.rows - 1)
+        self.cursor_col = min(col, self.cols - 1)
+
+    # --- Apagar / inserir ---
+
+    def erase_in_line(self, mode: int = 0):
+        start, end = {0: (self.cursor_col, self.cols), 1: (0, self.cursor_col + 1)}.get(mode, (0, self.cols))
+        self._erase(self.cursor_row, start, end)
+
+    def erase_in_display(self, mode: int = 0):
+        if mode == 0:
+            self.erase_in_line(0)
+            rows = range(self.cursor_row + 1, self.rows)
+        elif mode == 1:
+            self.erase_in_line(1)
+            rows = range(0, self.cursor_row)
+        elif mode == 3:
+            if self.scrollback is not None:
+                self.scrollback.clear()
+            self._full_damage = True
+            return
+        else:
+            rows = range(self.rows)
+        for row in rows:
+            self._erase(row, 0, self.cols)
+
+    def erase_chars(self, count: int = 1):
+        self._erase(self.cursor_row, self.cursor_col, min(self.cols, self.cursor_col + count))
+
+    def insert_chars(self, count: int = 1):
+        row, col = self.cursor_row, self.cursor_col
+        count = min(count, self.cols - col)
+        self.lines[row][col:col] = [" "] * count
+        del self.lines[row][self.cols:]
+        self.attrs[row][col:col] = [self._erase_attr()] * count
+        del self.attrs[row][self.cols:]
+        self._damaged.add(row)
+
+    def delete_chars(self, count: int = 1):
+        row, col = self.cursor_row, self.cursor_col
+        count = min(count, self.cols - col)
+        del self.lines[row][col:col + count]
+        self.lines[row].extend([" "] * count)
+        del self.attrs[row][col:col + count]
+        self.attrs[row].extend([self._erase_attr()] * count)
+        self._damaged.add(row)
+
+    def insert_lines(self, count: int = 1):
+        if not self.scroll_top <= self.cursor_row <= self.scroll_bottom:
+            return
+        saved_top, self.scroll_top = self.scroll_top, self.cursor_row
+        self.scroll_down(count)
+        self.scroll_top = saved_top
+        self.carriage_return()
+
+    def delete_lines(self, count: int = 1):
+        if not self.scroll_top <= self.cursor_row <= self.scroll_bottom:
+            return
+        saved_top, self.scroll_top = self.scroll_top, self.cursor_row
+        self.alternate, saved_alternate = True, self.alternate # Linhas apagadas não vão para o histórico
+        self.scroll_up(count)
+        self.alternate = saved_alternate
+        self.scroll_top = saved_top
+        self.carriage_return()
+
+    # --- Atributos e modos ---
+
+    def select_graphic_rendition(self, params: list):
+        fg, bg, flags = self.attr
+        if not params:
+            params = [0]
+        i = 0
+        while i < len(params):
+            code = params[i]
+            if code == 0:
+                fg, bg, flags = DEFAULT_ATTR
+            elif code in _SGR_FLAGS_ON:
+                flags |= _SGR_FLAGS_ON[code]
+            elif code in _SGR_FLAGS_OFF:
+                flags &= ~_SGR_FLAGS_OFF[code]
+            elif 30 <= code <= 37:
+                fg = code - 30
+            elif 40 <= code <= 47:
+                bg = code - 40
+            elif 90 <= code <= 97:
+                fg = code - 90 + 8
+            elif 100 <= code <= 107:
+                bg = code - 100 + 8
+            elif code == 39:
+                fg = DEFAULT_COLOR
+            elif code == 49:
+                bg = DEFAULT_COLOR
+            elif code in (38, 48):
+                color, consumed = _parse_extended_color(params, i + 1)
+                i += consumed
+                if color is not None:
+                    if code == 38:
+                        fg = color
+                    else:
+                        bg = color
+            i += 1
+        attr = (fg, bg, flags)
+        self.attr = self._attr_cache.setdefault(attr, attr) # Um só objeto por atributo: comparações rápidas
+
+    def set_mode(self, modes: list, private: bool, enabled: bool):
+        for mode in modes:
+            if not private:
+                if mode == 4:
+                    self.insert_mode = enabled
+            elif mode == 1:
+                self.application_cursor_keys = enabled
+            elif mode == 7:
+                self.autowrap = enabled
+            elif mode == 25:
+                self.cursor_visible = enabled
+                self._damaged.add(self.cursor_row)
+            elif mode in (47, 1047, 1049):
+                if enabled:
+                    self._enter_alternate(save_cursor=mode == 1049)
+                else:
+                    self._leave_alternate(restore_cursor=mode == 1049)
+            elif mode == 2004:
+                self.bracketed_paste = enabled
+
+    def resize(self, rows: int, cols: int):
+        rows, cols = max(1, rows), max(1, cols)
+        if rows == self.rows and cols == self.cols:
+            return
+        if self._main_grid is not None:
+            main_lines, main_attrs = self._main_grid
+            self._resize_grid(main_lines, main_attrs, rows, cols, keep_bottom_rows=0)
+        # O cursor deve continuar visível: se o ecrã encolhe, saem primeiro as linhas do topo
+        overflow_top = max(0, self.cursor_row - (rows - 1))
+        if overflow_top and not self.alternate and self.scrollback is not None:
+            self.scrollback.extend_lines(["".join(line).rstrip() for line in self.lines[:overflow_top]])
+        self._resize_grid(self.lines, self.attrs, rows, cols, keep_bottom_rows=overflow_top)
+        self.rows, self.cols = rows, cols
+        self.cursor_row = min(self.cursor_row - overflow_top, rows - 1)
+        self.cursor_col = min(self.cursor_col, cols - 1)
+        self.pending_wrap = False
+        self.scroll_top, self.scroll_bottom = 0, rows - 1
+        self._damaged = set()
+        self._full_damage = True
+
+    # --- Leitura (para a vista) ---
+
+    def line_text(self, row: int) -> str:
+        return "".join(self.lines[row])
+
+    def line_runs(self, row: int) -> list:
+        """[(coluna, texto, atributo)] com as células seguidas que partilham o mesmo atributo."""
+        line = self.lines[row]
+        attrs = self.attrs[row]
+        runs = []
+        start = 0
+        current = attrs[0]
+        for col in range(1, self.cols):
+            attr = attrs[col]
+            if attr is not current and attr != current:
+                runs.append((start, "".join(line[start:col]), current))
+                start = col
+                current = attr
+        runs.append((start, "".join(line[start:]), current))
+        return runs
+
+    # --- Interno ---
+
+    def _blank_line(self) -> list:
+        return [" "] * self.cols
+
+    def _blank_attrs(self) -> list:
+        return [self._erase_attr()] * self.cols
+
+    def _erase_attr(self):
+        # Apagar usa a cor de fundo atual (comportamento do xterm), sem os outros atributos
+        if self.attr[1] == DEFAULT_COLOR:
+            return DEFAULT_ATTR
+        attr = (DEFAULT_COLOR, self.attr[1], 0)
+        return self._attr_cache.setdefault(attr, attr)
+
+    def _erase(self, row: int, start: int, end: int):
+        if end <= start:
+            return
+        self.lines[row][start:end] = [" "] * (end - start)
+        self.attrs[row][start:end] = [self._erase_attr()] * (end - start)
+        self._damaged.add(row)
+
+    def _enter_alternate(self, save_cursor: bool):
+        if self.alternate:
+            return
+        if save_cursor:
+            self.save_cursor()
+        self._main_grid = (self.lines, self.attrs)
+        self.lines = [self._blank_line() for _ in range(self.rows)]
+        self.attrs = [[DEFAULT_ATTR] * self.cols for _ in range(self.rows)]
+        self.alternate = True
+        self._full_damage = True
+
+    def _leave_alternate(self, restore_cursor: bool):
+        if not self.alternate:
+            return
+        self.lines, self.attrs = self._main_grid
+        self._main_grid = None
+        self.alternate = False
+        if restore_cursor:
+            self.restore_cursor()
+        self._full_damage = True
+
+    @staticmethod
+    def _resize_grid(lines: list, attrs: list, rows: int, cols: int, keep_bottom_rows: int):
+        if keep_bottom_rows:
+            del lines[:keep_bottom_rows]
+            del attrs[:keep_bottom_rows]
+        del lines[rows:]
+        del attrs[rows:]
+        old_cols = len(lines[0]) if lines else cols
+        for line, line_attrs in zip(lines, attrs):
+            if cols > old_cols:
+                line.extend([" "] * (cols - old_cols))
+                line_attrs.extend([DEFAULT_ATTR] * (cols - old_cols))
+            else:
+                del line[cols:]
+                del line_attrs[cols:]
+        while len(lines) < rows:
+            lines.append([" "] * cols)
+            attrs.append([DEFAULT_ATTR] * cols)
+
+
+def _parse_extended_color(params: list, i: int):
+    """Cor de SGR 38/48: '5;n' (paleta) ou '2;r;g;b'. Devolve (cor, parâmetros consumidos)."""
+    if i < len(params) and params[i] == 5 and i + 1 < len(params):
+        return params[i + 1] & 0xFF, 2
+    if i < len(params) and params[i] == 2 and i + 3 < len(params):
+        r, g, b = (max(0, min(255, value)) for value in params[i + 1:i + 4])
+        return TRUECOLOR | (r << 16) | (g << 8) | b, 4
+    return None, len(params) - i
+
+
+# --- Parser VT100/ANSI ---
+
+_TEXT_RE = re.compile(r"[^\x00-\x09\x0b\x0c\x0e-\x1f\x7f]+") # Texto imprimível, incluindo '\r' e '\n'
+_CSI_RE = re.compile(r"\x1b\[([0-?]*)([ -/]*)([@-~])")
+_CSI_PARTIAL_RE = re.compile(r"\x1b\[[0-?]*[ -/]*\Z")
+_OSC_RE = re.compile(r"\x1b\]([^\x07\x1b]*)(?:\x07|\x1b\\)")
+_STRING_RE = re.compile(r"\x1b[P^_X][^\x07\x1b]*(?:\x07|\x1b\\)") # DCS, PM, APC, SOS: ignorados
+_ESC_RE = re.compile(r"\x1b([ -/]*)([0-~])")
+_LINE_CONTROLS_RE = re.compile(r"([\r\n])")
+_SGR_RE = re.compile(r"\x1b\[([0-9;:]*)m")
+_BULK_UNSAFE_RE = re.compile(r"[\x00-\x08\x0a-\x1f\x7f]") # Controlos (exceto TAB) ou escapes que não sejam cores
+_ANSI_RE = re.compile(r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[P^_X][^\x07\x1b]*(?:\x07|\x1b\\)|[ -/]*[0-~])")
+MAX_PENDING_SEQUENCE = 4096
+
+
+class VTParser:
+    """
+    Parser incremental de sequências VT100/xterm que aplica o texto a um TerminalScreen.
+
+    O texto chega em pedaços arbitrários; uma sequência de escape incompleta no fim de um
+    pedaço fica retida até ao seguinte. O texto simples é encontrado por expressões
+    regulares (em C) e escrito em blocos; só os controlos passam por código Python.
+
+    Args:
+        screen (TerminalScreen): Ecrã a atualizar.
+        respond (callable, optional): Recebe as respostas a pedidos do programa
+            (posição do cursor, atributos do terminal), a escrever de volta no PTY.
+    """
+
+    def __init__(self, screen: TerminalScreen, respond=None):
+        self.screen = screen
+        self.respond = respond
+        self._pending = ""
+
+    def feed(self, text: str):
+        screen = self.screen
+        if text.count("\r\n") > 3 * screen.rows and screen.can_scroll_out():
+            text = self._feed_bulk_lines(text)
+        self._feed_sequence(text)
+
+    # --- Interno ---
+
+    def _feed_bulk_lines(self, text: str) -> str:
+        """
+        Muitas linhas num só bloco: as que não chegam a ficar no ecrã seguem diretamente para
+        o histórico, desde que entre elas só haja texto e cores (SGR). Devolve o que falta processar.
+        """
+        head_end = text.find("\r\n") + 2
+        cut = len(text)
+        for _ in range(self.screen.rows + 1): # As últimas linhas do bloco passam pelo caminho normal
+            cut = text.rfind("\r\n", 0, cut)
+        middle = text[head_end:cut]
+        plain = _SGR_RE.sub("", middle) if "\x1b" in middle else middle
+        if _BULK_UNSAFE_RE.search(plain.replace("\r\n", "")):
+            return text
+        self._feed_sequence(text[:head_end])
+        screen = self.screen
+        if self._pending or screen.cursor_col != 0 or not screen.can_scroll_out():
+            return text[head_end:]
+        screen.scroll_out_lines(plain.split("\r\n"))
+        if plain is not middle:
+            # O atributo final só depende das cores desde o último reset (SGR 0)
+            reset = max(middle.rfind("\x1b[0m"), middle.rfind("\x1b[m"))
+            for match in _SGR_RE.finditer(middle, max(reset, 0)):
+                screen.select_graphic_rendition(_parse_params(match.group(1)))
+        return text[cut:]
+
+    def _feed_sequence(self, text: str):
+        if self._pending:
+            text = self._pending + text
+            self._pending = ""
+        screen = self.screen
+        position = 0
+        length = len(text)
+        while position < length:
+            match = _TEXT_RE.match(text, position)
+            if match:
+                self._feed_text(match.group())
+                position = match.end()
+                continue
+            char = text[position]
+            if char != "\x1b":
+                self._control(char, screen)
+                position += 1
+                continue
+            end = self._feed_escape(text, position)
+            if end is None: # Sequência incompleta: esperar pelo resto
+                if length - position > MAX_PENDING_SEQUENCE:
+                    position += 1 # Não é uma sequência válida: descartar o ESC
+                    continue
+                self._pending = text[position:]
+                return
+            position = end
+
+    def _feed_text(self, text: str):
+        screen = self.screen
+        if "\r" not in text and "\n" not in text:
+            screen.draw(text)
+            return
+        without_crlf = text.replace("\r\n", "") if "\r\n" in text else text
+        if "\r" not in without_crlf and "\n" not in without_crlf:
+            screen.draw_lines(text.split("\r\n")) # Caso comum num PTY (ONLCR): linhas terminadas em CRLF
+            return
+        for part in _LINE_CONTROLS_RE.split(text):
+            if part == "\r":
+                screen.carriage_return()
+            elif part == "\n":
+                screen.index()
+            elif part:
+                screen.draw(part)
+
+    def _control(self, char: str, screen: TerminalScreen):
+        if char == "\x08":
+            screen.backspace()
+        elif char == "\x09":
+            screen.tab()
+        elif char in "\x0b\x0c":
+            screen.index()
+        elif char == "\x07":
+            screen.bell()
+        # Restantes controlos (SO/SI, NUL, ...) não têm efeito visível
+
+    def _feed_escape(self, text: str, position: int):
+        if position + 1 >= len(text):
+            return None
+        kind = text[position + 1]
+        if kind == "[":
+            match = _CSI_RE.match(text, position)
+            if match is None:
+                return None if _CSI_PARTIAL_RE.match(text, position) else position + 2
+            self._csi(match.group(1), match.group(2), match.group(3))
+            return match.end()
+        if kind == "]":
+            match = _OSC_RE.match(text, position)
+            if match is None:
+                return None if "\x07" not in text[position:] and "\x1b" not in text[position + 1:] else position + 2
+            self._osc(match.group(1))
+            return match.end()
+        if kind in "P^_X":
+            match = _STRING_RE.match(text, position)
+            if match is None:
+                return None if "\x07" not in text[position:] and "\x1b" not in text[position + 1:] else position + 2
+            return match.end()
+        match = _ESC_RE.match(text, position)
+        if match is None:
+            return None if text[position + 1:].strip(" !\"#$%&'()*+,-./") == "" else position + 1
+        self._esc(match.group(1), match.group(2))
+        return match.end()
+
+    def _csi(self, param_text: str, intermediates: str, final: str):
+        screen = self.screen
+        private = param_text[:1] if param_text[:1] in "?<=>" else ""
+        params = _parse_params(param_text[1:] if private else param_text)
+        first = params[0] if params else 0
+        count = first or 1
+
+        if intermediates:
+            return # DECSCUSR (forma do cursor) e afins: sem efeito neste modelo
+        if final == "m":
+            if not private:
+                screen.select_graphic_rendition(params)
+        elif final == "H" or final == "f":
+            screen.set_position(count, (params[1] if len(params) > 1 else 0) or 1)
+        elif final == "A":
+            screen.cursor_up(count)
+        elif final == "B" or final == "e":
+            screen.cursor_down(count)
+        elif final == "C" or final == "a":
+            screen.cursor_forward(count)
+        elif final == "D":
+            screen.cursor_back(count)
+        elif final == "E":
+            screen.cursor_down(count)
+            screen.carriage_return()
+        elif final == "F":
+            screen.cursor_up(count)
+            screen.carriage_return()
+        elif final == "G" or final == "`":
+            screen.set_column(count)
+        elif final == "d":
+            screen.set_row(count)
+        elif final == "J":
+            screen.erase_in_display(first)
+        elif final == "K":
+            screen.erase_in_line(first)
+        elif final == "X":
+            screen.erase_chars(count)
+        elif final == "@":
+            screen.insert_chars(count)
+        elif final == "P":
+            screen.delete_chars(count)
+        elif final == "L":
+            screen.insert_lines(count)
+        elif final == "M":
+            screen.delete_lines(count)
+        elif final == "S":
+            screen.scroll_up(count)
+        elif final == "T":
+            screen.scroll_down(count)
+        elif final == "r":
+            screen.set_scroll_region(first or 1, (params[1] if len(params) > 1 else 0) or screen.rows)
+        elif final == "h" or final == "l":
+            screen.set_mode(params, private == "?", final == "h")
+        elif final == "s" and not private:
+            screen.save_cursor()
+        elif final == "u" and not private:
+            screen.restore_cursor()
+        elif final == "n" and not private:
+            if first == 6:
+                self._respond(f"\x1b[{screen.cursor_row + 1};{screen.cursor_col + 1}R")
+            elif first == 5:
+                self._respond("\x1b[0n")
+        elif final == "c":
+            if private == ">":
+                self._respond("\x1b[>0;10;0c")
+            elif not private:
+                self._respond("\x1b[?62;22c") # VT220 com cores ANSI
+
+    def _esc(self, intermediates: str, final: str):
+        if intermediates:
+            return # Designação de conjuntos de caracteres (ESC ( B...) e DECALN: ignorados
+        screen = self.screen
+        if final == "7":
+            screen.save_cursor()
+        elif final == "8":
+            screen.restore_cursor()
+        elif final == "D":
+            screen.index()
+        elif final == "E":
+            screen.carriage_return()
+            screen.index()
+        elif final == "M":
+            screen.reverse_index()
+        elif final == "c":
+            screen.reset()
+
+    def _osc(self, payload: str):
+        command, _, value = payload.partition(";")
+        if command in ("0", "2"):
+            self.screen.title = value
+
+    def _respond(self, text: str):
+        if self.respond is not None:
+            self.respond(text.encode())
+
+
+def _parse_params(text: str) -> list:
+    if not text:
+        return []
+    params = []
+    for part in text.split(";"):
+        if ":" in part: # Subparâmetros (38:2::r:g:b): o identificador do espaço de cor é descartado
+            values = [int(value) if value.isdigit() else 0 for value in part.split(":")]
+            if len(values) == 6 and values[1] == 2:
+                del values[2]
+            params.extend(values)
+        else:
+            params.append(int(part) if part.isdigit() else 0)
+    return params
+
+
+# --- Sessão ---
+
+class TerminalSession:
+    """
+    Junta as peças de um terminal: PTY, protocolo de marcadores de comando, parser VT e
+    ecrã com histórico. Não depende do Qt: a vista chama `read_available` quando o
+    descritor (`fileno`) tem dados e redesenha as linhas indicadas por `screen.take_damage`.
+
+    Args:
+        on_command_started / on_command_finished: ver ShellProtocolParser.
+        on_output_text (callable, optional): Recebe o texto de saída (com sequências de escape).
+    """
+
+    def __init__(self, rows: int = 24, cols: int = 80, max_scrollback_lines: int = DEFAULT_MAX_LINES,
+                 on_command_started=None, on_command_finished=None, on_output_text=None):
+        self.scrollback = ScrollbackBuffer(max_scrollback_lines)
+        self.screen = TerminalScreen(rows, cols, self.scrollback)
+        self.parser = VTParser(self.screen, respond=self.write)
+        self.on_output_text = on_output_text
+        self.protocol = ShellProtocolParser(self._handle_output_text, on_command_finished or (lambda record: None),
+                                            on_command_started)
+        self.pty = None
+
+    def start(self, argv: list = None, env_extra: dict = None, cwd: str = None):
+        """Inicia o shell (por omissão bash interativo com a integração de marcadores)."""
+        argv = argv or ["/bin/bash", "--rcfile", shell_integration_rcfile(), "-i"]
+        env = dict(os.environ)
+        env.update({"TERM": "xterm-256color", "COLORTERM": "truecolor"})
+        env.update(env_extra or {})
+        self.pty = PtyProcess(argv, env=env, cwd=cwd, rows=self.screen.rows, cols=self.screen.cols)
+
+    @property
+    def running(self) -> bool:
+        return self.pty is not None and self.pty.poll() is None
+
+    def fileno(self) -> int:
+        return self.pty.fd
+
+    def read_available(self, max_bytes: int = READ_BATCH_BYTES):
+        """
+        Lê e processa o que o PTY tiver, até `max_bytes`. Devolve o número de bytes lidos,
+        ou None quando o terminal foi fechado.
+
+        Um PTY entrega no máximo alguns KB por leitura; juntar as leituras antes de as
+        processar faz com que o custo fixo por bloco (proporcional ao ecrã) seja pago uma vez.
+        """
+        chunks = []
+        total = 0
+        closed = False
+        while total < max_bytes:
+            data = self.pty.read(READ_CHUNK_BYTES)
+            if data is None:
+                closed = True
+                break
+            if not data:
+                break
+            chunks.append(data)
+            total += len(data)
+        if chunks:
+            started = time.perf_counter()
+            self.protocol.feed(b"".join(chunks))
+            _bytes_read.add(total)
+            instruments.observe("terminal.process", (time.perf_counter() - started) * 1000) # Interpretar o lote (VT100)
+        if closed:
+            self.protocol.flush()
+            return total or None
+        return total
+
+    def feed(self, data: bytes):
+        """Processa bytes como se viessem do PTY (benchmarks, testes)."""
+        self.protocol.feed(data)
+
+    def feed_local(self, text: str):
+        """Mostra texto gerado pela aplicação (mensagens de erro, avisos), sem passar pelo shell."""
+        self.parser.feed(text.replace("\n", "\r\n"))
+
+    def write(self, data: bytes):
+        if self.pty is not None:
+            self.pty.write(data)
+
+    def awaiting_keys(self) -> bool:
+        """True se o programa no PTY lê as teclas uma a uma (p.ex. o readline no prompt)."""
+        return self.pty is not None and not self.pty.line_mode()
+
+    def resize(self, rows: int, cols: int):
+        self.screen.resize(rows, cols)
+        if self.pty is not None:
+            self.pty.resize(self.screen.rows, self.screen.cols)
+
+    def wait(self, timeout: float = None):
+        """Código de saída do shell (None se ainda não terminou ao fim de `timeout` segundos)."""
+        return self.pty.wait(timeout) if self.pty is not None else None
+
+    def close(self):
+        if self.pty is not None:
+            self.pty.close()
+            self.pty = None
+
+    def _handle_output_text(self, text: str):
+        self.parser.feed(text)
+        if self.on_output_text is not None:
+            self.on_output_text(text)
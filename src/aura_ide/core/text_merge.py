@@ -0,0 +1,101 @@
+import difflib
+
+
+def split_lines(text: str) -> list:
+    """Linhas com o '\\n' final (a última pode não o ter); "".join() devolve o texto original."""
+    lines = text.split("\n")
+    last = lines.pop()
+    lines = [line + "\n" for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+
+def _changes(old: list, new: list) -> list:
+    """Regiões alteradas como (início, fim, linhas_novas), com início/fim em `old`, por ordem."""
+    # Prefixo e sufixo comuns fora do SequenceMatcher: num arquivo grande mudado num só sítio é quase tudo
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    old_middle = old[prefix:len(old) - suffix]
+    new_middle = new[prefix:len(new) - suffix]
+    if not old_middle and not new_middle:
+        return []
+    matcher = difflib.SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+    return [
+        (prefix + i1, prefix + i2, new_middle[j1:j2])
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"
+    ]
+
+
+def line_edits(old: str, new: str) -> list:
+    """
+    Edições (deslocamento, caracteres_removidos, texto_inserido) que transformam `old` em
+    `new`, linha a linha, do fim para o início: cada uma pode ser aplicada depois das
+    anteriores sem corrigir deslocamentos (como as que o TextBuffer devolve ao desfazer).
+    """
+    old_lines = split_lines(old)
+    offsets = [0]
+    for line in old_lines:
+        offsets.append(offsets[-1] + len(line))
+    return [
+        (offsets[start], offsets[end] - offsets[start], "".join(lines))
+        for start, end, lines in reversed(_changes(old_lines, split_lines(new)))
+    ]
+
+
+def _side_version(base: list, start: int, end: int, changes: list) -> list:
+    """As linhas base[start:end] com as alterações de um dos lados aplicadas."""
+    lines = []
+    position = start
+    for change_start, change_end, new_lines in changes:
+        lines.extend(base[position:change_start])
+        lines.extend(new_lines)
+        position = change_end
+    lines.extend(base[position:end])
+    return lines
+
+
+def merge3(base: str, local: str, theirs: str):
+    """
+    Junta as alterações de `local` (o buffer) e de `theirs` (o disco), ambas feitas a partir
+    de `base`, linha a linha. Devolve (texto, conflitos). Alterações dos dois lados que se
+    tocam e não são iguais são um conflito: fica a versão local desse bloco.
+    """
+    base_lines = split_lines(base)
+    regions = sorted(
+        [(start, end, lines, 0) for start, end, lines in _changes(base_lines, split_lines(local))]
+        + [(start, end, lines, 1) for start, end, lines in _changes(base_lines, split_lines(theirs))],
+        key=lambda region: (region[0], region[1]),
+    )
+    merged = []
+    conflicts = 0
+    position = 0
+    i = 0
+    while i < len(regions):
+        # Um grupo: regiões que se sobrepõem ou se tocam (de qualquer dos lados)
+        group_start, group_end = regions[i][0], regions[i][1]
+        sides = ([], [])
+        while i < len(regions) and regions[i][0] <= group_end:
+            start, end, lines, side = regions[i]
+            sides[side].append((start, end, lines))
+            group_end = max(group_end, end)
+            i += 1
+        merged.extend(base_lines[position:group_start])
+        local_lines = _side_version(base_lines, group_start, group_end, sides[0])
+        if not sides[1]:
+            merged.extend(local_lines)
+        else:
+            their_lines = _side_version(base_lines, group_start, group_end, sides[1])
+            if sides[0] and local_lines != their_lines:
+                conflicts += 1
+                merged.extend(local_lines)
+            else:
+                merged.extend(their_lines)
+        position = group_end
+    merged.extend(base_lines[position:])
+    return "".join(merged), conflicts
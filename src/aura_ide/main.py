@@ -1,12 +1,18 @@
 import sys
-from PySide6.QtWidgets import QApplication
-from aura_ide.ui.main_window import MainWindow # Importa nossa classe MainWindow
+from aura_ide.utils.startup import startup_timeline # Primeiro: a linha do tempo do arranque começa aqui
+
+with startup_timeline.span("importar o Qt"):
+    from PySide6.QtWidgets import QApplication
+with startup_timeline.span("importar a MainWindow"):
+    from aura_ide.ui.main_window import MainWindow # Importa nossa classe MainWindow
 
 def run_app():
-    app = QApplication(sys.argv)
-    main_win = MainWindow()
+    with startup_timeline.span("QApplication"):
+        app = QApplication(sys.argv)
+    with startup_timeline.span("criar a MainWindow"):
+        main_win = MainWindow()
     main_win.show()
     sys.exit(app.exec())
 
 if __name__ == '__main__':
-    run_app()
\ No newline at end of file
+    run_app()
@@ -1,11 +1,63 @@
+import os
 import sys
+import threading
+import time
 import configparser
-from aura_ide.ai.gemini_provider import GeminiProvider
-from aura_ide.ui.widgets.ai_terminal_widget import AITerminalWidget
+from aura_ide.ai.agent_loop import (
+    AgentLoop,
+    COMMAND_PREFIX,
+    SEARCH_PREFIX,
+    STOP_MAX_SECONDS,
+    compress_output,
+    format_search_results,
+    tool_result_message,
+    DEFAULT_MAX_SECONDS as DEFAULT_AGENT_MAX_SECONDS,
+    DEFAULT_MAX_STEPS as DEFAULT_AGENT_MAX_STEPS,
+    DEFAULT_OUTPUT_CHARS as DEFAULT_AGENT_OUTPUT_CHARS
+)
+from aura_ide.ai.context_window import (
+    ConversationHistory,
+    DEFAULT_CONTEXT_BUDGET_TOKENS,
+    DEFAULT_SUMMARY_BUDGET_TOKENS
+)
+from aura_ide.ai.provider_registry import provider_registry, provider_specs_from_config
+from aura_ide.ai.provider_router import ProviderRouter, qualified_model
+from aura_ide.ai.request_manager import AIRequestManager
+from aura_ide.ai.response_cache import CachedAIProvider, ResponseCache, DEFAULT_MAX_DISK_BYTES, DEFAULT_TTL_SECONDS
+from aura_ide.ai.retrieval import DEFAULT_RETRIEVAL_BUDGET_TOKENS, DEFAULT_TOP_K, ProviderEmbedder
+from aura_ide.ai.retrieval_indexer import RetrievalIndexer
+from aura_ide.ai.tool_runner import ToolRunner
+from aura_ide.ai.tools import (
+    TOOL_CALL_PREFIX,
+    TOOL_SPECS,
+    describe_call,
+    flatten_tool_messages,
+    parse_tool_calls,
+    tool_signatures
+)
+from aura_ide.core.code_indexer import CodeIndexer, DEFAULT_SEARCH_WORKERS
+from aura_ide.core.command_queue import DEFAULT_COMMAND_TIMEOUT, JOB_DONE
+from aura_ide.core.event_loop_probe import EventLoopLagProbe
+from aura_ide.core.file_loader import FileLoader
+from aura_ide.core.file_watcher import FileWatcher
+from aura_ide.core.file_manager import DEFAULT_LARGE_FILE_BYTES, DEFAULT_WALK_THREADS, HEX_PREVIEW_BYTES, KIND_BINARY, KIND_LARGE_TEXT
+from aura_ide.core.project_indexer import ProjectIndexer
+from aura_ide.core.scrollback import DEFAULT_MAX_LINES as DEFAULT_SCROLLBACK_LINES
+from aura_ide.core.stall_watchdog import DEFAULT_SAMPLE_INTERVAL_MS, DEFAULT_STALL_THRESHOLD_MS, StallWatchdog
+from aura_ide.core.syntax import lexer_for_file
+from aura_ide.ui.widgets.ai_terminal_widget import AITerminalWidget, DEFAULT_SHELL_POOL_SIZE
+from aura_ide.ui.widgets.code_editor import CodeEditor, PARAGRAPH_SEPARATOR
+from aura_ide.ui.widgets.go_to_file_dialog import GoToFileDialog
+from aura_ide.ui.widgets.performance_panel import PerformancePanel
+from aura_ide.ui.widgets.provider_status_dialog import ProviderStatusDialog
+from aura_ide.ui.widgets.search_panel import SearchPanel
+from aura_ide.ui.widgets.syntax_highlighter import SyntaxHighlighter
+from aura_ide.utils.instrumentation import TRACE_FORMAT_CHROME, TRACE_FORMATS, instruments
+from aura_ide.utils.startup import startup_timeline
 
-from PySide6.QtCore import Qt, QDir, QTimer 
+from PySide6.QtCore import Qt, QDir, QTimer, Signal
+from PySide6.QtGui import QTextCursor
 from PySide6.QtWidgets import (
-    QApplication,
     QMainWindow,
     QLabel,
     QVBoxLayout,
@@ -17,13 +69,38 @@ from PySide6.QtWidgets import (
     QHeaderView,
     QPlainTextEdit,
     QComboBox,
-    QLineEdit,
+    QStackedWidget,
+    QTabWidget,
     QPushButton
 )
 from aura_ide.ui.widgets.simple_terminal import SimpleTerminal
 from aura_ide.ui.widgets.chat_input_text_edit import ChatInputTextEdit
+from aura_ide.ui.widgets.large_file_view import LargeFileView
+
+STARTUP_PAINT_TIMEOUT_MS = 1000 # O resto do arranque começa ao fim disto mesmo que a janela ainda não tenha sido pintada
+RETRIEVAL_TIMEOUT_MS = 1500 # A pergunta segue sem contexto do projeto se a recuperação demorar mais do que isto
+AURA_SYSTEM_PROMPT = (
+    "Você é Aura, uma assistente de IA num IDE, com ferramentas para trabalhar no projeto aberto: "
+    "run_command (executa um comando bash no terminal Linux da IA), read_file (lê um arquivo, ou só as linhas "
+    "start_line a end_line), write_file (grava o conteúdo completo de um arquivo), search (procura no código do "
+    "projeto; use-a em vez de grep) e list_dir (lista um diretório). Os caminhos são relativos à raiz do projeto. "
+    "Use as chamadas de funções do provedor; se não as tiver, escreva uma linha por chamada com o prefixo "
+    f"'{TOOL_CALL_PREFIX}' seguido de um objeto JSON, por exemplo "
+    f"'{TOOL_CALL_PREFIX} {{\"name\": \"read_file\", \"arguments\": {{\"path\": \"src/main.py\", \"start_line\": 1, \"end_line\": 80}}}}' "
+    f"(ferramentas e argumentos, com ? nos opcionais: {tool_signatures()}). "
+    "Pode explicar o que vai fazer no mesmo texto. Peça de uma vez todas as chamadas independentes de que precisar: "
+    "correm em paralelo e os resultados de todas voltam juntos; depois pode pedir mais ou dar a resposta final. "
+    "Para outras respostas, responda normalmente."
+)
 
 class MainWindow(QMainWindow):
+    # Emitido (possivelmente de outra thread) quando o provedor atualiza a sua lista de modelos
+    ai_models_refreshed = Signal(list)
+    # Emitido da thread que cria os provedores de IA: ([ProviderSpec], config)
+    ai_providers_ready = Signal(list, object)
+    # Emitido quando o arranque termina: shells iniciados e provedores de IA prontos (ou nenhum)
+    startup_finished = Signal()
+
     def __init__(self):
         super().__init__()
 
@@ -34,11 +111,119 @@ class MainWindow(QMainWindow):
         self._create_menu_bar()
         self._create_main_layout()
 
+        # Arquivos abertos fora da thread da UI (ver core/file_loader.py)
+        self.file_loader = FileLoader(self)
+        self.file_loader.probed.connect(self._handle_file_probed)
+        self.file_loader.text_chunk.connect(self._handle_file_text_chunk)
+        self.file_loader.progress.connect(self._handle_file_load_progress)
+        self.file_loader.large_file_ready.connect(self._handle_large_file_ready)
+        self.file_loader.binary_ready.connect(self._handle_binary_file_ready)
+        self.file_loader.finished.connect(self._handle_file_loaded)
+        self.file_loader.failed.connect(self._handle_file_load_failed)
+        self.file_loader.reloaded.connect(self._handle_file_reloaded)
+        self._loading_file_path = None
+        self._loading_file_probe = None
+        self._file_open_started = None # Instante (instruments.now_ns) do pedido para abrir o arquivo em carregamento
+        self._file_first_text_seen = False
+        self._open_file_disk_text = None # Texto do arquivo aberto tal como está no disco (None: não é texto editável)
+        self._reload_buffer_version = None
+
+        # Índice dos arquivos do projeto para "Ir para Arquivo" (gravado em disco entre sessões)
+        self.project_indexer = ProjectIndexer(self)
+        self.project_indexer.index_ready.connect(self._handle_project_index_ready)
+        self.project_indexer.finished.connect(self._handle_project_index_finished)
+        self.project_indexer.failed.connect(self._handle_project_index_failed)
+        self.go_to_file_dialog = GoToFileDialog(self)
+        self.go_to_file_dialog.file_chosen.connect(self._open_file)
+        # Alterações feitas fora do editor (terminal da IA, git...): índice e arquivo aberto atualizados em lotes
+        self.file_watcher = FileWatcher(self)
+        self.file_watcher.changes_ready.connect(self._handle_file_changes)
+        self.project_indexer.directories_walked.connect(self.file_watcher.watch_project)
+        # Pesquisa no conteúdo dos arquivos (painel "Pesquisa" e ferramenta da IA), com índice de trigramas em disco
+        self.code_indexer = CodeIndexer(self)
+        self.code_indexer.results_ready.connect(self._handle_code_search_results)
+        self.code_indexer.search_finished.connect(self._handle_code_search_finished)
+        self.code_indexer.search_failed.connect(self._handle_code_search_failed)
+        self.code_indexer.finished.connect(self._handle_code_index_finished)
+        self.code_indexer.failed.connect(self._handle_code_index_failed)
+        self.code_indexer.index_ready.connect(self._handle_code_index_ready)
+        self._panel_search_id = None
+        self._agent_searches = {} # id da pesquisa -> {"label", "matches", "started", "call"}
+        self._pending_goto = None # (linha, coluna) a mostrar quando o arquivo acabar de abrir
+        # Contexto do projeto para a IA: embeddings dos trechos de código, postos em dia a partir do índice de código
+        self.retrieval_indexer = RetrievalIndexer(self)
+        self.retrieval_indexer.finished.connect(self._handle_retrieval_index_finished)
+        self.retrieval_indexer.failed.connect(self._handle_retrieval_index_failed)
+        self.retrieval_indexer.retrieved.connect(self._handle_context_retrieved)
+        self.retrieval_indexer.retrieve_failed.connect(self._handle_context_retrieve_failed)
+        self.retrieval_enabled = False # Só com um provedor de IA (ver [RETRIEVAL] no config.ini)
+        self.retrieval_top_k = DEFAULT_TOP_K
+        self.retrieval_budget_tokens = DEFAULT_RETRIEVAL_BUDGET_TOKENS
+        self._pending_retrieval = None # (id, mensagem do usuário) à espera do contexto
+        self._retrieval_timer = QTimer(self)
+        self._retrieval_timer.setSingleShot(True)
+        self._retrieval_timer.setInterval(RETRIEVAL_TIMEOUT_MS)
+        self._retrieval_timer.timeout.connect(self._handle_context_retrieve_timeout)
+
         # 2. Inicializar o provedor de IA e carregar configurações
         self.ai_provider = None 
-        self._load_config_and_init_ai()
-        
-        # Outras inicializações que dependam da UI ou da IA podem vir aqui
+        self.ai_router = None # O ProviderRouter por trás de ai_provider (que pode ser a cache de respostas)
+        self.provider_specs = [] # ProviderSpec do config.ini, com o provedor criado ou o erro
+        self.provider_status_dialog = None # Criado na primeira vez que é aberto
+        # As chamadas à IA correm fora da thread da UI; os resultados chegam por sinais
+        self.ai_requests = AIRequestManager(parent=self)
+        self.ai_requests.request_finished.connect(self._handle_ai_response)
+        self.ai_requests.request_failed.connect(self._handle_ai_request_failed)
+        self.ai_requests.request_cancelled.connect(self._handle_ai_request_cancelled)
+        self.ai_requests.pending_count_changed.connect(self._update_ai_pending_ui)
+        self.ai_requests.chunk_received.connect(self._handle_ai_chunk)
+        self.ai_requests.tool_calls_received.connect(self._handle_ai_tool_calls)
+        self._pending_chat_messages = {} # request_id -> [mensagens do usuário no histórico]
+        self._ai_tool_calls = {} # request_id -> [ToolCall] nativas, até chegar o fim da resposta
+        # Histórico limitado por orçamento de tokens (ajustável em [CONTEXT] no config.ini)
+        self.chat_history_for_ia = ConversationHistory()
+        self.chat_history_for_ia.set_system_prompt(AURA_SYSTEM_PROMPT)
+        self.ai_models_refreshed.connect(self._handle_ai_models_refreshed)
+        # Ciclo modelo -> terminal da IA -> modelo (limites ajustáveis em [AGENT] no config.ini)
+        self.agent_loop = AgentLoop()
+        self._agent_request_id = None # Pedido ao modelo que pertence ao ciclo em curso
+        self._agent_terminal_calls = {} # id da tarefa no terminal da IA -> id da chamada de run_command
+        # O limite de tempo do ciclo vale mesmo a meio de um passo (ferramenta, comando ou resposta parados)
+        self._agent_deadline_timer = QTimer(self)
+        self._agent_deadline_timer.setSingleShot(True)
+        self._agent_deadline_timer.timeout.connect(self._handle_agent_deadline)
+        # read_file, write_file e list_dir pedidos pelo modelo correm num pool (ver ai/tool_runner.py)
+        self.tool_runner = ToolRunner(self)
+        self.tool_runner.root = QDir.currentPath()
+        self.tool_runner.finished.connect(self._handle_agent_tool_finished)
+
+        # Streaming: os pedaços recebidos são acumulados e desenhados no máximo uma vez por frame
+        self._ai_streams = {} # request_id -> {"pending": [pedaços], "mode": None/"text"/"command"}
+        self._ai_stream_tail = None # (request_id, tamanho do documento) após a última inserção
+        self._ai_stream_flush_timer = QTimer(self)
+        self._ai_stream_flush_timer.setSingleShot(True)
+        self._ai_stream_flush_timer.setInterval(16) # ~60 FPS
+        self._ai_stream_flush_timer.timeout.connect(self._flush_ai_stream_chunks)
+        self.ai_providers_ready.connect(self._handle_ai_providers_ready)
+        self._ai_config = None # config.ini lido, até a thread dos provedores de IA o usar
+        self._ai_init_pending = False
+        # Instrumentação (ver utils/instrumentation.py e [PERFORMANCE] no config.ini)
+        self.event_loop_probe = EventLoopLagProbe(self)
+        # Bloqueios da UI acima do limite ficam com as pilhas amostradas (ver core/stall_watchdog.py)
+        self.event_loop_probe.set_watchdog(StallWatchdog(self.event_loop_probe.interval_ms))
+        self.performance_panel = None # Criado na primeira vez que é aberto
+        self._trace_file = None
+        self._trace_format = TRACE_FORMAT_CHROME
+        with startup_timeline.span("configuração"):
+            self._load_config_and_init_ai()
+
+        # A janela aparece primeiro: shells, provedores de IA (os SDKs deles demoram a importar) e
+        # índices do projeto começam depois da primeira pintura (ver _start_deferred_startup)
+        self._first_paint_done = False
+        self._deferred_startup_waiting = False
+        self._deferred_startup_started = False
+        self._startup_done = False
+        QTimer.singleShot(0, self._begin_deferred_startup)
 
     def _create_menu_bar(self):
         menu_bar = self.menuBar()
@@ -50,6 +235,12 @@ class MainWindow(QMainWindow):
         open_action = file_menu.addAction("Abrir")
         save_action = file_menu.addAction("Salvar")
         file_menu.addSeparator()
+        go_to_file_action = file_menu.addAction("Ir para Arquivo...")
+        go_to_file_action.setShortcut("Ctrl+P")
+        go_to_file_action.triggered.connect(self._show_go_to_file)
+        reindex_action = file_menu.addAction("Reindexar Projeto")
+        reindex_action.triggered.connect(self._reindex_project)
+        file_menu.addSeparator()
         exit_action = file_menu.addAction("Sair")
         exit_action.triggered.connect(self.close)
 
@@ -58,6 +249,10 @@ class MainWindow(QMainWindow):
         # ... (ações existentes do menu Editar) ...
         edit_menu.addAction("Copiar")
         edit_menu.addAction("Colar")
+        edit_menu.addSeparator()
+        search_project_action = edit_menu.addAction("Pesquisar no Projeto...")
+        search_project_action.setShortcut("Ctrl+Shift+F")
+        search_project_action.triggered.connect(self._show_search_panel)
 
         # NOVO: Menu Controle da IA
         ia_control_menu = menu_bar.addMenu("&IA Controle")
@@ -79,11 +274,34 @@ class MainWindow(QMainWindow):
         self.pause_ia_all_action = ia_control_menu.addAction("Pausar Tudo (IA)")
         self.pause_ia_all_action.setCheckable(True)
         # TODO: self.pause_ia_all_action.toggled.connect(self._toggle_ia_all_pause)
+
+        ia_control_menu.addSeparator()
+
+        self.cancel_ia_requests_action = ia_control_menu.addAction("Cancelar Requisições da IA")
+        self.cancel_ia_requests_action.setEnabled(False)
+        self.cancel_ia_requests_action.triggered.connect(self._cancel_ai_requests)
+
+        # Cache de respostas: desligar para prompts em que se quer uma resposta nova a cada vez
+        self.use_response_cache_action = ia_control_menu.addAction("Usar Cache de Respostas")
+        self.use_response_cache_action.setCheckable(True)
+        self.use_response_cache_action.setChecked(True)
+        show_cache_stats_action = ia_control_menu.addAction("Estatísticas da Cache de Respostas")
+        show_cache_stats_action.triggered.connect(self._show_response_cache_stats)
+        show_provider_health_action = ia_control_menu.addAction("Estado dos Provedores de IA")
+        show_provider_health_action.triggered.connect(self._show_provider_health)
+        show_agent_trace_action = ia_control_menu.addAction("Tempos do Último Ciclo de Comandos")
+        show_agent_trace_action.triggered.connect(self._show_agent_trace)
         
         # Menu Ajuda (existente)
         help_menu = menu_bar.addMenu("&Ajuda")
         # ... (ações existentes do menu Ajuda) ...
         help_menu.addAction("Sobre")
+        show_startup_timeline_action = help_menu.addAction("Tempos do Arranque")
+        show_startup_timeline_action.triggered.connect(self._show_startup_timeline)
+        show_performance_action = help_menu.addAction("Desempenho...")
+        show_performance_action.triggered.connect(self._show_performance_panel)
+        show_stall_report_action = help_menu.addAction("Bloqueios da Interface")
+        show_stall_report_action.triggered.connect(self._show_stall_report)
 
     def _create_main_layout(self):
         # --- Splitter Principal (Horizontal) ---
@@ -112,8 +330,16 @@ class MainWindow(QMainWindow):
         self.file_tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
         self.file_tree.activated.connect(self._open_file_from_tree)
         
+        # Painel de pesquisa no conteúdo dos arquivos, num separador ao lado do navegador
+        self.search_panel = SearchPanel()
+        self.search_panel.search_requested.connect(self._search_project)
+        self.search_panel.match_activated.connect(self._open_search_match)
+        self.left_tabs = QTabWidget()
+        self.left_tabs.addTab(self.file_tree, "Arquivos")
+        self.left_tabs.addTab(self.search_panel, "Pesquisa")
+
         # Adicionar o navegador de arquivos ao splitter vertical esquerdo
-        left_combined_panel_splitter.addWidget(self.file_tree)
+        left_combined_panel_splitter.addWidget(self.left_tabs)
 
 
         # --- Sub-Painel Esquerdo Inferior (Chat com IA) ---
@@ -122,11 +348,10 @@ class MainWindow(QMainWindow):
         chat_layout.setContentsMargins(0, 5, 0, 0) # Margens pequenas
         chat_layout.setSpacing(5)
 
-        # ComboBox para seleção de modelo de IA
+        # ComboBox para seleção de modelo de IA (preenchido quando os provedores estão prontos)
         self.ai_model_selector = QComboBox()
-        self.ai_model_selector.addItem("DeepSeek Coder (Padrão)")
-        self.ai_model_selector.addItem("Gemini Pro (Futuro)")
-        # TODO: Adicionar lógica para quando o modelo for alterado
+        self.ai_model_selector.addItem("A iniciar a IA...")
+        self.ai_model_selector.setEnabled(False)
         chat_layout.addWidget(self.ai_model_selector)
 
         # Área de exibição do Chat
@@ -146,6 +371,16 @@ class MainWindow(QMainWindow):
         self.chat_input_widget.message_submitted.connect(self._send_chat_message_from_input_widget)
 
         chat_layout.addWidget(self.chat_input_widget)
+
+        # Estado das requisições em curso e botão para cancelá-las
+        chat_status_layout = QHBoxLayout()
+        self.ai_pending_label = QLabel("")
+        chat_status_layout.addWidget(self.ai_pending_label, stretch=1)
+        self.ai_cancel_button = QPushButton("Cancelar")
+        self.ai_cancel_button.setEnabled(False)
+        self.ai_cancel_button.clicked.connect(self._cancel_ai_requests)
+        chat_status_layout.addWidget(self.ai_cancel_button)
+        chat_layout.addLayout(chat_status_layout)
         # Adicionar o painel de chat ao splitter vertical esquerdo
         left_combined_panel_splitter.addWidget(chat_panel_widget)
 
@@ -162,20 +397,27 @@ class MainWindow(QMainWindow):
         right_splitter.setHandleWidth(10)
         right_splitter.setStyleSheet("QSplitter::handle { background-color: lightgray; }")
 
-        self.editor_area = QPlainTextEdit()
+        self.editor_area = CodeEditor()
+        self.syntax_highlighter = SyntaxHighlighter(self.editor_area)
         self.editor_area.setPlaceholderText("Dê um duplo clique em um arquivo para abrí-lo...")
-        right_splitter.addWidget(self.editor_area)
+        # Arquivos acima do limite de [EDITOR] LARGE_FILE_MB abrem num visualizador só de leitura
+        self.large_file_view = LargeFileView()
+        self.editor_stack = QStackedWidget()
+        self.editor_stack.addWidget(self.editor_area)
+        self.editor_stack.addWidget(self.large_file_view)
+        right_splitter.addWidget(self.editor_stack)
 
-        self.user_terminal = SimpleTerminal()
+        self.user_terminal = SimpleTerminal(autostart=False) # Os shells iniciam depois da primeira pintura
         right_splitter.addWidget(self.user_terminal)
 
         # --- Terminal 2 (IA) ---
-        self.ai_terminal = AITerminalWidget()
+        self.ai_terminal = AITerminalWidget(autostart=False)
         right_splitter.addWidget(self.ai_terminal)
 
         if hasattr(self, 'ai_terminal') and self.ai_terminal: # Checar se existe
             self.ai_terminal.command_output_ready.connect(self._handle_ai_terminal_output)
             self.ai_terminal.ready_for_next_ai_command.connect(self._ai_terminal_ready_for_command)
+            self.ai_terminal.queue_changed.connect(self._ai_terminal_queue_changed)
 
         main_splitter.addWidget(right_splitter)
 
@@ -195,178 +437,918 @@ class MainWindow(QMainWindow):
             else:
                 self.file_tree.expand(index)
             return
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                file_content = f.read()
-            self.editor_area.setPlainText(file_content)
-            self.setWindowTitle(f"Aura IDE - {file_path}")
-        except UnicodeDecodeError:
-            try:
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    file_content = f.read()
-                self.editor_area.setPlainText(file_content)
-                self.setWindowTitle(f"Aura IDE - {file_path} (latin-1)")
-            except Exception as e:
-                self.editor_area.setPlainText(f"Não foi possível abrir o arquivo (encoding):\n{file_path}\n\nErro: {e}")
-                self.setWindowTitle(f"Aura IDE - Erro ao abrir arquivo")
-        except Exception as e:
-            self.editor_area.setPlainText(f"Não foi possível abrir o arquivo:\n{file_path}\n\nErro: {e}")
-            self.setWindowTitle(f"Aura IDE - Erro ao abrir arquivo")
+        self._open_file(file_path)
+
+    def _open_file(self, file_path: str):
+        # A leitura corre numa thread; o documento é preenchido aos pedaços (ver _handle_file_*)
+        if self._loading_file_path is not None and self._loading_file_path != file_path:
+            self.file_watcher.unwatch_file(self._loading_file_path)
+        self.file_watcher.watch_file(file_path)
+        self._loading_file_path = file_path
+        self._loading_file_probe = None
+        self._file_open_started = instruments.now_ns()
+        self._file_first_text_seen = False
+        self._open_file_disk_text = None
+        self._pending_goto = None
+        self.large_file_view.clear()
+        self.editor_stack.setCurrentWidget(self.editor_area)
+        self.syntax_highlighter.set_lexer(None)
+        self.editor_area.clear()
+        self.editor_area.setReadOnly(True) # Até o arquivo estar todo no documento
+        self.setWindowTitle(f"Aura IDE - {file_path} (a carregar...)")
+        self.file_loader.load(file_path)
+
+    def _show_go_to_file(self):
+        self.go_to_file_dialog.set_index(self.project_indexer.index, self.project_indexer.indexing)
+        self.go_to_file_dialog.open_palette()
+
+    def _show_search_panel(self):
+        self.left_tabs.setCurrentWidget(self.search_panel)
+        self.search_panel.focus_query(self.editor_area.textCursor().selectedText().split(PARAGRAPH_SEPARATOR)[0])
+
+    def _search_project(self, query: str, regex: bool, case_sensitive: bool, paths: str):
+        if self._panel_search_id is not None:
+            self.code_indexer.cancel_search(self._panel_search_id)
+            self._panel_search_id = None
+        if not query:
+            return
+        self.search_panel.begin_search()
+        self._panel_search_id = self.code_indexer.search(query, regex=regex, case_sensitive=case_sensitive, paths=paths)
+
+    def _open_search_match(self, path: str, line: int, column: int):
+        file_path = os.path.join(self.code_indexer.root or QDir.currentPath(), path)
+        if file_path == self._loading_file_path and self._open_file_disk_text is not None:
+            self.editor_area.go_to_line(line, column) # Já aberto (e editável): só mover o cursor
+            return
+        self._open_file(file_path)
+        self._pending_goto = (line, column)
+
+    def _handle_code_search_results(self, search_id: int, matches: list):
+        if search_id == self._panel_search_id:
+            self.search_panel.add_matches(matches)
+        elif search_id in self._agent_searches:
+            self._agent_searches[search_id]["matches"].extend(matches)
+
+    def _handle_code_search_finished(self, search_id: int, stats: dict):
+        if search_id == self._panel_search_id:
+            self._panel_search_id = None
+            self.search_panel.finish(stats)
+        elif search_id in self._agent_searches:
+            search = self._agent_searches.pop(search_id)
+            output = format_search_results(search["matches"], stats, self.agent_loop.max_output_chars)
+            self._handle_agent_search_done(search_id, search, output, f"{stats['matches']} resultado(s)")
+
+    def _handle_code_search_failed(self, search_id: int, error: str):
+        if search_id == self._panel_search_id:
+            self._panel_search_id = None
+            self.search_panel.show_error(error)
+        elif search_id in self._agent_searches:
+            self._handle_agent_search_done(search_id, self._agent_searches.pop(search_id), f"Erro: {error}", "erro")
+
+    def _handle_agent_search_done(self, search_id: int, search: dict, output: str, state: str):
+        lines = output.splitlines()
+        shown = "\n".join(lines[:5]) + (f"\n... (+{len(lines) - 5} linhas)" if len(lines) > 5 else "")
+        self.chat_display_area.appendPlainText(f"Aura IA (Feedback da Pesquisa): {search['label']} [{state}]:\n{shown}")
+        self._add_agent_tool_result(search["call"], search["label"], output, state,
+                                    time.monotonic() - search["started"], "search")
+
+    def _handle_code_index_finished(self, stats: dict):
+        if stats["updated_files"]:
+            print(f"Índice de código: {stats['updated_files']} arquivo(s) indexados em {stats['seconds']:.2f} s "
+                  f"({stats['indexed_files']} arquivos, {stats['text_bytes'] / (1024 * 1024):.1f} MB, "
+                  f"{stats['segments']} segmento(s)).")
+
+    def _handle_code_index_failed(self, error: str):
+        print(f"AVISO: Falha ao atualizar o índice de código: {error}")
+
+    def _handle_code_index_ready(self, index):
+        if self.retrieval_enabled:
+            self.retrieval_indexer.update(index)
+
+    def _handle_retrieval_index_finished(self, stats: dict):
+        if stats["updated_files"]:
+            print(f"Índice de contexto: {stats['updated_files']} arquivo(s) em {stats['seconds']:.2f} s, "
+                  f"{stats['embedded_chunks']} trecho(s) novos e {stats['reused_chunks']} reutilizados "
+                  f"({stats['chunks']} trechos, {stats['embedder']}).")
+
+    def _handle_retrieval_index_failed(self, error: str):
+        print(f"AVISO: Falha ao atualizar o índice de contexto: {error}")
+
+    def _reindex_project(self):
+        self.project_indexer.refresh()
+        self.statusBar().showMessage("A reindexar o projeto...", 3000)
+
+    def _handle_project_index_ready(self, index, from_cache: bool):
+        self.go_to_file_dialog.set_index(index, self.project_indexer.indexing)
+
+    def _handle_project_index_finished(self, seconds: float):
+        index = self.project_indexer.index
+        self.go_to_file_dialog.set_index(index, False)
+        self.code_indexer.start(index.root, index) # Arquivos novos, alterados ou apagados desde a última sessão
+        print(f"Índice do projeto: {len(index)} arquivos em {seconds:.2f} s.")
+
+    def _handle_project_index_failed(self, error: str):
+        self.go_to_file_dialog.set_index(self.project_indexer.index, False)
+        print(f"AVISO: Falha ao indexar o projeto: {error}")
+
+    def _handle_file_probed(self, load_id: int, probe):
+        self._loading_file_probe = probe
+
+    def _handle_file_text_chunk(self, load_id: int, text: str):
+        self._observe_file_first_text()
+        self.editor_area.append_text(text)
+
+    def _handle_file_load_progress(self, load_id: int, done: int, total: int):
+        if total > 0:
+            self.statusBar().showMessage(f"A abrir {self._loading_file_path}: {min(100, done * 100 // total)}%")
+
+    def _handle_large_file_ready(self, load_id: int, mapped_file):
+        self.large_file_view.set_file(mapped_file)
+        self.editor_stack.setCurrentWidget(self.large_file_view)
+        self._observe_file_first_text()
+
+    def _handle_binary_file_ready(self, load_id: int, hex_text: str):
+        probe = self._loading_file_probe
+        if probe is not None and probe.size > HEX_PREVIEW_BYTES:
+            hex_text += f"\n... ({probe.size - HEX_PREVIEW_BYTES} bytes não mostrados)"
+        self.editor_area.setPlainText(hex_text)
+
+    def _handle_file_loaded(self, load_id: int):
+        file_path = self._loading_file_path
+        probe = self._loading_file_probe
+        self.statusBar().clearMessage()
+        self._record_file_open("ok")
+        if probe is not None and probe.kind == KIND_BINARY:
+            self.setWindowTitle(f"Aura IDE - {file_path} (binário, pré-visualização hexadecimal)")
+            return # Continua só de leitura
+        if probe is not None and probe.kind == KIND_LARGE_TEXT:
+            self.setWindowTitle(f"Aura IDE - {file_path} ({probe.encoding}, {probe.size / (1024 * 1024):.0f} MB, só leitura)")
+            return
+        self.editor_area.setReadOnly(False)
+        self.editor_area.buffer.clear_history() # Os pedaços inseridos não são edições a desfazer
+        self._open_file_disk_text = self.editor_area.snapshot()
+        self.editor_area.moveCursor(QTextCursor.MoveOperation.Start)
+        self.syntax_highlighter.set_lexer(lexer_for_file(file_path, self.editor_area.buffer.line(0)))
+        if self._pending_goto is not None:
+            self.editor_area.go_to_line(*self._pending_goto) # Aberto a partir de um resultado de pesquisa
+            self._pending_goto = None
+        encoding = f" ({probe.encoding})" if probe is not None and probe.encoding != "utf-8" else ""
+        self.setWindowTitle(f"Aura IDE - {file_path}{encoding}")
+
+    def _handle_file_load_failed(self, load_id: int, error: str):
+        self.statusBar().clearMessage()
+        self._record_file_open("error")
+        self.editor_stack.setCurrentWidget(self.editor_area)
+        self.editor_area.setPlainText(f"Não foi possível abrir o arquivo:\n{self._loading_file_path}\n\nErro: {error}")
+        self.setWindowTitle(f"Aura IDE - Erro ao abrir arquivo")
+
+    def _observe_file_first_text(self):
+        # Do pedido até haver texto para ler (o resto do arquivo continua a chegar aos pedaços)
+        if self._file_open_started is not None and not self._file_first_text_seen:
+            self._file_first_text_seen = True
+            instruments.observe("file.first_text", (instruments.now_ns() - self._file_open_started) / 1e6)
+
+    def _record_file_open(self, outcome: str):
+        if self._file_open_started is None:
+            return
+        probe = self._loading_file_probe
+        instruments.record_span("file.open", self._file_open_started, category="file", outcome=outcome,
+                                kind=probe.kind if probe is not None else "", size=probe.size if probe is not None else 0)
+        self._file_open_started = None
+
+    def _handle_file_changes(self, changes):
+        self.project_indexer.apply_changes(changes)
+        self.code_indexer.apply_changes(changes)
+        file_path = self._loading_file_path
+        if file_path is None or os.path.abspath(file_path) not in changes.changed_files:
+            return
+        if changes.file_signatures.get(os.path.abspath(file_path)) is None:
+            self.setWindowTitle(f"Aura IDE - {file_path} (apagado do disco)")
+            self.statusBar().showMessage("O arquivo aberto foi apagado ou movido; o conteúdo do editor foi mantido.", 5000)
+            return
+        self._reload_open_file()
+
+    def _reload_open_file(self):
+        if self._open_file_disk_text is None:
+            self._open_file(self._loading_file_path) # A carregar, binário ou grande: abrir outra vez
+            return
+        self._reload_buffer_version = self.editor_area.buffer.version
+        self.file_loader.reload(self._loading_file_path, self._open_file_disk_text, self.editor_area.snapshot())
+
+    def _handle_file_reloaded(self, load_id: int, edits, disk_text: str, conflicts: int, merged: bool):
+        if edits is None:
+            self._open_file(self._loading_file_path)
+            return
+        if self.editor_area.buffer.version != self._reload_buffer_version:
+            self._reload_open_file() # O usuário escreveu entretanto: as edições já não se aplicam
+            return
+        self.editor_area.apply_edits(edits)
+        self._open_file_disk_text = disk_text
+        if conflicts:
+            self.statusBar().showMessage(
+                f"O arquivo mudou no disco: {conflicts} bloco(s) em conflito ficaram com a versão do editor.", 8000)
+        elif merged:
+            self.statusBar().showMessage("O arquivo mudou no disco: alterações juntadas às do editor.", 5000)
+        else:
+            self.statusBar().showMessage("O arquivo mudou no disco e foi recarregado.", 3000)
 
     def _send_chat_message_from_input_widget(self, message: str):
         if not message.strip():
             return
 
         self.chat_display_area.appendPlainText(f"Você: {message}")
-        QApplication.processEvents()
 
         if self.ai_provider:
-            selected_model_from_combo = self.ai_model_selector.currentText()
-            
-            if not hasattr(self, 'chat_history_for_ia'):
-                self.chat_history_for_ia = []
+            # Uma nova pergunta começa um novo ciclo; comandos do ciclo anterior deixam de contar
+            self._stop_agent_loop("nova mensagem")
+            self._cancel_pending_retrieval()
+            self.agent_loop.start()
+            self._agent_deadline_timer.start(max(0, int(self.agent_loop.max_seconds * 1000)))
+            user_message = {"role": "user", "content": message}
+            if self.retrieval_enabled and self.retrieval_indexer.index is not None:
+                # A pergunta só segue quando chegam os trechos do projeto mais parecidos com ela (ou ao fim do prazo)
+                retrieve_id = self.retrieval_indexer.retrieve(message, self.retrieval_top_k, self.retrieval_budget_tokens,
+                                                              self.chat_history_for_ia.token_counter)
+                self._pending_retrieval = (retrieve_id, user_message)
+                self._retrieval_timer.start()
+                self.ai_pending_label.setText("Aura IA está a procurar contexto no projeto...")
+            else:
+                self._send_question(user_message, "")
+        else:
+            self.chat_display_area.appendPlainText("Aura IA: (Funcionalidade de IA não está configurada ou disponível)")
+
+    def _send_question(self, user_message: dict, retrieved_context: str):
+        self._pending_retrieval = None
+        self._retrieval_timer.stop()
+        self._agent_request_id = self._submit_ai_request([user_message], retrieved_context)
+
+    def _handle_context_retrieved(self, retrieve_id: int, result: dict):
+        if self._pending_retrieval is None or self._pending_retrieval[0] != retrieve_id:
+            return
+        if result["context"]:
+            self.statusBar().showMessage(
+                f"Contexto do projeto: {len(result['chunks'])} trecho(s) em {result['seconds'] * 1000:.0f} ms", 5000)
+        self._send_question(self._pending_retrieval[1], result["context"])
+
+    def _handle_context_retrieve_failed(self, retrieve_id: int, error: str):
+        if self._pending_retrieval is None or self._pending_retrieval[0] != retrieve_id:
+            return
+        print(f"AVISO: Contexto do projeto indisponível: {error}")
+        self._send_question(self._pending_retrieval[1], "")
+
+    def _handle_context_retrieve_timeout(self):
+        if self._pending_retrieval is None:
+            return
+        self.retrieval_indexer.cancel_retrieve(self._pending_retrieval[0])
+        print(f"AVISO: Contexto do projeto não chegou em {RETRIEVAL_TIMEOUT_MS} ms; a pergunta segue sem ele.")
+        self._send_question(self._pending_retrieval[1], "")
+
+    def _cancel_pending_retrieval(self):
+        if self._pending_retrieval is not None:
+            self.retrieval_indexer.cancel_retrieve(self._pending_retrieval[0])
+            self._pending_retrieval = None
+            self._retrieval_timer.stop()
+            self._update_ai_pending_ui(len(self.ai_requests.pending_requests()))
+
+    def _submit_ai_request(self, new_messages: list, retrieved_context: str = None) -> int:
+        """
+        Acrescenta as mensagens ao histórico (a pergunta, ou os resultados das ferramentas de
+        um passo do ciclo) e pede a resposta (em streaming) ao provedor. `retrieved_context`
+        (trechos do projeto) vai com a primeira mensagem e substitui o contexto da pergunta
+        anterior; sem ele (seguimentos do ciclo de comandos) fica o da pergunta que começou o ciclo.
+        """
+        selected_model_from_combo = self.ai_model_selector.currentData() # "Provedor::modelo" (ver _populate_model_selector)
+        for message in new_messages:
+            self.chat_history_for_ia.append(message)
+        if retrieved_context is not None:
+            self.chat_history_for_ia.set_retrieved_context(new_messages[0], retrieved_context)
+
+        # A chamada ao provedor corre numa thread do pool; a resposta chega em _handle_ai_response
+        request_options = {}
+        if isinstance(self.ai_provider, CachedAIProvider):
+            request_options["use_cache"] = self.use_response_cache_action.isChecked()
+
+        # Só a janela atual (instrução de sistema + resumo + mensagens recentes) é enviada
+        request_messages = self.chat_history_for_ia.build_messages()
+        if getattr(self.ai_provider, "supports_tools", False):
+            request_options["tools"] = TOOL_SPECS # Chamadas de funções nativas da API
+        else:
+            request_messages = flatten_tool_messages(request_messages)
+        request_id = self.ai_requests.submit(
+            self.ai_provider,
+            request_messages,
+            model_name=selected_model_from_combo,
+            stream=True,
+            **request_options
+        )
+        # Se o pedido falhar, só as mensagens do usuário saem do histórico: os resultados de
+        # chamadas nativas têm de ficar, a seguir à resposta que as pediu
+        self._pending_chat_messages[request_id] = [message for message in new_messages if message.get("role") == "user"]
+        self._ai_streams[request_id] = {"pending": [], "mode": None}
+        return request_id
+
+    def _handle_ai_chunk(self, request_id: int, chunk_text: str):
+        stream_state = self._ai_streams.get(request_id)
+        if stream_state is None or stream_state["mode"] == "command":
+            return
+        stream_state["pending"].append(chunk_text)
+
+        if stream_state["mode"] is None:
+            # Segurar o texto até saber se a resposta é um comando para o terminal da IA (ou uma
+            # pesquisa de código), para não mostrar o prefixo a meio do streaming.
+            text_so_far = "".join(stream_state["pending"]).lstrip()
+            if text_so_far.startswith((TOOL_CALL_PREFIX, COMMAND_PREFIX, SEARCH_PREFIX)):
+                stream_state["mode"] = "command"
+                stream_state["pending"].clear()
+                return
+            if any(len(text_so_far) < len(prefix) and prefix.startswith(text_so_far)
+                   for prefix in (TOOL_CALL_PREFIX, COMMAND_PREFIX, SEARCH_PREFIX)):
+                return # Ainda ambíguo
+            stream_state["mode"] = "text"
 
-            if not self.chat_history_for_ia or self.chat_history_for_ia[0].get("role") != "system":
-                self.chat_history_for_ia = [msg for msg in self.chat_history_for_ia if msg.get("role") != "system"]
-                self.chat_history_for_ia.insert(0, {"role": "system", "content": "Você é Aura, uma assistente de IA. Se você precisar executar um comando no terminal Linux para obter informações ou realizar uma ação, responda APENAS com o prefixo 'EXECUTE_TERMINAL_IA:' seguido do comando. Exemplo: 'EXECUTE_TERMINAL_IA: ls -l'. Para outras respostas, responda normalmente."})
-            
-            self.chat_history_for_ia.append({"role": "user", "content": message})
+        if not self._ai_stream_flush_timer.isActive():
+            self._ai_stream_flush_timer.start()
 
+    def _flush_ai_stream_chunks(self):
+        document = self.chat_display_area.document()
+        scroll_bar = self.chat_display_area.verticalScrollBar()
+        was_at_bottom = scroll_bar.value() >= scroll_bar.maximum() - 4
+
+        for request_id, stream_state in self._ai_streams.items():
+            if stream_state["mode"] != "text" or not stream_state["pending"]:
+                continue
+            chunk_text = "".join(stream_state["pending"])
+            stream_state["pending"].clear()
+
+            # Continuar na mesma linha só se nada mais foi escrito no chat desde o último pedaço
+            if self._ai_stream_tail != (request_id, document.characterCount()):
+                # Com várias respostas em paralelo, identificar a que requisição pertence cada trecho
+                concurrent_streams = sum(1 for state in self._ai_streams.values() if state["mode"] == "text")
+                self.chat_display_area.appendPlainText("Aura IA: " if concurrent_streams == 1 else f"Aura IA [#{request_id}]: ")
+                chunk_text = chunk_text.lstrip()
+            cursor = QTextCursor(document)
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText(chunk_text)
+            self._ai_stream_tail = (request_id, document.characterCount())
+
+        if was_at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
+
+    def _finish_ai_stream(self, request_id: int) -> bool:
+        """Desenha o que falta do stream e devolve True se a resposta já foi mostrada no chat."""
+        stream_state = self._ai_streams.get(request_id)
+        if stream_state is None:
+            return False
+        if stream_state["mode"] is None and stream_state["pending"]:
+            stream_state["mode"] = "text" # Resposta curta que nunca saiu da zona ambígua
+        self._flush_ai_stream_chunks()
+        del self._ai_streams[request_id]
+        return stream_state["mode"] == "text"
+
+    def _handle_ai_tool_calls(self, request_id: int, tool_calls: list):
+        # Chamadas nativas da resposta; chegam antes de _handle_ai_response, que as executa
+        self._ai_tool_calls[request_id] = tool_calls
+
+    def _handle_ai_response(self, request_id: int, ai_response_text: str):
+        self._pending_chat_messages.pop(request_id, None)
+        already_displayed = self._finish_ai_stream(request_id)
+        native_calls = self._ai_tool_calls.pop(request_id, [])
+
+        is_agent_reply = request_id == self._agent_request_id
+        if is_agent_reply:
+            self._agent_request_id = None
+
+        # --- INÍCIO DA LÓGICA PARA EXECUTAR AS FERRAMENTAS PEDIDAS PELA IA ---
+        # Chamadas nativas da API e, para modelos sem elas, as escritas no texto (TOOL_CALL: e formatos antigos)
+        text_calls, other_text = parse_tool_calls(ai_response_text)
+        calls = native_calls + text_calls
+        if calls:
+            if other_text and not already_displayed:
+                self.chat_display_area.appendPlainText(f"Aura IA: {other_text}")
+            # A resposta (com as chamadas) entra no histórico: os resultados referem-se a ela
+            assistant_message = {"role": "assistant", "content": ai_response_text.strip()}
+            if native_calls:
+                assistant_message["tool_calls"] = [call.to_dict() for call in native_calls]
+            self.chat_history_for_ia.append(assistant_message)
+            labels = [describe_call(call) for call in calls]
+            if not is_agent_reply or not self.agent_loop.begin_step(labels):
+                if is_agent_reply:
+                    self._agent_deadline_timer.stop()
+                reason = self.agent_loop.stop_reason or "ciclo terminado"
+                self.chat_display_area.appendPlainText(f"Aura IA: (Comandos não executados: {reason})")
+                for call in native_calls: # Cada chamada nativa no histórico precisa de uma resposta
+                    self.chat_history_for_ia.append(tool_result_message(call, f"(não executado: {reason})"))
+                if self.agent_loop.steps:
+                    self._report_agent_loop()
+            else:
+                step = self.agent_loop.current_step
+                for call in calls:
+                    self.agent_loop.track_job(call.id, call)
+                for call, label in zip(calls, labels):
+                    self._start_agent_tool(call, label, step.number)
+        else:
+            # Resposta normal da IA, exibir no chat (se ainda não veio por streaming) e adicionar ao histórico
+            if not already_displayed:
+                self.chat_display_area.appendPlainText(f"Aura IA: {ai_response_text}")
+            ai_response_text = ai_response_text.strip()
+            self.chat_history_for_ia.append({"role": "assistant", "content": ai_response_text})
+            if is_agent_reply:
+                self._agent_deadline_timer.stop()
+            if is_agent_reply and self.agent_loop.steps:
+                self.agent_loop.finish()
+                self._report_agent_loop()
+            elif is_agent_reply:
+                self.agent_loop.finish() # Resposta direta, sem comandos: nada a relatar
+        # --- FIM DA LÓGICA PARA EXECUTAR AS FERRAMENTAS PEDIDAS PELA IA ---
+
+    def _start_agent_tool(self, call, label: str, step_number: int):
+        """Começa uma chamada de ferramenta do passo atual; todas as de uma resposta correm ao mesmo tempo."""
+        if call.error:
+            self.chat_display_area.appendPlainText(f"Aura IA (Chamada inválida, passo {step_number}): {call.error}")
+            self._add_agent_tool_result(call.id, label, f"Erro: {call.error}", "erro", 0.0, call.name)
+        elif call.name == "run_command":
+            if not (hasattr(self, 'ai_terminal') and self.ai_terminal):
+                self._add_agent_tool_result(call.id, label, "Erro: o terminal da IA não está disponível.", "erro", 0.0, call.name)
+                return
+            command = call.arguments["command"]
+            if not command.strip(): # O terminal não põe comandos vazios na fila: o resultado nunca chegaria
+                self._add_agent_tool_result(call.id, label, "Erro: run_command precisa de um comando não vazio.", "erro", 0.0, call.name)
+                return
+            self.chat_display_area.appendPlainText(f"Aura IA (para Terminal, passo {step_number}): {command}")
+            self._agent_terminal_calls[self.ai_terminal.execute_ai_command(command)] = call.id
+        elif call.name == "search":
+            self.chat_display_area.appendPlainText(f"Aura IA (Pesquisa no Projeto, passo {step_number}): {label}")
+            arguments = call.arguments
+            search_id = self.code_indexer.search(arguments["query"], regex=arguments["regex"],
+                                                 case_sensitive=arguments["case_sensitive"], paths=arguments["path"],
+                                                 max_matches=arguments["max_results"])
+            self._agent_searches[search_id] = {"label": label, "matches": [], "started": time.monotonic(), "call": call.id}
+        else: # read_file, write_file, list_dir
+            self.chat_display_area.appendPlainText(f"Aura IA (Arquivos, passo {step_number}): {label}")
+            self.tool_runner.run(call)
+
+    def _handle_agent_tool_finished(self, call_id: str, output: str, state: str, seconds: float):
+        step = self.agent_loop.current_step
+        call = step.calls.get(call_id) if step is not None else None
+        if call is None:
+            return
+        label = describe_call(call)
+        lines = output.splitlines()
+        shown = "\n".join(lines[:5]) + (f"\n... (+{len(lines) - 5} linhas)" if len(lines) > 5 else "")
+        self.chat_display_area.appendPlainText(f"Aura IA (Feedback de Arquivos): {label} [{state}]:\n{shown}")
+        self._add_agent_tool_result(call_id, label, output, state, seconds, call.name)
+
+    def _add_agent_tool_result(self, call_id: str, label: str, output: str, state: str, seconds: float, tool: str):
+        if self.agent_loop.add_result(call_id, label, output, state=state, seconds=seconds, tool=tool):
+            self._send_agent_feedback()
+
+    def _handle_ai_request_failed(self, request_id: int, error: str):
+        self._finish_ai_stream(request_id)
+        error_msg = f"Aura IA: (Erro ao obter resposta: {error})"
+        self.chat_display_area.appendPlainText(error_msg)
+        print(f"Erro na chamada get_chat_completion: {error}")
+        if request_id == self._agent_request_id:
+            self._stop_agent_loop("erro do provedor")
+        # A pergunta sai do histórico e o erro não entra: só seria ruído no contexto dos próximos pedidos
+        self._remove_pending_user_message(request_id)
+
+    def _handle_ai_request_cancelled(self, request_id: int):
+        self._finish_ai_stream(request_id)
+        self.chat_display_area.appendPlainText("Aura IA: (Requisição cancelada)")
+        if request_id == self._agent_request_id:
+            self._stop_agent_loop("cancelado")
+        # Uma pergunta sem resposta não deve continuar a ser enviada como contexto
+        self._remove_pending_user_message(request_id)
+
+    def _remove_pending_user_message(self, request_id: int):
+        self._ai_tool_calls.pop(request_id, None)
+        for user_message in self._pending_chat_messages.pop(request_id, ()):
+            # Comparação por identidade: o usuário pode ter enviado o mesmo texto mais de uma vez
+            self.chat_history_for_ia.remove(user_message)
+
+    def _cancel_ai_requests(self):
+        self._stop_agent_loop("cancelado")
+        self._cancel_pending_retrieval()
+        self.ai_requests.cancel_all()
+
+    def _update_ai_pending_ui(self, pending_count: int):
+        has_pending = pending_count > 0
+        self.ai_cancel_button.setEnabled(has_pending)
+        self.cancel_ia_requests_action.setEnabled(has_pending)
+        if pending_count == 1:
+            self.ai_pending_label.setText("Aura IA está pensando...")
+        elif has_pending:
+            self.ai_pending_label.setText(f"Aura IA está pensando... ({pending_count} requisições)")
+        else:
+            self.ai_pending_label.setText("")
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            startup_timeline.mark("primeira pintura")
+            if self._deferred_startup_waiting:
+                QTimer.singleShot(0, self._start_deferred_startup) # Depois de o frame chegar ao ecrã
+
+    def _begin_deferred_startup(self):
+        # Primeira volta do ciclo de eventos. Se a janela foi mostrada, o resto do arranque espera
+        # pela primeira pintura; sem janela visível (benchmarks, testes), começa já.
+        if self.isVisible() and not self._first_paint_done:
+            self._deferred_startup_waiting = True
+            QTimer.singleShot(STARTUP_PAINT_TIMEOUT_MS, self._start_deferred_startup)
+            return
+        self._start_deferred_startup()
+
+    def _start_deferred_startup(self):
+        if self._deferred_startup_started:
+            return
+        self._deferred_startup_started = True
+        self._deferred_startup_waiting = False
+        # Os provedores de IA numa thread, em paralelo com os shells e os índices
+        self._start_ai_init()
+        if instruments.enabled:
+            self.event_loop_probe.start()
+        with startup_timeline.span("shells"):
+            self.user_terminal.start_shell()
+            self.ai_terminal.start()
+        with startup_timeline.span("índices do projeto"):
+            self.project_indexer.start(QDir.currentPath())
+            self.code_indexer.start(QDir.currentPath()) # O índice gravado serve já; a listagem do projeto põe-no em dia
+        self._check_startup_finished()
+
+    def _check_startup_finished(self):
+        if self._startup_done or not self._deferred_startup_started or self._ai_init_pending:
+            return
+        self._startup_done = True
+        startup_timeline.mark("pronto")
+        first_paint_ms = startup_timeline.mark_ms("primeira pintura")
+        first_paint = f"janela pintada em {first_paint_ms:.0f} ms, " if first_paint_ms is not None else ""
+        print(f"Arranque: {first_paint}pronto em {startup_timeline.mark_ms('pronto'):.0f} ms "
+              f"(detalhes em Ajuda → Tempos do Arranque).")
+        self.startup_finished.emit()
+
+    def _show_startup_timeline(self):
+        self.chat_display_area.appendPlainText("Tempos do arranque (ms desde o início):")
+        for line in startup_timeline.report():
+            self.chat_display_area.appendPlainText(f"  {line.strip()}")
+
+    def _show_performance_panel(self):
+        if self.performance_panel is None:
+            self.performance_panel = PerformancePanel(self)
+        self.performance_panel.show()
+        self.performance_panel.raise_()
+
+    def _show_stall_report(self):
+        watchdog = self.event_loop_probe.watchdog
+        if watchdog is None:
+            self.chat_display_area.appendPlainText("Cão de guarda dos bloqueios da interface desligado ([PERFORMANCE] STALL_THRESHOLD_MS).")
+            return
+        summary = watchdog.summary()
+        self.chat_display_area.appendPlainText(
+            f"Bloqueios da interface acima de {watchdog.threshold * 1000:.0f} ms nesta sessão: {summary['stalls']}")
+        for stall in summary["slowest"]:
+            frame = stall["top_stack"][-1] if stall["top_stack"] else "(sem pilha Python)"
+            started = time.strftime("%H:%M:%S", time.localtime(stall["started_at"]))
+            self.chat_display_area.appendPlainText(f"  {started}  {stall['duration_ms']:.0f} ms  em {frame}")
+        if summary["hot_frames"]:
+            self.chat_display_area.appendPlainText("Funções com mais tempo bloqueado (amostras):")
+            for hot in summary["hot_frames"]:
+                self.chat_display_area.appendPlainText(f"  ~{hot['ms']:.0f} ms  {hot['frame']}")
+            folded_path, json_path = watchdog.report_paths()
+            self.chat_display_area.appendPlainText(f"Flame graph: flamegraph.pl {folded_path} > bloqueios.svg (ou abra-o em speedscope.app); detalhes em {json_path}")
+
+    def _apply_performance_config(self, config):
+        # Sempre ligada por omissão (o custo é um tuplo num deque por medida)
+        instruments.enabled = config.getboolean('PERFORMANCE', 'ENABLED', fallback=True)
+        log_file = config.get('PERFORMANCE', 'LOG_FILE', fallback='').strip()
+        if log_file and instruments.enabled:
             try:
-                ai_response_text = self.ai_provider.get_chat_completion(
-                    self.chat_history_for_ia, 
-                    model_name=selected_model_from_combo
-                )
-                
-                # --- INÍCIO DA LÓGICA PARA EXECUTAR COMANDO DO TERMINAL DA IA ---
-                command_prefix = "EXECUTE_TERMINAL_IA:"
-                if ai_response_text.strip().startswith(command_prefix):
-                    command_to_execute = ai_response_text.strip()[len(command_prefix):].strip()
-                    self.chat_display_area.appendPlainText(f"Aura IA (para Terminal): {command_to_execute}")
-                    QApplication.processEvents()
-                    if hasattr(self, 'ai_terminal') and self.ai_terminal:
-                        self.ai_terminal.execute_ai_command(command_to_execute)
-                        # A resposta da IA (o próprio comando) não é adicionada ao histórico de chat como 'assistant'
-                        # pois a "resposta" real virá da saída do terminal.
-                        # Mas podemos remover a última mensagem do usuário do histórico se quisermos
-                        # que o feedback do terminal seja o próximo input para a IA.
-                        # Por agora, vamos deixar o histórico como está.
-                    else:
-                        self.chat_display_area.appendPlainText("Aura IA: (Terminal da IA não está disponível para executar o comando)")
-                        self.chat_history_for_ia.append({"role": "assistant", "content": "Eu tentei executar um comando, mas meu terminal não está disponível."})
-                else:
-                    # Resposta normal da IA, exibir no chat e adicionar ao histórico
-                    self.chat_display_area.appendPlainText(f"Aura IA: {ai_response_text}")
-                    self.chat_history_for_ia.append({"role": "assistant", "content": ai_response_text})
-                # --- FIM DA LÓGICA PARA EXECUTAR COMANDO DO TERMINAL DA IA ---
-
-            except Exception as e:
-                error_msg = f"Aura IA: (Erro ao obter resposta: {e})"
-                self.chat_display_area.appendPlainText(error_msg)
-                print(f"Erro na chamada get_chat_completion (Gemini): {e}")
-                if self.chat_history_for_ia and self.chat_history_for_ia[-1]['role'] == 'user':
-                    self.chat_history_for_ia.pop() # Remove a última pergunta do usuário se a IA falhou
-                self.chat_history_for_ia.append({"role": "assistant", "content": error_msg}) # Adiciona erro ao histórico
+                instruments.set_log_file(log_file)
+            except OSError as e:
+                print(f"AVISO: Não foi possível abrir o registo de desempenho '{log_file}': {e}")
+        self._trace_file = config.get('PERFORMANCE', 'TRACE_FILE', fallback='').strip() or None
+        trace_format = config.get('PERFORMANCE', 'TRACE_FORMAT', fallback=TRACE_FORMAT_CHROME).strip().lower()
+        if trace_format not in TRACE_FORMATS:
+            print(f"AVISO: TRACE_FORMAT '{trace_format}' desconhecido em [PERFORMANCE]; a usar '{TRACE_FORMAT_CHROME}'.")
+            trace_format = TRACE_FORMAT_CHROME
+        self._trace_format = trace_format
+        # Cão de guarda dos bloqueios da UI (0 desliga)
+        stall_threshold_ms = config.getint('PERFORMANCE', 'STALL_THRESHOLD_MS', fallback=DEFAULT_STALL_THRESHOLD_MS)
+        if stall_threshold_ms <= 0 or not instruments.enabled:
+            self.event_loop_probe.set_watchdog(None)
         else:
-            self.chat_display_area.appendPlainText("Aura IA: (Funcionalidade de IA não está configurada ou disponível)")
+            self.event_loop_probe.set_watchdog(StallWatchdog(
+                self.event_loop_probe.interval_ms, stall_threshold_ms,
+                max(1, config.getint('PERFORMANCE', 'STALL_SAMPLE_MS', fallback=DEFAULT_SAMPLE_INTERVAL_MS)),
+                config.get('PERFORMANCE', 'STALL_REPORT_DIR', fallback='').strip() or None
+            ))
+
+    def _export_trace_on_close(self):
+        if not self._trace_file or not instruments.enabled:
+            return
+        try:
+            count = instruments.export(self._trace_file, self._trace_format)
+            print(f"Trace de desempenho ({self._trace_format}, {count} intervalos) gravado em {self._trace_file}")
+        except OSError as e:
+            print(f"AVISO: Não foi possível gravar o trace de desempenho em '{self._trace_file}': {e}")
 
     def _load_config_and_init_ai(self):
         config = configparser.ConfigParser()
         config_path = QDir.currentPath() + "/config.ini"
-        
-        ai_successfully_initialized = False
 
         if not config.read(config_path):
             print(f"AVISO: Arquivo de configuração '{config_path}' não encontrado ou vazio.")
             self._update_ai_status_ui(available=False, message="IA Indisponível - config.ini não encontrado")
             return
 
-        if not ai_successfully_initialized:
-            gemini_api_key = config.get('API_KEYS', 'GEMINI_API_KEY', fallback=None)
-            if gemini_api_key and gemini_api_key != "SUA_CHAVE_API_GEMINI_AQUI": # Adicione um placeholder se quiser
-                try:
-                    self.ai_provider = GeminiProvider(api_key=gemini_api_key)
-                    print("Provedor Gemini IA inicializado.")
-                    self._update_ai_status_ui(available=True, models=self.ai_provider.get_available_models(), provider_name="Gemini")
-                    ai_successfully_initialized = True
-                except ValueError as ve: # Erros de configuração do GeminiProvider são ValueError
-                    print(f"Erro ao inicializar GeminiProvider: {ve}")
-                    self.ai_provider = None # Garantir que está None
-                    self._update_ai_status_ui(available=False, message=f"Erro Config. Gemini: {str(ve)[:50]}...") # Mensagem curta
-            else:
-                print("AVISO: GEMINI_API_KEY não encontrada ou não configurada em config.ini.")
-        
-        if not ai_successfully_initialized:
+        # Instrumentação: ligada ou não, registo de eventos e trace gravado ao fechar
+        self._apply_performance_config(config)
+
+        # Linhas guardadas no histórico (scrollback) de cada terminal
+        scrollback_lines = config.getint('TERMINAL', 'SCROLLBACK_LINES', fallback=DEFAULT_SCROLLBACK_LINES)
+        for terminal in (self.user_terminal, self.ai_terminal):
+            terminal.set_max_lines(max(1, scrollback_lines))
+
+        # Shells do terminal da IA (comandos só de leitura correm em paralelo) e tempo limite por comando
+        self.ai_terminal.set_pool_size(config.getint('AI_TERMINAL', 'SHELL_POOL_SIZE', fallback=DEFAULT_SHELL_POOL_SIZE))
+        self.ai_terminal.default_timeout = config.getfloat('AI_TERMINAL', 'COMMAND_TIMEOUT_SECONDS', fallback=DEFAULT_COMMAND_TIMEOUT)
+
+        # Threads a percorrer a árvore do projeto ao construir o índice de "Ir para Arquivo"
+        self.project_indexer.threads = max(1, config.getint('PROJECT', 'INDEX_THREADS', fallback=DEFAULT_WALK_THREADS))
+
+        # Processos a indexar e a verificar as pesquisas no conteúdo dos arquivos (0: tudo numa thread)
+        self.code_indexer.workers = max(0, config.getint('SEARCH', 'WORKERS', fallback=DEFAULT_SEARCH_WORKERS))
+
+        # Tamanho a partir do qual um arquivo abre no visualizador de arquivos grandes (mmap, só leitura)
+        self.file_loader.large_file_bytes = int(config.getfloat('EDITOR', 'LARGE_FILE_MB', fallback=DEFAULT_LARGE_FILE_BYTES / (1024 * 1024)) * 1024 * 1024)
+
+        # Orçamento de tokens do contexto enviado à IA em cada mensagem
+        self.chat_history_for_ia.budget_tokens = config.getint('CONTEXT', 'MAX_TOKENS', fallback=DEFAULT_CONTEXT_BUDGET_TOKENS)
+        self.chat_history_for_ia.summary_budget_tokens = config.getint('CONTEXT', 'SUMMARY_MAX_TOKENS', fallback=DEFAULT_SUMMARY_BUDGET_TOKENS)
+
+        # Limites do ciclo de comandos (respostas com comandos, duração, saída por comando)
+        self.agent_loop.max_steps = max(1, config.getint('AGENT', 'MAX_STEPS', fallback=DEFAULT_AGENT_MAX_STEPS))
+        self.agent_loop.max_seconds = config.getfloat('AGENT', 'MAX_SECONDS', fallback=DEFAULT_AGENT_MAX_SECONDS)
+        self.agent_loop.max_output_chars = config.getint('AGENT', 'MAX_OUTPUT_CHARS', fallback=DEFAULT_AGENT_OUTPUT_CHARS)
+
+        # Os provedores de IA são criados numa thread, depois de a janela aparecer (ver _start_ai_init)
+        self._ai_config = config
+        self._update_ai_status_ui(available=False, message="A iniciar a IA...")
+
+    def _start_ai_init(self):
+        if self._ai_config is None: # Sem config.ini: a IA fica indisponível
+            return
+        config, self._ai_config = self._ai_config, None
+        self._ai_init_pending = True
+        threading.Thread(target=self._create_ai_providers, args=(config,), name="aura-ai-init", daemon=True).start()
+
+    def _create_ai_providers(self, config):
+        # Corre fora da thread da UI: importar os SDKs dos provedores (google.generativeai, requests)
+        # e contactar servidores locais custa mais do que o resto do arranque, por isso o registo
+        # cria-os todos em paralelo (ver ai/provider_registry.py). Todos os provedores criados entram
+        # no router: novas tentativas com backoff e failover automático quando um deles falha ou fica lento.
+        specs = provider_specs_from_config(config)
+        if not specs:
+            print("AVISO: Nenhum provedor de IA em config.ini ([API_KEYS] ou secções [PROVIDER:nome]).")
+        provider_registry.create_providers(specs, on_models_updated=self.ai_models_refreshed.emit)
+        self.ai_providers_ready.emit(specs, config)
+
+    def _handle_ai_providers_ready(self, specs: list, config):
+        self._ai_init_pending = False
+        self.provider_specs = specs
+        providers = [(spec.name, spec.provider) for spec in specs if spec.provider is not None]
+        if providers:
+            self._init_retrieval(config, providers)
+            self.ai_router = ProviderRouter(providers)
+            self.ai_provider = self._wrap_with_response_cache(self.ai_router, config)
+            self.chat_history_for_ia.token_counter = self.ai_provider.count_tokens
+            provider_names = " + ".join(name for name, _ in providers)
+            self._update_ai_status_ui(available=True, provider_name=provider_names)
+        else:
             # Se nenhum provedor foi inicializado com sucesso
+            self.ai_router = None
             self.ai_provider = None
-            self._update_ai_status_ui(available=False, message="IA Indisponível - Nenhuma chave de API válida")
+            self._update_ai_status_ui(available=False, message="IA Indisponível - Nenhum provedor configurado")
             if self.chat_display_area: # Verificar se já foi criado
                 self.chat_display_area.appendPlainText(
-                    "Aura IA: Nenhuma chave de API válida encontrada para DeepSeek ou Gemini. "
-                    "Funcionalidades de IA estarão desabilitadas."
+                    "Aura IA: Nenhum provedor de IA disponível (chaves em [API_KEYS] ou secções [PROVIDER:nome] "
+                    "no config.ini). Funcionalidades de IA estarão desabilitadas."
                 )
+        if self.provider_status_dialog is not None:
+            self.provider_status_dialog.set_providers(self.ai_router, self.provider_specs)
+        startup_timeline.mark("IA pronta")
+        self._check_startup_finished()
+
+    def _init_retrieval(self, config, providers: list):
+        # Trechos do projeto enviados com cada pergunta: quantos e até quantos tokens no total.
+        # Os embeddings são locais por omissão; com EMBEDDINGS = provider, os trechos vão ao
+        # primeiro provedor que os fornece (o código do projeto sai da máquina).
+        self.retrieval_enabled = config.getboolean('RETRIEVAL', 'ENABLED', fallback=True)
+        self.retrieval_top_k = max(1, config.getint('RETRIEVAL', 'TOP_K', fallback=DEFAULT_TOP_K))
+        self.retrieval_budget_tokens = config.getint('RETRIEVAL', 'MAX_TOKENS', fallback=DEFAULT_RETRIEVAL_BUDGET_TOKENS)
+        if config.get('RETRIEVAL', 'EMBEDDINGS', fallback='local').strip().lower() == 'provider':
+            embedding_providers = [provider for _, provider in providers if provider.embedding_model]
+            if embedding_providers:
+                self.retrieval_indexer.set_embedder(ProviderEmbedder(embedding_providers[0]))
+            else:
+                print("AVISO: Nenhum provedor configurado fornece embeddings; a usar o embedder local.")
+
+    def _wrap_with_response_cache(self, provider, config):
+        if not config.getboolean('CACHE', 'ENABLED', fallback=True):
+            return provider
+        try:
+            response_cache = ResponseCache(
+                max_disk_bytes=config.getint('CACHE', 'MAX_DISK_MB', fallback=DEFAULT_MAX_DISK_BYTES // (1024 * 1024)) * 1024 * 1024,
+                ttl=config.getfloat('CACHE', 'TTL_HOURS', fallback=DEFAULT_TTL_SECONDS / 3600) * 3600
+            )
+        except Exception as e: # P.ex. diretório de cache sem permissão de escrita
+            print(f"AVISO: Cache de respostas desativada: {e}")
+            return provider
+        return CachedAIProvider(provider, response_cache)
+
+    def _show_response_cache_stats(self):
+        if not isinstance(self.ai_provider, CachedAIProvider):
+            self.chat_display_area.appendPlainText("Aura IA: (Cache de respostas desativada)")
+            return
+        stats = self.ai_provider.cache.metrics()
+        self.chat_display_area.appendPlainText(
+            f"Cache de respostas: {stats['memory_hits']} acertos em memória, {stats['disk_hits']} em disco, "
+            f"{stats['misses']} falhas (taxa de acerto {stats['hit_rate']:.0%}); "
+            f"{stats['memory_entries']} entradas em memória, {stats['disk_bytes'] / 1024:.1f} KiB em disco, "
+            f"{stats['evictions']} removidas."
+        )
 
-    def _update_ai_status_ui(self, available: bool, models: list = None, message: str = None, provider_name: str = ""):
+    def _show_provider_health(self):
+        if self.provider_status_dialog is None:
+            self.provider_status_dialog = ProviderStatusDialog(self)
+            self.provider_status_dialog.provider_chosen.connect(self._select_ai_provider)
+        self.provider_status_dialog.set_providers(self.ai_router, self.provider_specs)
+        self.provider_status_dialog.show()
+        self.provider_status_dialog.raise_()
+
+    def _select_ai_provider(self, provider_name: str):
+        """Escolhe no seletor o modelo padrão de `provider_name` (o router passa a pedir-lhe primeiro)."""
+        for name, models, default_model in self.ai_router.models_by_provider() if self.ai_router is not None else []:
+            if name == provider_name:
+                index = self.ai_model_selector.findData(qualified_model(name, default_model or (models[0] if models else None)))
+                if index >= 0:
+                    self.ai_model_selector.setCurrentIndex(index)
+                return
+
+    def _update_ai_status_ui(self, available: bool, message: str = None, provider_name: str = ""):
         """Método auxiliar para atualizar a UI relacionada ao status da IA."""
         if self.ai_model_selector: # Checar se o widget existe
-            self.ai_model_selector.clear()
-            if available and models:
-                self.ai_model_selector.addItems(models)
-                self.ai_model_selector.setEnabled(True)
-
-                default_model_to_select = None
-                if self.ai_provider and hasattr(self.ai_provider, 'get_default_model_name'):
-                    default_model_to_select = self.ai_provider.get_default_model_name()
-                
-                if default_model_to_select:
-                    try:
-                        # models é a lista de strings que foi adicionada ao ComboBox
-                        index = models.index(default_model_to_select)
-                        self.ai_model_selector.setCurrentIndex(index)
-                        print(f"Modelo padrão '{default_model_to_select}' selecionado no ComboBox.")
-                    except ValueError:
-                        # O modelo padrão não está na lista de modelos disponíveis (pode acontecer)
-                        print(f"AVISO: Modelo padrão '{default_model_to_select}' não encontrado na lista de modelos disponíveis: {models}")
-                        # O ComboBox selecionará o primeiro item por padrão (índice 0) se houver algum.
-                
+            if available and self.ai_router is not None:
+                self._populate_model_selector()
                 if self.chat_display_area:
                     self.chat_display_area.appendPlainText(f"Aura IA: Conectada ao {provider_name}!")
             else:
+                self.ai_model_selector.clear()
                 self.ai_model_selector.addItem(message if message else "IA Indisponível")
                 self.ai_model_selector.setEnabled(False)
 
-    def _handle_ai_terminal_output(self, command_executed: str, output: str):
+    def _populate_model_selector(self):
+        """
+        Um item por (provedor, modelo), com o nome qualificado (qualified_model) como dado; a
+        seleção atual mantém-se se ainda existir, senão fica o modelo padrão do primeiro provedor.
+        """
+        models_by_provider = self.ai_router.models_by_provider()
+        current = self.ai_model_selector.currentData()
+        several = len(models_by_provider) > 1
+        self.ai_model_selector.blockSignals(True)
+        self.ai_model_selector.clear()
+        default_data = None
+        for name, models, default_model in models_by_provider:
+            for model in models or [default_model]:
+                data = qualified_model(name, model)
+                self.ai_model_selector.addItem(f"{model or '(padrão)'} — {name}" if several else (model or name), data)
+                if default_data is None and (model == default_model or default_model is None):
+                    default_data = data
+        index = self.ai_model_selector.findData(current) if current else -1
+        if index < 0 and default_data is not None:
+            index = self.ai_model_selector.findData(default_data)
+        self.ai_model_selector.setCurrentIndex(max(0, index))
+        self.ai_model_selector.setEnabled(self.ai_model_selector.count() > 0)
+        self.ai_model_selector.blockSignals(False)
+
+    def _handle_ai_models_refreshed(self, models: list):
+        """Atualiza o seletor com a lista de modelos obtida em segundo plano, mantendo a seleção."""
+        if self.ai_router is None or not models:
+            return
+        self._populate_model_selector()
+
+    def _handle_ai_terminal_output(self, job_id: int, command_executed: str, output: str):
         # Este método é chamado quando um comando executado pelo AITerminalWidget termina.
-        # A saída já foi mostrada no AITerminalWidget.
-        # Agora, podemos informar a IA (via chat) sobre o resultado.
-        
-        # Limitar o tamanho da saída para não sobrecarregar o chat ou o próximo prompt da IA
-        max_output_len = 500 
-        truncated_output = output
-        if len(output) > max_output_len:
-            truncated_output = output[:max_output_len] + "\n... (saída truncada)"
+        # A saída completa já foi mostrada no AITerminalWidget; no chat fica um resumo.
+        job = self.ai_terminal.get_job(job_id)
+        status = ""
+        if job is not None and job.record is not None:
+            status = f" (código de saída {job.record.exit_code}, {job.record.duration:.1f}s)"
+        if job is not None and job.state != JOB_DONE:
+            status += f" [{job.state}]"
+        self.chat_display_area.appendPlainText(
+            f"Aura IA (Feedback do Terminal): Comando '{command_executed}' executado no meu terminal{status}. "
+            f"Saída:\n{compress_output(output, 500)}"
+        )
+        print(f"Comando da IA '{command_executed}' (tarefa {job_id}) finalizado. Saída capturada.")
 
-        feedback_to_ia = f"Comando '{command_executed}' executado no meu terminal. Saída:\n{truncated_output}"
-        
-        self.chat_display_area.appendPlainText(f"Aura IA (Feedback do Terminal): {feedback_to_ia}")
-        QApplication.processEvents()
-
-        # Opcional: Enviar este feedback de volta para a IA como uma nova mensagem de "usuário" (ou sistema)
-        # para que ela possa continuar a conversa baseada na saída do terminal.
-        # Por agora, apenas exibimos no chat.
-        #
-        # Se quisermos que a IA reaja à saída, faríamos algo como:
-        # self.chat_history_for_ia.append({"role": "user", "content": feedback_to_ia}) # Ou role: system
-        # # E então, talvez, pedir à IA para analisar ou prosseguir:
-        # # self._request_ia_chat_completion("Analise a saída do comando anterior e me diga o que fazer a seguir.")
-        #
-        # Por enquanto, vamos manter simples e apenas logar.
-        print(f"Comando da IA '{command_executed}' finalizado. Saída capturada.")
+        # As saídas de todas as chamadas de uma resposta voltam à IA num só pedido de seguimento
+        call_id = self._agent_terminal_calls.pop(job_id, None)
+        if job is None or call_id is None or not self.agent_loop.owns(call_id):
+            return
+        step_complete = self.agent_loop.add_result(call_id, command_executed, output, exit_code=job.exit_code,
+                                                   state=job.state, seconds=job.run_seconds)
+        if step_complete:
+            self._send_agent_feedback()
+
+    def _send_agent_feedback(self):
+        """Envia ao modelo, num só pedido, os resultados das chamadas de ferramentas do passo que terminou."""
+        if not self.ai_provider:
+            self._stop_agent_loop("IA indisponível")
+            return
+        step = self.agent_loop.current_step
+        self.chat_display_area.appendPlainText(
+            f"Aura IA: (a enviar {len(step.commands)} resultado(s) do passo {step.number} de volta ao modelo)"
+        )
+        self.agent_loop.request_sent()
+        self._agent_request_id = self._submit_ai_request(self.agent_loop.build_feedback())
+
+    def _handle_agent_deadline(self):
+        # Passou o limite de tempo do ciclo: parar já, com o pedido ao modelo que estiver pendente
+        if not self.agent_loop.running:
+            return
+        request_id = self._agent_request_id
+        self.chat_display_area.appendPlainText(f"Aura IA: (Ciclo de comandos interrompido: {STOP_MAX_SECONDS})")
+        self._stop_agent_loop(STOP_MAX_SECONDS)
+        if request_id is not None:
+            self.ai_requests.cancel(request_id)
+
+    def _stop_agent_loop(self, reason: str):
+        """Termina o ciclo de comandos em curso e cancela as chamadas dele que ainda não acabaram."""
+        self._agent_deadline_timer.stop()
+        if not self.agent_loop.running:
+            return
+        pending_calls = set(self.agent_loop.pending_job_ids())
+        self.agent_loop.stop(reason)
+        self._agent_request_id = None
+        for job_id, call_id in list(self._agent_terminal_calls.items()):
+            if call_id in pending_calls:
+                self.ai_terminal.cancel_job(job_id)
+                del self._agent_terminal_calls[job_id]
+        for search_id, search in list(self._agent_searches.items()):
+            if search["call"] in pending_calls:
+                self.code_indexer.cancel_search(search_id)
+                del self._agent_searches[search_id]
+        for call_id in pending_calls:
+            self.tool_runner.cancel(call_id)
+        step = self.agent_loop.current_step
+        if step is not None and not step.feedback_sent:
+            # Passo interrompido: as chamadas nativas dele ficam respondidas no histórico
+            for message in self.agent_loop.build_feedback(reason):
+                self.chat_history_for_ia.append(message)
+        if self.agent_loop.steps:
+            self._report_agent_loop()
+
+    def _report_agent_loop(self):
+        summary = self.agent_loop.summary()
+        self.statusBar().showMessage(f"Ciclo de comandos: {summary}", 10000)
+        print(f"Ciclo de comandos da IA: {summary}")
+        for step in self.agent_loop.trace():
+            print(f"  passo {step['step']}: {step['commands']} comando(s), modelo {step['model_seconds']:.2f}s, "
+                  f"terminal {step['terminal_seconds']:.2f}s")
+
+    def _show_agent_trace(self):
+        if not self.agent_loop.steps:
+            self.chat_display_area.appendPlainText("Aura IA: (Nenhum ciclo de comandos registado)")
+            return
+        self.chat_display_area.appendPlainText(f"Ciclo de comandos: {self.agent_loop.summary()}")
+        for step in self.agent_loop.trace():
+            command_times = ", ".join(f"{seconds:.1f}s" for seconds in step["command_seconds"])
+            self.chat_display_area.appendPlainText(
+                f"  Passo {step['step']}: modelo {step['model_seconds']:.1f}s, terminal {step['terminal_seconds']:.1f}s "
+                f"({step['commands']} comando(s): {command_times})"
+            )
 
     def _ai_terminal_ready_for_command(self):
-        # Este sinal indica que o terminal da IA está pronto para um novo comando.
-        # Podemos usar isso para gerenciar um fluxo de comandos da IA, se necessário.
-        # Por agora, apenas um log.
-        print("Terminal da IA está pronto para o próximo comando.")
-        # Poderíamos ter uma fila de comandos da IA aqui, ou um estado que indica
-        # se a IA está esperando para executar um comando.
\ No newline at end of file
+        # A fila do terminal da IA esvaziou e nenhum comando está a correr
+        self.statusBar().showMessage("Terminal da IA: pronto", 5000)
+
+    def _ai_terminal_queue_changed(self, queued: int, running: int):
+        if queued or running:
+            self.statusBar().showMessage(f"Terminal da IA: {running} em execução, {queued} na fila")
+
+    def closeEvent(self, event):
+        self._deferred_startup_started = True # Fechada antes de acabar o arranque: não iniciar shells nem índices
+        # Descartar respostas pendentes; chamadas já em curso terminam em segundo plano
+        self._stop_agent_loop("janela fechada")
+        self.tool_runner.cancel()
+        self.project_indexer.cancel()
+        self.code_indexer.shutdown()
+        self._cancel_pending_retrieval()
+        self.retrieval_indexer.shutdown()
+        self.file_watcher.stop()
+        self.ai_requests.cancel_all()
+        self.event_loop_probe.stop()
+        self._export_trace_on_close()
+        instruments.set_log_file(None)
+        super().closeEvent(event)
@@ -1,161 +1,469 @@
-from PySide6.QtWidgets import QPlainTextEdit, QApplication
-from PySide6.QtCore import QProcess, Qt, Signal
-from PySide6.QtGui import QFont, QTextCursor, QColor
-
-class AITerminalWidget(QPlainTextEdit):
-    # Sinal emitido quando um comando termina de executar e sua saída (parcial ou total) está disponível
-    # Poderia emitir (str: command, str: output, int: exit_code)
-    command_output_ready = Signal(str, str) # (comando_original, saida_completa_do_comando)
-    # Sinal para quando o prompt estiver pronto para um novo comando da IA
+import os
+import shlex
+import time
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QSocketNotifier, QTimer, Signal
+
+from aura_ide.core.command_queue import (
+    DEFAULT_COMMAND_TIMEOUT, JOB_CANCELLED, JOB_FAILED, JOB_TIMED_OUT, PRIORITY_NORMAL,
+    CommandJob, CommandQueue, is_read_only_command,
+)
+from aura_ide.core.terminal import TerminalSession, strip_ansi
+from aura_ide.ui.widgets.terminal_view import TerminalView
+
+MAX_CAPTURED_OUTPUT_CHARS = 64 * 1024 # Saída guardada para a IA; o resto só aparece no terminal
+DEFAULT_SHELL_POOL_SIZE = 4 # Shell visível + até 3 shells auxiliares (ocultos) para comandos em paralelo
+KILL_GRACE_MS = 2000 # Depois do Ctrl+C por tempo esgotado, espera isto antes de matar o shell
+MAX_FINISHED_JOBS = 200 # Tarefas terminadas que ficam disponíveis em get_job()
+NOTE_PREVIEW_LINES = 20 # Linhas da saída de um shell auxiliar repetidas no terminal visível
+PROMPT_POLL_MS = 2 # Espera pelo readline antes de escrever o comando (ver _ShellRunner._write_when_prompted)
+PROMPT_WAIT_SECONDS = 0.5
+BACKGROUND_SHELL_COLUMNS = 200
+BACKGROUND_SCROLLBACK_LINES = 1000
+
+AI_SHELL_ENV = {"AURA_PS1": "\\w# IA $ ", "AURA_NO_HISTORY": "1"}
+# Os shells auxiliares não leem o ~/.bashrc: arrancam em milissegundos e herdam o ambiente do IDE
+BACKGROUND_SHELL_ENV = {"AURA_NO_HISTORY": "1", "AURA_SKIP_BASHRC": "1"}
+
+def _as_single_line(command: str) -> str:
+    """
+    Um comando com várias linhas ou TABs vira `eval $'...'`: o shell executa-o de uma vez
+    (um só par de marcadores) e o readline não trata os TABs como pedidos de completar.
+    """
+    if "\n" not in command and "\t" not in command:
+        return command
+    quoted = command.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n").replace("\t", "\\t")
+    return f"eval $'{quoted}'"
+
+class _ShellRunner:
+    """
+    Executa uma tarefa de cada vez num shell do conjunto: escreve o comando, captura a saída
+    entre os marcadores de início e fim e aplica o tempo limite (Ctrl+C e, se não bastar,
+    pede ao AITerminalWidget que mate e substitua o shell).
+    """
+
+    def __init__(self, index: int, owner):
+        self.index = index # 0 = shell visível do widget
+        self.owner = owner
+        self.session = None
+        self.notifier = None
+        self.ready = False # Só depois do primeiro prompt
+        self.job = None
+        self._started = False
+        self._captured_output = []
+        self._captured_chars = 0
+        self._timeout_timer = QTimer(owner)
+        self._timeout_timer.setSingleShot(True)
+        self._timeout_timer.timeout.connect(lambda: self.interrupt(JOB_TIMED_OUT))
+        self._kill_timer = QTimer(owner)
+        self._kill_timer.setSingleShot(True)
+        self._kill_timer.setInterval(KILL_GRACE_MS)
+        self._kill_timer.timeout.connect(lambda: owner._kill_runner(self))
+
+    @property
+    def busy(self) -> bool:
+        return self.job is not None
+
+    def run(self, job: CommandJob, command_line: str):
+        self.job = job
+        job.start(self.index)
+        self._started = False
+        self._reset_capture()
+        self.session.protocol.begin_command(job.command)
+        if job.timeout:
+            self._timeout_timer.start(int(job.timeout * 1000))
+        self._write_when_prompted((command_line + "\r").encode(), time.monotonic() + PROMPT_WAIT_SECONDS)
+
+    def _write_when_prompted(self, data: bytes, deadline: float):
+        # O marcador de fim chega antes de o readline assumir o terminal; escrito antes disso,
+        # o comando seria ecoado pelo kernel e outra vez pelo readline, depois do prompt
+        if self.job is None:
+            return
+        if not self.session.awaiting_keys() and time.monotonic() < deadline:
+            QTimer.singleShot(PROMPT_POLL_MS, lambda: self._write_when_prompted(data, deadline))
+            return
+        # Escrito como se fosse teclado: o shell ecoa o comando a seguir ao prompt
+        self.session.write(data)
+
+    def interrupt(self, state: str):
+        """Ctrl+C ao comando em curso; se o shell não voltar ao prompt a tempo, é morto."""
+        if self.job is None:
+            return
+        self.job.state = state
+        self._timeout_timer.stop()
+        self.session.write(b"\x03")
+        self._kill_timer.start()
+
+    def handle_started(self):
+        if self.job is not None and not self._started:
+            self._started = True
+            self._reset_capture() # O que veio antes era o eco da linha escrita
+
+    def handle_output(self, text: str):
+        if self.job is None:
+            return
+        if self._captured_chars < MAX_CAPTURED_OUTPUT_CHARS:
+            self._captured_output.append(text[:MAX_CAPTURED_OUTPUT_CHARS - self._captured_chars])
+        self._captured_chars += len(text) # Conta tudo, para saber se houve truncagem
+
+    def handle_finished(self, record):
+        """Marcador de fim: devolve a tarefa terminada (ou None se era só um prompt)."""
+        self.ready = True
+        if self.job is None:
+            return None
+        return self.take_job(record)
+
+    def take_job(self, record=None, note: str = "", state: str = None):
+        job, self.job = self.job, None
+        self._timeout_timer.stop()
+        self._kill_timer.stop()
+        # A saída vem do PTY com cores e '\r\n': a IA recebe só o texto
+        output = strip_ansi("".join(self._captured_output))
+        if not self._started:
+            # Sem marcador de início (p.ex. erro de sintaxe): descartar o eco da linha escrita
+            output = output.partition("\n")[2]
+        output = output.strip()
+        if self._captured_chars > MAX_CAPTURED_OUTPUT_CHARS:
+            output += "\n... (saída truncada)"
+        if note:
+            output = f"{output}\n{note}" if output else note
+        self._reset_capture()
+        if state is None:
+            job.finish(output, record)
+        else:
+            job.finish(output, record, state)
+        return job
+
+    def _reset_capture(self):
+        self._captured_output = []
+        self._captured_chars = 0
+
+class AITerminalWidget(TerminalView):
+    """
+    Terminal onde a IA executa comandos, com uma fila de tarefas.
+
+    - Cada `execute_ai_command` cria uma tarefa (CommandJob) com id, prioridade e tempo limite,
+      e devolve o id; o resultado chega por `command_output_ready(id, comando, saída)`.
+    - Comandos só de leitura (ls, cat, grep, git status...) correm em paralelo: no shell
+      visível, se estiver livre, ou num dos shells auxiliares ocultos (até `pool_size` shells).
+    - Os restantes correm sozinhos no shell visível, pela ordem da fila: podem mudar o
+      diretório atual ou os ficheiros que os outros comandos leem.
+    """
+    # Emitido quando um comando termina (também se foi interrompido ou cancelado)
+    command_output_ready = Signal(int, str, str) # (id_da_tarefa, comando_original, saida_do_comando)
+    # Emitido no fim de cada comando com o CommandRecord (código de saída, cwd, bytes, duração)
+    command_finished = Signal(object)
+    # Emitido com o CommandJob de cada tarefa terminada
+    job_finished = Signal(object)
+    # Tarefas à espera e em execução, sempre que a fila muda
+    queue_changed = Signal(int, int)
+    # Sinal para quando a fila ficar vazia e nenhum comando estiver a correr
     ready_for_next_ai_command = Signal()
 
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.process = QProcess(self)
-        self.prompt_str = "# IA $ " # Prompt diferente para o terminal da IA
+    def __init__(self, parent=None, pool_size: int = DEFAULT_SHELL_POOL_SIZE, autostart: bool = True):
+        # Tema um pouco diferente para distinguir visualmente (opcional); erros da IA em laranja/amarelo
+        super().__init__(parent, background="#2E3440", foreground="#D8DEE9", error_color="orange") # Nord theme-ish
+        self.input_enabled = False # Este terminal é apenas para saída e comandos programáticos
         self.current_path_str = "~"
-        self.unique_end_marker = "###AURA_IDE_AI_CMD_END###"
-        self.is_processing_initial_prompt = True
-        self.current_ai_command = None # Para rastrear o comando que a IA enviou
-
-        self._setup_ui()
-        self._start_shell_process()
-        self._send_initial_commands()
-
-    def _setup_ui(self):
-        font = QFont("Monospace")
-        font.setStyleHint(QFont.StyleHint.Monospace)
-        font.setPointSize(10)
-        self.setFont(font)
-        # Tema um pouco diferente para distinguir visualmente (opcional)
-        self.setStyleSheet("QPlainTextEdit { background-color: #2E3440; color: #D8DEE9; border: none; }") # Nord theme-ish
-        self.setReadOnly(True) # Este terminal é apenas para saída e comandos programáticos
-        self.setUndoRedoEnabled(False)
-
-    def _start_shell_process(self):
-        self.process.readyReadStandardOutput.connect(self._handle_shell_output)
-        self.process.finished.connect(self._handle_shell_finished)
-        self.process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
-
+        self.last_command_record = None
+        self.pool_size = max(1, pool_size)
+        self.default_timeout = DEFAULT_COMMAND_TIMEOUT
+        self._queue = CommandQueue()
+        self._next_job_id = 1
+        self._active_jobs = {} # job_id -> CommandJob (na fila ou em execução)
+        self._finished_jobs = {} # job_id -> CommandJob, as MAX_FINISHED_JOBS mais recentes
+        self._primary = _ShellRunner(0, self)
+        self._primary.session = self.session
+        self._background_runners = [] # _ShellRunner dos shells auxiliares
+        self._next_shell_index = 1
+        self._pending_notes = [] # Resumos de tarefas dos shells auxiliares, à espera do prompt
+        self._last_queue_state = (0, 0)
+
+        if autostart:
+            self.start()
+
+    # --- API ---
+
+    def start(self):
+        """Inicia o shell visível (o construtor já o faz, exceto com autostart=False)."""
         # TODO: Considerar rodar com um usuário de privilégios mínimos específico para a IA
-        shell_program = "/bin/bash" 
-        self.process.start(shell_program)
-
-        if not self.process.waitForStarted(1000):
-            self._append_output_text(f"Erro: Não foi possível iniciar o shell da IA '{shell_program}'.\n", is_error=True)
-            self.is_processing_initial_prompt = False
+        # Prompt diferente para o terminal da IA; os comandos da IA não vão para o ~/.bash_history
+        if not self.start_shell(AI_SHELL_ENV):
             self.ready_for_next_ai_command.emit() # Mesmo com erro, sinalizar que pode tentar (ou falhar)
 
-    def _send_initial_commands(self):
-        if self.process.state() == QProcess.ProcessState.Running:
-            self.is_processing_initial_prompt = True
-            self.process.write(f"pwd; echo '{self.unique_end_marker}'\n".encode())
-        else:
-            self.is_processing_initial_prompt = False
-            self._display_prompt(initial=True) # Exibe o prompt inicial
-            self.ready_for_next_ai_command.emit()
-
-
-    def _get_full_prompt(self):
-        return f"{self.current_path_str}{self.prompt_str}"
-
-    def _display_prompt(self, initial=False):
-        self.moveCursor(QTextCursor.MoveOperation.End)
-        if not initial: # Não adicionar nova linha antes do primeiro prompt
-             self.insertPlainText("\n")
-        self.insertPlainText(self._get_full_prompt())
-        self.ensureCursorVisible()
-
-    def _append_output_text(self, text, is_error=False):
-        self.moveCursor(QTextCursor.MoveOperation.End)
-        original_format = self.currentCharFormat()
-        if is_error:
-            error_format = self.currentCharFormat()
-            error_format.setForeground(QColor("orange")) # Erros da IA em laranja/amarelo
-            self.setCurrentCharFormat(error_format)
-
-        self.insertPlainText(text)
-
-        if is_error:
-            self.setCurrentCharFormat(original_format)
-        self.ensureCursorVisible()
-
-    def _handle_shell_output(self):
-        raw_data = self.process.readAllStandardOutput()
-        output_text = raw_data.data().decode(errors='replace')
-
-        if self.unique_end_marker in output_text:
-            parts = output_text.split(self.unique_end_marker, 1)
-            text_before_marker = parts[0].strip() # Saída do comando + pwd
-
-            # A saída do comando é tudo antes do último PWD
-            lines = text_before_marker.split('\n')
-            command_actual_output = ""
-            
-            if self.is_processing_initial_prompt:
-                if lines: self.current_path_str = lines[0] # PWD é a primeira linha
-                # Não há "saída de comando" real para o PWD inicial
-                self.is_processing_initial_prompt = False
+    @property
+    def current_ai_command(self):
+        """Comando em curso no shell visível (None se estiver livre)."""
+        return self._primary.job.command if self._primary.job is not None else None
+
+    def set_pool_size(self, pool_size: int):
+        """Número máximo de shells (o visível incluído). Os auxiliares a mais fecham quando ficarem livres."""
+        self.pool_size = max(1, pool_size)
+        for runner in list(self._background_runners):
+            if len(self._background_runners) < self.pool_size:
+                break
+            if not runner.busy:
+                self._close_runner(runner)
+
+    def execute_ai_command(self, command_str: str, priority: int = PRIORITY_NORMAL, timeout: float = None,
+                           parallel: bool = None):
+        """
+        Põe um comando na fila e devolve o id da tarefa (None se o comando estiver vazio).
+
+        Args:
+            priority (int): Menor = mais urgente (ver core/command_queue.py).
+            timeout (float): Segundos até o comando ser interrompido (por omissão `default_timeout`).
+            parallel (bool): Forçar (ou impedir) a execução em paralelo; por omissão decide
+                `is_read_only_command`.
+        """
+        command = command_str.strip()
+        if not command:
+            if self._is_idle():
+                self.ready_for_next_ai_command.emit() # Se comando vazio, está pronto
+            return None
+
+        job = CommandJob(self._next_job_id, command, priority,
+                         self.default_timeout if timeout is None else timeout,
+                         is_read_only_command(command) if parallel is None else parallel)
+        self._next_job_id += 1
+
+        if not self.shell_running:
+            error_msg = "Erro: Shell da IA não está rodando."
+            self.append_text(f"{command}\n{error_msg}\n", is_error=True)
+            job.finish(error_msg, state=JOB_FAILED)
+            # Sempre de forma assíncrona: quem submete recebe o id antes do resultado
+            QTimer.singleShot(0, lambda: self._complete_job(job))
+            return job.job_id
+
+        self._active_jobs[job.job_id] = job
+        self._queue.push(job)
+        self._dispatch()
+        return job.job_id
+
+    def cancel_job(self, job_id: int) -> bool:
+        """Retira a tarefa da fila ou interrompe-a (Ctrl+C) se já estiver a correr."""
+        job = self._queue.remove(job_id)
+        if job is not None:
+            job.finish("(cancelada antes de executar)", state=JOB_CANCELLED)
+            self._complete_job(job)
+            self._dispatch()
+            return True
+        for runner in [self._primary] + self._background_runners:
+            if runner.job is not None and runner.job.job_id == job_id:
+                runner.interrupt(JOB_CANCELLED)
+                return True
+        return False
+
+    def get_job(self, job_id: int):
+        """CommandJob de uma tarefa (na fila, em execução ou entre as terminadas mais recentes)."""
+        return self._active_jobs.get(job_id) or self._finished_jobs.get(job_id)
+
+    def pending_jobs(self) -> list:
+        return self._queue.jobs()
+
+    def running_jobs(self) -> list:
+        return [runner.job for runner in [self._primary] + self._background_runners if runner.job is not None]
+
+    def close_session(self):
+        for runner in list(self._background_runners):
+            self._close_runner(runner)
+        super().close_session()
+
+    # --- Ganchos do TerminalView (shell visível) ---
+
+    def _handle_command_started(self):
+        self._primary.handle_started()
+
+    def _handle_shell_output_text(self, text):
+        self._primary.handle_output(text)
+
+    def _handle_command_finished(self, record):
+        # O shell escreve um marcador a cada prompt (ver core/shell_protocol.py)
+        if record.cwd:
+            self.current_path_str = record.cwd
+        self._handle_runner_finished(self._primary, record)
+
+    def _handle_shell_finished(self, exit_code):
+        super()._handle_shell_finished(exit_code)
+        self._primary.ready = False
+        if self._primary.job is not None:
+            self._complete_job(self._primary.take_job(note="(o shell da IA terminou)", state=JOB_FAILED))
+        # Sem shell visível não há onde correr o resto da fila
+        while len(self._queue):
+            job = self._queue.pop()
+            job.finish("Erro: Shell da IA não está rodando.", state=JOB_FAILED)
+            self._complete_job(job)
+        self._emit_queue_state()
+        self.ready_for_next_ai_command.emit() # Pode não ser ideal, mas sinaliza o fim
+
+    # --- Escalonamento ---
+
+    def _dispatch(self):
+        """Arranca as tarefas da fila que puderem correr já."""
+        while len(self._queue):
+            job = self._queue.peek()
+            if self._primary.busy and not self._primary.job.parallel:
+                break # Um comando que pode mudar o estado corre sozinho
+            if job.parallel:
+                runner = self._idle_runner()
+                if runner is None:
+                    break
             else:
-                if len(lines) > 1:
-                    self.current_path_str = lines[-1] # Última linha é o novo PWD
-                    command_actual_output = "\n".join(lines[:-1]) # Tudo menos o último PWD
-                elif lines: # Apenas uma linha (pode ser só PWD ou saída curta)
-                    # Se a única linha for o PWD, a saída do comando é vazia
-                    if lines[0].startswith("/") or lines[0] == "~": # Heurística para PWD
-                        self.current_path_str = lines[0]
-                    else: # Saída de comando de uma linha, PWD não mudou (ou não foi pego)
-                        command_actual_output = lines[0]
-                
-                # Emitir o sinal com a saída do comando
-                if self.current_ai_command:
-                    self._append_output_text(f"{command_actual_output}\n" if command_actual_output else "\n")
-                    self.command_output_ready.emit(self.current_ai_command, command_actual_output)
-                    self.current_ai_command = None # Resetar para o próximo comando
-
-            self._display_prompt() # Mostrar novo prompt da IA
+                if self.running_jobs() or not self._primary.ready:
+                    break # Espera que os comandos em paralelo terminem
+                runner = self._primary
+            self._queue.pop()
+            self._start_job(runner, job)
+        self._emit_queue_state()
+
+    def _idle_runner(self):
+        if self._primary.ready and not self._primary.busy:
+            return self._primary # Preferir o shell visível: a saída fica à vista
+        for runner in self._background_runners:
+            if runner.ready and not runner.busy:
+                return runner
+        # Arrancar shells auxiliares para as tarefas paralelas à espera (ficam prontos no 1º prompt)
+        starting = sum(1 for runner in self._background_runners if not runner.ready)
+        wanted = self._queue.count_parallel() - starting
+        while wanted > 0 and 1 + len(self._background_runners) < self.pool_size:
+            if self._spawn_background_shell() is None:
+                break
+            wanted -= 1
+        return None
+
+    def _start_job(self, runner, job):
+        command_line = _as_single_line(job.command)
+        if runner is not self._primary:
+            # Os shells auxiliares seguem o diretório atual do shell visível
+            cwd = os.path.expanduser(self.current_path_str)
+            command_line = f"builtin cd -- {shlex.quote(cwd)} 2>/dev/null; {command_line}"
+        runner.run(job, command_line)
+
+    def _handle_runner_finished(self, runner, record):
+        job = runner.handle_finished(record)
+        if job is not None:
+            self._complete_job(job)
+        if runner is self._primary and self._pending_notes:
+            self._flush_pending_notes()
+        elif runner is not self._primary and not runner.busy and 1 + len(self._background_runners) > self.pool_size:
+            self._close_runner(runner) # O conjunto foi reduzido (set_pool_size)
+        self._dispatch()
+        if job is None and runner is self._primary and record.command is None and self._is_idle():
+            self.ready_for_next_ai_command.emit() # Primeiro prompt: o terminal está pronto
+
+    def _complete_job(self, job):
+        self._active_jobs.pop(job.job_id, None)
+        self._finished_jobs[job.job_id] = job
+        while len(self._finished_jobs) > MAX_FINISHED_JOBS:
+            del self._finished_jobs[next(iter(self._finished_jobs))]
+        if job.record is not None:
+            self.last_command_record = job.record
+            self.command_finished.emit(job.record)
+        if job.shell_index:
+            self._show_note(self._job_note(job))
+        elif job.state in (JOB_TIMED_OUT, JOB_CANCELLED):
+            prefix = "\n" if self.session.screen.cursor_col else ""
+            self.append_text(f"{prefix}[tarefa {job.job_id}: {job.state}]\n", is_error=True)
+        self.job_finished.emit(job)
+        self.command_output_ready.emit(job.job_id, job.command, job.output)
+        if self._is_idle():
             self.ready_for_next_ai_command.emit() # IA está pronta para o próximo comando
 
-            if len(parts) > 1 and parts[1].strip(): # Texto residual após marcador
-                self._append_output_text(parts[1])
-        else:
-            # Saída intermediária, apenas anexa (não emite sinal ainda)
-            self._append_output_text(output_text)
-            
-    def execute_ai_command(self, command_str: str):
-        if not command_str.strip():
-            self.ready_for_next_ai_command.emit() # Se comando vazio, está pronto
+    def _is_idle(self) -> bool:
+        return not len(self._queue) and not self.running_jobs()
+
+    def _emit_queue_state(self):
+        state = (len(self._queue), len(self.running_jobs()))
+        if state != self._last_queue_state:
+            self._last_queue_state = state
+            self.queue_changed.emit(*state)
+
+    # --- Shells auxiliares ---
+
+    def _spawn_background_shell(self):
+        runner = _ShellRunner(self._next_shell_index, self)
+        runner.session = TerminalSession(
+            rows=24, cols=BACKGROUND_SHELL_COLUMNS, max_scrollback_lines=BACKGROUND_SCROLLBACK_LINES,
+            on_command_started=runner.handle_started,
+            on_command_finished=lambda record: self._handle_runner_finished(runner, record),
+            on_output_text=runner.handle_output,
+        )
+        try:
+            runner.session.start(env_extra=BACKGROUND_SHELL_ENV, cwd=os.path.expanduser(self.current_path_str))
+        except OSError as e:
+            print(f"AVISO: Não foi possível iniciar um shell auxiliar da IA: {e}")
+            return None
+        self._next_shell_index += 1
+        runner.notifier = QSocketNotifier(runner.session.fileno(), QSocketNotifier.Type.Read, self)
+        runner.notifier.activated.connect(lambda *args: self._read_background_shell(runner))
+        self._background_runners.append(runner)
+        return runner
+
+    def _read_background_shell(self, runner):
+        try:
+            result = runner.session.read_available()
+        except OSError as e:
+            print(f"Erro ao ler de um shell auxiliar da IA: {e}")
+            result = None
+        if result is None and runner in self._background_runners:
+            job = runner.take_job(note="(o shell auxiliar terminou)", state=JOB_FAILED) if runner.busy else None
+            self._close_runner(runner)
+            if job is not None:
+                self._complete_job(job)
+            self._dispatch()
+
+    def _kill_runner(self, runner):
+        """O comando não respondeu ao Ctrl+C: matar o shell e substituí-lo."""
+        if not runner.busy:
             return
-
-        if self.process.state() != QProcess.ProcessState.Running:
-            error_msg = "Erro: Shell da IA não está rodando."
-            self._append_output_text(f"{self._get_full_prompt()}{command_str}\n{error_msg}\n", is_error=True)
-            self.command_output_ready.emit(command_str, error_msg)
-            self._display_prompt()
-            self.ready_for_next_ai_command.emit()
+        job = runner.take_job(note=f"(terminado à força: {runner.job.state})")
+        if runner is self._primary:
+            TerminalView.close_session(self)
+            runner.ready = False
+            self.session.protocol.begin_command(None)
+            self._complete_job(job)
+            self.append_text("[o shell da IA foi reiniciado]\n", is_error=True)
+            self.start_shell(AI_SHELL_ENV)
+        else:
+            self._close_runner(runner)
+            self._complete_job(job)
+        self._dispatch()
+
+    def _close_runner(self, runner):
+        runner.notifier.setEnabled(False)
+        runner.notifier.deleteLater()
+        runner.session.close()
+        self._background_runners.remove(runner)
+
+    # --- Resumos no terminal visível ---
+
+    def _job_note(self, job) -> str:
+        lines = job.output.splitlines()
+        preview = "\n".join(lines[:NOTE_PREVIEW_LINES])
+        if len(lines) > NOTE_PREVIEW_LINES:
+            preview += f"\n... ({len(lines) - NOTE_PREVIEW_LINES} linhas a mais)"
+        status = f"código {job.exit_code}" if job.exit_code is not None else job.state
+        note = f"[tarefa {job.job_id} · shell {job.shell_index}] $ {job.command}\n"
+        if preview:
+            note += preview + "\n"
+        return note + f"[{status}, {job.run_seconds:.1f}s]\n"
+
+    def _show_note(self, note: str):
+        if self._primary.busy or not self._primary.ready:
+            self._pending_notes.append(note) # Não misturar com a saída do comando em curso
             return
-
-        self.current_ai_command = command_str.strip()
-        # Mostrar o comando que a IA está executando
-        self.moveCursor(QTextCursor.MoveOperation.End)
-        self.insertPlainText(f"{self.current_ai_command}\n") # Ecoar o comando da IA
-        self.ensureCursorVisible()
-        QApplication.processEvents() # Atualizar UI
-
-        full_shell_command = f"{self.current_ai_command}; pwd; echo '{self.unique_end_marker}'\n"
-        self.process.write(full_shell_command.encode())
-
-
-    def _handle_shell_finished(self, exitCode, exitStatus):
-        msg = f"\nProcesso do shell da IA terminado (Código: {exitCode}, Status: {exitStatus}).\n"
-        self._append_output_text(msg, is_error=True)
-        self.ready_for_next_ai_command.emit() # Pode não ser ideal, mas sinaliza o fim
-
-    def closeEvent(self, event):
-        if self.process.state() == QProcess.ProcessState.Running:
-            self.process.kill()
-            self.process.waitForFinished(1000)
-        super().closeEvent(event)
+        # O shell está no prompt: escrever o resumo por cima da linha do prompt e redesenhá-lo,
+        # para o cursor ficar onde o readline espera
+        screen = self.session.screen
+        prompt = screen.line_text(screen.cursor_row)[:screen.cursor_col]
+        self.append_text("\r\x1b[2K" + note + prompt)
+
+    def _flush_pending_notes(self):
+        # Chamado no marcador de fim: o prompt seguinte ainda não foi escrito
+        notes, self._pending_notes = self._pending_notes, []
+        prefix = "\n" if self.session.screen.cursor_col else ""
+        self.append_text(prefix + "".join(notes))
 
 # Bloco para teste isolado
 if __name__ == '__main__':
@@ -165,27 +473,26 @@ if __name__ == '__main__':
     ai_terminal.resize(700, 300)
     ai_terminal.show()
 
+    started_at = []
+
     def run_test_commands():
-        print("Teste: Enviando 'ls -l'")
-        ai_terminal.execute_ai_command("ls -l")
-
-    def handle_output(cmd, output):
-        print(f"Saída do comando '{cmd}':\n---\n{output}\n---")
-        if cmd == "ls -l":
-            print("Teste: Enviando 'echo \"Olá do Terminal da IA\"'")
-            ai_terminal.execute_ai_command("echo \"Olá do Terminal da IA\"")
-        elif cmd.startswith("echo"):
-            print("Teste: Fim dos comandos de teste.")
-            # app.quit()
+        started_at.append(time.monotonic())
+        print("Teste: Enviando três sondagens em paralelo e um comando exclusivo")
+        for command in ("sleep 1; ls -l", "sleep 1; uname -a", "sleep 1; echo \"Olá do Terminal da IA\""):
+            ai_terminal.execute_ai_command(command)
+        ai_terminal.execute_ai_command("cd /tmp && pwd")
+
+    def handle_output(job_id, cmd, output):
+        print(f"Saída da tarefa {job_id} '{cmd}' ({time.monotonic() - started_at[0]:.1f}s):\n---\n{output}\n---")
 
     def ready_for_next():
         print("Terminal da IA pronto para o próximo comando.")
 
     ai_terminal.command_output_ready.connect(handle_output)
     ai_terminal.ready_for_next_ai_command.connect(ready_for_next)
-    
+
     # Usar uma lista para encapsular o estado do flag
-    initial_prompt_processed_container = [False] 
+    initial_prompt_processed_container = [False]
 
     def on_first_ready():
         # Acessar e modificar o conteúdo da lista
@@ -201,4 +508,4 @@ if __name__ == '__main__':
 
     ai_terminal.ready_for_next_ai_command.connect(on_first_ready)
 
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
@@ -0,0 +1,133 @@
+from PySide6.QtGui import QKeySequence, QTextCursor
+from PySide6.QtWidgets import QPlainTextEdit
+
+from aura_ide.core.editor import TextBuffer
+
+PARAGRAPH_SEPARATOR = "\u2029" # Como o QTextCursor.selectedText() devolve as quebras de linha
+
+
+class CodeEditor(QPlainTextEdit):
+    """
+    Editor de código cujo conteúdo é também mantido num TextBuffer (core/editor.py).
+
+    O QTextDocument continua a tratar do desenho e do cursor; cada alteração que ele
+    reporta (`contentsChange`) é repetida no buffer, que fica com o texto, o índice de
+    linhas e o histórico. Desfazer/refazer vem do buffer (o do documento está desligado,
+    o que evita guardar as edições duas vezes), e `snapshot()` dá uma vista imutável do
+    texto que pode ser lida fora da thread da UI.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.buffer = TextBuffer()
+        self._syncing = False # True enquanto o próprio editor altera o documento
+        super().setUndoRedoEnabled(False)
+        self.document().contentsChange.connect(self._mirror_change)
+        self.cursorPositionChanged.connect(self._cursor_moved)
+        self._expected_position = None
+
+    def snapshot(self):
+        return self.buffer.snapshot()
+
+    def setPlainText(self, text: str):
+        self._syncing = True
+        try:
+            super().setPlainText(text)
+        finally:
+            self._syncing = False
+        self.buffer.load(text)
+
+    def clear(self):
+        self.setPlainText("")
+
+    def append_text(self, text: str):
+        """Acrescenta texto no fim (carregamento de arquivos; depois, `buffer.clear_history()`)."""
+        self._syncing = True
+        try:
+            cursor = QTextCursor(self.document())
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText(text)
+        finally:
+            self._syncing = False
+        self.buffer.insert(len(self.buffer), text)
+
+    def apply_edits(self, edits: list):
+        """
+        Aplica (deslocamento, caracteres_removidos, texto), por ordem, como uma só edição a
+        desfazer e sem mover o cursor (recarregar um arquivo que mudou no disco).
+        """
+        if not edits:
+            return
+        with self.buffer.edit_group():
+            for offset, removed, text in edits:
+                self.buffer.replace(offset, offset + removed, text)
+        self.buffer.break_undo_group()
+        self._replay(edits, move_cursor=False)
+
+    def go_to_line(self, line: int, column: int = 1):
+        """Põe o cursor na linha e coluna dadas (a partir de 1) e mostra-a a meio do editor."""
+        block = self.document().findBlockByNumber(max(0, min(line, self.document().blockCount()) - 1))
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + max(0, min(column - 1, block.length() - 1)))
+        self.setTextCursor(cursor)
+        self.centerCursor()
+        self.setFocus()
+
+    def undo(self):
+        self._replay(self.buffer.undo())
+
+    def redo(self):
+        self._replay(self.buffer.redo())
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.StandardKey.Undo):
+            if not self.isReadOnly():
+                self.undo()
+            return
+        if event.matches(QKeySequence.StandardKey.Redo):
+            if not self.isReadOnly():
+                self.redo()
+            return
+        super().keyPressEvent(event)
+
+    # --- Interno ---
+
+    def _mirror_change(self, position: int, removed: int, added: int):
+        if self._syncing:
+            return
+        document = self.document()
+        cursor = QTextCursor(document)
+        cursor.setPosition(position)
+        cursor.setPosition(min(position + added, document.characterCount() - 1), QTextCursor.MoveMode.KeepAnchor)
+        text = cursor.selectedText().replace(PARAGRAPH_SEPARATOR, "\n")
+        if removed == added and self.buffer.text(position, position + removed) == text:
+            return # Só mudou a formatação (p.ex. realce de sintaxe)
+        self.buffer.replace(position, position + removed, text)
+        self._expected_position = position + len(text)
+        if len(self.buffer) != document.characterCount() - 1:
+            # O documento reportou a alteração de forma inesperada: volta a copiar tudo
+            print(f"AVISO: TextBuffer dessincronizado do documento ({len(self.buffer)} vs {document.characterCount() - 1}); a recarregar.")
+            self.buffer.load(self.toPlainText())
+
+    def _cursor_moved(self):
+        # Mover o cursor (clique, setas) termina o grupo de digitação atual
+        if self.textCursor().position() != self._expected_position:
+            self.buffer.break_undo_group()
+        self._expected_position = None
+
+    def _replay(self, changes: list, move_cursor: bool = True):
+        if not changes:
+            return
+        self._syncing = True
+        try:
+            cursor = QTextCursor(self.document())
+            cursor.beginEditBlock()
+            for offset, removed, text in changes:
+                cursor.setPosition(offset)
+                cursor.setPosition(offset + removed, QTextCursor.MoveMode.KeepAnchor)
+                cursor.insertText(text)
+            cursor.endEditBlock()
+        finally:
+            self._syncing = False
+        if move_cursor:
+            self.setTextCursor(cursor)
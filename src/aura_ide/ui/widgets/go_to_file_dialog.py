@@ -0,0 +1,130 @@
+import os
+import time
+
+from PySide6.QtCore import QEvent, Qt, Signal
+from PySide6.QtGui import QFont, QFontMetrics
+from PySide6.QtWidgets import (
+    QDialog, QLabel, QLineEdit, QListWidget, QListWidgetItem, QStyle, QStyledItemDelegate, QVBoxLayout,
+)
+
+from aura_ide.core.project_index import DEFAULT_MAX_RESULTS
+
+_POSITIONS_ROLE = Qt.ItemDataRole.UserRole + 1
+_NAVIGATION_KEYS = (Qt.Key.Key_Up, Qt.Key.Key_Down, Qt.Key.Key_PageUp, Qt.Key.Key_PageDown)
+
+
+class _MatchDelegate(QStyledItemDelegate):
+    """Desenha o caminho com os caracteres encontrados a negrito."""
+
+    def paint(self, painter, option, index):
+        self.initStyleOption(option, index)
+        text = option.text
+        option.text = ""
+        style = option.widget.style() if option.widget is not None else None
+        if style is not None:
+            style.drawControl(QStyle.ControlElement.CE_ItemViewItem, option, painter, option.widget)
+        positions = set(index.data(_POSITIONS_ROLE) or ())
+        normal_font = QFont(option.font)
+        bold_font = QFont(option.font)
+        bold_font.setBold(True)
+        selected = option.state & QStyle.StateFlag.State_Selected
+        painter.save()
+        painter.setPen(option.palette.highlightedText().color() if selected else option.palette.text().color())
+        x = option.rect.x() + 4
+        baseline = option.rect.y() + (option.rect.height() + QFontMetrics(normal_font).ascent()
+                                      - QFontMetrics(normal_font).descent()) // 2
+        start = 0
+        while start < len(text):
+            bold = start in positions
+            end = start + 1
+            while end < len(text) and (end in positions) == bold:
+                end += 1
+            font = bold_font if bold else normal_font
+            painter.setFont(font)
+            painter.drawText(x, baseline, text[start:end])
+            x += QFontMetrics(font).horizontalAdvance(text[start:end])
+            start = end
+        painter.restore()
+
+
+class GoToFileDialog(QDialog):
+    """
+    Paleta "ir para arquivo" (Ctrl+P): pesquisa difusa no índice do projeto
+    (core/project_index.py) a cada tecla. Setas escolhem, Enter abre, Esc fecha.
+    """
+    file_chosen = Signal(str) # Caminho absoluto
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Ir para Arquivo")
+        self.resize(700, 420)
+        self.index = None
+        self._indexing = False
+
+        layout = QVBoxLayout(self)
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Nome do arquivo (com '/' pesquisa também no diretório)")
+        self.query_input.textChanged.connect(self._update_results)
+        self.query_input.returnPressed.connect(self._choose_current)
+        self.query_input.installEventFilter(self)
+        layout.addWidget(self.query_input)
+
+        self.results_list = QListWidget()
+        self.results_list.setItemDelegate(_MatchDelegate(self.results_list))
+        self.results_list.setUniformItemSizes(True)
+        self.results_list.itemActivated.connect(self._choose_current)
+        layout.addWidget(self.results_list, stretch=1)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+    def set_index(self, index, indexing: bool = False):
+        """Índice a pesquisar (None enquanto ainda não há nenhum); `indexing` = há uma atualização em curso."""
+        self.index = index
+        self._indexing = indexing
+        if self.isVisible():
+            self._update_results()
+
+    def open_palette(self):
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.query_input.setFocus()
+        self.query_input.selectAll()
+        self._update_results()
+
+    def eventFilter(self, obj, event):
+        # As setas no campo de pesquisa movem a seleção na lista
+        if obj is self.query_input and event.type() == QEvent.Type.KeyPress and event.key() in _NAVIGATION_KEYS:
+            self.results_list.keyPressEvent(event)
+            return True
+        return super().eventFilter(obj, event)
+
+    def _update_results(self):
+        self.results_list.clear()
+        if self.index is None:
+            self.status_label.setText("A indexar o projeto...")
+            return
+        started = time.perf_counter()
+        matches = self.index.search(self.query_input.text(), DEFAULT_MAX_RESULTS)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for match in matches:
+            item = QListWidgetItem(match.path)
+            item.setData(_POSITIONS_ROLE, match.positions)
+            item.setData(Qt.ItemDataRole.UserRole, os.path.join(self.index.root, match.path))
+            self.results_list.addItem(item)
+        if matches:
+            self.results_list.setCurrentRow(0)
+        status = f"{len(self.index)} arquivos no índice"
+        if self.query_input.text().strip():
+            status += f" · {len(matches)} resultados em {elapsed_ms:.1f} ms"
+        if self._indexing:
+            status += " · a atualizar..."
+        self.status_label.setText(status)
+
+    def _choose_current(self, *args):
+        item = self.results_list.currentItem()
+        if item is None:
+            return
+        self.hide()
+        self.file_chosen.emit(item.data(Qt.ItemDataRole.UserRole))
@@ -0,0 +1,174 @@
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QFont, QGuiApplication, QKeySequence, QPainter
+from PySide6.QtWidgets import QAbstractScrollArea
+
+TEXT_MARGIN = 4
+TAB_SIZE = 8
+MAX_COPY_LINES = 100000 # Cópia de uma seleção enorme: só as primeiras linhas
+
+
+class LargeFileView(QAbstractScrollArea):
+    """
+    Visualizador só de leitura para arquivos grandes (core/file_manager.MappedTextFile).
+
+    Cada repaint lê do mmap apenas as linhas visíveis; o arquivo nunca é decodificado
+    inteiro, pelo que abrir e percorrer um log de centenas de MB custa o mesmo que um
+    pequeno. Clique (e Shift+clique) seleciona linhas; Ctrl+C copia-as.
+    """
+
+    def __init__(self, parent=None, background: str = "#ffffff", foreground: str = "#202020"):
+        super().__init__(parent)
+        self._file = None
+        self._background = QColor(background)
+        self._foreground = QColor(foreground)
+        self._gutter_color = QColor("#888888")
+        self._selection_color = QColor("#cde3ff")
+        self._selection = None # (primeira_linha, última_linha)
+        self._selection_anchor = None
+        self._longest_line_seen = 0
+
+        font = QFont("Monospace")
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        font.setPointSize(10)
+        self.setFont(font)
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+
+    @property
+    def mapped_file(self):
+        return self._file
+
+    def set_file(self, mapped_file):
+        """Mostra um MappedTextFile já indexado. O anterior (se houver) é fechado."""
+        self.clear()
+        self._file = mapped_file
+        self._update_scrollbars()
+        self.verticalScrollBar().setValue(0)
+        self.viewport().update()
+
+    def clear(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._selection = None
+        self._selection_anchor = None
+        self._longest_line_seen = 0
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def go_to_line(self, line: int):
+        """Desloca a vista para a linha `line` (0 = primeira) e seleciona-a."""
+        if self._file is None:
+            return
+        line = max(0, min(line, self._file.line_count - 1))
+        self._selection = (line, line)
+        self._selection_anchor = line
+        self.verticalScrollBar().setValue(max(0, line - self._visible_rows() // 2))
+        self.viewport().update()
+
+    def selected_text(self) -> str:
+        if self._file is None or self._selection is None:
+            return ""
+        first, last = self._selection
+        return "\n".join(self._file.lines(first, min(last - first + 1, MAX_COPY_LINES)))
+
+    # --- Eventos ---
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.StandardKey.Copy):
+            text = self.selected_text()
+            if text:
+                QGuiApplication.clipboard().setText(text)
+            return
+        bar = self.verticalScrollBar()
+        key = event.key()
+        control = event.modifiers() & Qt.KeyboardModifier.ControlModifier
+        if key == Qt.Key.Key_Up:
+            bar.setValue(bar.value() - 1)
+        elif key == Qt.Key.Key_Down:
+            bar.setValue(bar.value() + 1)
+        elif key == Qt.Key.Key_PageUp:
+            bar.setValue(bar.value() - bar.pageStep())
+        elif key == Qt.Key.Key_PageDown:
+            bar.setValue(bar.value() + bar.pageStep())
+        elif key == Qt.Key.Key_Home and control:
+            bar.setValue(bar.minimum())
+        elif key == Qt.Key.Key_End and control:
+            bar.setValue(bar.maximum())
+        else:
+            super().keyPressEvent(event)
+
+    def mousePressEvent(self, event):
+        if self._file is None or event.button() != Qt.MouseButton.LeftButton:
+            return
+        line = min(self._file.line_count - 1, self.verticalScrollBar().value() + int(event.position().y()) // self._line_height())
+        if event.modifiers() & Qt.KeyboardModifier.ShiftModifier and self._selection_anchor is not None:
+            self._selection = (min(self._selection_anchor, line), max(self._selection_anchor, line))
+        else:
+            self._selection_anchor = line
+            self._selection = (line, line)
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbars()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(self.viewport().rect(), self._background)
+        if self._file is None:
+            return
+        line_height = self._line_height()
+        char_width = self._char_width()
+        ascent = self.fontMetrics().ascent()
+        first = self.verticalScrollBar().value()
+        lines = self._file.lines(first, self._visible_rows() + 1)
+        gutter_width = self._gutter_width()
+        x_offset = gutter_width + TEXT_MARGIN - self.horizontalScrollBar().value() * char_width
+        longest = self._longest_line_seen
+
+        for row, text in enumerate(lines):
+            line = first + row
+            y = row * line_height
+            if self._selection is not None and self._selection[0] <= line <= self._selection[1]:
+                painter.fillRect(0, y, self.viewport().width(), line_height, self._selection_color)
+            painter.setPen(self._gutter_color)
+            painter.drawText(TEXT_MARGIN, y + ascent, str(line + 1).rjust(len(str(self._file.line_count))))
+            if "\t" in text:
+                text = text.expandtabs(TAB_SIZE)
+            longest = max(longest, len(text))
+            painter.setPen(self._foreground)
+            painter.drawText(x_offset, y + ascent, text)
+        painter.setPen(self._gutter_color)
+        painter.drawLine(gutter_width, 0, gutter_width, self.viewport().height())
+
+        if longest > self._longest_line_seen:
+            # A largura total só é conhecida à medida que as linhas são vistas
+            self._longest_line_seen = longest
+            self._update_scrollbars()
+
+    # --- Interno ---
+
+    def _char_width(self) -> int:
+        return max(1, self.fontMetrics().horizontalAdvance("M"))
+
+    def _line_height(self) -> int:
+        return max(1, self.fontMetrics().lineSpacing())
+
+    def _visible_rows(self) -> int:
+        return max(1, self.viewport().height() // self._line_height())
+
+    def _gutter_width(self) -> int:
+        digits = len(str(self._file.line_count)) if self._file is not None else 1
+        return 2 * TEXT_MARGIN + digits * self._char_width()
+
+    def _update_scrollbars(self):
+        rows = self._visible_rows()
+        v_bar = self.verticalScrollBar()
+        v_bar.setRange(0, max(0, (self._file.line_count if self._file is not None else 0) - rows))
+        v_bar.setPageStep(rows)
+        text_columns = max(1, (self.viewport().width() - self._gutter_width() - TEXT_MARGIN) // self._char_width())
+        h_bar = self.horizontalScrollBar()
+        h_bar.setRange(0, max(0, self._longest_line_seen - text_columns))
+        h_bar.setPageStep(text_columns)
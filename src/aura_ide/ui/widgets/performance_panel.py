@@ -0,0 +1,136 @@
+import time
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import (
+    QDialog, QFileDialog, QHBoxLayout, QHeaderView, QLabel, QPlainTextEdit, QPushButton, QTableWidget,
+    QTableWidgetItem, QVBoxLayout,
+)
+
+from aura_ide.utils.instrumentation import TRACE_FORMAT_CHROME, TRACE_FORMAT_OTLP, instruments
+
+REFRESH_INTERVAL_MS = 1000
+RECENT_EVENTS = 50
+_HISTOGRAM_COLUMNS = ("Medida", "Amostras", "p50", "p90", "p99", "Máx.", "Unidade")
+_COUNTER_COLUMNS = ("Contador", "Total", "Por segundo", "Unidade")
+
+
+def _format_number(value) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, int) or value >= 100:
+        return f"{value:,.0f}".replace(",", " ")
+    return f"{value:.1f}" if value >= 10 else f"{value:.2f}"
+
+
+class PerformancePanel(QDialog):
+    """
+    Painel "Desempenho": percentis das medidas (utils/instrumentation.py), contadores com a
+    taxa por segundo desde a última atualização e os eventos recentes, atualizados a cada
+    segundo enquanto o painel está aberto. Exporta os intervalos como trace do Chrome
+    (chrome://tracing, ui.perfetto.dev) ou OTLP/JSON.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Desempenho")
+        self.resize(760, 560)
+        self._previous_counters = {} # nome -> (valor, instante) da última atualização
+
+        layout = QVBoxLayout(self)
+        self.histogram_table = self._create_table(_HISTOGRAM_COLUMNS)
+        layout.addWidget(self.histogram_table, stretch=3)
+        self.counter_table = self._create_table(_COUNTER_COLUMNS)
+        layout.addWidget(self.counter_table, stretch=1)
+        layout.addWidget(QLabel("Eventos recentes"))
+        self.events_view = QPlainTextEdit()
+        self.events_view.setReadOnly(True)
+        self.events_view.setMaximumBlockCount(RECENT_EVENTS)
+        layout.addWidget(self.events_view, stretch=1)
+
+        buttons = QHBoxLayout()
+        self.status_label = QLabel("")
+        buttons.addWidget(self.status_label, stretch=1)
+        export_chrome_button = QPushButton("Exportar Trace (Chrome)...")
+        export_chrome_button.clicked.connect(lambda: self._export(TRACE_FORMAT_CHROME))
+        buttons.addWidget(export_chrome_button)
+        export_otlp_button = QPushButton("Exportar OTLP...")
+        export_otlp_button.clicked.connect(lambda: self._export(TRACE_FORMAT_OTLP))
+        buttons.addWidget(export_otlp_button)
+        reset_button = QPushButton("Limpar")
+        reset_button.clicked.connect(self._reset)
+        buttons.addWidget(reset_button)
+        layout.addLayout(buttons)
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self._refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self._refresh_timer.start()
+
+    def hideEvent(self, event):
+        self._refresh_timer.stop() # Fechado não custa nada
+        super().hideEvent(event)
+
+    def refresh(self):
+        metrics = instruments.metrics()
+        histograms = [(name, snapshot) for name, snapshot in metrics["histograms"].items() if snapshot["count"]]
+        self.histogram_table.setRowCount(len(histograms))
+        for row, (name, snapshot) in enumerate(histograms):
+            values = (name, _format_number(snapshot["count"]), _format_number(snapshot["p50"]), _format_number(snapshot["p90"]),
+                      _format_number(snapshot["p99"]), _format_number(snapshot["max"]), snapshot["unit"])
+            self._set_row(self.histogram_table, row, values)
+
+        now = time.monotonic()
+        self.counter_table.setRowCount(len(metrics["counters"]))
+        for row, (name, counter) in enumerate(metrics["counters"].items()):
+            previous = self._previous_counters.get(name)
+            rate = None
+            if previous is not None and now > previous[1]:
+                rate = (counter["value"] - previous[0]) / (now - previous[1])
+            self._previous_counters[name] = (counter["value"], now)
+            self._set_row(self.counter_table, row, (name, _format_number(counter["value"]), _format_number(rate), counter["unit"]))
+
+        self.events_view.setPlainText("\n".join(
+            f"{time.strftime('%H:%M:%S', time.localtime(event['ts']))} {event['event']} "
+            + " ".join(f"{key}={value}" for key, value in event.items() if key not in ("ts", "event", "level", "thread"))
+            for event in instruments.recent_events(RECENT_EVENTS)
+        ))
+        self.status_label.setText(f"{len(instruments.spans())} intervalo(s) no trace")
+
+    # --- Interno ---
+
+    def _create_table(self, columns: tuple) -> QTableWidget:
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        return table
+
+    def _set_row(self, table: QTableWidget, row: int, values: tuple):
+        for column, value in enumerate(values):
+            item = table.item(row, column)
+            if item is None:
+                table.setItem(row, column, QTableWidgetItem(value))
+            elif item.text() != value:
+                item.setText(value)
+
+    def _export(self, trace_format: str):
+        suggested = "aura_trace.json" if trace_format == TRACE_FORMAT_CHROME else "aura_trace.otlp.json"
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar Trace", suggested, "JSON (*.json)")
+        if not path:
+            return
+        try:
+            count = instruments.export(path, trace_format)
+        except (OSError, ValueError) as e:
+            self.status_label.setText(f"Erro ao exportar: {e}")
+            return
+        self.status_label.setText(f"{count} intervalo(s) exportados para {path}")
+
+    def _reset(self):
+        instruments.reset()
+        self._previous_counters = {}
+        self.refresh()
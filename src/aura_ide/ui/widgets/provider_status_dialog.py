@@ -0,0 +1,164 @@
+import threading
+
+from PySide6.QtCore import QTimer, Signal
+from PySide6.QtWidgets import (
+    QAbstractItemView, QDialog, QHBoxLayout, QHeaderView, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from aura_ide.ai.errors import AIProviderError
+from aura_ide.ai.provider_router import CircuitBreaker
+
+REFRESH_INTERVAL_MS = 1000
+_COLUMNS = ("Provedor", "Tipo", "Modelo", "Circuito", "Latência", "Taxa de erro", "Pedidos", "Arranque")
+
+
+class ProviderStatusDialog(QDialog):
+    """
+    Estado de cada provedor de IA: circuito, latência e taxa de erro recentes (médias do
+    ProviderRouter), pedidos feitos e o tempo que levou a criar. "Medir Latência" pede uma
+    resposta mínima a todos em paralelo; "Usar Selecionado" e "Usar o Mais Rápido" emitem
+    `provider_chosen` com o nome do provedor (a janela principal muda o modelo escolhido).
+    Atualizado a cada segundo enquanto está aberto.
+    """
+    provider_chosen = Signal(str)
+    # Emitido das threads de medição: (nome, segundos ou None, erro)
+    _latency_measured = Signal(str, object, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Provedores de IA")
+        self.resize(820, 300)
+        self.router = None
+        self.specs = []
+        self._measuring = set()
+        self._last_probe = {} # nome -> texto do último resultado de "Medir Latência"
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(_COLUMNS))
+        self.table.setHorizontalHeaderLabels(_COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        self.table.doubleClicked.connect(self._use_selected)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        self.status_label = QLabel("")
+        buttons.addWidget(self.status_label, stretch=1)
+        self.measure_button = QPushButton("Medir Latência")
+        self.measure_button.clicked.connect(self.measure_latency)
+        buttons.addWidget(self.measure_button)
+        fastest_button = QPushButton("Usar o Mais Rápido")
+        fastest_button.clicked.connect(self._use_fastest)
+        buttons.addWidget(fastest_button)
+        use_button = QPushButton("Usar Selecionado")
+        use_button.clicked.connect(self._use_selected)
+        buttons.addWidget(use_button)
+        layout.addLayout(buttons)
+
+        self._latency_measured.connect(self._handle_latency_measured)
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self._refresh_timer.timeout.connect(self.refresh)
+
+    def set_providers(self, router, specs: list):
+        """O ProviderRouter ativo (ou None) e as ProviderSpec da última inicialização."""
+        self.router = router
+        self.specs = list(specs)
+        self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self._refresh_timer.start()
+
+    def hideEvent(self, event):
+        self._refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        health = self.router.health_snapshot() if self.router is not None else {}
+        models = {name: default_model for name, _, default_model in self.router.models_by_provider()} if self.router is not None else {}
+        self.table.setRowCount(len(self.specs))
+        for row, spec in enumerate(self.specs):
+            state = health.get(spec.name)
+            if spec.provider is None:
+                values = (spec.name, spec.kind, "", "indisponível", spec.error or "", "", "", self._ms(spec.init_ms))
+            elif state is None:
+                values = (spec.name, spec.kind, models.get(spec.name) or "", "", "", "", "", self._ms(spec.init_ms))
+            else:
+                latency = self._ms(state["latency_ms"]) if state["latency_ms"] is not None else "sem dados"
+                if spec.name in self._measuring:
+                    latency = "a medir..."
+                elif spec.name in self._last_probe:
+                    latency = f"{latency} ({self._last_probe[spec.name]})"
+                values = (spec.name, spec.kind, models.get(spec.name) or "", state["state"], latency,
+                          f"{state['error_rate']:.0%}", f"{state['requests'] - state['failures']}/{state['requests']}",
+                          self._ms(spec.init_ms))
+            for column, value in enumerate(values):
+                item = self.table.item(row, column)
+                if item is None:
+                    self.table.setItem(row, column, QTableWidgetItem(value))
+                elif item.text() != value:
+                    item.setText(value)
+        self.measure_button.setEnabled(self.router is not None and not self._measuring)
+
+    def measure_latency(self):
+        if self.router is None or self._measuring:
+            return
+        names = [name for name, _ in self.router.providers]
+        self._measuring = set(names)
+        self.status_label.setText("A medir a latência de todos os provedores...")
+        for name in names:
+            threading.Thread(target=self._measure_one, args=(self.router, name), name=f"aura-latency-{name}", daemon=True).start()
+        self.refresh()
+
+    # --- Interno ---
+
+    def _measure_one(self, router, name: str):
+        try:
+            self._latency_measured.emit(name, router.measure_latency(name), "")
+        except AIProviderError as e:
+            self._latency_measured.emit(name, None, str(e))
+        except Exception as e: # Provedor de um plugin com outras exceções
+            self._latency_measured.emit(name, None, f"{type(e).__name__}: {e}")
+
+    def _handle_latency_measured(self, name: str, seconds, error: str):
+        self._measuring.discard(name)
+        self._last_probe[name] = f"teste: {seconds * 1000:.0f} ms" if seconds is not None else "teste falhou"
+        if error:
+            self.status_label.setText(f"{name}: {error}")
+        elif not self._measuring:
+            self.status_label.setText("Latência medida (tempo até ao primeiro pedaço da resposta).")
+        self.refresh()
+
+    def _use_selected(self):
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
+            self.status_label.setText("Selecione um provedor na tabela.")
+            return
+        spec = self.specs[rows[0].row()]
+        if spec.provider is None:
+            self.status_label.setText(f"{spec.name} não está disponível.")
+            return
+        self.provider_chosen.emit(spec.name)
+        self.status_label.setText(f"A usar {spec.name}.")
+
+    def _use_fastest(self):
+        if self.router is None:
+            return
+        health = self.router.health_snapshot()
+        measured = [(state["latency_ms"], name) for name, state in health.items()
+                    if state["latency_ms"] is not None and state["state"] != CircuitBreaker.OPEN]
+        if not measured:
+            self.status_label.setText("Ainda não há latências: use \"Medir Latência\" primeiro.")
+            return
+        latency_ms, name = min(measured)
+        self.provider_chosen.emit(name)
+        self.status_label.setText(f"A usar {name} ({latency_ms} ms).")
+
+    def _ms(self, value) -> str:
+        return f"{value:.0f} ms" if value is not None else ""
@@ -0,0 +1,126 @@
+import os
+
+from PySide6.QtCore import Qt, QTimer, Signal
+from PySide6.QtWidgets import (
+    QCheckBox, QHBoxLayout, QLabel, QLineEdit, QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget,
+)
+
+SEARCH_DELAY_MS = 300 # Pausa na escrita antes de pesquisar
+_LOCATION_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+class SearchPanel(QWidget):
+    """
+    Painel "Pesquisar no Projeto" (Ctrl+Shift+F): texto ou regex no conteúdo dos arquivos,
+    com filtro de caminhos. Não pesquisa sozinho: emite `search_requested` e a MainWindow
+    entrega os resultados (core/code_indexer.py) com `add_matches`, à medida que chegam,
+    agrupados por arquivo.
+    """
+    search_requested = Signal(str, bool, bool, str) # (consulta ou "", regex, maiúsculas/minúsculas, caminhos)
+    match_activated = Signal(str, int, int)         # (caminho relativo, linha, coluna), a partir de 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._file_items = {} # caminho -> item do arquivo na árvore
+        self._matches = 0
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Pesquisar no conteúdo dos arquivos")
+        self.query_input.setClearButtonEnabled(True)
+        layout.addWidget(self.query_input)
+
+        options_layout = QHBoxLayout()
+        self.regex_checkbox = QCheckBox("Regex")
+        self.case_checkbox = QCheckBox("Maiúsculas/minúsculas")
+        options_layout.addWidget(self.regex_checkbox)
+        options_layout.addWidget(self.case_checkbox)
+        options_layout.addStretch(1)
+        layout.addLayout(options_layout)
+
+        self.paths_input = QLineEdit()
+        self.paths_input.setPlaceholderText("Caminhos (ex.: src/, *.py), separados por vírgulas")
+        self.paths_input.setClearButtonEnabled(True)
+        layout.addWidget(self.paths_input)
+
+        self.results_tree = QTreeWidget()
+        self.results_tree.setHeaderHidden(True)
+        self.results_tree.setUniformRowHeights(True)
+        self.results_tree.itemActivated.connect(self._activate_item)
+        layout.addWidget(self.results_tree, stretch=1)
+
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        # Pesquisa ao parar de escrever (ou já, com Enter)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self._request_search)
+        self.query_input.textChanged.connect(self._search_timer.start)
+        self.paths_input.textChanged.connect(self._search_timer.start)
+        self.query_input.returnPressed.connect(self._request_search)
+        self.paths_input.returnPressed.connect(self._request_search)
+        self.regex_checkbox.toggled.connect(self._request_search)
+        self.case_checkbox.toggled.connect(self._request_search)
+
+    def focus_query(self, text: str = ""):
+        if text:
+            self.query_input.setText(text)
+        self.query_input.setFocus()
+        self.query_input.selectAll()
+
+    def begin_search(self):
+        """Limpa os resultados anteriores (chamado quando a nova pesquisa começa)."""
+        self.results_tree.clear()
+        self._file_items.clear()
+        self._matches = 0
+        self.status_label.setText("A pesquisar...")
+
+    def add_matches(self, matches: list):
+        """Acrescenta CodeMatch (por ordem de caminho) à árvore."""
+        self.results_tree.setUpdatesEnabled(False)
+        touched = set()
+        for match in matches:
+            file_item = self._file_items.get(match.path)
+            if file_item is None:
+                file_item = QTreeWidgetItem(self.results_tree, [match.path])
+                file_item.setToolTip(0, match.path)
+                file_item.setData(0, _LOCATION_ROLE, (match.path, match.line, match.column + 1))
+                file_item.setExpanded(True)
+                self._file_items[match.path] = file_item
+            line_item = QTreeWidgetItem(file_item, [f"{match.line}: {match.text.strip()}"])
+            line_item.setData(0, _LOCATION_ROLE, (match.path, match.line, match.column + 1))
+            touched.add(file_item)
+            self._matches += 1
+        for file_item in touched:
+            file_item.setText(0, f"{file_item.toolTip(0)} ({file_item.childCount()})")
+        self.results_tree.setUpdatesEnabled(True)
+        self.status_label.setText(f"A pesquisar... {self._matches} resultado(s)")
+
+    def finish(self, stats: dict):
+        truncated = " (limite atingido)" if stats["truncated"] else ""
+        self.status_label.setText(
+            f"{stats['matches']} resultado(s){truncated} em {stats['files']} arquivo(s); "
+            f"{stats['searched_files']} de {stats['indexed_files']} arquivos lidos, {stats['seconds'] * 1000:.0f} ms")
+
+    def show_error(self, message: str):
+        self.status_label.setText(message)
+
+    def _request_search(self):
+        self._search_timer.stop()
+        query = self.query_input.text()
+        if not query:
+            self.begin_search()
+            self.status_label.setText("")
+        # Também com a consulta vazia: a MainWindow cancela a pesquisa anterior
+        self.search_requested.emit(query, self.regex_checkbox.isChecked(), self.case_checkbox.isChecked(),
+                                   self.paths_input.text())
+
+    def _activate_item(self, item, column: int):
+        location = item.data(0, _LOCATION_ROLE)
+        if location is not None:
+            path, line, column = location
+            self.match_activated.emit(path.replace("/", os.sep), line, column)
@@ -0,0 +1,282 @@
+import threading
+import time
+
+from PySide6.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, QTimer, Signal
+from PySide6.QtGui import QColor, QFont, QTextCharFormat, QTextLayout
+
+from aura_ide.core.syntax import (
+    STATE_NORMAL, TOKEN_BUILTIN, TOKEN_COMMENT, TOKEN_CONSTANT, TOKEN_DECORATOR, TOKEN_DEFINITION,
+    TOKEN_KEY, TOKEN_KEYWORD, TOKEN_NUMBER, TOKEN_STRING, TOKEN_VARIABLE,
+)
+
+SYNC_LEX_SECONDS = 0.002 # Por tecla: tokenização na thread da UI para lá das linhas visíveis
+BACKGROUND_BATCH_LINES = 500 # Linhas tokenizadas em segundo plano por cada resultado enviado
+TYPING_PAUSE_MS = 150 # A thread de fundo espera este tempo sem edições antes de continuar
+MAX_PAUSE_SECONDS = 1.0 # ...mas nunca mais do que isto seguido, para acabar mesmo com digitação contínua
+
+# tipo de token -> (cor, negrito, itálico)
+SYNTAX_COLORS = {
+    TOKEN_KEYWORD: ("#0033b3", True, False),
+    TOKEN_BUILTIN: ("#000080", False, False),
+    TOKEN_CONSTANT: ("#871094", False, False),
+    TOKEN_STRING: ("#067d17", False, False),
+    TOKEN_COMMENT: ("#8c8c8c", False, True),
+    TOKEN_NUMBER: ("#1750eb", False, False),
+    TOKEN_DEFINITION: ("#00627a", True, False),
+    TOKEN_DECORATOR: ("#9e880d", False, False),
+    TOKEN_VARIABLE: ("#871094", False, False),
+    TOKEN_KEY: ("#871094", False, False),
+}
+
+
+class _LexSignals(QObject):
+    batch = Signal(int, int, object) # (geração, primeira_linha, [estado no fim de cada linha])
+    done = Signal(int)
+
+
+class _LexTask(QRunnable):
+    """Calcula, numa thread do pool, o estado do tokenizador no fim de cada linha de uma vista do buffer."""
+
+    def __init__(self, generation: int, lexer, view, first_line: int, state: int, cancel_event: threading.Event,
+                 resume_event: threading.Event):
+        super().__init__()
+        self.generation = generation
+        self.lexer = lexer
+        self.view = view # BufferView: imutável, pode ser lida fora da thread da UI
+        self.first_line = first_line
+        self.state = state
+        self.cancel_event = cancel_event
+        self.resume_event = resume_event # Limpo enquanto o usuário escreve
+        self.signals = _LexSignals()
+
+    def run(self):
+        tokenize = self.lexer.tokenize
+        line = self.first_line
+        state = self.state
+        total = self.view.line_count
+        while line < total and not self.cancel_event.is_set():
+            # Com o GIL, tokenizar enquanto o usuário escreve atrasaria cada tecla
+            paused_until = time.monotonic() + MAX_PAUSE_SECONDS
+            while not self.resume_event.wait(0.05) and time.monotonic() < paused_until:
+                if self.cancel_event.is_set():
+                    return
+            states = []
+            for text in self.view.lines(line, BACKGROUND_BATCH_LINES):
+                state = tokenize(text, state)[1]
+                states.append(state)
+            self.signals.batch.emit(self.generation, line, states)
+            line += len(states)
+            time.sleep(0) # Cede o GIL à thread da UI entre lotes
+        if not self.cancel_event.is_set():
+            self.signals.done.emit(self.generation)
+
+
+class SyntaxHighlighter(QObject):
+    """
+    Realce de sintaxe incremental para um CodeEditor.
+
+    Em vez de um QSyntaxHighlighter (que ao abrir um arquivo tokeniza o documento inteiro
+    na thread da UI), guarda-se por linha só o estado do tokenizador no fim dessa linha:
+
+    - ao editar, volta-se a tokenizar a partir da linha editada e pára-se assim que o estado
+      no fim de uma linha coincide com o guardado (o resto do arquivo não mudou). Se isso
+      não acontecer dentro das linhas visíveis e de SYNC_LEX_SECONDS, os estados seguintes
+      são descartados e continuam a ser calculados em segundo plano;
+    - o resto do arquivo é tokenizado numa thread, a partir de um snapshot do TextBuffer;
+    - só as linhas visíveis recebem formatos (QTextLayout.setFormats), quando aparecem
+      no ecrã; os tokens não são guardados, voltam a ser calculados a partir do estado.
+    """
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.document = editor.document()
+        self.lexer = None
+        self._states = [] # Estado no fim de cada linha; None = ainda por calcular
+        self._applied = bytearray() # 1 = a linha já tem os formatos certos
+        self._dirty_from = None # Primeira linha com estado por calcular (todas as seguintes também estão)
+        self._generation = 0
+        self._cancel_event = None
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        self._tasks = {} # geração -> tarefa ainda na posse do pool
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+        self._resume_timer = QTimer(self)
+        self._resume_timer.setSingleShot(True)
+        self._resume_timer.setInterval(TYPING_PAUSE_MS)
+        self._resume_timer.timeout.connect(self._resume_event.set)
+        self._formats = {}
+        for kind, (color, bold, italic) in SYNTAX_COLORS.items():
+            text_format = QTextCharFormat()
+            text_format.setForeground(QColor(color))
+            if bold:
+                text_format.setFontWeight(QFont.Weight.Bold)
+            text_format.setFontItalic(italic)
+            self._formats[kind] = text_format
+        self.document.contentsChange.connect(self._on_contents_change)
+        editor.updateRequest.connect(self._apply_visible)
+        # O pool espera pelas tarefas ao ser destruído: cancelá-las antes
+        editor.destroyed.connect(self._cancel_all)
+        if QCoreApplication.instance() is not None:
+            QCoreApplication.instance().aboutToQuit.connect(self._cancel_all)
+
+    @property
+    def idle(self) -> bool:
+        """True quando todas as linhas têm o estado calculado."""
+        return self._dirty_from is None
+
+    def set_lexer(self, lexer):
+        """Tokenizador do documento atual (core/syntax.lexer_for_file), ou None para desligar."""
+        self._cancel_background()
+        self.lexer = lexer
+        count = self.document.blockCount() if lexer is not None else 0
+        self._states = [None] * count
+        self._applied = bytearray(count)
+        self._dirty_from = 0 if lexer is not None else None
+        if lexer is not None:
+            self._start_background()
+            self._apply_visible()
+
+    # --- Edições ---
+
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        if self.lexer is None:
+            return
+        self._resume_event.clear()
+        self._resume_timer.start()
+        document = self.document
+        count = document.blockCount()
+        first = document.findBlock(position).blockNumber()
+        last = document.findBlock(min(position + added, document.characterCount() - 1)).blockNumber()
+        added_lines = last - first
+        removed_lines = added_lines - (count - len(self._states))
+        if first < 0 or removed_lines < 0 or first + removed_lines >= len(self._states):
+            self.set_lexer(self.lexer) # Alteração que não se consegue localizar: recomeça
+            return
+        # As linhas editadas passam a "por calcular"; as restantes mantêm o estado
+        self._states[first:first + removed_lines + 1] = [None] * (added_lines + 1)
+        self._applied[first:first + removed_lines + 1] = bytes(added_lines + 1)
+        if self._dirty_from is not None:
+            if self._dirty_from > first + removed_lines:
+                self._dirty_from += added_lines - removed_lines
+            elif self._dirty_from > first:
+                self._dirty_from = first
+        self._relex_from(first)
+
+    def _relex_from(self, first: int):
+        """Tokeniza a partir de `first` até o estado convergir (ou o orçamento acabar)."""
+        states = self._states
+        if first > 0 and states[first - 1] is None:
+            self._restart_background() # A linha anterior ainda não foi calculada
+            return
+        state = states[first - 1] if first > 0 else STATE_NORMAL
+        last_visible = self._visible_range()[1]
+        deadline = time.perf_counter() + SYNC_LEX_SECONDS
+        tokenize = self.lexer.tokenize
+        block = self.document.findBlockByNumber(first)
+        line = first
+        total = len(states)
+        while line < total:
+            state = tokenize(block.text(), state)[1]
+            previous = states[line]
+            states[line] = state
+            self._applied[line] = 0
+            if previous is not None and previous == state:
+                break # Convergiu: daqui para a frente nada muda
+            line += 1
+            if line > last_visible and time.perf_counter() > deadline and line < total:
+                # Não convergiu a tempo: o resto é calculado em segundo plano
+                states[line:] = [None] * (total - line)
+                self._dirty_from = line if self._dirty_from is None else min(self._dirty_from, line)
+                break
+            block = block.next()
+        if self._dirty_from is not None:
+            self._restart_background()
+        self._apply_visible()
+
+    # --- Segundo plano ---
+
+    def _start_background(self):
+        if self._dirty_from is None:
+            return
+        first = self._dirty_from
+        state = self._states[first - 1] if first > 0 else STATE_NORMAL
+        self._generation += 1
+        self._cancel_event = threading.Event()
+        task = _LexTask(self._generation, self.lexer, self.editor.snapshot(), first, state, self._cancel_event,
+                        self._resume_event)
+        task.setAutoDelete(False)
+        task.signals.batch.connect(self._on_batch)
+        task.signals.done.connect(self._on_done)
+        self._tasks[self._generation] = task
+        self.thread_pool.start(task)
+
+    def _cancel_background(self):
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        task = self._tasks.get(self._generation)
+        if task is not None and self.thread_pool.tryTake(task):
+            self._tasks.pop(self._generation, None)
+        self._generation += 1 # Resultados ainda a caminho são ignorados
+
+    def _cancel_all(self, *args):
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+
+    def _restart_background(self):
+        self._cancel_background()
+        self._start_background()
+
+    def _on_batch(self, generation: int, first: int, states: list):
+        if generation != self._generation or first != self._dirty_from:
+            return
+        end = min(first + len(states), len(self._states))
+        self._states[first:end] = states[:end - first]
+        self._applied[first:min(end + 1, len(self._applied))] = bytes(min(end + 1, len(self._applied)) - first)
+        self._dirty_from = end if end < len(self._states) else None
+        self._apply_visible()
+
+    def _on_done(self, generation: int):
+        self._tasks.pop(generation, None)
+
+    # --- Formatos ---
+
+    def _visible_range(self):
+        """(primeira, última) linha visível; com quebra de linha a última é uma estimativa por excesso."""
+        editor = self.editor
+        first = editor.firstVisibleBlock().blockNumber()
+        rows = editor.viewport().height() // max(1, editor.fontMetrics().lineSpacing()) + 1
+        return first, min(first + rows, len(self._states) - 1)
+
+    def _apply_visible(self, *args):
+        """Aplica os formatos às linhas visíveis que ainda não os têm (só se o estado anterior já for conhecido)."""
+        if self.lexer is None or not self._states:
+            return
+        first, last = self._visible_range()
+        line = self._applied.find(0, first, last + 1)
+        if line == -1:
+            return # Chamado a cada updateRequest (p.ex. o cursor a piscar): quase sempre nada a fazer
+        block = self.document.findBlockByNumber(line)
+        changed_from = changed_to = None
+        while block.isValid() and line <= last:
+            if not self._applied[line]:
+                state = self._states[line - 1] if line > 0 else STATE_NORMAL
+                if state is not None:
+                    ranges = []
+                    for start, length, kind in self.lexer.tokenize(block.text(), state)[0]:
+                        format_range = QTextLayout.FormatRange()
+                        format_range.start = start
+                        format_range.length = length
+                        format_range.format = self._formats[kind]
+                        ranges.append(format_range)
+                    block.layout().setFormats(ranges)
+                    self._applied[line] = 1
+                    if changed_from is None:
+                        changed_from = block.position()
+                    changed_to = block.position() + block.length()
+            block = block.next()
+            line += 1
+        if changed_from is not None:
+            # Não emite contentsChange: só refaz o layout (e o desenho) destas linhas
+            self.document.markContentsDirty(changed_from, changed_to - changed_from)
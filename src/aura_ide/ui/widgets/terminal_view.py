@@ -0,0 +1,524 @@
+import time
+
+from PySide6.QtCore import Qt, QTimer, QPoint, QRect, QSocketNotifier
+from PySide6.QtGui import QColor, QFont, QKeySequence, QPainter, QGuiApplication
+from PySide6.QtWidgets import QAbstractScrollArea, QApplication
+
+from aura_ide.core.scrollback import DEFAULT_MAX_LINES
+from aura_ide.core.terminal import (
+    TerminalSession, DEFAULT_COLOR, TRUECOLOR, BOLD, DIM, ITALIC, UNDERLINE, REVERSE, HIDDEN, STRIKE
+)
+
+FRAME_INTERVAL_MS = 16 # No máximo uma atualização da vista por frame (~60 Hz)
+READ_BUDGET_SECONDS = 0.008 # Tempo máximo a ler do PTY por ativação: o ciclo de eventos nunca fica parado
+READ_BATCH_BYTES = 64 * 1024
+TEXT_MARGIN = 4
+
+# As 16 cores ANSI (normais e brilhantes)
+ANSI_COLORS = [
+    "#3f4451", "#e06c75", "#98c379", "#e5c07b", "#61afef", "#c678dd", "#56b6c2", "#d7dae0",
+    "#5c6370", "#ff7b86", "#b1e18b", "#f0d197", "#8cc8ff", "#de9df0", "#7bd4df", "#ffffff",
+]
+
+# Sequências enviadas ao shell por tecla especial: (normal, modo "application cursor keys")
+_KEY_SEQUENCES = {
+    Qt.Key.Key_Up: ("\x1b[A", "\x1bOA"),
+    Qt.Key.Key_Down: ("\x1b[B", "\x1bOB"),
+    Qt.Key.Key_Right: ("\x1b[C", "\x1bOC"),
+    Qt.Key.Key_Left: ("\x1b[D", "\x1bOD"),
+    Qt.Key.Key_Home: ("\x1b[H", "\x1bOH"),
+    Qt.Key.Key_End: ("\x1b[F", "\x1bOF"),
+    Qt.Key.Key_Insert: ("\x1b[2~", "\x1b[2~"),
+    Qt.Key.Key_Delete: ("\x1b[3~", "\x1b[3~"),
+    Qt.Key.Key_PageUp: ("\x1b[5~", "\x1b[5~"),
+    Qt.Key.Key_PageDown: ("\x1b[6~", "\x1b[6~"),
+    Qt.Key.Key_Return: ("\r", "\r"),
+    Qt.Key.Key_Enter: ("\r", "\r"),
+    Qt.Key.Key_Backspace: ("\x7f", "\x7f"),
+    Qt.Key.Key_Tab: ("\t", "\t"),
+    Qt.Key.Key_Backtab: ("\x1b[Z", "\x1b[Z"),
+    Qt.Key.Key_Escape: ("\x1b", "\x1b"),
+    Qt.Key.Key_F1: ("\x1bOP", "\x1bOP"),
+    Qt.Key.Key_F2: ("\x1bOQ", "\x1bOQ"),
+    Qt.Key.Key_F3: ("\x1bOR", "\x1bOR"),
+    Qt.Key.Key_F4: ("\x1bOS", "\x1bOS"),
+    Qt.Key.Key_F5: ("\x1b[15~", "\x1b[15~"),
+    Qt.Key.Key_F6: ("\x1b[17~", "\x1b[17~"),
+    Qt.Key.Key_F7: ("\x1b[18~", "\x1b[18~"),
+    Qt.Key.Key_F8: ("\x1b[19~", "\x1b[19~"),
+    Qt.Key.Key_F9: ("\x1b[20~", "\x1b[20~"),
+    Qt.Key.Key_F10: ("\x1b[21~", "\x1b[21~"),
+    Qt.Key.Key_F11: ("\x1b[23~", "\x1b[23~"),
+    Qt.Key.Key_F12: ("\x1b[24~", "\x1b[24~"),
+}
+
+
+def _palette_color(index: int) -> str:
+    if index < 16:
+        return ANSI_COLORS[index]
+    if index < 232: # Cubo 6x6x6
+        index -= 16
+        levels = (0, 95, 135, 175, 215, 255)
+        return "#{:02x}{:02x}{:02x}".format(levels[index // 36], levels[index // 6 % 6], levels[index % 6])
+    gray = 8 + (index - 232) * 10
+    return "#{0:02x}{0:02x}{0:02x}".format(gray)
+
+
+class TerminalView(QAbstractScrollArea):
+    """
+    Terminal sobre um pseudo-terminal (PTY), com emulação VT100/xterm (core/terminal.py).
+
+    - O PTY é lido quando o descritor tem dados (QSocketNotifier), no máximo durante
+      READ_BUDGET_SECONDS por ativação, para que o ciclo de eventos nunca fique parado.
+    - Os pedaços lidos só atualizam o modelo do ecrã; a vista redesenha no máximo uma vez
+      por frame e, se nada deslocou, apenas as linhas alteradas (registo de danos do ecrã).
+    - A vista mostra o histórico (só texto) seguido das linhas do ecrã; só as linhas
+      visíveis são desenhadas.
+    - As teclas vão para o programa (readline, vim, less...) como num terminal real;
+      Shift+PgUp/PgDn percorrem o histórico, Ctrl+Shift+C/V copiam e colam.
+
+    As subclasses chamam `start_shell` e podem reimplementar os `_handle_*`.
+    """
+
+    def __init__(self, parent=None, max_lines: int = DEFAULT_MAX_LINES, background: str = "#282c34",
+                 foreground: str = "#abb2bf", error_color: str = "red"):
+        super().__init__(parent)
+        self.input_enabled = True
+        self.session = TerminalSession(
+            max_scrollback_lines=max_lines,
+            on_command_started=self._handle_command_started,
+            on_command_finished=self._handle_command_finished,
+            on_output_text=self._handle_shell_output_text,
+        )
+        self._notifier = None
+        self._follow_output = True # Acompanhar o fim enquanto o usuário não subir
+        self._selection_anchor = None # (linha_absoluta, coluna)
+        self._selection_end = None
+        self._painted_scrollback = (0, 0) # (linhas no histórico, linhas descartadas) no último frame
+        self._painted_cursor_row = 0
+        self._color_cache = {}
+        self.set_colors(background, foreground, error_color)
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(FRAME_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush_output)
+
+        font = QFont("Monospace")
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        font.setPointSize(10)
+        self.setFont(font)
+        self._fonts = {}
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.setFrameShape(QAbstractScrollArea.Shape.NoFrame)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff) # As linhas quebram na largura
+        self.viewport().setCursor(Qt.CursorShape.IBeamCursor)
+        self.verticalScrollBar().valueChanged.connect(self._on_vertical_scroll)
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close_session)
+        self._update_scrollbars()
+
+    # --- API para as subclasses ---
+
+    def start_shell(self, env_extra: dict = None) -> bool:
+        """Inicia o bash interativo no PTY. Devolve False (e mostra o erro) se não for possível."""
+        rows, cols = self._grid_size()
+        self.session.resize(rows, cols)
+        try:
+            self.session.start(env_extra=env_extra)
+        except OSError as e:
+            self.append_text(f"Erro: Não foi possível iniciar o shell: {e}\n", is_error=True)
+            return False
+        self._notifier = QSocketNotifier(self.session.fileno(), QSocketNotifier.Type.Read, self)
+        self._notifier.activated.connect(self._read_shell_output)
+        return True
+
+    @property
+    def shell_running(self) -> bool:
+        return self.session.running
+
+    def set_colors(self, background: str, foreground: str, error_color: str):
+        self._background = QColor(background)
+        self._foreground = QColor(foreground)
+        self._error_color = QColor(error_color)
+        self._selection_color = QColor(foreground)
+        self._selection_color.setAlpha(70)
+        self._color_cache = {}
+        self.viewport().update()
+
+    def set_max_lines(self, max_lines: int):
+        self.session.scrollback.max_lines = max_lines
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def append_text(self, text: str, is_error: bool = False):
+        """Mostra uma mensagem da própria aplicação (não vem do shell)."""
+        if is_error:
+            color = self._error_color
+            text = f"\x1b[38;2;{color.red()};{color.green()};{color.blue()}m{text}\x1b[0m"
+        self.session.feed_local(text)
+        self._schedule_frame()
+
+    def feed_output(self, data: bytes):
+        """Processa bytes como se viessem do shell (benchmarks, testes)."""
+        self.session.feed(data)
+        self._schedule_frame()
+
+    def send_text(self, text: str):
+        """Escreve no shell como se fosse escrito no teclado."""
+        if self.session.running:
+            self.session.write(text.encode())
+
+    def paste_text(self, text: str):
+        """Cola texto; com 'bracketed paste' ativo (readline), as linhas não são executadas uma a uma."""
+        text = text.replace("\r\n", "\n").replace("\n", "\r")
+        if self.session.screen.bracketed_paste:
+            text = "\x1b[200~" + text.replace("\x1b[201~", "") + "\x1b[201~"
+        self.send_text(text)
+
+    def flush_output(self):
+        """Redesenha já: as linhas alteradas ou, se houve deslocamento, toda a vista."""
+        self._flush_timer.stop()
+        screen = self.session.screen
+        scrollback = self.session.scrollback
+        damaged, scrolled, full = screen.take_damage()
+        painted_length, painted_dropped = self._painted_scrollback
+        dropped = scrollback.dropped_lines - painted_dropped
+        self._painted_scrollback = (len(scrollback), scrollback.dropped_lines)
+        if full or scrolled or dropped or len(scrollback) != painted_length or not self._follow_output:
+            self._update_scrollbars(dropped=dropped)
+            self.viewport().update()
+        else:
+            damaged.add(screen.cursor_row)
+            damaged.add(self._painted_cursor_row)
+            line_height = self._line_height()
+            offset = len(scrollback) - self.verticalScrollBar().value()
+            width = self.viewport().width()
+            for row in damaged:
+                self.viewport().update(QRect(0, (offset + row) * line_height, width, line_height))
+        self._painted_cursor_row = screen.cursor_row
+
+    def plain_text(self) -> str:
+        """Todo o texto guardado (histórico + ecrã, sem linhas vazias no fim)."""
+        scrollback = self.session.scrollback
+        screen = self.session.screen
+        lines = scrollback.text_range(0, len(scrollback))
+        lines.extend(screen.line_text(row).rstrip() for row in range(screen.rows))
+        while lines and not lines[-1]:
+            lines.pop()
+        return "\n".join(lines)
+
+    def selected_text(self) -> str:
+        selection = self._normalized_selection()
+        if selection is None:
+            return ""
+        (start_line, start_col), (end_line, end_col) = selection
+        parts = []
+        for absolute in range(start_line, end_line + 1):
+            text = self._row_text(absolute - self.session.scrollback.dropped_lines)
+            if text is None:
+                continue # Linha já descartada do histórico
+            first = start_col if absolute == start_line else 0
+            last = end_col if absolute == end_line else len(text)
+            parts.append(text[first:last])
+        return "\n".join(parts)
+
+    def copy(self):
+        text = self.selected_text()
+        if text:
+            QGuiApplication.clipboard().setText(text)
+
+    def close_session(self):
+        if self._notifier is not None:
+            self._notifier.setEnabled(False)
+        self.session.close()
+
+    # --- Ganchos para as subclasses ---
+
+    def _handle_command_started(self):
+        pass
+
+    def _handle_command_finished(self, record):
+        pass
+
+    def _handle_shell_output_text(self, text: str):
+        pass
+
+    def _handle_shell_finished(self, exit_code):
+        self.append_text(f"\nProcesso do shell terminado (Código: {exit_code}).\n", is_error=True)
+
+    # --- Eventos ---
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        modifiers = event.modifiers()
+        control = modifiers & Qt.KeyboardModifier.ControlModifier
+        shift = modifiers & Qt.KeyboardModifier.ShiftModifier
+        scroll_bar = self.verticalScrollBar()
+
+        if (control and shift and key == Qt.Key.Key_C) or (event.matches(QKeySequence.StandardKey.Copy) and self._normalized_selection()):
+            self.copy() # Ctrl+C só copia se houver seleção; senão vai para o shell (interromper)
+            return
+        if (control and shift and key == Qt.Key.Key_V) or (shift and key == Qt.Key.Key_Insert):
+            if self.input_enabled:
+                self.paste_text(QGuiApplication.clipboard().text())
+            return
+        if shift and key in (Qt.Key.Key_PageUp, Qt.Key.Key_PageDown):
+            scroll_bar.triggerAction(scroll_bar.SliderAction.SliderPageStepSub if key == Qt.Key.Key_PageUp
+                                     else scroll_bar.SliderAction.SliderPageStepAdd)
+            return
+
+        if not self.input_enabled:
+            # Terminal só de leitura: as teclas servem apenas para navegar
+            if key in (Qt.Key.Key_Up, Qt.Key.Key_PageUp):
+                scroll_bar.triggerAction(scroll_bar.SliderAction.SliderSingleStepSub if key == Qt.Key.Key_Up
+                                         else scroll_bar.SliderAction.SliderPageStepSub)
+            elif key in (Qt.Key.Key_Down, Qt.Key.Key_PageDown):
+                scroll_bar.triggerAction(scroll_bar.SliderAction.SliderSingleStepAdd if key == Qt.Key.Key_Down
+                                         else scroll_bar.SliderAction.SliderPageStepAdd)
+            elif key == Qt.Key.Key_Home:
+                scroll_bar.setValue(scroll_bar.minimum())
+            elif key == Qt.Key.Key_End:
+                scroll_bar.setValue(scroll_bar.maximum())
+            return
+
+        data = self._key_to_text(event)
+        if data is None:
+            super().keyPressEvent(event)
+            return
+        self._selection_anchor = self._selection_end = None
+        self._follow_output = True # Escrever volta a mostrar o fim, como num terminal real
+        self._update_scrollbars()
+        self.send_text(data)
+
+    def focusNextPrevChild(self, next):
+        # Tab pertence ao shell (completar), não à navegação entre widgets
+        return False if self.input_enabled else super().focusNextPrevChild(next)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._selection_anchor = self._selection_end = self._position_at(event.position().toPoint())
+            self.viewport().update()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._selection_anchor is not None and event.buttons() & Qt.MouseButton.LeftButton:
+            self._selection_end = self._position_at(event.position().toPoint())
+            self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        rows, cols = self._grid_size()
+        screen = self.session.screen
+        if (rows, cols) != (screen.rows, screen.cols):
+            self.session.resize(rows, cols)
+        self._update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def closeEvent(self, event):
+        self.close_session()
+        super().closeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        rect = event.rect()
+        painter.fillRect(rect, self._background)
+        ascent = self.fontMetrics().ascent()
+        line_height = self._line_height()
+        char_width = self._char_width()
+        scrollback = self.session.scrollback
+        screen = self.session.screen
+        first_row = self.verticalScrollBar().value()
+        selection = self._normalized_selection()
+
+        first_view_row = max(0, rect.top() // line_height)
+        last_view_row = rect.bottom() // line_height
+        for view_row in range(first_view_row, last_view_row + 1):
+            row = first_row + view_row
+            y = view_row * line_height
+            if row < len(scrollback):
+                text = scrollback.line(row)[0]
+                painter.setFont(self.font())
+                painter.setPen(self._foreground)
+                painter.drawText(TEXT_MARGIN, y + ascent, text[:screen.cols])
+            elif row - len(scrollback) < screen.rows:
+                text = self._paint_screen_row(painter, row - len(scrollback), y, ascent, char_width, line_height)
+            else:
+                break
+            if selection is not None:
+                self._paint_selection(painter, row, text, selection, y, char_width, line_height)
+
+        cursor_view_row = len(scrollback) + screen.cursor_row - first_row
+        if self.input_enabled and screen.cursor_visible and first_view_row <= cursor_view_row <= last_view_row:
+            cursor_x = TEXT_MARGIN + screen.cursor_col * char_width
+            cursor_y = cursor_view_row * line_height
+            if self.hasFocus():
+                painter.fillRect(cursor_x, cursor_y, char_width, line_height, self._foreground)
+                character = screen.lines[screen.cursor_row][screen.cursor_col]
+                if character.strip():
+                    painter.setFont(self.font())
+                    painter.setPen(self._background)
+                    painter.drawText(cursor_x, cursor_y + ascent, character)
+            else:
+                painter.setPen(self._foreground)
+                painter.drawRect(cursor_x, cursor_y, char_width - 1, line_height - 1)
+
+    # --- Interno ---
+
+    def _read_shell_output(self):
+        deadline = time.monotonic() + READ_BUDGET_SECONDS
+        while True:
+            try:
+                result = self.session.read_available(READ_BATCH_BYTES)
+            except OSError as e:
+                print(f"Erro ao ler do terminal: {e}")
+                result = None
+            if result is None:
+                self._notifier.setEnabled(False)
+                exit_code = self.session.wait(timeout=1)
+                self.session.close()
+                self._handle_shell_finished(exit_code)
+                break
+            if not result or time.monotonic() >= deadline:
+                break # O resto fica para a próxima ativação, depois dos outros eventos
+        self._schedule_frame()
+
+    def _schedule_frame(self):
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _paint_screen_row(self, painter, screen_row: int, y: int, ascent: int, char_width: int, line_height: int) -> str:
+        screen = self.session.screen
+        runs = screen.line_runs(screen_row)
+        for index, (col, text, attr) in enumerate(runs):
+            cells = (runs[index + 1][0] if index + 1 < len(runs) else screen.cols) - col
+            fg, bg, flags = attr
+            if flags & BOLD and 0 <= fg < 8:
+                fg += 8 # Negrito com as cores brilhantes, como no xterm
+            foreground = self._color(fg, self._foreground)
+            background = self._color(bg, None)
+            if flags & REVERSE:
+                foreground, background = background or self._background, foreground
+            x = TEXT_MARGIN + col * char_width
+            if background is not None:
+                painter.fillRect(x, y, cells * char_width, line_height, background)
+            if flags & HIDDEN or not text.strip():
+                continue
+            if flags & DIM:
+                foreground = QColor(foreground)
+                foreground.setAlpha(150)
+            painter.setFont(self._font_for(flags))
+            painter.setPen(foreground)
+            painter.drawText(x, y + ascent, text)
+        return screen.line_text(screen_row)
+
+    def _color(self, value: int, default):
+        if value == DEFAULT_COLOR:
+            return default
+        color = self._color_cache.get(value)
+        if color is None:
+            if value & TRUECOLOR:
+                color = QColor((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF)
+            else:
+                color = QColor(_palette_color(value))
+            self._color_cache[value] = color
+        return color
+
+    def _font_for(self, flags: int) -> QFont:
+        key = flags & (BOLD | ITALIC | UNDERLINE | STRIKE)
+        font = self._fonts.get(key)
+        if font is None:
+            font = QFont(self.font())
+            font.setBold(bool(key & BOLD))
+            font.setItalic(bool(key & ITALIC))
+            font.setUnderline(bool(key & UNDERLINE))
+            font.setStrikeOut(bool(key & STRIKE))
+            self._fonts[key] = font
+        return font
+
+    def _key_to_text(self, event):
+        key = event.key()
+        modifiers = event.modifiers()
+        sequences = _KEY_SEQUENCES.get(key)
+        if sequences is not None:
+            return sequences[1 if self.session.screen.application_cursor_keys else 0]
+        text = event.text()
+        if modifiers & Qt.KeyboardModifier.ControlModifier:
+            if Qt.Key.Key_A <= key <= Qt.Key.Key_Z:
+                return chr(key - Qt.Key.Key_A + 1) # Ctrl+C -> \x03, Ctrl+D -> \x04...
+            if key == Qt.Key.Key_Space:
+                return "\x00"
+            if text and ord(text[0]) < 32:
+                return text # Ctrl+[ , Ctrl+\ ... já vêm traduzidos pelo Qt
+        if not text:
+            return None
+        if modifiers & Qt.KeyboardModifier.AltModifier:
+            return "\x1b" + text # Meta: prefixo ESC (readline: Alt+B, Alt+F...)
+        return text
+
+    def _row_text(self, row: int):
+        scrollback = self.session.scrollback
+        if 0 <= row < len(scrollback):
+            return scrollback.line(row)[0]
+        screen_row = row - len(scrollback)
+        if 0 <= screen_row < self.session.screen.rows:
+            return self.session.screen.line_text(screen_row).rstrip()
+        return None
+
+    def _char_width(self) -> int:
+        return max(1, self.fontMetrics().horizontalAdvance("M"))
+
+    def _line_height(self) -> int:
+        return max(1, self.fontMetrics().height())
+
+    def _visible_rows(self) -> int:
+        return max(1, self.viewport().height() // self._line_height())
+
+    def _grid_size(self):
+        cols = (self.viewport().width() - 2 * TEXT_MARGIN) // self._char_width()
+        return self._visible_rows(), max(2, cols)
+
+    def _on_vertical_scroll(self, value: int):
+        self._follow_output = value >= self.verticalScrollBar().maximum()
+        self.viewport().update()
+
+    def _update_scrollbars(self, dropped: int = 0):
+        follow = self._follow_output
+        rows = len(self.session.scrollback) + self.session.screen.rows
+        page = self._visible_rows()
+        v_bar = self.verticalScrollBar()
+        value = v_bar.value()
+        v_bar.blockSignals(True)
+        v_bar.setPageStep(page)
+        v_bar.setRange(0, max(0, rows - page))
+        if follow:
+            v_bar.setValue(v_bar.maximum())
+        else:
+            # Linhas descartadas no início: manter à vista o mesmo conteúdo
+            v_bar.setValue(max(0, value - dropped))
+        v_bar.blockSignals(False)
+        self._follow_output = follow
+
+    def _position_at(self, point: QPoint):
+        row = self.verticalScrollBar().value() + max(0, point.y()) // self._line_height()
+        row = min(row, len(self.session.scrollback) + self.session.screen.rows - 1)
+        col = (point.x() - TEXT_MARGIN + self._char_width() // 2) // self._char_width()
+        return self.session.scrollback.dropped_lines + row, max(0, col)
+
+    def _normalized_selection(self):
+        if self._selection_anchor is None or self._selection_end is None or self._selection_anchor == self._selection_end:
+            return None
+        return tuple(sorted((self._selection_anchor, self._selection_end)))
+
+    def _paint_selection(self, painter, row, text, selection, y, char_width, line_height):
+        (start_line, start_col), (end_line, end_col) = selection
+        absolute = self.session.scrollback.dropped_lines + row
+        if not start_line <= absolute <= end_line:
+            return
+        first = start_col if absolute == start_line else 0
+        last = end_col if absolute == end_line else len(text.rstrip()) + 1
+        if last > first:
+            painter.fillRect(TEXT_MARGIN + first * char_width, y, (last - first) * char_width, line_height, self._selection_color)
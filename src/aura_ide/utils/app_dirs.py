@@ -0,0 +1,12 @@
+import os
+
+
+def get_cache_dir() -> str:
+    """
+    Diretório de cache do Aura IDE ($XDG_CACHE_HOME/aura_ide ou ~/.cache/aura_ide),
+    criado se ainda não existir.
+    """
+    base_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    cache_dir = os.path.join(base_dir, "aura_ide")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
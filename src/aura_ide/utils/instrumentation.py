@@ -0,0 +1,293 @@
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+# Instrumentação do IDE: contadores, histogramas (percentis das amostras mais recentes),
+# intervalos de tempo (spans) exportáveis como trace do Chrome/Perfetto ou OTLP/JSON, e um
+# registo estruturado de eventos (JSON lines). Pensada para ficar sempre ligada: registar uma
+# amostra ou um intervalo é guardar um tuplo num deque limitado, sem I/O nem formatação; o
+# trabalho (ordenar, percentis, JSON) só acontece quando alguém lê ou exporta.
+# Este módulo não usa o Qt (ver ui/widgets/performance_panel.py e core/event_loop_probe.py).
+
+DEFAULT_HISTOGRAM_SAMPLES = 1024 # Amostras mais recentes guardadas por histograma (para os percentis)
+MAX_TRACE_SPANS = 20000 # Intervalos guardados para exportação; os mais antigos saem primeiro
+MAX_LOG_EVENTS = 500 # Eventos estruturados guardados em memória (o arquivo de registo tem todos)
+TRACE_FORMAT_CHROME = "chrome"
+TRACE_FORMAT_OTLP = "otlp"
+TRACE_FORMATS = (TRACE_FORMAT_CHROME, TRACE_FORMAT_OTLP)
+SERVICE_NAME = "aura_ide"
+
+
+class Counter:
+    """Total que só cresce (bytes lidos, tokens...). A taxa por segundo calcula-se ao ler."""
+    __slots__ = ("name", "unit", "value", "_lock")
+
+    def __init__(self, name: str, unit: str = ""):
+        self.name = name
+        self.unit = unit
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def reset(self):
+        with self._lock:
+            self.value = 0
+
+
+class Histogram:
+    """Distribuição de uma medida: total de amostras, soma e máximo, mais as N mais recentes."""
+
+    def __init__(self, name: str, unit: str = "ms", samples: int = DEFAULT_HISTOGRAM_SAMPLES):
+        self.name = name
+        self.unit = unit
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+        self._recent = deque(maxlen=samples)
+
+    def observe(self, value: float):
+        # deque.append é atómico; count/total/max podem perder uma amostra entre threads, o que
+        # não muda os percentis e evita um lock no caminho quente
+        self._recent.append(value)
+        self.count += 1
+        self.total += value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def reset(self):
+        self._recent.clear()
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+
+    def snapshot(self) -> dict:
+        """{count, mean, p50, p90, p99, max, unit}; os percentis são das amostras mais recentes."""
+        recent = sorted(self._recent)
+        if not recent:
+            return {"count": 0, "mean": None, "p50": None, "p90": None, "p99": None, "max": None, "unit": self.unit}
+
+        def percentile(fraction: float) -> float:
+            return recent[min(len(recent) - 1, int(fraction * len(recent)))]
+
+        return {"count": self.count, "mean": self.total / self.count, "p50": percentile(0.5),
+                "p90": percentile(0.9), "p99": percentile(0.99), "max": self.max, "unit": self.unit}
+
+
+class _Span:
+    """Intervalo aberto por Instrumentation.span (uma classe e não @contextmanager: custa metade)."""
+    __slots__ = ("_instruments", "_name", "_category", "_attributes", "_span_id", "_parent_id", "_stack", "_started")
+
+    def __init__(self, instruments, name: str, category: str, attributes: dict):
+        self._instruments = instruments
+        self._name = name
+        self._category = category
+        self._attributes = attributes
+        self._stack = None
+
+    def __enter__(self) -> dict:
+        instruments = self._instruments
+        if instruments.enabled:
+            stack = getattr(instruments._local, "stack", None)
+            if stack is None:
+                stack = instruments._local.stack = []
+            self._span_id = next(instruments._span_ids)
+            self._parent_id = stack[-1] if stack else None
+            stack.append(self._span_id)
+            self._stack = stack
+            self._started = time.perf_counter_ns()
+        return self._attributes
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self._stack is None:
+            return False
+        ended = time.perf_counter_ns()
+        self._stack.pop()
+        if exc_type is not None:
+            self._attributes["error"] = exc_type.__name__
+        self._instruments._add_span(self._name, self._category, self._started, ended, self._attributes, self._span_id, self._parent_id)
+        return False
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)} # int64 vai como texto no OTLP/JSON
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Instrumentation:
+    """
+    Registo de métricas e intervalos do processo (ver `instruments`, a instância partilhada).
+
+    Os nomes seguem "área.medida" (ai.request, terminal.bytes, file.open...). Um intervalo
+    fechado com `span()` ou `record_span()` também é uma amostra (em ms) do histograma com o
+    mesmo nome. Pode ser usado de qualquer thread.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.trace_id = uuid.uuid4().hex # Um trace por sessão do IDE (OTLP)
+        self.origin_ns = time.perf_counter_ns()
+        self._unix_offset_ns = time.time_ns() - self.origin_ns
+        self._counters = {}
+        self._histograms = {}
+        self._registry_lock = threading.Lock()
+        # (nome, categoria, início_ns, fim_ns, id_da_thread, nome_da_thread, atributos, id, id_do_pai)
+        self._spans = deque(maxlen=MAX_TRACE_SPANS)
+        self._span_ids = itertools.count(1)
+        self._local = threading.local() # Pilha de spans abertos por thread (pais no OTLP)
+        self._events = deque(maxlen=MAX_LOG_EVENTS)
+        self._log_file = None
+        self._log_lock = threading.Lock()
+
+    # --- Métricas ---
+
+    def counter(self, name: str, unit: str = "") -> Counter:
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._registry_lock:
+                counter = self._counters.setdefault(name, Counter(name, unit))
+        return counter
+
+    def histogram(self, name: str, unit: str = "ms") -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._registry_lock:
+                histogram = self._histograms.setdefault(name, Histogram(name, unit))
+        return histogram
+
+    def observe(self, name: str, value: float, unit: str = "ms"):
+        if self.enabled:
+            self.histogram(name, unit).observe(value)
+
+    def metrics(self) -> dict:
+        """{"counters": {nome: {value, unit}}, "histograms": {nome: snapshot}}, por nome."""
+        return {
+            "counters": {name: {"value": counter.value, "unit": counter.unit} for name, counter in sorted(self._counters.items())},
+            "histograms": {name: histogram.snapshot() for name, histogram in sorted(self._histograms.items())},
+        }
+
+    def reset(self):
+        """Esquece as métricas, os intervalos e os eventos (não fecha o arquivo de registo)."""
+        # Zera em vez de esquecer: os módulos guardam referências aos seus contadores e histogramas
+        with self._registry_lock:
+            for counter in self._counters.values():
+                counter.reset()
+            for histogram in self._histograms.values():
+                histogram.reset()
+        self._spans.clear()
+        self._events.clear()
+
+    # --- Intervalos ---
+
+    def span(self, name: str, category: str = "aura", **attributes) -> "_Span":
+        """Mede o bloco `with`; `attributes` (e o que o bloco lhes juntar) vão para o trace."""
+        return _Span(self, name, category, attributes)
+
+    def now_ns(self) -> int:
+        """Relógio dos intervalos (para `record_span` de operações assíncronas)."""
+        return time.perf_counter_ns()
+
+    def record_span(self, name: str, started_ns: int, ended_ns: int = None, category: str = "aura", **attributes):
+        """Regista um intervalo medido fora de um bloco `with` (p.ex. entre dois sinais)."""
+        if self.enabled:
+            self._add_span(name, category, started_ns, ended_ns if ended_ns is not None else time.perf_counter_ns(),
+                           attributes, next(self._span_ids), None)
+
+    def _add_span(self, name, category, started, ended, attributes, span_id, parent_id):
+        thread = threading.current_thread()
+        self._spans.append((name, category, started, ended, thread.ident, thread.name, attributes, span_id, parent_id))
+        self.histogram(name).observe((ended - started) / 1e6)
+
+    def spans(self) -> list:
+        return list(self._spans)
+
+    # --- Registo estruturado ---
+
+    def set_log_file(self, path: str = None):
+        """Passa a acrescentar cada evento (uma linha JSON) a `path`; None para parar."""
+        with self._log_lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+            if path:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._log_file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def log(self, event: str, level: str = "info", **fields):
+        """Evento estruturado: fica em memória (recent_events) e vai para o arquivo de registo."""
+        if not self.enabled:
+            return
+        record = {"ts": time.time(), "event": event, "level": level, "thread": threading.current_thread().name}
+        record.update(fields)
+        self._events.append(record)
+        if self._log_file is not None:
+            line = json.dumps(record, ensure_ascii=False, default=str)
+            with self._log_lock:
+                if self._log_file is not None:
+                    self._log_file.write(line + "\n")
+
+    def recent_events(self, limit: int = MAX_LOG_EVENTS) -> list:
+        return list(self._events)[-limit:]
+
+    # --- Exportação ---
+
+    def export(self, path: str, trace_format: str = TRACE_FORMAT_CHROME) -> int:
+        """Grava os intervalos em `path` (chrome ou otlp); devolve quantos foram gravados."""
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(f"Formato de trace desconhecido: {trace_format} (use {' ou '.join(TRACE_FORMATS)})")
+        spans = self.spans()
+        document = self._chrome_trace(spans) if trace_format == TRACE_FORMAT_CHROME else self._otlp_trace(spans)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, default=str)
+        os.replace(temporary_path, path)
+        return len(spans)
+
+    def _chrome_trace(self, spans: list) -> dict:
+        # Trace Event Format (chrome://tracing, ui.perfetto.dev): eventos "X" em microssegundos
+        pid = os.getpid()
+        thread_names = {}
+        events = []
+        for name, category, started, ended, thread_id, thread_name, attributes, _, _ in spans:
+            thread_names[thread_id] = thread_name
+            events.append({"name": name, "cat": category, "ph": "X", "pid": pid, "tid": thread_id,
+                           "ts": (started - self.origin_ns) / 1000, "dur": (ended - started) / 1000, "args": attributes})
+        events.extend({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id, "args": {"name": thread_name}}
+                      for thread_id, thread_name in thread_names.items())
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"service": SERVICE_NAME, "metrics": self.metrics()}}
+
+    def _otlp_trace(self, spans: list) -> dict:
+        # OTLP/JSON (o corpo de um POST /v1/traces), para importar num coletor OpenTelemetry
+        otlp_spans = []
+        for name, category, started, ended, thread_id, thread_name, attributes, span_id, parent_id in spans:
+            span = {
+                "traceId": self.trace_id, "spanId": f"{span_id:016x}", "name": name, "kind": 1,
+                "startTimeUnixNano": str(started + self._unix_offset_ns), "endTimeUnixNano": str(ended + self._unix_offset_ns),
+                "attributes": [{"key": key, "value": _otlp_value(value)}
+                               for key, value in dict(attributes, category=category, **{"thread.name": thread_name}).items()],
+            }
+            if parent_id is not None:
+                span["parentSpanId"] = f"{parent_id:016x}"
+            otlp_spans.append(span)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                                        {"key": "process.pid", "value": {"intValue": str(os.getpid())}}]},
+            "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": otlp_spans}],
+        }]}
+
+
+# A do processo
+instruments = Instrumentation()
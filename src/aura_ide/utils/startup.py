@@ -0,0 +1,61 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from aura_ide.utils.instrumentation import instruments
+
+
+class StartupTimeline:
+    """
+    Linha do tempo do arranque do IDE: intervalos (importações, janela, shells, provedores...)
+    e marcos (primeira pintura, pronto), em ms desde a criação da linha do tempo. Pode ser
+    usada de qualquer thread. Os intervalos também vão para o trace da instrumentação
+    (categoria "startup"). Para o detalhe das importações: `python -X importtime run.py`.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = [] # (nome, início, fim, thread), em segundos desde origin
+        self.marks = {} # nome -> segundos desde origin
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.origin) * 1000
+
+    @contextmanager
+    def span(self, name: str):
+        started_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            ended_ns = time.perf_counter_ns()
+            self.spans.append((name, started_ns / 1e9 - self.origin, ended_ns / 1e9 - self.origin, threading.current_thread().name))
+            instruments.record_span(f"startup.{name}", started_ns, ended_ns, category="startup")
+
+    def mark(self, name: str):
+        """Regista um marco (só o primeiro de cada nome conta)."""
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.origin
+            instruments.log("startup.mark", mark=name, ms=round(self.marks[name] * 1000, 1))
+
+    def mark_ms(self, name: str):
+        """Milissegundos do marco `name`, ou None se ainda não aconteceu."""
+        seconds = self.marks.get(name)
+        return round(seconds * 1000, 1) if seconds is not None else None
+
+    def to_dict(self) -> dict:
+        return {
+            "marks": {name: round(seconds * 1000, 1) for name, seconds in sorted(self.marks.items(), key=lambda item: item[1])},
+            "spans": [{"name": name, "start_ms": round(start * 1000, 1), "ms": round((end - start) * 1000, 1), "thread": thread}
+                      for name, start, end, thread in sorted(self.spans, key=lambda span: span[1])],
+        }
+
+    def report(self) -> list:
+        """Linhas de texto, por ordem de início, para o chat ou a consola."""
+        events = [(start, f"{start * 1000:8.1f} ms  {name} ({(end - start) * 1000:.1f} ms{'' if thread == 'MainThread' else ', ' + thread})")
+                  for name, start, end, thread in self.spans]
+        events += [(seconds, f"{seconds * 1000:8.1f} ms  * {name}") for name, seconds in self.marks.items()]
+        return [line for _, line in sorted(events, key=lambda event: event[0])]
+
+
+# A do processo: criada na primeira importação deste módulo (aura_ide.main importa-o antes do Qt)
+startup_timeline = StartupTimeline()